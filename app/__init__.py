@@ -30,9 +30,18 @@ def create_app(config=None):
     }.get(config_type, DevelopmentConfig)
     app.config.from_object(config)
 
+    # Configure logging once, queued off the request threads
+    from .logs import app_logging  # pylint: disable=C0415
+    app_logging.init_app(app)
+
     # Initialize Flask extensions
     db.init_app(app)
     Migrate(app, db)
+    from .blackjack.store import game_store  # pylint: disable=C0415
+    game_store.init_app(app)
+    # Record settled hands, written to the database in batches
+    from .blackjack.history import hand_history  # pylint: disable=C0415
+    hand_history.init_app(app)
     # Removed Redis session initialization
     # if app.config.get('SESSION_TYPE') == 'redis':
     #     Session(app)
@@ -41,4 +50,16 @@ def create_app(config=None):
     from .blackjack import blackjack_bp  # pylint: disable=C0415
     app.register_blueprint(blackjack_bp, url_prefix='/blackjack')
 
+    # Push live tables over WebSockets when LIVE_TABLES_PORT is set
+    from .blackjack.live import live_tables  # pylint: disable=C0415
+    live_tables.init_app(app)
+
+    # Time the blackjack requests and serve /metrics
+    from .metrics import metrics  # pylint: disable=C0415
+    metrics.init_app(app)
+
+    # Profile a sample of the blackjack requests when PROFILE_SAMPLE_RATE is set
+    from .profiling import profiler  # pylint: disable=C0415
+    profiler.init_app(app)
+
     return app
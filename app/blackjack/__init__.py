@@ -1,4 +1,5 @@
 # app.blackjack
 
-from .models import Game, Dealer, Player, Deck, Card
+from .models import Game, Dealer, Player, Deck, Shoe, Card
+from .strategy import Action, StrategyTable, get_strategy
 from .routes import blackjack_bp
@@ -0,0 +1,245 @@
+"""blackjack/advice.py
+
+This module computes composition-dependent expected values for the player's
+options, as an alternative to the static chart behind
+Game.determine_best_move.
+
+For the current hand, dealer up-card and the cards the player has not seen
+(the shoe plus the dealer's hole card), it returns the expected value, in
+units of the current bet, of standing, hitting, doubling down, surrendering
+and splitting. Player draws are weighted by the exact remaining composition.
+The dealer's distribution is computed once per query from the current
+composition (see probability.dealer_probabilities) and reused for every
+player draw, and after TRACKED_DRAWS player draws further cards are drawn
+from a fixed composition. Both effects are far below a hundredth of a bet
+and keep a query within a few milliseconds.
+
+The rules are a Rules object, by default the rules of Game: the dealer does
+not peek, so a dealer blackjack is settled as a 21 and beats a doubled hand,
+a two-card 21 is stood on like any other 21, and pairs are played by their
+total. Rules.naturals and Rules.splits give the casino game with a peek, a
+natural paid at once and splits.
+
+Results are cached per (hand, up-card, composition, rules), so asking again
+without any card being dealt is a dictionary lookup.
+
+Functions:
+    hand_evs: Expected value of each legal action for a hand.
+    advise: Advice for the current hand of a Game.
+    cache_info: Hit and miss statistics of the result cache.
+"""
+
+from functools import lru_cache
+
+from .probability import (
+    BLACKJACK,
+    BUST,
+    MASK,
+    SHIFTS,
+    UNITS,
+    VALUES,
+    composition_key,
+    dealer_probabilities,
+    shoe_counts,
+    value_index,
+)
+from .simulation import Rules
+
+ACTIONS = ("stand", "hit", "double", "surrender", "split")
+CACHE_SIZE = 4096
+TRACKED_DRAWS = 3
+
+
+def _best_total(hard, has_ace):
+    """Return the best total of a hand."""
+    return hard + 10 if has_ace and hard <= 11 else hard
+
+
+def _stand_table(dealer):
+    """Return the expected value of standing on every total from 0 to 21.
+
+    A dealer blackjack that no peek has ruled out counts as a 21, since Game
+    compares totals only.
+    """
+    finals = dealer[:BUST - 1] + (dealer[BUST - 1] + dealer[BLACKJACK],)
+    table = []
+    for total in range(22):
+        ev = dealer[BUST]
+        for final, dealer_total in zip(finals, range(17, 22)):
+            if total > dealer_total:
+                ev += final
+            elif total < dealer_total:
+                ev -= final
+        table.append(ev)
+    return table
+
+
+class _Evaluator:
+    """Expected values for one query: a fixed dealer distribution and shoe."""
+
+    def __init__(self, stand, rules):
+        self.stand = stand
+        self.rules = rules
+        self.memo = {}
+
+    def draws(self, key, remaining, depth=0):
+        """Yield (composition index, probability, key after the draw).
+
+        Past TRACKED_DRAWS draws the composition is no longer reduced.
+        """
+        tracked = depth < TRACKED_DRAWS
+        for index in range(len(VALUES)):
+            count = (key >> SHIFTS[index]) & MASK
+            if count:
+                yield index, count / remaining, key - UNITS[index] if tracked else key
+
+    def stand_ev(self, hard, has_ace):
+        """Expected value of standing."""
+        total = _best_total(hard, has_ace)
+        return -1.0 if total > 21 else self.stand[total]
+
+    def hit_ev(self, hard, has_ace, key, remaining, depth=0):
+        """Expected value of hitting once and then playing on optimally."""
+        memo_key = (hard, has_ace, key)
+        ev = self.memo.get(memo_key)
+        if ev is not None:
+            return ev
+        ev = 0.0
+        left = remaining - 1 if depth < TRACKED_DRAWS else remaining
+        for index, probability, after in self.draws(key, remaining, depth):
+            new_hard = hard + index + 1
+            new_ace = has_ace or index == 0
+            total = _best_total(new_hard, new_ace)
+            if total > 21:
+                ev -= probability
+            elif total == 21:
+                ev += probability * self.stand[21]
+            else:
+                ev += probability * max(
+                    self.stand[total],
+                    self.hit_ev(new_hard, new_ace, after, left, depth + 1),
+                )
+        self.memo[memo_key] = ev
+        return ev
+
+    def double_ev(self, hard, has_ace, key, remaining):
+        """Expected value of doubling down: one card, twice the bet."""
+        ev = 0.0
+        for index, probability, _ in self.draws(key, remaining, TRACKED_DRAWS):
+            ev += probability * self.stand_ev(hard + index + 1, has_ace or index == 0)
+        return 2 * ev
+
+    def split_ev(self, value_index_, key, remaining):
+        """Expected value of splitting a pair, for both hands, without resplits."""
+        card = value_index_ + 1
+        aces = value_index_ == 0
+        ev = 0.0
+        for index, probability, after in self.draws(key, remaining):
+            hard = card + index + 1
+            has_ace = aces or index == 0
+            if aces:  # Split aces receive one card each
+                hand_ev = self.stand_ev(hard, has_ace)
+            else:
+                hand_ev = max(
+                    self.stand_ev(hard, has_ace),
+                    self.hit_ev(hard, has_ace, after, remaining - 1, 1),
+                )
+                if self.rules.double_after_split:
+                    hand_ev = max(hand_ev, self.double_ev(hard, has_ace, after, remaining - 1))
+            ev += probability * hand_ev
+        return 2 * ev
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _hand_evs(values, up_value, key, rules):
+    """Cached body of hand_evs; values is a sorted tuple of card values."""
+    counts = tuple((key >> shift) & MASK for shift in SHIFTS)
+    remaining = sum(counts)
+    aces = sum(1 for value in values if value in (1, 11))
+    hard = sum(1 if value in (1, 11) else value for value in values)
+    has_ace = aces > 0
+    two_cards = len(values) == 2
+
+    if rules.naturals and two_cards and _best_total(hard, has_ace) == 21:
+        # A natural is paid unless the dealer also has one, which the peek
+        # has already ruled out by the time the player acts
+        return (("stand", rules.blackjack_payout),)
+
+    dealer = dealer_probabilities(up_value, counts, peek=rules.naturals)
+    evaluator = _Evaluator(_stand_table(dealer), rules)
+    if _best_total(hard, has_ace) == 21:
+        return (("stand", evaluator.stand_ev(hard, has_ace)),)
+    evs = [
+        ("stand", evaluator.stand_ev(hard, has_ace)),
+        ("hit", evaluator.hit_ev(hard, has_ace, key, remaining)),
+    ]
+    if two_cards:
+        evs.append(("double", evaluator.double_ev(hard, has_ace, key, remaining)))
+        if rules.surrender:
+            evs.append(("surrender", -0.5))
+        if rules.splits and value_index(values[0]) == value_index(values[1]):
+            evs.append(("split", evaluator.split_ev(value_index(values[0]), key, remaining)))
+    return tuple(evs)
+
+
+def hand_evs(player_values, up_value, counts, rules=None):
+    """
+    Compute the expected value of each legal action for a hand.
+
+    Args:
+        player_values (list): The values of the player's cards (aces as 11
+            or 1).
+        up_value (int): The value of the dealer's up-card.
+        counts (tuple): The composition of the cards the player has not seen,
+            ace first and ten-valued cards last.
+        rules (Rules): The table rules, defaults to Rules(), those of Game.
+
+    Returns:
+        dict: Expected value in units of the bet, keyed by action name.
+    """
+    values = tuple(sorted(11 if value == 1 else value for value in player_values))
+    key = composition_key(counts)
+    return dict(_hand_evs(values, up_value, key, rules or Rules()))
+
+
+def advise(game, rules=None, seat=0):
+    """
+    Compute advice for a seat's current hand in a game.
+
+    The composition is what the player has not seen: the cards left in the
+    shoe plus the dealer's hole card.
+
+    Args:
+        game (Game): The game in progress.
+        rules (Rules): The table rules, defaults to Rules(), those of Game.
+        seat (int): The seat to advise.
+
+    Returns:
+        dict: The expected values by action, the best action and the chart's
+            move under the same rules, ready to be returned as JSON.
+
+    Raises:
+        ValueError: If the seat does not exist or no round is in progress.
+    """
+    rules = rules or Rules()
+    player, dealer = game.get_seat(seat), game.dealer
+    if len(player.hand) < 2 or not dealer.hand:
+        raise ValueError("No hand in progress")
+    up_card = dealer.hand[0]
+    counts = list(shoe_counts(game.deck))
+    for card in dealer.hand[1:]:
+        counts[value_index(card.value)] += 1
+    evs = hand_evs([card.value for card in player.hand], up_card.value, counts, rules)
+    return {
+        "hand": [repr(card) for card in player.hand],
+        "total": player.total,
+        "dealer_up": repr(up_card),
+        "ev": evs,
+        "best": max(evs, key=evs.get),
+        "chart": game.determine_best_move(player.hand, up_card, allow_split=rules.splits),
+    }
+
+
+def cache_info():
+    """Return the lru_cache statistics of the result cache."""
+    return _hand_evs.cache_info()
@@ -0,0 +1,252 @@
+"""blackjack/bankroll.py
+
+This module estimates the risk of ruin of a bankroll with NumPy.
+
+Rather than settling Player objects one round at a time, it evolves many
+bankroll paths at once as arrays: every round, one outcome per live path is
+drawn from the per-round outcome distribution, multiplied by the bet the
+betting policy sets for that path's bankroll, and added to it. A path is
+ruined once its bankroll falls below the table minimum, so the next bet can
+no longer be placed, and it then stops playing. Only the paths still alive
+are carried forward.
+
+Outcomes are in units of the initial bet, as in the round simulator, and
+include doubles and splits, so a path can lose more than its bet in a
+round; a bankroll never goes below zero.
+
+Classes:
+    OutcomeDistribution: The probability of each net result of one round.
+    BettingPolicy: The bet for a bankroll, within the table limits.
+    RuinResult: Ruin probability, time to ruin, drawdowns and final
+      bankrolls of a run.
+
+Functions:
+    simulate_bankrolls: Evolves bankroll paths and summarizes them.
+"""
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .simulation import Rules, SimulationResult, Simulator
+
+QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class OutcomeDistribution:
+    """
+    The probability of each net result of one round, in initial-bet units.
+
+    Attributes:
+        values (ndarray): The distinct results, ascending.
+        probabilities (ndarray): The probability of each result.
+    """
+
+    def __init__(self, values, probabilities):
+        values = np.asarray(values, dtype=np.float64)
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        if values.shape != probabilities.shape or not values.size:
+            raise ValueError("An outcome distribution needs one probability per value")
+        if (probabilities < 0).any() or not np.isclose(probabilities.sum(), 1.0):
+            raise ValueError("Outcome probabilities must be non-negative and add up to 1")
+        order = np.argsort(values)
+        self.values = values[order]
+        self.probabilities = probabilities[order] / probabilities.sum()
+        self._cumulative = np.cumsum(self.probabilities)
+        self._cumulative[-1] = 1.0
+
+    @classmethod
+    def from_counts(cls, counts):
+        """
+        Build a distribution from observed results.
+
+        Args:
+            counts (dict): The number of rounds with each net result.
+
+        Returns:
+            OutcomeDistribution: The observed frequencies.
+        """
+        values = np.fromiter(counts.keys(), dtype=np.float64, count=len(counts))
+        frequencies = np.fromiter(counts.values(), dtype=np.float64, count=len(counts))
+        return cls(values, frequencies / frequencies.sum())
+
+    @classmethod
+    def from_simulation(cls, rounds, seed=None, rules=None):
+        """
+        Measure the distribution with the round simulator.
+
+        The rounds are played at flat bets of one unit; bet sizing is up to
+        the betting policy. At a table with several seats the result is the
+        net of the whole table, so use one seat for one player's bankroll.
+
+        Args:
+            rounds (int): The number of rounds to play.
+            seed (int): Optional seed for a reproducible measurement.
+            rules (Rules): The table rules; a bet ramp is ignored.
+
+        Returns:
+            OutcomeDistribution: The observed frequencies.
+        """
+        simulator = Simulator(rules=rules or Rules(), seed=seed)
+        play_round = simulator.play_table_round
+        result = SimulationResult(seats=simulator.rules.seats)
+        counts = {}
+        for _ in range(rounds):
+            outcome = play_round(result)
+            counts[outcome] = counts.get(outcome, 0) + 1
+        return cls.from_counts(counts)
+
+    @property
+    def mean(self):
+        """float: The expected result of a round."""
+        return float(self.values @ self.probabilities)
+
+    @property
+    def std(self):
+        """float: The standard deviation of the result of a round."""
+        return float(np.sqrt(((self.values - self.mean) ** 2) @ self.probabilities))
+
+    def sample(self, rng, size):
+        """Draw results for size rounds with a NumPy Generator."""
+        return self.values[np.searchsorted(self._cumulative, rng.random(size), side="right")]
+
+
+@dataclass(frozen=True)
+class BettingPolicy:
+    """
+    The bet for a bankroll, within the table limits.
+
+    The bet is unit, or fraction of the bankroll when fraction is set,
+    rounded down to whole chips of table_min and kept between the table
+    limits, and never more than the bankroll.
+
+    Attributes:
+        unit (float): The flat bet.
+        table_min (float): The smallest bet the table takes.
+        table_max (float): The largest bet the table takes.
+        fraction (float): Bet this fraction of the bankroll instead of a
+            flat unit, as in Kelly betting; None for flat bets.
+    """
+    unit: float = 10.0
+    table_min: float = 10.0
+    table_max: float = 500.0
+    fraction: float = None
+
+    def __post_init__(self):
+        if not 0 < self.table_min <= self.table_max:
+            raise ValueError("Table limits must satisfy 0 < table_min <= table_max")
+        if self.fraction is not None and not 0 < self.fraction <= 1:
+            raise ValueError(f"The betting fraction must be in (0, 1], not {self.fraction}")
+
+    def bets(self, bankrolls):
+        """Return the bet for each bankroll in an array."""
+        if self.fraction is None:
+            return np.minimum(bankrolls, min(max(self.unit, self.table_min), self.table_max))
+        bets = bankrolls * (self.fraction / self.table_min)
+        np.floor(bets, out=bets)
+        bets *= self.table_min
+        np.maximum(bets, self.table_min, out=bets)
+        np.minimum(bets, self.table_max, out=bets)
+        return np.minimum(bets, bankrolls, out=bets)
+
+
+@dataclass
+class RuinResult:
+    """
+    Ruin probability, time to ruin, drawdowns and final bankrolls of a run.
+
+    Quantiles are keyed by their fraction as text, e.g. '0.99'.
+
+    Attributes:
+        paths (int): The number of bankroll paths.
+        rounds (int): The rounds each surviving path played.
+        bankroll (float): The starting bankroll.
+        ruined (int): The paths ruined within the rounds.
+        time_to_ruin (dict): Quantiles of the round in which ruined paths
+            were ruined, and their mean as 'mean'.
+        max_drawdown (dict): Quantiles over all paths of the largest fall
+            from a peak bankroll.
+        final_bankroll (dict): Quantiles of the final bankroll, 0 for ruined
+            paths, and their mean as 'mean'.
+    """
+    paths: int
+    rounds: int
+    bankroll: float
+    ruined: int
+    time_to_ruin: dict = field(default_factory=dict)
+    max_drawdown: dict = field(default_factory=dict)
+    final_bankroll: dict = field(default_factory=dict)
+
+    @property
+    def ruin_probability(self):
+        """float: The fraction of paths ruined."""
+        return self.ruined / self.paths if self.paths else 0.0
+
+    def to_dict(self):
+        """Return the result plus the ruin probability as a dictionary."""
+        return {**self.__dict__, "ruin_probability": self.ruin_probability}
+
+
+def _quantiles(values, mean=False):
+    """Return the standard quantiles of an array, and optionally its mean."""
+    if not values.size:
+        return {}
+    summary = {str(q): float(v) for q, v in zip(QUANTILES, np.quantile(values, QUANTILES))}
+    if mean:
+        summary["mean"] = float(values.mean())
+    return summary
+
+
+def simulate_bankrolls(distribution, policy, bankroll, rounds, paths=100_000, seed=None):
+    """
+    Evolve bankroll paths and summarize ruin, drawdowns and final bankrolls.
+
+    Args:
+        distribution (OutcomeDistribution): The result of one round at a
+            bet of one unit.
+        policy (BettingPolicy): How much each path bets.
+        bankroll (float): The starting bankroll of every path.
+        rounds (int): The number of rounds to play.
+        paths (int): The number of bankroll paths.
+        seed (int): Optional seed for a reproducible run.
+
+    Returns:
+        RuinResult: The summary of the run.
+    """
+    rng = np.random.default_rng(seed)
+    ruined_at = np.full(paths, -1, dtype=np.int64)
+    drawdown = np.zeros(paths)
+    final = np.zeros(paths)
+    # The live paths, compacted: their indices, bankrolls, peaks and drawdowns
+    index = np.arange(paths)
+    live = np.full(paths, float(bankroll))
+    peak = live.copy()
+    fall = np.zeros(paths)
+    if bankroll < policy.table_min:
+        ruined_at[:] = 0
+        index = index[:0]
+    for current in range(1, rounds + 1):
+        if not index.size:
+            break
+        live += policy.bets(live) * distribution.sample(rng, index.size)
+        np.maximum(live, 0.0, out=live)
+        np.maximum(peak, live, out=peak)
+        np.maximum(fall, peak - live, out=fall)
+        broke = live < policy.table_min
+        if broke.any():
+            ruined_at[index[broke]] = current
+            drawdown[index[broke]] = fall[broke]
+            keep = ~broke
+            index, live, peak, fall = index[keep], live[keep], peak[keep], fall[keep]
+    drawdown[index] = fall[:index.size]
+    final[index] = live[:index.size]
+    times = ruined_at[ruined_at >= 0]
+    return RuinResult(
+        paths=paths,
+        rounds=rounds,
+        bankroll=float(bankroll),
+        ruined=int(times.size),
+        time_to_ruin=_quantiles(times.astype(np.float64), mean=True),
+        max_drawdown=_quantiles(drawdown),
+        final_bankroll=_quantiles(final, mean=True),
+    )
@@ -0,0 +1,267 @@
+"""blackjack/chart.py
+
+This module derives the basic strategy chart from expected values instead of
+maintaining it by hand.
+
+Each cell of the chart (a player hand against a dealer up-card) is decided by
+the expected values from advice.hand_evs, computed for a representative hand
+against a full shoe with the player's cards and the up-card removed. The
+chart is written both as app/data/blackjack_strategy.csv, the file compiled
+by StrategyTable, and as app/data/strategy.json, grouped by action.
+
+Cell expected values do not depend on the payout, surrender or
+double-after-split rules (both split variants are computed), only on the
+number of decks. They are stored in an on-disk cache keyed by deck count,
+hand and up-card, so regenerating the chart for another rule set reads the
+cache and only a new deck count computes cells again. Missing cells are
+computed across a process pool.
+
+Functions:
+    chart_hands: The chart rows and their representative hands.
+    cell_evs: Expected values of one chart cell.
+    cell_code: The chart code of a cell for a rule set.
+    generate_chart: Computes the chart for a rule set.
+    write_csv: Writes a chart in the format of blackjack_strategy.csv.
+    write_json: Writes a chart in the format of strategy.json.
+"""
+
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+
+from .advice import hand_evs
+from .probability import full_shoe_counts, value_index
+from .simulation import Rules
+from .strategy import DEALER_COLUMNS, STRATEGY_FILE
+
+DATA_DIR = os.path.dirname(STRATEGY_FILE)
+JSON_FILE = os.path.join(DATA_DIR, "strategy.json")
+CACHE_FILE = os.path.join(DATA_DIR, ".chart_cache.json")
+
+# Bump when the expected value engine changes so cached cells are recomputed
+ENGINE_VERSION = 1
+
+# Cells are charted for the casino game, in which the dealer peeks for a
+# natural and pairs may be split; Game follows the chart with pairs played
+# by their total
+CELL_RULES = Rules(naturals=True, splits=True, surrender=False)
+
+# Dealer up-card values in column order
+UP_VALUES = (2, 3, 4, 5, 6, 7, 8, 9, 10, 11)
+
+# Hard totals below 12 without a pair
+LOW_HANDS = {5: (3, 2), 6: (4, 2), 7: (5, 2), 8: (6, 2), 9: (6, 3), 10: (6, 4), 11: (6, 5)}
+
+# strategy.json groups hands by action under these names
+JSON_ACTIONS = {
+    "H": "hit",
+    "S": "stand",
+    "Sp": "split",
+    "DH": "double_down_hit",
+    "DS": "double_down_stand",
+    "PH": "double_down_hit_after_split",
+    "RH": "surrender_or_hit",
+}
+
+
+def chart_hands():
+    """
+    Return the chart rows with a representative hand for each.
+
+    Hard totals use two different cards where possible (three cards for hard
+    20 and 21), soft totals an ace and one card, and pairs two equal cards.
+
+    Returns:
+        list: (row key, card values) tuples in chart order, keyed like the
+            CSV ('16', 'a7', 'dT', 'aa').
+    """
+    rows = []
+    for total in range(5, 22):
+        if total <= 11:
+            cards = LOW_HANDS[total]
+        elif total <= 19:
+            cards = (10, total - 10)
+        else:
+            cards = (10, 6, total - 16)
+        rows.append((str(total), cards))
+    for other in range(2, 10):
+        rows.append((f"a{other}", (11, other)))
+    for value in range(2, 11):
+        rows.append(("dT" if value == 10 else f"d{value}", (value, value)))
+    rows.append(("aa", (11, 11)))
+    return rows
+
+
+def cell_evs(cards, up_value, decks):
+    """
+    Compute the expected values of one chart cell.
+
+    Args:
+        cards (tuple): The player's card values.
+        up_value (int): The dealer's up-card value.
+        decks (int): The number of decks in a full shoe.
+
+    Returns:
+        dict: Expected values of stand, hit, double (two cards only) and, for
+            pairs, split with and without doubling after the split.
+    """
+    counts = list(full_shoe_counts(decks))
+    for value in cards + (up_value,):
+        counts[value_index(value)] -= 1
+    evs = hand_evs(cards, up_value, counts, CELL_RULES)
+    if "split" in evs:
+        no_das = hand_evs(cards, up_value, counts, replace(CELL_RULES, double_after_split=False))
+        evs["split_no_das"] = no_das["split"]
+    return evs
+
+
+def cell_code(evs, rules):
+    """
+    Choose the chart code of a cell.
+
+    Args:
+        evs (dict): The expected values from cell_evs.
+        rules (Rules): The table rules.
+
+    Returns:
+        str: One of the codes in strategy.config.
+    """
+    stand, hit = evs["stand"], evs.get("hit", -2.0)
+    double = evs.get("double", -2.0)
+    best = max(stand, hit, double)
+    if rules.surrender and best < -0.5:
+        code, best = "RH", -0.5
+    elif double == best:
+        code = "DH" if hit >= stand else "DS"
+    else:
+        code = "H" if hit > stand else "S"
+
+    if "split" in evs:
+        split = evs["split"] if rules.double_after_split else evs["split_no_das"]
+        if split > best:
+            das_only = rules.double_after_split and evs["split_no_das"] <= best
+            code = "PH" if das_only else "Sp"
+    return code
+
+
+def _cell_key(decks, cards, up_value):
+    """Return the cache key of a cell."""
+    return f"{ENGINE_VERSION}/{decks}/{'-'.join(map(str, cards))}/{up_value}"
+
+
+def _compute_cells(task):
+    """Compute a batch of cells; task is (decks, [(key, cards, up_value)])."""
+    decks, cells = task
+    return [(key, cell_evs(cards, up_value, decks)) for key, cards, up_value in cells]
+
+
+def _load_cache(path):
+    """Read the cell cache, or return an empty one."""
+    if path is None or not os.path.exists(path):
+        return {}
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_cache(path, cache):
+    """Write the cell cache atomically."""
+    temp = f"{path}.tmp"
+    with open(temp, "w", encoding="utf-8") as file:
+        json.dump(cache, file, sort_keys=True)
+    os.replace(temp, path)
+
+
+def generate_chart(rules=None, workers=1, cache_path=CACHE_FILE):
+    """
+    Compute the basic strategy chart for a rule set.
+
+    Args:
+        rules (Rules): The table rules, defaults to Rules(). A deck count of
+            0 (a fresh deck every round) is charted as a single deck.
+        workers (int): Number of worker processes for cells missing from the
+            cache; 0 or None uses every core and 1 computes in this process.
+        cache_path (str): The on-disk cell cache, or None to disable it.
+
+    Returns:
+        tuple: The chart as a dictionary of row key to {dealer column: code}
+            in chart order, and the number of cells that were computed.
+    """
+    rules = rules or Rules()
+    decks = max(rules.decks, 1)
+    workers = workers or os.cpu_count() or 1
+    cache = _load_cache(cache_path)
+    hands = chart_hands()
+
+    missing = [
+        (_cell_key(decks, cards, up), cards, up)
+        for _, cards in hands
+        for up in UP_VALUES
+        if _cell_key(decks, cards, up) not in cache
+    ]
+    if missing:
+        batches = [(decks, missing[index::workers]) for index in range(workers)]
+        batches = [batch for batch in batches if batch[1]]
+        if len(batches) == 1:
+            results = map(_compute_cells, batches)
+        else:
+            with ProcessPoolExecutor(max_workers=len(batches)) as pool:
+                results = list(pool.map(_compute_cells, batches))
+        for batch in results:
+            cache.update(batch)
+        if cache_path is not None:
+            _save_cache(cache_path, cache)
+
+    chart = {}
+    for row, cards in hands:
+        chart[row] = {
+            column: cell_code(cache[_cell_key(decks, cards, up)], rules)
+            for column, up in zip(DEALER_COLUMNS, UP_VALUES)
+        }
+    return chart, len(missing)
+
+
+def write_csv(chart, path=STRATEGY_FILE):
+    """Write a chart in the format of blackjack_strategy.csv."""
+    with open(path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file, lineterminator="\n")
+        writer.writerow(["my_hand"] + [f"'{column}'" for column in DEALER_COLUMNS])
+        for row, cells in chart.items():
+            writer.writerow([row] + [cells[column] for column in DEALER_COLUMNS])
+
+
+def _json_hand(row):
+    """Return the strategy.json name of a chart row: 16, 'A7', 'D10' or 'AA'."""
+    if row == "aa":
+        return "AA"
+    if row[0] == "a":
+        return f"A{row[1:]}"
+    if row[0] == "d":
+        return "D10" if row == "dT" else f"D{row[1:]}"
+    return int(row)
+
+
+def write_json(chart, path=JSON_FILE):
+    """Write a chart in the format of strategy.json, hands grouped by action."""
+    groups = {
+        name: {column: [] for column in DEALER_COLUMNS}
+        for name in JSON_ACTIONS.values()
+    }
+    for row, cells in chart.items():
+        for column, code in cells.items():
+            groups[JSON_ACTIONS[code]][column].append(_json_hand(row))
+
+    lines = ["{"]
+    for group_index, (name, columns) in enumerate(groups.items()):
+        lines.append(f'  "{name}": {{')
+        for column_index, (column, hands) in enumerate(columns.items()):
+            comma = "," if column_index < len(columns) - 1 else ""
+            lines.append(f'    "{column}": {json.dumps(hands)}{comma}')
+        lines.append("  }," if group_index < len(groups) - 1 else "  }")
+    lines.append("}")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("\n".join(lines) + "\n")
@@ -0,0 +1,264 @@
+"""blackjack/codec.py
+
+This module packs a Game into a few dozen bytes for the session and rebuilds
+it on the next request.
+
+A shoe that was filled by Shoe.shuffle is stored as its seed and shuffle
+count, from which the card order is regenerated, plus the deal position and
+cut card. The discard tray is not stored either: it holds exactly the cards
+dealt since the shuffle that are no longer on the table. Hands are stored as
+card codes, one byte per card, seat by seat, each followed by the letters
+of the actions the seat has taken this round. The strategy table is never
+stored; decoded games share the process-wide table from get_strategy.
+
+A shoe that cannot be regenerated from its seed (after reshuffle_discards,
+or with cards placed by hand) is stored with its card codes and discard tray
+packed as bytes instead, which is still far smaller than the objects.
+
+Every encoding starts with its format version. decode_game also reads
+version 2, written before seats kept their actions, and version 1, the
+single-seat format written before tables had seats, so games already in the
+store keep loading; it rejects any other version rather than guessing.
+
+Functions:
+    encode_game: Packs a Game into bytes.
+    decode_game: Rebuilds a Game from bytes.
+"""
+
+import struct
+from array import array
+from functools import lru_cache
+
+from .models import CARDS, Dealer, Game, Player, Shoe
+from .strategy import get_strategy
+
+FORMAT_VERSION = 3
+
+# version, flags, decks, penetration, seed, shuffles, position, cut, discarded,
+# seats, turn
+_HEADER = struct.Struct("<BBBdqIHHHBB")
+# bankroll, current bet, result
+_SEAT = struct.Struct("<ddB")
+# Version 1: as above but with the one seat's bankroll and current bet in
+# place of the seat count and turn
+_HEADER_V1 = struct.Struct("<BBBdqIHHHdd")
+_LENGTH = struct.Struct("<H")
+
+# Seat results by their stored code
+RESULTS = (None, "win", "lose", "draw", "surrender")
+_RESULT_CODES = {result: code for code, result in enumerate(RESULTS)}
+
+# Flag bits
+PACKED_SHOE = 1
+
+ORDER_CACHE_SIZE = 256
+
+
+@lru_cache(maxsize=ORDER_CACHE_SIZE)
+def _shoe_order(num_decks, seed, shuffle_index):
+    """Cached Shoe.order as immutable bytes."""
+    return Shoe.order(num_decks, seed, shuffle_index).tobytes()
+
+
+def _tray_from_deals(shoe, hands):
+    """
+    Rebuild the discard tray of a regenerated shoe.
+
+    Args:
+        shoe (Shoe): The shoe, with codes and position restored.
+        hands (list): The card codes of every hand on the table.
+
+    Returns:
+        bytearray: The dealt codes not on the table, in dealing order, or
+            None if the hands hold cards that were not dealt from the shoe.
+    """
+    tray = bytearray(shoe.codes[:shoe.position])
+    try:
+        for code in hands:
+            tray.remove(code)
+    except ValueError:
+        return None
+    return tray
+
+
+def _is_regenerable(shoe, hands):
+    """Return whether the shoe can be stored as its seed and shuffle count."""
+    if not shoe.shuffles or not 0 <= shoe.seed < 1 << 63:
+        return False
+    if shoe.codes.tobytes() != _shoe_order(shoe.num_decks, shoe.seed, shoe.shuffles - 1):
+        return False
+    tray = _tray_from_deals(shoe, hands)
+    if tray is None or len(tray) != shoe.discarded:
+        return False
+    return sorted(tray) == sorted(shoe.discards[:shoe.discarded])
+
+
+def _pack_codes(codes):
+    """Return a length-prefixed run of card codes."""
+    return _LENGTH.pack(len(codes)) + bytes(codes)
+
+
+def encode_game(game):
+    """
+    Pack a game into bytes for the session.
+
+    Args:
+        game (Game): The game to encode.
+
+    Returns:
+        bytes: The encoded game, typically 60-70 bytes for one seat and about
+            30 more per extra seat.
+
+    Raises:
+        ValueError: If the shoe's seed is not an integer.
+    """
+    shoe, dealer = game.deck, game.dealer
+    if not isinstance(shoe.seed, int):
+        raise ValueError("Only games with an integer seed can be encoded")
+    seat_codes = [[card.code for card in player.hand] for player in game.seats]
+    dealer_codes = [card.code for card in dealer.hand]
+    packed = not _is_regenerable(shoe, sum(seat_codes, dealer_codes))
+
+    parts = [
+        _HEADER.pack(
+            FORMAT_VERSION, PACKED_SHOE if packed else 0, shoe.num_decks,
+            shoe.penetration, shoe.seed, shoe.shuffles, shoe.position, shoe.cut,
+            shoe.discarded, len(game.seats), game.turn,
+        ),
+    ]
+    for player, result, codes, actions in zip(game.seats, game.results, seat_codes,
+                                              game.actions):
+        name = player.name.encode("utf-8")
+        actions = actions.encode("ascii")
+        parts.append(_SEAT.pack(player.bankroll, player.current_bet, _RESULT_CODES[result]))
+        parts.append(bytes([len(name)]))
+        parts.append(name)
+        parts.append(bytes([len(codes)]))
+        parts.append(bytes(codes))
+        parts.append(bytes([len(actions)]))
+        parts.append(actions)
+    parts.append(bytes([len(dealer_codes)]))
+    parts.append(bytes(dealer_codes))
+    if packed:
+        parts.append(_pack_codes(shoe.codes))
+        parts.append(_pack_codes(shoe.discards[:shoe.discarded]))
+    return b"".join(parts)
+
+
+def _number(value):
+    """Return a stored amount as an int when it is whole."""
+    return int(value) if value.is_integer() else value
+
+
+def _read_run(data, offset):
+    """Return a run with a one-byte length prefix and the offset after it."""
+    length = data[offset]
+    run = data[offset + 1:offset + 1 + length]
+    if len(run) != length:
+        raise IndexError("Run past the end of the data")
+    return run, offset + 1 + length
+
+
+def _read_seats(data):
+    """
+    Read the header and seats of any supported format version.
+
+    Returns:
+        tuple: (shoe fields, seats, turn, offset) where seats is a list of
+            (name, bankroll, current bet, result, hand codes, actions).
+    """
+    if data[0] == 1:
+        (_, *shoe_fields, bankroll, current_bet) = _HEADER_V1.unpack_from(data)
+        name, offset = _read_run(data, _HEADER_V1.size)
+        codes, offset = _read_run(data, offset)
+        return shoe_fields, [(name, bankroll, current_bet, 0, codes, b"")], 0, offset
+    (_, *shoe_fields, count, turn) = _HEADER.unpack_from(data)
+    offset = _HEADER.size
+    seats = []
+    for _ in range(count):
+        bankroll, current_bet, result = _SEAT.unpack_from(data, offset)
+        name, offset = _read_run(data, offset + _SEAT.size)
+        codes, offset = _read_run(data, offset)
+        actions = b""
+        if data[0] >= 3:
+            actions, offset = _read_run(data, offset)
+        seats.append((name, bankroll, current_bet, result, codes, actions))
+    return shoe_fields, seats, turn, offset
+
+
+def decode_game(data):
+    """
+    Rebuild a game from the bytes made by encode_game.
+
+    Args:
+        data (bytes): The encoded game, in the current format or an
+            earlier supported version.
+
+    Returns:
+        Game: The game, sharing the process-wide strategy table.
+
+    Raises:
+        ValueError: If the data is truncated, corrupt or of another version.
+    """
+    if not data or data[0] not in (1, 2, FORMAT_VERSION):
+        raise ValueError("Unsupported game state version")
+    try:
+        shoe_fields, seats, turn, offset = _read_seats(data)
+        (flags, num_decks, penetration, seed, shuffles, position, cut,
+         discarded) = shoe_fields
+        dealer_codes, offset = _read_run(data, offset)
+        if flags & PACKED_SHOE:
+            packed = []
+            for _ in range(2):
+                (length,) = _LENGTH.unpack_from(data, offset)
+                packed.append(data[offset + 2:offset + 2 + length])
+                offset += 2 + length
+            codes, tray = packed
+        else:
+            codes, tray = _shoe_order(num_decks, seed, shuffles - 1), None
+    except (IndexError, struct.error) as e:
+        raise ValueError("Truncated game state") from e
+    hands = b"".join(seat[4] for seat in seats) + dealer_codes
+    if (offset != len(data) or not 1 <= len(seats) <= Game.MAX_SEATS
+            or turn > len(seats) or max(hands + codes, default=0) >= len(CARDS)
+            or any(seat[3] >= len(RESULTS) for seat in seats)):
+        raise ValueError("Corrupt game state")
+
+    # The shoe is restored field by field rather than through __init__, which
+    # would shuffle a shoe only to overwrite it
+    shoe = Shoe.__new__(Shoe)
+    shoe.num_decks = num_decks
+    shoe.penetration = penetration
+    shoe.seed = seed
+    shoe.shuffles = shuffles
+    shoe.codes = array("B", codes)
+    shoe.position = position
+    shoe.cut = cut
+    shoe.discards = array("B", bytes(max(num_decks * 52, len(codes))))
+    if tray is None:
+        tray = _tray_from_deals(shoe, hands)
+        if tray is None or len(tray) != discarded:
+            raise ValueError("Corrupt game state")
+    shoe.discards[:len(tray)] = array("B", tray)
+    shoe.discarded = discarded
+
+    game = Game.__new__(Game)
+    game.deck = shoe
+    game.seats = []
+    game.results = []
+    game.actions = []
+    for name, bankroll, current_bet, result, player_codes, actions in seats:
+        player = Player(name.decode("utf-8"), _number(bankroll))
+        player.current_bet = _number(current_bet)
+        player.hand = [CARDS[code] for code in player_codes]
+        game.seats.append(player)
+        game.results.append(RESULTS[result])
+        game.actions.append(actions.decode("ascii"))
+    game.turn = turn
+    game.dealer = Dealer()
+    game.dealer.hand = [CARDS[code] for code in dealer_codes]
+    game.strategy = get_strategy()
+    game.version = None
+    game.counters = {}
+    game.history = []
+    return game
@@ -0,0 +1,400 @@
+"""blackjack/columnar.py
+
+This module stores the result of every seat round of a simulation run as
+columns of memory-mapped NumPy files, for runs too large for Python lists.
+
+A run is written to a directory holding one .npy file per column and a
+checkpoint. Each seat round becomes one row of fixed-width values:
+
+    outcome (uint8): An index into OUTCOMES.
+    net (float32): The seat's net result in initial-bet units, including
+        splits, doubles and the bet ramp's bet.
+    hand (uint8): The strategy table row of the seat's first two cards, a
+        pair row for pairs; strategy.hand_key turns it into '16', 'a7' or
+        'd8'.
+    up (uint8): The dealer's up-card value, 2-11.
+    count (float32): The betting count of the shoe before the round, under
+        the run's counting system or Hi-Lo: the true count of a balanced
+        system and the running count of KO, the count a bet ramp bets on;
+        0 with a fresh deck per round.
+
+The files are created at the full size of the run and filled chunk by chunk
+in order, chunk i holding rows i * chunk_rounds * seats onwards, so only
+the chunk being copied in is ever held in memory. Chunks are
+the seeded chunks of simulation.simulate: their net results add up to
+simulate's with the same seed and chunk size. After each chunk the files are
+flushed and the checkpoint records how many chunks are complete and the
+merged tallies, so an interrupted run resumes at the next chunk with the
+same seed and writes exactly what an uninterrupted run would.
+
+ColumnStore reads a run back. Its aggregates are computed BLOCK_ROWS rows at
+a time from the memory maps, so only a block is ever in memory.
+
+Classes:
+    ColumnSummary: Aggregates of a columnar run.
+    ColumnStore: Reads the columns of a run.
+
+Functions:
+    write_columns: Plays a run, or resumes one, into a column directory.
+
+Attributes:
+    OUTCOMES (tuple): The outcome names by code.
+    COLUMNS (dict): The NumPy dtype of each column.
+"""
+
+import json
+import math
+import os
+import random
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+
+from .counting import DEFAULT_SYSTEM, CardCounter
+from .simulation import CHUNK_ROUNDS, Rules, SimulationResult, Simulator, chunk_seed
+from .strategy import DEALER_COLUMNS, NUM_CLASSES, PAIR_BASE, get_strategy, hand_class, hand_key
+
+OUTCOMES = ("loss", "push", "win", "blackjack", "surrender")
+LOSS, PUSH, WIN, BLACKJACK, SURRENDER = range(len(OUTCOMES))
+COLUMNS = {
+    "outcome": np.uint8,
+    "net": np.float32,
+    "hand": np.uint8,
+    "up": np.uint8,
+    "count": np.float32,
+}
+# The typecode of the array each column is collected in while a chunk plays
+_TYPECODES = {"outcome": "B", "net": "f", "hand": "B", "up": "B", "count": "f"}
+
+CHECKPOINT = "checkpoint.json"
+FORMAT_VERSION = 2
+BLOCK_ROWS = 1 << 20
+# Counts are summarized in whole-count buckets from -COUNT_RANGE to
+# +COUNT_RANGE, counts beyond the range falling into the end buckets
+COUNT_RANGE = 10
+
+
+def _hand_row(first, second):
+    """Return the strategy table row of two card values, a pair row for pairs."""
+    if first == second:
+        return PAIR_BASE + first
+    return hand_class(Simulator.hand_total(first, second), 11 in (first, second))
+
+
+class _SeatRows:
+    """A Simulator.play_table_round sink that keeps each seat's row of a round."""
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        self.rows = []
+
+    def __call__(self, first, second, up, hands, net):
+        if hands is None:  # Settled by a natural
+            outcome = BLACKJACK if net > 0 else PUSH if net == 0 else LOSS
+        elif hands[0][1] == 0:  # Only an unsplit hand can surrender
+            outcome = SURRENDER
+        else:
+            outcome = WIN if net > 0 else LOSS if net < 0 else PUSH
+        self.rows.append((outcome, net, _hand_row(first, second), up))
+
+
+def _play_chunk_columns(task):
+    """
+    Play one chunk of a run, in a worker process, and collect its columns.
+
+    Returns:
+        tuple: (SimulationResult, dict of column name to ndarray).
+    """
+    rounds, seed, rules, strategy = task
+    simulator = Simulator(strategy=strategy, rules=rules, seed=seed)
+    counter = simulator.counter
+    if counter is None and simulator.shoe is not None:
+        counter = CardCounter(simulator.shoe, DEFAULT_SYSTEM)
+    ramp = rules.bet_ramp
+    result = SimulationResult(seats=rules.seats)
+    outcomes, nets, hands, ups, counts = (array(_TYPECODES[name]) for name in COLUMNS)
+    sink = _SeatRows()
+
+    total = squares = 0.0
+    start = time.perf_counter()
+    for _ in range(rounds):
+        simulator.start_round()  # Shuffle first, so the count is that of the bet
+        count = counter.betting_count if counter is not None else 0.0
+        bet = ramp.units(count) if ramp is not None else 1
+        wagered = result.wagered_units
+        table = 0.0
+        simulator.play_table_round(result, sink)
+        for outcome, net, hand, up in sink.rows:
+            net *= bet
+            table += net
+            outcomes.append(outcome)
+            nets.append(net)
+            hands.append(hand)
+            ups.append(up)
+            counts.append(count)
+        sink.rows.clear()
+        if bet != 1:
+            result.wagered_units = wagered + (result.wagered_units - wagered) * bet
+        total += table
+        squares += table * table
+    result.elapsed += time.perf_counter() - start
+    result.rounds += rounds
+    result.net_units += total
+    result.net_squares += squares
+    simulator.collect_decisions(result)
+    columns = {name: np.frombuffer(values, dtype=dtype) for (name, dtype), values
+               in zip(COLUMNS.items(), (outcomes, nets, hands, ups, counts))}
+    return result, columns
+
+
+def _rules_dict(rules):
+    """Return the rules as they are stored in the checkpoint."""
+    return json.loads(json.dumps(asdict(rules)))
+
+
+def _save_checkpoint(path, checkpoint):
+    """Replace the checkpoint atomically, so a crash leaves the old one whole."""
+    target = os.path.join(path, CHECKPOINT)
+    with open(target + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(checkpoint, file)
+    os.replace(target + ".tmp", target)
+
+
+def _load_checkpoint(path):
+    """Return the checkpoint of a column directory, or None if there is none."""
+    try:
+        with open(os.path.join(path, CHECKPOINT), encoding="utf-8") as file:
+            checkpoint = json.load(file)
+    except FileNotFoundError:
+        return None
+    if checkpoint.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported column store version in {path}")
+    return checkpoint
+
+
+def write_columns(path, rounds, seed=None, rules=None, strategy=None, workers=1,
+                  chunk_rounds=CHUNK_ROUNDS, progress=None):
+    """
+    Play a run into a column directory, resuming it if it was interrupted.
+
+    If the directory holds the checkpoint of a run, that run is resumed at
+    its first unfinished chunk: rounds, rules and chunk_rounds must match
+    it, and seed must match it or be None. The strategy table is not
+    checked; resume with the table the run started with.
+
+    Args:
+        path (str): The directory of the column files, created if missing.
+        rounds (int): The number of rounds to play.
+        seed (int): Optional seed of the run, drawn at random when omitted.
+        rules (Rules): Optional table rules, defaults to Rules().
+        strategy (StrategyTable): Optional strategy table.
+        workers (int): Worker processes playing chunks, 0 for one per core.
+        chunk_rounds (int): Number of rounds per chunk and per checkpoint.
+        progress (callable): Optional function called with the number of
+            completed chunks and the total after each checkpoint.
+
+    Returns:
+        SimulationResult: The tallies of the whole run, including the chunks
+            played before a resume; elapsed is the playing time of all of them.
+
+    Raises:
+        ValueError: If rounds or chunk_rounds is not positive, or the
+            directory holds a different run.
+    """
+    if rounds <= 0 or chunk_rounds <= 0:
+        raise ValueError("rounds and chunk_rounds must be positive")
+    rules = rules or Rules()
+    strategy = strategy or get_strategy()
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(path, exist_ok=True)
+
+    checkpoint = _load_checkpoint(path)
+    run = {"rounds": rounds, "chunk_rounds": chunk_rounds, "rules": _rules_dict(rules)}
+    if checkpoint is None:
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(64)
+        checkpoint = {"version": FORMAT_VERSION, **run, "seed": seed, "seats": rules.seats,
+                      "chunks": 0, "rows": 0,
+                      "result": asdict(SimulationResult(seats=rules.seats, seed=seed))}
+        mode = "w+"
+    else:
+        if any(checkpoint[key] != value for key, value in run.items()) or (
+                seed is not None and seed != checkpoint["seed"]):
+            raise ValueError(f"{path} holds a different run; use another directory")
+        seed = checkpoint["seed"]
+        mode = "r+"
+
+    total_rows = rounds * rules.seats
+    files = {name: np.lib.format.open_memmap(os.path.join(path, f"{name}.npy"), mode=mode,
+                                             dtype=dtype, shape=(total_rows,))
+             for name, dtype in COLUMNS.items()}
+    if mode == "w+":
+        _save_checkpoint(path, checkpoint)
+
+    result = SimulationResult(**checkpoint["result"])
+    chunks = math.ceil(rounds / chunk_rounds)
+    tasks = [(min(chunk_rounds, rounds - index * chunk_rounds), chunk_seed(seed, index),
+              rules, strategy) for index in range(checkpoint["chunks"], chunks)]
+    pool = None
+    if workers > 1 and len(tasks) > 1:
+        pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks)))
+    try:
+        played = pool.map(_play_chunk_columns, tasks) if pool else map(_play_chunk_columns, tasks)
+        for chunk, columns in played:
+            start = checkpoint["rows"]
+            for name, values in columns.items():
+                files[name][start:start + len(values)] = values
+                files[name].flush()
+            result.merge(chunk)
+            checkpoint["chunks"] += 1
+            checkpoint["rows"] = start + len(columns["net"])
+            checkpoint["result"] = asdict(result)
+            _save_checkpoint(path, checkpoint)
+            if progress is not None:
+                progress(checkpoint["chunks"], chunks)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+        for values in files.values():
+            values.flush()
+        del files
+    return result
+
+
+@dataclass
+class ColumnSummary:
+    """
+    Aggregates of a columnar run, per seat round.
+
+    Attributes:
+        rows (int): Seat rounds read.
+        outcomes (dict): Seat rounds by outcome name.
+        net_units (float): Net result in initial-bet units.
+        net_squares (float): Sum of the squared per-seat-round results.
+        by_count (dict): {count: {'rows', 'net_units', 'ev'}} with the
+            betting count floored and clipped to +/-COUNT_RANGE.
+        by_cell (dict): {'hand/dealer': {'rows', 'net_units', 'ev'}} per
+            initial strategy cell, e.g. '16/T'.
+    """
+    rows: int = 0
+    outcomes: dict = field(default_factory=dict)
+    net_units: float = 0.0
+    net_squares: float = 0.0
+    by_count: dict = field(default_factory=dict)
+    by_cell: dict = field(default_factory=dict)
+
+    @property
+    def ev(self):
+        """float: The mean result of a seat round in initial-bet units."""
+        return self.net_units / self.rows if self.rows else 0.0
+
+    @property
+    def std_error(self):
+        """float: The standard error of ev, taking seat rounds as independent."""
+        if self.rows < 2:
+            return 0.0
+        variance = (self.net_squares / self.rows - self.ev ** 2) * self.rows / (self.rows - 1)
+        return math.sqrt(max(variance, 0.0) / self.rows)
+
+    def to_dict(self):
+        """Return the aggregates plus ev and std_error as a dictionary."""
+        return {**asdict(self), "ev": self.ev, "std_error": self.std_error}
+
+
+class ColumnStore:
+    """
+    Reads the columns of a run written by write_columns.
+
+    Only the rows of completed chunks are read, so a run can be read while
+    it is interrupted or still being written.
+
+    Attributes:
+        path (str): The column directory.
+        rows (int): The rows of completed chunks.
+        rounds (int): The rounds the run was started for.
+        seats (int): The seats at the table; row i is seat i % seats.
+        seed (int): The seed of the run.
+        complete (bool): Whether every chunk has been written.
+        columns (dict): Read-only memory maps of every column, by name,
+            holding the full size of the run.
+    """
+
+    def __init__(self, path):
+        checkpoint = _load_checkpoint(path)
+        if checkpoint is None:
+            raise ValueError(f"{path} holds no columnar run")
+        self.path = path
+        self.rows = checkpoint["rows"]
+        self.rounds = checkpoint["rounds"]
+        self.seats = checkpoint["seats"]
+        self.seed = checkpoint["seed"]
+        self.complete = self.rows == self.rounds * self.seats
+        self.columns = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+                        for name in COLUMNS}
+
+    def __len__(self):
+        return self.rows
+
+    def blocks(self, block_rows=BLOCK_ROWS):
+        """
+        Yield the completed rows a block at a time.
+
+        Args:
+            block_rows (int): The rows per block.
+
+        Yields:
+            dict: Column name to a memory-mapped slice of the block.
+        """
+        for start in range(0, self.rows, block_rows):
+            stop = min(start + block_rows, self.rows)
+            yield {name: values[start:stop] for name, values in self.columns.items()}
+
+    def aggregate(self, block_rows=BLOCK_ROWS):
+        """
+        Aggregate the completed rows, reading BLOCK_ROWS rows at a time.
+
+        Args:
+            block_rows (int): The rows read into memory at a time.
+
+        Returns:
+            ColumnSummary: Outcome counts, net result and EV by betting
+                count and by initial strategy cell.
+        """
+        outcomes = np.zeros(len(OUTCOMES), dtype=np.int64)
+        buckets = 2 * COUNT_RANGE + 1
+        count_rows = np.zeros(buckets, dtype=np.int64)
+        count_net = np.zeros(buckets)
+        cells = NUM_CLASSES * 12  # Up-card values 0-11, of which 2-11 are used
+        cell_rows = np.zeros(cells, dtype=np.int64)
+        cell_net = np.zeros(cells)
+        net_units = net_squares = 0.0
+        for block in self.blocks(block_rows):
+            net = block["net"].astype(np.float64)
+            net_units += net.sum()
+            net_squares += net @ net
+            outcomes += np.bincount(block["outcome"], minlength=len(OUTCOMES))
+            bucket = np.clip(np.floor(block["count"]), -COUNT_RANGE, COUNT_RANGE)
+            bucket = bucket.astype(np.intp) + COUNT_RANGE
+            count_rows += np.bincount(bucket, minlength=buckets)
+            count_net += np.bincount(bucket, weights=net, minlength=buckets)
+            cell = block["hand"].astype(np.intp) * 12 + block["up"]
+            cell_rows += np.bincount(cell, minlength=cells)
+            cell_net += np.bincount(cell, weights=net, minlength=cells)
+
+        def groups(rows, nets, key):
+            return {key(index): {"rows": int(rows[index]), "net_units": float(nets[index]),
+                                 "ev": float(nets[index] / rows[index])}
+                    for index in np.flatnonzero(rows)}
+
+        return ColumnSummary(
+            rows=self.rows,
+            outcomes=dict(zip(OUTCOMES, map(int, outcomes))),
+            net_units=float(net_units),
+            net_squares=float(net_squares),
+            by_count=groups(count_rows, count_net, lambda index: int(index) - COUNT_RANGE),
+            by_cell=groups(cell_rows, cell_net, lambda index: (
+                f"{hand_key(index // 12)}/{DEALER_COLUMNS[index % 12 - 2]}")),
+        )
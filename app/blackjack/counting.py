@@ -0,0 +1,288 @@
+"""blackjack/counting.py
+
+This module keeps card counts of a shoe up to date as cards are dealt.
+
+A CardCounter follows one Shoe under one counting system. It remembers how
+far into the shoe it has counted, so bringing it up to date only visits the
+cards dealt since, each exactly once: the running count, the cards left of
+each rank and the cards left in total are then read in O(1). Dealing itself
+is untouched, so games and simulations that do not count pay nothing. When
+the shoe has been shuffled since, including a mid-round reshuffle of the
+discards, the counter is rebuilt from the cards left to deal.
+
+The running count covers every card that is not left in the shoe, counted
+from the initial running count of the system. Balanced systems start at 0
+and are converted to a true count by dividing by the decks left; the
+unbalanced KO count starts at 4 - 4 x decks and is bet on directly.
+
+Classes:
+    CountingSystem: The tag of each rank in a counting system.
+    CardCounter: Incremental counts of a shoe under one system.
+    BetRamp: Bet sizes by count, in units for the simulator or placed
+        through Player.place_bet for a seat of a game.
+
+Attributes:
+    SYSTEMS (dict): The counting systems by name: 'hi-lo', 'ko', 'omega-ii'
+        and 'zen'.
+    DEFAULT_SYSTEM (str): The name of the system used when none is given.
+"""
+
+import math
+from array import array
+from dataclasses import dataclass
+
+from .models import RANKS
+
+
+@dataclass(frozen=True)
+class CountingSystem:
+    """
+    The tag of each rank in a counting system.
+
+    Attributes:
+        name (str): The name of the system.
+        tags (tuple): The tag of each rank, in the order of RANKS (2 to A).
+    """
+    name: str
+    tags: tuple
+
+    @property
+    def balanced(self):
+        """bool: Whether the tags of a full deck add up to zero."""
+        return sum(self.tags) == 0
+
+    def initial_count(self, num_decks):
+        """
+        Return the running count of a full shoe.
+
+        Args:
+            num_decks (int): The decks in the shoe.
+
+        Returns:
+            int: 0 for a balanced system; for an unbalanced one, minus the
+                tags of every deck but one (4 - 4 x decks for KO).
+        """
+        return -4 * sum(self.tags) * (num_decks - 1)
+
+
+#                                   2  3  4  5  6  7  8   9  10  J   Q   K   A
+SYSTEMS = {system.name: system for system in (
+    CountingSystem("hi-lo", (1, 1, 1, 1, 1, 0, 0, 0, -1, -1, -1, -1, -1)),
+    CountingSystem("ko", (1, 1, 1, 1, 1, 1, 0, 0, -1, -1, -1, -1, -1)),
+    CountingSystem("omega-ii", (1, 1, 2, 2, 2, 1, 0, -1, -2, -2, -2, -2, 0)),
+    CountingSystem("zen", (1, 1, 2, 2, 2, 1, 0, 0, -2, -2, -2, -2, -1)),
+)}
+DEFAULT_SYSTEM = "hi-lo"
+
+
+def get_system(name):
+    """
+    Return a counting system by name.
+
+    Raises:
+        ValueError: If there is no such system.
+    """
+    try:
+        return SYSTEMS[name]
+    except KeyError:
+        raise ValueError(f"Unknown counting system {name!r}; "
+                         f"choose from {', '.join(SYSTEMS)}") from None
+
+
+class CardCounter:
+    """
+    Incremental counts of a shoe under one counting system.
+
+    Read the counts through the properties or to_dict, which bring the
+    counter up to date with the shoe first.
+
+    Attributes:
+        system (CountingSystem): The counting system.
+        shoe (Shoe): The shoe being counted.
+    """
+    __slots__ = ("system", "shoe", "_tags", "_running", "_left", "_remaining",
+                 "_shuffles", "_seen")
+
+    def __init__(self, shoe, system=DEFAULT_SYSTEM):
+        self.system = get_system(system) if isinstance(system, str) else system
+        self.shoe = shoe
+        # Tags by card code, so counting a card is a single index
+        self._tags = array("b", [tag for tag in self.system.tags for _ in range(4)])
+        self._shuffles = None
+        self.sync()
+
+    def _rebuild(self):
+        """Count the shoe from scratch, from the cards left to deal."""
+        shoe = self.shoe
+        remaining = array("H", bytes(2 * len(RANKS)))
+        for code in shoe.codes[shoe.position:]:
+            remaining[code >> 2] += 1
+        tags = self.system.tags
+        left_total = sum(count * tag for count, tag in zip(remaining, tags))
+        full_total = 4 * sum(tags) * shoe.num_decks
+        self._running = self.system.initial_count(shoe.num_decks) + full_total - left_total
+        self._remaining = remaining
+        self._left = len(shoe.codes) - shoe.position
+        self._shuffles = shoe.shuffles
+        self._seen = shoe.position
+
+    def sync(self):
+        """Count the cards dealt since the last call; return the counter."""
+        shoe = self.shoe
+        if shoe.shuffles != self._shuffles or shoe.position < self._seen:
+            self._rebuild()
+            return self
+        position = shoe.position
+        if position == self._seen:
+            return self
+        tags, remaining = self._tags, self._remaining
+        running = self._running
+        for code in shoe.codes[self._seen:position]:
+            running += tags[code]
+            remaining[code >> 2] -= 1
+        self._running = running
+        self._left -= position - self._seen
+        self._seen = position
+        return self
+
+    @property
+    def running_count(self):
+        """int: The running count of every card dealt from the shoe."""
+        return self.sync()._running
+
+    @property
+    def cards_left(self):
+        """int: The cards left to deal."""
+        return self.sync()._left
+
+    @property
+    def decks_left(self):
+        """float: The decks left to deal, at least a quarter deck."""
+        return max(self.cards_left / 52, 0.25)
+
+    @property
+    def true_count(self):
+        """float: The running count per deck left to deal."""
+        return self.running_count / self.decks_left
+
+    @property
+    def betting_count(self):
+        """float: The true count of a balanced system, the running count otherwise."""
+        return self.true_count if self.system.balanced else self.running_count
+
+    def copy(self, shoe=None):
+        """
+        Return a counter with the same counts, following another copy of the shoe.
+
+        The game store keeps counters this way between requests, so a game
+        decoded again is not counted from scratch.
+
+        Args:
+            shoe (Shoe): The shoe to follow, a copy of this counter's shoe
+                such as the same game decoded again; this counter's own shoe
+                if omitted.
+
+        Returns:
+            CardCounter: The copy.
+        """
+        counter = CardCounter.__new__(CardCounter)
+        counter.system = self.system
+        counter.shoe = self.shoe if shoe is None else shoe
+        counter._tags = self._tags
+        counter._running = self._running
+        counter._remaining = array("H", self._remaining)
+        counter._left = self._left
+        counter._shuffles = self._shuffles
+        counter._seen = self._seen
+        return counter
+
+    def remaining(self):
+        """Return the cards left to deal of each rank, in the order of RANKS."""
+        return list(self.sync()._remaining)
+
+    def to_dict(self, hidden=()):
+        """
+        Return the counts as JSON-ready data.
+
+        Args:
+            hidden (iterable): Codes of cards dealt but not yet shown, such
+                as the dealer's hole card, which are counted as if still in
+                the shoe.
+
+        Returns:
+            dict: The system, running and true counts, decks and cards left
+                and the cards left by rank.
+        """
+        self.sync()
+        running, left = self._running, self._left
+        remaining = list(self._remaining)
+        for code in hidden:
+            running -= self._tags[code]
+            remaining[code >> 2] += 1
+            left += 1
+        decks = max(left / 52, 0.25)
+        return {
+            "system": self.system.name,
+            "balanced": self.system.balanced,
+            "running": running,
+            "true": round(running / decks, 2),
+            "decks_left": round(left / 52, 2),
+            "cards_left": left,
+            "remaining": dict(zip(RANKS, remaining)),
+        }
+
+
+@dataclass(frozen=True)
+class BetRamp:
+    """
+    Bet sizes by count: one unit until the first step is reached.
+
+    Attributes:
+        steps (tuple): (count, units) pairs in ascending order of count: at
+            a betting count (floored) of at least count, bet units.
+    """
+    steps: tuple = ((2, 2), (3, 4), (4, 6), (5, 8))
+
+    def __post_init__(self):
+        counts = [count for count, _ in self.steps]
+        if counts != sorted(counts) or any(units <= 0 for _, units in self.steps):
+            raise ValueError("Bet ramp steps must ascend by count with positive units")
+
+    @classmethod
+    def parse(cls, text):
+        """Build a ramp from text such as '2:2,3:4,4:8'."""
+        try:
+            steps = tuple((int(count), float(units)) for count, units in
+                          (step.split(":") for step in text.split(",") if step.strip()))
+        except ValueError:
+            raise ValueError(f"Bet ramp must look like '2:2,3:4', not {text!r}") from None
+        return cls(steps)
+
+    def units(self, count):
+        """Return the units to bet at a betting count."""
+        count = math.floor(count)
+        units = 1
+        for threshold, step_units in self.steps:
+            if count < threshold:
+                break
+            units = step_units
+        return units
+
+    def place_bet(self, player, counter, unit):
+        """
+        Place a player's bet for the next round according to the count.
+
+        This is for the seats of a Game; the simulator bets in units, with
+        no bankroll, and reads units directly.
+
+        Args:
+            player (Player): The player to bet for.
+            counter (CardCounter): The count of the shoe.
+            unit (int): The bet of one unit.
+
+        Returns:
+            int: The amount bet.
+        """
+        amount = int(unit * self.units(counter.betting_count))
+        player.place_bet(amount)
+        return amount
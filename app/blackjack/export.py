@@ -0,0 +1,175 @@
+"""blackjack/export.py
+
+This module streams the hand history and simulation results out as NDJSON
+or CSV.
+
+Nothing is collected before it is written, so memory stays flat however
+many rows are exported. Hand history rows come from a server-side cursor
+that fetches FETCH_SIZE rows at a time, in insertion order. Simulation
+results are played chunk by chunk (see simulation.simulate_chunks) and each
+chunk becomes a row as soon as it is finished. Rows are encoded BLOCK_ROWS
+at a time into text, and gzip_stream compresses the text as it passes
+through, so a gzip export is never held whole either.
+
+Functions:
+    history_rows: Reads hand history rows through a server-side cursor.
+    simulation_rows: Plays a simulation and yields a row per chunk.
+    encode_rows: Encodes rows as NDJSON or CSV, optionally gzipped.
+    gzip_stream: Compresses a stream of bytes on the fly.
+
+Attributes:
+    FORMATS (dict): The media type of each export format.
+    HISTORY_COLUMNS (tuple): The columns of a hand history export.
+    SIMULATION_COLUMNS (tuple): The columns of a simulation export.
+"""
+
+import csv
+import io
+import json
+import zlib
+
+import sqlalchemy
+
+from ..extensions import db
+from .history import HandRecord
+from .simulation import CHUNK_ROUNDS, simulate_chunks
+
+FETCH_SIZE = 1000
+BLOCK_ROWS = 500
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+HISTORY_COLUMNS = tuple(column.name for column in HandRecord.__table__.columns)
+SIMULATION_COLUMNS = ("chunk", "seed", "rounds", "hands", "wins", "losses", "pushes",
+                      "surrenders", "blackjacks", "doubles", "splits", "net_units",
+                      "wagered_units")
+
+
+def history_rows(since=None, until=None, game=None, seat=None, player=None, hand=None,
+                 fetch_size=FETCH_SIZE):
+    """
+    Read hand history rows, oldest first, through a server-side cursor.
+
+    Must be iterated inside an application context; the cursor stays open
+    until the generator is exhausted or closed.
+
+    Args:
+        since (float): Only hands settled at or after this Unix time.
+        until (float): Only hands settled before this Unix time.
+        game (str): Only hands of this game id.
+        seat (int): Only hands of this seat.
+        player (str): Only hands of players with this name.
+        hand (str): Only hands from this chart row, e.g. '16' or 'a7', in
+            either case.
+        fetch_size (int): The rows fetched from the database at a time.
+
+    Yields:
+        tuple: A row's values, in the order of HISTORY_COLUMNS.
+    """
+    table = HandRecord.__table__
+    if hand is not None:
+        hand = hand.lower()  # Chart keys are lowercase, see strategy.hand_key
+    query = sqlalchemy.select(*(table.c[name] for name in HISTORY_COLUMNS))
+    for column, value in (("game_id", game), ("seat", seat), ("player", player),
+                          ("hand_key", hand)):
+        if value is not None:
+            query = query.where(table.c[column] == value)
+    if since is not None:
+        query = query.where(table.c.played_at >= since)
+    if until is not None:
+        query = query.where(table.c.played_at < until)
+    query = query.order_by(table.c.id).execution_options(yield_per=fetch_size)
+    result = db.session.execute(query)
+    try:
+        for partition in result.partitions():
+            yield from partition
+    finally:
+        result.close()
+
+
+def simulation_rows(rounds, seed=None, rules=None, chunk_rounds=CHUNK_ROUNDS):
+    """
+    Play a simulation and yield the tallies of each chunk as it finishes.
+
+    Args:
+        rounds (int): The number of rounds to play.
+        seed (int): Optional seed of the run; the chunks are those of
+            simulate with the same seed.
+        rules (Rules): Optional table rules.
+        chunk_rounds (int): The rounds per chunk, and so per row.
+
+    Yields:
+        tuple: A chunk's values, in the order of SIMULATION_COLUMNS.
+    """
+    for index, result in simulate_chunks(rounds, seed=seed, rules=rules,
+                                         chunk_rounds=chunk_rounds):
+        yield (index, result.seed, *(getattr(result, name) for name in SIMULATION_COLUMNS[2:]))
+
+
+def _ndjson(columns, rows):
+    """Encode rows as blocks of JSON lines."""
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(dict(zip(columns, row))))
+        if len(lines) == BLOCK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def _csv(columns, rows):
+    """Encode rows as blocks of CSV lines after a header line."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count == BLOCK_ROWS:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            count = 0
+    yield buffer.getvalue()
+
+
+def gzip_stream(chunks, level=6):
+    """
+    Compress a stream of bytes into a gzip stream as it passes.
+
+    Args:
+        chunks (iterable): The bytes to compress.
+        level (int): The compression level, 1 (fastest) to 9 (smallest).
+
+    Yields:
+        bytes: The gzip stream, in pieces.
+    """
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def encode_rows(columns, rows, fmt="ndjson", compress=False):
+    """
+    Encode rows as NDJSON or CSV, a block of rows at a time.
+
+    Args:
+        columns (tuple): The column names.
+        rows (iterable): The rows, each a sequence of values in column order.
+        fmt (str): 'ndjson' or 'csv'.
+        compress (bool): Whether to gzip the output.
+
+    Returns:
+        iterator: The encoded rows, as bytes.
+
+    Raises:
+        ValueError: If the format is unknown.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format {fmt!r}; choose from {', '.join(FORMATS)}")
+    encoder = _ndjson if fmt == "ndjson" else _csv
+    chunks = (text.encode("utf-8") for text in encoder(columns, rows))
+    return gzip_stream(chunks) if compress else chunks
@@ -0,0 +1,438 @@
+"""blackjack/history.py
+
+This module records every settled hand in an append-only hand history and
+answers analytics queries over it.
+
+Once the history is bound to an application with init_app, games record each
+seat they settle (see Game.hand_record). When a game is saved, the history
+takes those records as a game store listener and buffers them, so the
+database is off the request path. A background writer bulk-inserts the
+buffer in one transaction whenever HAND_HISTORY_BATCH_SIZE records are
+waiting, and at least every HAND_HISTORY_FLUSH_INTERVAL seconds. Records
+only reach the history once their game is saved: a save that loses a race
+with another request (StaleGameError) records nothing, though a save the
+game store later drops as stale at a flush has already recorded. If the
+database cannot be written, the buffer is kept for the next attempt, up to
+HAND_HISTORY_MAX_PENDING records; older records are dropped beyond that.
+The analytics routes never write on the request thread either: they wake the
+writer and read what has been written, so they can lag the rounds just
+played by one write.
+
+Rows are indexed by (game id, time), which serves the per-player queries of
+a game, and by (hand key, dealer up-card), which serves the queries of one
+strategy cell. The transaction that inserts a batch also adds it to the
+per-cell totals in the hand_cells table, so the EV and overall deviation
+figures read at most a few hundred rows however long the history grows.
+
+Classes:
+    HandRecord: A row of the hand history.
+    HandCell: The running totals of one strategy cell.
+    HandHistory: Buffers hand records and writes them in batches.
+
+Functions:
+    player_stats: Results and chart deviations of each seat of a game.
+    cell_stats: Results, EV and chart deviations of each strategy cell.
+
+Attributes:
+    hand_history (HandHistory): The history started by create_app.
+"""
+
+import atexit
+import logging
+import math
+import threading
+
+import sqlalchemy
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from ..extensions import db
+from .models import RANKS, SUITS, Game
+from .store import game_store
+from .strategy import (
+    DEALER_COLUMNS,
+    PAIR_BASE,
+    Action,
+    dealer_index,
+    get_strategy,
+    hand_key,
+)
+
+logger = logging.getLogger('BlackjackGame')
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_FLUSH_INTERVAL = 1.0
+DEFAULT_MAX_PENDING = 100_000
+# The running totals of a strategy cell, in the order they are summed
+CELL_TOTALS = ("rounds", "wins", "losses", "pushes", "surrenders", "units",
+               "units_squared", "decisions", "deviations")
+_RESULT_TOTALS = {"win": "wins", "lose": "losses", "draw": "pushes", "surrender": "surrenders"}
+# Chart rows by hand key; pairs are played by their total, so only hard and soft rows occur
+_ROWS = {hand_key(row): row for row in range(PAIR_BASE)}
+
+
+class HandRecord(db.Model):
+    """
+    A row of the hand history: one seat's settled round.
+
+    Attributes:
+        id (int): The row id, in insertion order.
+        game_id (str): The game id.
+        seat (int): The seat id.
+        player (str): The name of the player in the seat.
+        played_at (float): The time the seat was settled.
+        cards (str): The seat's cards, e.g. '10H 6S 5D'.
+        dealer_cards (str): The dealer's cards when the seat was settled.
+        up_card (int): The value of the dealer's up-card, 2-11.
+        hand_key (str): The chart row of the first two cards, e.g. '16'.
+        chart_action (str): The chart code of the strategy cell, e.g. 'RH'.
+        actions (str): The seat's actions, e.g. 'HS'; see Game.actions.
+        decisions (int): The number of actions.
+        deviations (int): The actions that were not the chart's move.
+        bet (float): The initial bet.
+        net (float): The change in the seat's bankroll.
+        units (float): The result in initial bets, e.g. -2 for a lost double.
+        result (str): 'win', 'lose', 'draw' or 'surrender'.
+    """
+    __tablename__ = "hand_history"
+    __table_args__ = (
+        db.Index("ix_hand_history_game_time", "game_id", "played_at"),
+        db.Index("ix_hand_history_cell", "hand_key", "up_card"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    game_id = db.Column(db.String(32), nullable=False)
+    seat = db.Column(db.SmallInteger, nullable=False)
+    player = db.Column(db.String(64))
+    played_at = db.Column(db.Float, nullable=False)
+    cards = db.Column(db.String(64), nullable=False)
+    dealer_cards = db.Column(db.String(64), nullable=False)
+    up_card = db.Column(db.SmallInteger)
+    hand_key = db.Column(db.String(4))
+    chart_action = db.Column(db.String(2))
+    actions = db.Column(db.String(32), nullable=False)
+    decisions = db.Column(db.SmallInteger, nullable=False)
+    deviations = db.Column(db.SmallInteger, nullable=False)
+    bet = db.Column(db.Float, nullable=False)
+    net = db.Column(db.Float, nullable=False)
+    units = db.Column(db.Float, nullable=False)
+    result = db.Column(db.String(10), nullable=False)
+
+
+class HandCell(db.Model):
+    """
+    The running totals of the hands played from one strategy cell.
+
+    Attributes:
+        hand_key (str): The chart row, e.g. '16'.
+        up_card (int): The value of the dealer's up-card, 2-11.
+        rounds (int): The hands played.
+        wins, losses, pushes, surrenders (int): The hands by result.
+        units (float): The sum of the results in initial bets.
+        units_squared (float): The sum of their squares.
+        decisions (int): The actions taken.
+        deviations (int): The actions that were not the chart's move.
+    """
+    __tablename__ = "hand_cells"
+
+    hand_key = db.Column(db.String(4), primary_key=True)
+    up_card = db.Column(db.SmallInteger, primary_key=True)
+    rounds = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    losses = db.Column(db.Integer, nullable=False, default=0)
+    pushes = db.Column(db.Integer, nullable=False, default=0)
+    surrenders = db.Column(db.Integer, nullable=False, default=0)
+    units = db.Column(db.Float, nullable=False, default=0.0)
+    units_squared = db.Column(db.Float, nullable=False, default=0.0)
+    decisions = db.Column(db.Integer, nullable=False, default=0)
+    deviations = db.Column(db.Integer, nullable=False, default=0)
+
+
+def _cards_text(codes):
+    """Return card codes as short text, e.g. '10H 6S'."""
+    return " ".join(RANKS[code >> 2] + SUITS[code & 3][0] for code in codes)
+
+
+def _row(game_id, record):
+    """Turn a record from Game.hand_record into a hand_history row."""
+    row = dict(record, game_id=game_id)
+    row["cards"] = _cards_text(record["cards"])
+    row["dealer_cards"] = _cards_text(record["dealer_cards"])
+    return row
+
+
+def _cell_totals(rows):
+    """Add up a batch of rows by strategy cell."""
+    totals = {}
+    for row in rows:
+        if row["hand_key"] is None:
+            continue  # Settled without a dealt hand, so outside every cell
+        cell = totals.get((row["hand_key"], row["up_card"]))
+        if cell is None:
+            cell = totals[row["hand_key"], row["up_card"]] = dict.fromkeys(CELL_TOTALS, 0)
+        cell["rounds"] += 1
+        cell[_RESULT_TOTALS[row["result"]]] += 1
+        cell["units"] += row["units"]
+        cell["units_squared"] += row["units"] * row["units"]
+        cell["decisions"] += row["decisions"]
+        cell["deviations"] += row["deviations"]
+    return [{"hand_key": key, "up_card": up, **cell} for (key, up), cell in totals.items()]
+
+
+class HandHistory:
+    """
+    Buffers hand records from saved games and writes them in batches.
+
+    Attributes:
+        app (Flask): The application whose database the history writes to,
+            or None while the history is off.
+        batch_size (int): The buffered records that wake the writer.
+        flush_interval (float): The longest wait between writes, in seconds.
+        max_pending (int): The most records buffered while writes fail.
+        written (int): The records written.
+        dropped (int): The records dropped from a full buffer.
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH_SIZE, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 max_pending=DEFAULT_MAX_PENDING):
+        self.app = None
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.written = 0
+        self.dropped = 0
+        self._pending = []  # (game id, record) pairs
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._writer = None
+
+    def init_app(self, app):
+        """
+        Record the hands of an application's games and start the writer.
+
+        Reads HAND_HISTORY_ENABLED, HAND_HISTORY_BATCH_SIZE,
+        HAND_HISTORY_FLUSH_INTERVAL and HAND_HISTORY_MAX_PENDING from the
+        application config, and creates the tables and indexes if they are
+        missing. Does nothing if HAND_HISTORY_ENABLED is false.
+
+        Args:
+            app (Flask): The application.
+        """
+        if not app.config.get("HAND_HISTORY_ENABLED", True):
+            return
+        self.batch_size = app.config.get("HAND_HISTORY_BATCH_SIZE", self.batch_size)
+        self.flush_interval = app.config.get("HAND_HISTORY_FLUSH_INTERVAL", self.flush_interval)
+        self.max_pending = app.config.get("HAND_HISTORY_MAX_PENDING", self.max_pending)
+        self.app = app
+        with app.app_context():
+            HandRecord.__table__.create(db.engine, checkfirst=True)
+            HandCell.__table__.create(db.engine, checkfirst=True)
+        game_store.subscribe(self.take)
+        Game.record_hands = True
+        if self._writer is None:
+            atexit.register(self.close)
+        if self._writer is None or not self._writer.is_alive():
+            self._stop.clear()
+            self._writer = threading.Thread(target=self._run, name="hand-history-writer",
+                                            daemon=True)
+            self._writer.start()
+
+    def take(self, game_id, game):
+        """
+        Buffer the hands a game settled since it was loaded.
+
+        Called by the game store after every save; the records are removed
+        from game.history so that saving the game again does not repeat them.
+
+        Args:
+            game_id (str): The game id.
+            game (Game): The saved game.
+        """
+        records = game.history
+        if not records:
+            return
+        game.history = []
+        with self._lock:
+            self._pending.extend((game_id, record) for record in records)
+            self._trim()
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wake.set()
+
+    def wake(self):
+        """Ask the writer to write the buffer now, without waiting for the write."""
+        self._wake.set()
+
+    def _trim(self):
+        """Drop the oldest records beyond max_pending; call with the lock held."""
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+            logger.warning("Hand history buffer full; dropped %s records", overflow)
+
+    def flush(self):
+        """
+        Write every buffered record, and its cell totals, in one transaction.
+
+        Returns:
+            int: The number of records written.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if not pending:
+            return 0
+        rows = [_row(game_id, record) for game_id, record in pending]
+        try:
+            with self.app.app_context():
+                db.session.execute(sqlalchemy.insert(HandRecord), rows)
+                self._add_cells(_cell_totals(rows))
+                db.session.commit()
+        except Exception:  # pylint: disable=W0718
+            logger.exception("Writing %s hand records failed; retrying next time", len(rows))
+            with self.app.app_context():
+                db.session.rollback()
+            with self._lock:
+                # Records buffered during the write are newer
+                self._pending = pending + self._pending
+                self._trim()
+            return 0
+        self.written += len(rows)
+        return len(rows)
+
+    @staticmethod
+    def _add_cells(cells):
+        """Add batch totals to the hand_cells rows."""
+        if not cells:
+            return
+        if db.engine.dialect.name == "sqlite":
+            statement = sqlite_insert(HandCell)
+            statement = statement.on_conflict_do_update(
+                index_elements=[HandCell.hand_key, HandCell.up_card],
+                set_={name: getattr(HandCell, name) + getattr(statement.excluded, name)
+                      for name in CELL_TOTALS},
+            )
+            db.session.execute(statement, cells)
+            return
+        for cell in cells:
+            record = db.session.get(HandCell, (cell["hand_key"], cell["up_card"]),
+                                    with_for_update=True)
+            if record is None:
+                db.session.add(HandCell(**cell))
+                continue
+            for name in CELL_TOTALS:
+                setattr(record, name, getattr(record, name) + cell[name])
+
+    def _run(self):
+        """Write the buffer when a batch is waiting or flush_interval passes, until closed."""
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        """Stop recording and the writer, write any remaining records and unbind the app."""
+        game_store.unsubscribe(self.take)
+        Game.record_hands = False
+        self._stop.set()
+        self._wake.set()
+        if self._writer is not None and self._writer is not threading.current_thread():
+            self._writer.join()
+        if self.app is not None:
+            self.flush()
+            self.app = None
+
+
+def _rate(part, whole):
+    return part / whole if whole else 0.0
+
+
+def player_stats(game_id, since=None):
+    """
+    Return the results and chart deviations of each seat of a game.
+
+    Uses the (game id, time) index, so it reads only the game's rows.
+
+    Args:
+        game_id (str): The game id.
+        since (float): Only count hands settled at or after this time.
+
+    Returns:
+        list: A dictionary per seat with its player, rounds, wins, losses,
+            pushes, surrenders, win rate, net result, units per round,
+            decisions, deviations and deviation rate.
+    """
+    wins = sqlalchemy.func.sum(sqlalchemy.case((HandRecord.result == "win", 1), else_=0))
+    losses = sqlalchemy.func.sum(sqlalchemy.case((HandRecord.result == "lose", 1), else_=0))
+    pushes = sqlalchemy.func.sum(sqlalchemy.case((HandRecord.result == "draw", 1), else_=0))
+    query = sqlalchemy.select(
+        HandRecord.seat, sqlalchemy.func.max(HandRecord.player), sqlalchemy.func.count(),
+        wins, losses, pushes, sqlalchemy.func.sum(HandRecord.net),
+        sqlalchemy.func.sum(HandRecord.units), sqlalchemy.func.sum(HandRecord.decisions),
+        sqlalchemy.func.sum(HandRecord.deviations),
+    ).where(HandRecord.game_id == game_id)
+    if since is not None:
+        query = query.where(HandRecord.played_at >= since)
+    stats = []
+    for (seat, player, rounds, won, lost, pushed, net, units, decisions,
+         deviations) in db.session.execute(query.group_by(HandRecord.seat).order_by(HandRecord.seat)):
+        stats.append({
+            "seat": seat,
+            "player": player,
+            "rounds": rounds,
+            "wins": won,
+            "losses": lost,
+            "pushes": pushed,
+            "surrenders": rounds - won - lost - pushed,
+            "win_rate": _rate(won, rounds),
+            "net": net,
+            "units_per_round": _rate(units, rounds),
+            "decisions": decisions,
+            "deviations": deviations,
+            "deviation_rate": _rate(deviations, decisions),
+        })
+    return stats
+
+
+def cell_stats(hand=None, up=None):
+    """
+    Return the results, EV and chart deviations of each strategy cell played.
+
+    Reads the per-cell totals rather than the hand history.
+
+    Args:
+        hand (str): Only this chart row, e.g. '16' or 'a7'.
+        up (int): Only this dealer up-card value, 2-11.
+
+    Returns:
+        list: A dictionary per cell with its hand key, up-card value and
+            chart column, the chart's current code, the totals of HandCell,
+            the EV in initial bets per hand with its standard error, and the
+            deviation rate; ordered by hand key and up-card.
+    """
+    query = sqlalchemy.select(HandCell)
+    if hand is not None:
+        query = query.where(HandCell.hand_key == hand)
+    if up is not None:
+        query = query.where(HandCell.up_card == up)
+    strategy = get_strategy()
+    stats = []
+    for cell in db.session.scalars(query.order_by(HandCell.hand_key, HandCell.up_card)):
+        totals = {name: getattr(cell, name) for name in CELL_TOTALS}
+        ev = _rate(cell.units, cell.rounds)
+        variance = max(_rate(cell.units_squared, cell.rounds) - ev * ev, 0.0)
+        column = dealer_index(cell.up_card)
+        stats.append({
+            "hand_key": cell.hand_key,
+            "up_card": cell.up_card,
+            "dealer": DEALER_COLUMNS[column],
+            "chart_action": Action(strategy.lookup(_ROWS[cell.hand_key], column)).code,
+            **totals,
+            "ev": ev,
+            "std_error": math.sqrt(variance / cell.rounds) if cell.rounds else 0.0,
+            "deviation_rate": _rate(cell.deviations, cell.decisions),
+        })
+    return stats
+
+
+hand_history = HandHistory()
@@ -0,0 +1,584 @@
+"""blackjack/live.py
+
+This module pushes live tables to their seats over WebSockets.
+
+A client opens ws://host:port/tables/<game id>/seats/<seat>?token=<token>
+and receives {"version", "state"} with the full state of the game. From
+then on, every time the game is saved, whether by an action sent on any
+connection or by the HTTP routes of the same process, every connection on
+the table receives {"version", "delta"} with only what changed since the
+version it last saw, or the full state if it missed a version. A connection sends
+{"actions": [...]} in the format of the batch endpoint to act for its seat,
+and for its seat alone; errors are answered to that connection alone.
+
+Everything runs on one asyncio event loop. A connection is a coroutine
+waiting on its socket, so an idle seat costs a few kilobytes rather than a
+thread. Reads and saves of the game store, which may go to the database,
+run in the loop's default executor so they never block the loop. A
+broadcast encodes each message once per table and writes it to every
+connection without waiting; a connection that lets MAX_BUFFER bytes
+pile up unread is dropped rather than allowed to hold the table back. The
+protocol is the part of RFC 6455 a browser needs (text frames, fragments,
+ping/pong and close), written on asyncio streams, so the push channel needs
+neither extra packages nor a Redis pub/sub: saves reach the loop through the
+game store's listener hook. Saves made in other processes are therefore not
+pushed; run the app as a single process when live tables are enabled.
+
+The token in the URL is what grants access to a seat, as the session
+cookie does for the HTTP routes: it is an HMAC of the game id and seat
+under the app's secret key (see utils.seat_token), so knowing the game id
+or the token of one seat does not open another. The /seats/<seat>/live
+route hands it only to the session that owns the game.
+
+Classes:
+    ProtocolError: Raised when a peer breaks the WebSocket protocol.
+    LiveTables: The WebSocket server and the tables it pushes to.
+    LiveClient: A minimal asyncio WebSocket client, for tests and tools.
+
+Functions:
+    accept_key: Computes the handshake answer to a client's key.
+    encode_frame: Builds a single WebSocket frame.
+    read_frame: Reads a single WebSocket frame.
+    read_message: Reads the next data message, answering control frames.
+
+Attributes:
+    live_tables (LiveTables): The server started by create_app.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import re
+import struct
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+from ..utils import diff_state, seat_token
+from .routes import MAX_BATCH_ACTIONS, apply_batch
+from .store import StaleGameError, game_store
+
+logger = logging.getLogger('BlackjackGame')
+
+GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+CONTINUATION, TEXT, BINARY, CLOSE, PING, PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+MAX_MESSAGE = 64 * 1024
+MAX_BUFFER = 256 * 1024
+_PATH = re.compile(r"^/tables/([0-9A-Za-z_-]{1,32})/seats/(\d{1,2})$")
+
+
+class ProtocolError(Exception):
+    """Raised when a peer breaks the WebSocket protocol."""
+
+
+def accept_key(key):
+    """Return the Sec-WebSocket-Accept answer to a Sec-WebSocket-Key."""
+    digest = hashlib.sha1((key + GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def _mask(payload, key):
+    """XOR a payload with a four-byte masking key."""
+    length = len(payload)
+    if not length:
+        return payload
+    stream = (key * (length // 4 + 1))[:length]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(stream, "big")).to_bytes(length, "big")
+
+
+def encode_frame(opcode, payload, mask=False):
+    """
+    Build a single, final WebSocket frame.
+
+    Args:
+        opcode (int): The frame opcode, e.g. TEXT or CLOSE.
+        payload (bytes): The payload.
+        mask (bool): Whether to mask the payload, as clients must.
+
+    Returns:
+        bytes: The frame.
+    """
+    length = len(payload)
+    mask_bit = 0x80 if mask else 0
+    if length < 126:
+        head = struct.pack("!BB", 0x80 | opcode, mask_bit | length)
+    elif length < 1 << 16:
+        head = struct.pack("!BBH", 0x80 | opcode, mask_bit | 126, length)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, mask_bit | 127, length)
+    if mask:
+        key = os.urandom(4)
+        return head + key + _mask(payload, key)
+    return head + payload
+
+
+async def read_frame(reader):
+    """
+    Read a single WebSocket frame.
+
+    Args:
+        reader (asyncio.StreamReader): The stream to read from.
+
+    Returns:
+        tuple: (final, opcode, payload, masked).
+
+    Raises:
+        ProtocolError: If the frame uses reserved bits or is too large.
+        asyncio.IncompleteReadError: If the stream ends inside the frame.
+    """
+    first, second = await reader.readexactly(2)
+    if first & 0x70:
+        raise ProtocolError("Reserved bits set")
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    if length > MAX_MESSAGE:
+        raise ProtocolError(f"Frame of {length} bytes is too large")
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if key is not None:
+        payload = _mask(payload, key)
+    return bool(first & 0x80), first & 0x0F, payload, key is not None
+
+
+async def read_message(reader, writer, from_client):
+    """
+    Read the next data message, answering pings and close frames.
+
+    Args:
+        reader (asyncio.StreamReader): The stream to read from.
+        writer (asyncio.StreamWriter): The stream to answer on.
+        from_client (bool): Whether the peer is a client, whose frames must
+            be masked, rather than a server, whose frames must not be.
+
+    Returns:
+        str: The message text, or None once the peer has closed.
+
+    Raises:
+        ProtocolError: If the peer breaks the protocol.
+    """
+    parts = []
+    size = 0
+    while True:
+        final, opcode, payload, masked = await read_frame(reader)
+        if masked != from_client:
+            raise ProtocolError("Frame masking does not match the peer")
+        if opcode == PING:
+            writer.write(encode_frame(PONG, payload, mask=not from_client))
+            continue
+        if opcode == PONG:
+            continue
+        if opcode == CLOSE:
+            if not writer.is_closing():
+                writer.write(encode_frame(CLOSE, payload[:2], mask=not from_client))
+            return None
+        if opcode in (TEXT, BINARY):
+            if parts:
+                raise ProtocolError("New message inside a fragmented one")
+        elif opcode != CONTINUATION or not parts:
+            raise ProtocolError(f"Unexpected opcode {opcode}")
+        parts.append(payload)
+        size += len(payload)
+        if size > MAX_MESSAGE:
+            raise ProtocolError("Message is too large")
+        if final:
+            return b"".join(parts).decode("utf-8")
+
+
+def _json_frame(data):
+    """Return a text frame carrying data as compact JSON."""
+    return encode_frame(TEXT, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+
+class _Connection:
+    """One seat's WebSocket: where to write and the state version it has seen."""
+    __slots__ = ("writer", "game_id", "seat", "version")
+
+    def __init__(self, writer, game_id, seat):
+        self.writer = writer
+        self.game_id = game_id
+        self.seat = seat
+        self.version = None
+
+    def send(self, frame):
+        """Queue a frame without waiting, dropping a connection that stopped reading."""
+        writer = self.writer
+        if writer.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > MAX_BUFFER:
+            logger.warning("Dropping a live seat of game %s that stopped reading", self.game_id)
+            writer.transport.abort()
+            return
+        writer.write(frame)
+
+
+class _Table:
+    """The connections to one game and the last state pushed to them."""
+    __slots__ = ("connections", "version", "state")
+
+    def __init__(self, version, state):
+        self.connections = set()
+        self.version = version
+        self.state = state
+
+
+class LiveTables:
+    """
+    The WebSocket server and the tables it pushes to.
+
+    Attributes:
+        store (GameStore): The store games are read from and saved to.
+        secret (str): The secret key seat tokens are signed with; every
+            connection is refused while it is None.
+        tables (dict): The tables with at least one connection, by game id.
+        loop (asyncio.AbstractEventLoop): The loop serving the connections,
+            or None before start.
+        server (asyncio.Server): The listening server, or None.
+    """
+
+    def __init__(self, store=game_store, secret=None):
+        self.store = store
+        self.secret = secret
+        self.tables = {}
+        self.loop = None
+        self.server = None
+        self._thread = None
+
+    @property
+    def port(self):
+        """int: The port the server listens on, or None if it is not started."""
+        if self.server is None:
+            return None
+        return self.server.sockets[0].getsockname()[1]
+
+    @property
+    def connections(self):
+        """int: The number of open connections across every table."""
+        return sum(len(table.connections) for table in self.tables.values())
+
+    def init_app(self, app):
+        """
+        Start the server in a background thread if LIVE_TABLES_PORT is set.
+
+        Seat tokens are checked against the application's secret key.
+
+        Args:
+            app (Flask): The application.
+        """
+        port = app.config.get("LIVE_TABLES_PORT")
+        if not port:
+            return
+        self.secret = app.secret_key
+        try:
+            self.run_in_thread(app.config.get("LIVE_TABLES_HOST", "127.0.0.1"), port)
+        except OSError as e:
+            logger.error("Live tables could not listen on port %s: %s", port, e)
+
+    async def start(self, host="127.0.0.1", port=0):
+        """
+        Listen for connections on the running event loop.
+
+        Args:
+            host (str): The interface to listen on.
+            port (int): The port, or 0 for any free port.
+
+        Returns:
+            asyncio.Server: The listening server.
+        """
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle, host, port, backlog=1024)
+        self.store.subscribe(self.notify)
+        return self.server
+
+    async def stop(self):
+        """Stop listening and close every connection."""
+        self.store.unsubscribe(self.notify)
+        if self.server is not None:
+            self.server.close()
+        for table in list(self.tables.values()):
+            for connection in list(table.connections):
+                connection.writer.close()
+        if self.server is not None:
+            await self.server.wait_closed()
+        self.server = None
+        self.loop = None
+
+    def run_in_thread(self, host="127.0.0.1", port=0):
+        """
+        Serve from a new event loop in a daemon thread.
+
+        Args:
+            host (str): The interface to listen on.
+            port (int): The port, or 0 for any free port.
+
+        Returns:
+            threading.Thread: The thread running the loop.
+
+        Raises:
+            OSError: If the server cannot listen on the port.
+        """
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start(host, port))
+            except OSError as e:
+                errors.append(e)
+                started.set()
+                loop.close()
+                return
+            started.set()
+            loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="live-tables", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self._thread
+
+    async def handle(self, reader, writer):
+        """Serve one connection from the handshake until it closes."""
+        connection = None
+        try:
+            connection = await self.accept(reader, writer)
+            while connection is not None:
+                message = await read_message(reader, writer, from_client=True)
+                if message is None:
+                    break
+                await self.receive(connection, message)
+        except (ProtocolError, UnicodeDecodeError, ValueError, asyncio.IncompleteReadError,
+                asyncio.LimitOverrunError, ConnectionError) as e:
+            logger.info("Closing a live connection: %s", e)
+        finally:
+            if connection is not None:
+                self.leave(connection)
+            writer.close()
+
+    async def accept(self, reader, writer):
+        """
+        Complete the WebSocket handshake and seat the connection at its table.
+
+        Returns:
+            _Connection: The seated connection, or None if the request was
+                refused.
+        """
+        head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1")
+        request, *lines = head.split("\r\n")
+        method, target, _ = request.split(" ", 2)
+        headers = {}
+        for line in lines:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        key = headers.get("sec-websocket-key")
+        if method != "GET" or headers.get("upgrade", "").lower() != "websocket" or not key:
+            return self.refuse(writer, "400 Bad Request")
+        url = urlsplit(target)
+        match = _PATH.match(url.path)
+        if not match:
+            return self.refuse(writer, "404 Not Found")
+        token = parse_qs(url.query).get("token", [""])[0]
+        expected = seat_token(self.secret, match.group(1), int(match.group(2)))
+        if self.secret is None or not hmac.compare_digest(token, expected):
+            return self.refuse(writer, "403 Forbidden")
+        try:
+            game = await self.loop.run_in_executor(None, self.store.get, match.group(1))
+        except StaleGameError:
+            return self.refuse(writer, "409 Conflict")
+        if game is None or int(match.group(2)) >= len(game.seats):
+            return self.refuse(writer, "404 Not Found")
+
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Accept: {accept_key(key)}\r\n\r\n"
+            .encode("ascii")
+        )
+        game_id = match.group(1)
+        connection = _Connection(writer, game_id, int(match.group(2)))
+        table = self.tables.get(game_id)
+        if table is None:
+            table = self.tables[game_id] = _Table(game.version, game.serialize())
+        elif game.version > table.version:
+            # Saved by another process since the table last changed here
+            self.broadcast(game_id, game.version, game.serialize())
+        table.connections.add(connection)
+        connection.version = table.version
+        connection.send(_json_frame({"version": table.version, "state": table.state}))
+        return connection
+
+    @staticmethod
+    def refuse(writer, status):
+        """Answer a request that is not a valid live table handshake."""
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Length: 0\r\nConnection: close\r\n\r\n"
+                     .encode("ascii"))
+        return None
+
+    def leave(self, connection):
+        """Remove a connection from its table, forgetting tables left empty."""
+        table = self.tables.get(connection.game_id)
+        if table is None:
+            return
+        table.connections.discard(connection)
+        if not table.connections:
+            del self.tables[connection.game_id]
+
+    async def receive(self, connection, message):
+        """
+        Apply a batch of actions sent on a connection and save the game.
+
+        Actions may only be for the connection's seat. The save reaches
+        every connection on the table through notify; the sender only hears
+        back directly about errors, or with the full state when the batch is
+        empty.
+        """
+        try:
+            payload = json.loads(message)
+        except ValueError:
+            payload = None
+        actions = payload.get("actions") if isinstance(payload, dict) else None
+        if not isinstance(actions, list) or len(actions) > MAX_BATCH_ACTIONS:
+            connection.send(_json_frame(
+                {"error": f"actions must be a list of at most {MAX_BATCH_ACTIONS}"}))
+            return
+        try:
+            game = await self.loop.run_in_executor(None, self.store.get, connection.game_id)
+        except StaleGameError:
+            connection.send(_json_frame(
+                {"error": "The game changed during this request, please retry"}))
+            return
+        if game is None:
+            connection.send(_json_frame({"error": "No game in progress"}))
+            return
+        if not actions:
+            connection.version = game.version
+            connection.send(_json_frame({"version": game.version, "state": game.serialize()}))
+            return
+        failure = apply_batch(game, actions, connection.seat, own_seat_only=True)
+        if failure:
+            connection.send(_json_frame(failure))
+            return
+        try:
+            await self.loop.run_in_executor(None, self.store.put, connection.game_id, game)
+        except StaleGameError:
+            connection.send(_json_frame(
+                {"error": "The game changed during this request, please retry"}))
+
+    def notify(self, game_id, game):
+        """Store listener: schedule a broadcast of a saved game that has live seats.
+
+        Runs in the saving thread, so the state is serialized here, before
+        the caller can change the game again.
+        """
+        loop = self.loop
+        if loop is None or game_id not in self.tables:
+            return
+        try:
+            loop.call_soon_threadsafe(self.broadcast, game_id, game.version, game.serialize())
+        except RuntimeError:  # The loop was closed meanwhile
+            pass
+
+    def broadcast(self, game_id, version, state):
+        """
+        Push a new version of a game to every connection on its table.
+
+        Connections at the previous version receive the delta and the others
+        the full state; each message is encoded once. Versions older than the
+        one last pushed, which can arrive out of order from other threads,
+        are ignored.
+
+        Args:
+            game_id (str): The game id.
+            version (int): The saved version.
+            state (dict): The serialized game at that version.
+        """
+        table = self.tables.get(game_id)
+        if table is None or version <= table.version:
+            return
+        delta_frame = state_frame = None
+        if version == table.version + 1:
+            delta_frame = _json_frame({"version": version, "delta": diff_state(table.state, state)})
+        for connection in list(table.connections):
+            if delta_frame is not None and connection.version == table.version:
+                connection.send(delta_frame)
+            else:
+                if state_frame is None:
+                    state_frame = _json_frame({"version": version, "state": state})
+                connection.send(state_frame)
+            connection.version = version
+        table.version, table.state = version, state
+
+
+class LiveClient:
+    """
+    A minimal asyncio WebSocket client for live tables.
+
+    Attributes:
+        reader (asyncio.StreamReader): The stream from the server.
+        writer (asyncio.StreamWriter): The stream to the server.
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, url):
+        """
+        Open a connection to a live table.
+
+        Args:
+            url (str): The ws:// URL of a seat, with its token.
+
+        Returns:
+            LiveClient: The connected client.
+
+        Raises:
+            ConnectionError: If the server refuses the handshake.
+        """
+        parts = urlsplit(url)
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        target = f"{parts.path}?{parts.query}" if parts.query else parts.path
+        writer.write(
+            f"GET {target} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+            .encode("ascii")
+        )
+        head = await reader.readuntil(b"\r\n\r\n")
+        status = head.split(b"\r\n", 1)[0]
+        if b" 101 " not in status or accept_key(key).encode("ascii") not in head:
+            writer.close()
+            raise ConnectionError(f"Handshake refused: {status.decode('latin-1')}")
+        return cls(reader, writer)
+
+    async def send(self, data):
+        """Send data as a JSON text message."""
+        self.writer.write(encode_frame(TEXT, json.dumps(data).encode("utf-8"), mask=True))
+        await self.writer.drain()
+
+    async def receive(self):
+        """Return the next JSON message, or None once the server has closed."""
+        message = await read_message(self.reader, self.writer, from_client=False)
+        return None if message is None else json.loads(message)
+
+    async def close(self):
+        """Close the connection."""
+        if not self.writer.is_closing():
+            self.writer.write(encode_frame(CLOSE, struct.pack("!H", 1000), mask=True))
+            self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+live_tables = LiveTables()
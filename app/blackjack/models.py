@@ -7,6 +7,8 @@ Classes:
     Card: Represents a single card in the deck.
     Deck: Represents a deck of cards, providing methods to shuffle and deal
       cards.
+    Shoe: Represents a multi-deck shoe with a cut card that persists across
+      rounds.
     Player: Represents a player in the game, holding their hand, bankroll, and
       current bet.
     Dealer: Inherits from Player, with specific behaviors for the dealer.
@@ -26,54 +28,166 @@ Functions:
     handle_surrender: Adjusts the player's bankroll when they surrender.
     resolve_bets: Adjusts the player's bankroll based on the result of the
       round.
+    chart_move: Returns the chart's move for a hand, as the game allows it.
+    hand_record: Describes a seat's settled round for the hand history.
+    surrender_allowed: The late surrender rule, shared by Game.surrender and
+      the round simulator.
 
 Returns:
     Various types based on the functions, primarily dealing with game state and
       player actions.
 """
 
-import csv
-from random import shuffle
-from ..utils import calculate_hand_value, assign_value, setup_logging
+import logging
+import random
+import time
+from array import array
+from ..metrics import metrics
+from ..utils import assign_value
+from .strategy import (
+    Action,
+    DEALER_COLUMNS,
+    NO_ACTION,
+    dealer_index,
+    get_strategy,
+    hand_class,
+    hand_key,
+    load_strategy,
+)
 
-logger = setup_logging()
+logger = logging.getLogger('BlackjackGame')
+
+SUITS = ("Hearts", "Diamonds", "Clubs", "Spades")
+RANKS = ("2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A")
+# Card values by rank index, computed once so the hot path never compares strings
+RANK_VALUES = tuple(assign_value(rank) for rank in RANKS)
+_RANK_INDEX = {rank: index for index, rank in enumerate(RANKS)}
+_SUIT_INDEX = {suit: index for index, suit in enumerate(SUITS)}
+# The result of a seat in initial bets, before doubling
+RESULT_UNITS = {"win": 1, "lose": -1, "draw": 0, "surrender": -0.5}
+
+
+def surrender_allowed(total, soft, up, pair_value=None):
+    """Return whether a two-card hand may surrender against the dealer's up card.
+
+    Late surrender is allowed on a hard 16 against a 9, 10 or ace, except
+    two 8s, and on a hard 15 against a 10.
+
+    Args:
+        total (int): The best total of the hand.
+        soft (bool): Whether an ace in the hand is counted as 11.
+        up (int): The value of the dealer's up card, 11 for an ace.
+        pair_value (int): The card value of a pair, or None.
+
+    Returns:
+        bool: True if the hand may surrender.
+    """
+    if soft or pair_value == 8:
+        return False
+    return (total == 16 and up >= 9) or (total == 15 and up == 10)
 
 class Card:
     """
     Represents a single card in the deck.
 
+    A card is stored as one small integer code (rank index * 4 + suit index);
+    rank, suit and value are read-only views of that code. The 52 distinct
+    cards are shared instances, available through Card.from_code.
+
     Attributes:
+        code (int): The compact encoding of the card, 0-51.
         rank (str): The rank of the card (e.g., '2', '3', 'K', 'A').
         suit (str): The suit of the card (e.g., 'Hearts', 'Diamonds').
         value (int): The value of the card, assigned based on its rank.
     """
+    __slots__ = ("code",)
+
     def __init__(self, rank, suit):
-        self.rank = rank
-        self.suit = suit
-        self.value = assign_value(rank)
+        try:
+            self.code = _RANK_INDEX[rank] * 4 + _SUIT_INDEX[suit]
+        except KeyError as e:
+            raise ValueError(f"Invalid card: {rank} of {suit}") from e
+
+    @staticmethod
+    def from_code(code):
+        """Return the shared Card instance for a code.
+
+        Args:
+            code (int): The compact encoding of the card, 0-51.
+
+        Returns:
+            Card: The card with that code.
+        """
+        return CARDS[code]
+
+    @property
+    def rank(self):
+        """str: The rank of the card."""
+        return RANKS[self.code >> 2]
+
+    @property
+    def suit(self):
+        """str: The suit of the card."""
+        return SUITS[self.code & 3]
+
+    @property
+    def value(self):
+        """int: The value of the card, with aces counted as 11."""
+        return RANK_VALUES[self.code >> 2]
+
+    def __eq__(self, other):
+        if not isinstance(other, Card):
+            return NotImplemented
+        return self.code == other.code
+
+    def __hash__(self):
+        return self.code
 
     def __repr__(self):
         return f"{self.rank} of {self.suit}"
 
+# One shared instance per card, indexed by code
+CARDS = tuple(Card(rank, suit) for rank in RANKS for suit in SUITS)
+FULL_DECK = array("B", range(len(CARDS)))
+
 class Deck:
     """
     Represents a deck of cards, providing methods to shuffle and deal cards.
 
+    The deck is stored as a byte array of card codes, so building and
+    shuffling it never allocates Card objects.
+
     Attributes:
         suits (list): The four suits in a standard deck of cards.
         ranks (list): The thirteen ranks in a standard deck of cards.
-        cards (list): The list of Card objects in the deck.
+        codes (array): The card codes in the deck; the last one is dealt next.
+        cards (list): The Card objects in the deck, as a view of codes.
+        rng (random.Random): The random number generator used to shuffle.
     """
-    suits = ["Hearts", "Diamonds", "Clubs", "Spades"]
-    ranks = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+    __slots__ = ("rng", "codes")
+    suits = list(SUITS)
+    ranks = list(RANKS)
 
-    def __init__(self):
-        self.cards = [Card(rank, suit) for suit in self.suits for rank in self.ranks]
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random.Random()
+        self.codes = array("B", FULL_DECK)
         self.shuffle()
 
+    @property
+    def cards(self):
+        """list: The Card objects in the deck."""
+        return [CARDS[code] for code in self.codes]
+
+    @cards.setter
+    def cards(self, cards):
+        self.codes = array("B", [card.code for card in cards])
+
+    def __len__(self):
+        return len(self.codes)
+
     def shuffle(self):
-        """Shuffle the deck of cards."""
-        shuffle(self.cards)
+        """Shuffle the deck of cards with the deck's own random stream."""
+        self.rng.shuffle(self.codes)
 
     def deal(self):
         """Deal a card from the deck.
@@ -81,29 +195,284 @@ class Deck:
         Returns:
             Card: The dealt card, or None if the deck is empty.
         """
-        if self.cards:
-            return self.cards.pop()
+        if self.codes:
+            return CARDS[self.codes.pop()]
         return None
 
+class Shoe:
+    """
+    Represents a multi-deck shoe with a cut card, kept for the whole game.
+
+    Cards are dealt by advancing an index into a byte array of card codes, so
+    dealing is O(1) and nothing is allocated per round. Cards collected at the
+    end of a round go into a preallocated discard buffer. The shoe is only
+    reshuffled once the cut card has come out, between rounds.
+
+    Each shuffle is driven by a random stream derived from the shoe's seed and
+    the number of shuffles so far, so the order of the shoe can be rebuilt
+    from (seed, shuffles) alone.
+
+    Attributes:
+        num_decks (int): The number of decks in the shoe, 1-8.
+        penetration (float): The fraction of the shoe dealt before the cut card.
+        seed (int): The seed from which every shuffle is derived.
+        shuffles (int): The number of times the shoe has been shuffled.
+        codes (array): The card codes in dealing order.
+        position (int): The index of the next card to deal.
+        cut (int): The index of the cut card.
+        discards (array): The preallocated discard tray.
+        discarded (int): The number of cards in the discard tray.
+    """
+    __slots__ = (
+        "num_decks", "penetration", "seed", "shuffles", "codes", "position",
+        "cut", "discards", "discarded",
+    )
+    DEFAULT_DECKS = 6
+    DEFAULT_PENETRATION = 0.75
+    MAX_DECKS = 8
+
+    def __init__(self, num_decks=DEFAULT_DECKS, penetration=DEFAULT_PENETRATION, seed=None):
+        if not 1 <= num_decks <= self.MAX_DECKS:
+            raise ValueError(f"A shoe holds 1 to {self.MAX_DECKS} decks, not {num_decks}")
+        if not 0 < penetration <= 1:
+            raise ValueError(f"Penetration must be in (0, 1], not {penetration}")
+        self.num_decks = num_decks
+        self.penetration = penetration
+        self.seed = seed if seed is not None else random.SystemRandom().getrandbits(63)
+        self.shuffles = 0
+        self.codes = FULL_DECK * num_decks
+        self.cut = 0
+        self.discards = array("B", bytes(len(self.codes)))
+        self.discarded = 0
+        self.position = 0
+        self.shuffle()
+
+    @property
+    def cards(self):
+        """list: The Card objects left to deal, the next one last."""
+        return [CARDS[code] for code in reversed(self.codes[self.position:])]
+
+    @property
+    def remaining(self):
+        """int: The number of cards left to deal."""
+        return len(self.codes) - self.position
+
+    @property
+    def cut_card_reached(self):
+        """bool: Whether the cut card has come out."""
+        return self.position >= self.cut
+
+    def __len__(self):
+        return len(self.codes) - self.position
+
+    @staticmethod
+    def order(num_decks, seed, shuffle_index):
+        """Return the card codes of a full shoe after a given shuffle.
+
+        Args:
+            num_decks (int): The number of decks in the shoe.
+            seed (int): The shoe's seed.
+            shuffle_index (int): The number of shuffles before this one.
+
+        Returns:
+            array: The card codes in dealing order.
+        """
+        codes = FULL_DECK * num_decks
+        random.Random(f"{seed}:{shuffle_index}").shuffle(codes)
+        return codes
+
+    def shuffle(self):
+        """Gather every card and shuffle the full shoe."""
+        self.codes = self.order(self.num_decks, self.seed, self.shuffles)
+        self.shuffles += 1
+        self.position = 0
+        self.cut = int(len(self.codes) * self.penetration)
+        self.discarded = 0
+
+    def shuffle_if_needed(self):
+        """Shuffle the shoe if the cut card has come out.
+
+        Returns:
+            bool: True if the shoe was shuffled.
+        """
+        if self.position >= self.cut:
+            self.shuffle()
+            return True
+        return False
+
+    def deal_code(self):
+        """Deal the code of the next card.
+
+        Returns:
+            int: The code of the dealt card.
+
+        Raises:
+            ValueError: If the shoe is empty.
+        """
+        position = self.position
+        if position >= len(self.codes):
+            raise ValueError("The shoe is empty")
+        self.position = position + 1
+        return self.codes[position]
+
+    def deal(self):
+        """Deal a card from the shoe.
+
+        Returns:
+            Card: The dealt card.
+
+        Raises:
+            ValueError: If the shoe is empty.
+        """
+        return CARDS[self.deal_code()]
+
+    def discard(self, cards):
+        """Move cards from the table into the discard tray.
+
+        Args:
+            cards (list): The Card objects to discard.
+        """
+        discards = self.discards
+        count = self.discarded
+        for card in cards:
+            discards[count] = card.code
+            count += 1
+        self.discarded = count
+
+    def reshuffle_discards(self):
+        """Shuffle the discard tray back into the shoe mid-round.
+
+        Cards still in play stay on the table; only the tray is reused. The
+        tray is sorted before shuffling, so the new order depends on which
+        cards were discarded and not on the order they were collected in.
+
+        Returns:
+            bool: True if there were discards to reshuffle.
+        """
+        if not self.discarded:
+            return False
+        self.codes = array("B", sorted(self.discards[:self.discarded]))
+        random.Random(f"{self.seed}:{self.shuffles}").shuffle(self.codes)
+        self.shuffles += 1
+        self.position = 0
+        self.cut = 0  # Shuffle the full shoe before the next round
+        self.discarded = 0
+        return True
+
 class Player:
     """
     Represents a player in the game, holding their hand, bankroll, and current bet.
 
+    The hand's totals are kept up to date as cards are added, so reading the
+    hand value or whether it is soft, a pair or a blackjack is O(1). Cards
+    must be added with add_card (or the hand replaced by assigning to hand);
+    mutating the hand list in place bypasses the running totals.
+
     Attributes:
         name (str): The name of the player.
         hand (list): The list of Card objects in the player's hand.
         bankroll (int): The amount of money the player has.
         current_bet (int): The current bet placed by the player.
+        hard_total (int): The hand total with every ace counted as 1.
+        aces (int): The number of aces in the hand.
+        card_count (int): The number of cards in the hand.
     """
+    __slots__ = ("name", "_hand", "bankroll", "current_bet", "hard_total", "aces", "_pair_value")
+
     def __init__(self, name, starting_bankroll=1000):
         self.name = name
         self.hand = []
         self.bankroll = starting_bankroll
         self.current_bet = 0
 
+    @classmethod
+    def holding(cls, cards, name="Hand"):
+        """Create a player holding the given cards, e.g. to evaluate a hand.
+
+        Args:
+            cards (list): The Card objects to hold.
+            name (str): The name of the player.
+
+        Returns:
+            Player: A player whose hand is a copy of cards.
+        """
+        player = cls.__new__(cls)
+        player.name = name
+        player.bankroll = 0
+        player.current_bet = 0
+        player.hand = list(cards)
+        return player
+
+    @property
+    def hand(self):
+        """list: The Card objects in the player's hand."""
+        return self._hand
+
+    @hand.setter
+    def hand(self, cards):
+        self._hand = []
+        self.hard_total = 0
+        self.aces = 0
+        self._pair_value = None
+        for card in cards:
+            self.add_card(card)
+
     def add_card(self, card):
-        """Add a card to the player's hand."""
-        self.hand.append(card)
+        """Add a card to the player's hand, updating the totals in O(1)."""
+        hand = self._hand
+        hand.append(card)
+        value = card.value
+        if value == 11:
+            self.aces += 1
+            self.hard_total += 1
+        else:
+            self.hard_total += value
+        if len(hand) == 2 and hand[0].value == value:
+            self._pair_value = value
+        else:
+            self._pair_value = None
+
+    def clear_hand(self):
+        """Empty the player's hand and reset its totals.
+
+        Returns:
+            list: The cards that were in the hand.
+        """
+        cards = self._hand
+        self.hand = []
+        return cards
+
+    @property
+    def card_count(self):
+        """int: The number of cards in the hand."""
+        return len(self._hand)
+
+    @property
+    def is_soft(self):
+        """bool: Whether an ace in the hand is counted as 11."""
+        return self.aces > 0 and self.hard_total <= 11
+
+    @property
+    def total(self):
+        """int: The best total of the hand."""
+        if self.aces and self.hard_total <= 11:
+            return self.hard_total + 10
+        return self.hard_total
+
+    @property
+    def is_pair(self):
+        """bool: Whether the hand is two cards of the same value."""
+        return self._pair_value is not None
+
+    @property
+    def pair_value(self):
+        """int: The card value of a pair, or None if the hand is not a pair."""
+        return self._pair_value
+
+    @property
+    def is_blackjack(self):
+        """bool: Whether the hand is a two-card 21."""
+        return len(self._hand) == 2 and self.aces > 0 and self.hard_total == 11
 
     def hand_value(self):
         """Calculate the value of the player's hand.
@@ -111,7 +480,9 @@ class Player:
         Returns:
             int: The total value of the hand.
         """
-        return calculate_hand_value(self.hand)
+        if self.aces and self.hard_total <= 11:
+            return self.hard_total + 10
+        return self.hard_total
 
     def place_bet(self, amount):
         """Place a bet for the current round.
@@ -147,6 +518,8 @@ class Dealer(Player):
     Methods:
         play: The dealer's actions during their turn.
     """
+    __slots__ = ()
+
     def __init__(self):
         super().__init__("Dealer")
 
@@ -154,7 +527,7 @@ class Dealer(Player):
         """The dealer's actions during their turn.
 
         Args:
-            deck (Deck): The deck of cards used in the game.
+            deck (Shoe): The shoe or deck of cards used in the game.
         """
         while self.hand_value() < 17:
             self.add_card(deck.deal())
@@ -163,24 +536,147 @@ class Game:
     """
     Manages the flow of the game, including dealing cards, managing player actions, and determining outcomes.
 
+    A game is one table: 1 to MAX_SEATS seats dealt from the same shoe in
+    casino order, each with its own bankroll and bet, and a single dealer
+    turn once every seat has acted. Seats act in order; turn is the index of
+    the seat to act, or the number of seats once the round is settled.
+
     Attributes:
-        deck (Deck): The deck of cards used in the game.
-        player (Player): The player in the game.
+        deck (Shoe): The shoe of cards used in the game, kept across rounds.
+        seats (list): The Player in each seat, indexed by seat id.
+        player (Player): The player in seat 0.
         dealer (Dealer): The dealer in the game.
-        strategy (dict): The blackjack strategy loaded from a CSV file.
-        used_cards (list): The list of used cards in the game.
+        turn (int): The seat whose turn it is.
+        results (list): The result of each seat's round ('win', 'lose',
+            'draw' or 'surrender'), or None while it is unsettled.
+        in_round (bool): Whether a round has been dealt and a seat is still to
+            play it.
+        strategy (StrategyTable): The compiled blackjack strategy, shared by
+            every game in the process.
+        used_cards (list): The cards in the shoe's discard tray.
+        version (int): The store version the game was loaded at, or None for
+            a game that has not been loaded from the store.
+        counters (dict): The card counters of the shoe by counting system;
+            not encoded with the game, but kept by the game store for the
+            version they were read at (see GameStore.keep_counters).
+        actions (list): The letters of the playing actions each seat has
+            taken this round: 'H' hit, 'S' stand, 'D' double down and 'R'
+            surrender.
+        history (list): The hand records of the seats settled since the game
+            was created or loaded, while record_hands is on; not stored with
+            the game. See hand_record.
+        record_hands (bool): Whether settled seats are recorded in history;
+            turned on for the whole process by the hand history.
     """
-    def __init__(self):
-        self.deck = Deck()
-        self.player = Player("Player 1")
+    ACTIONS = ("bet", "deal", "hit", "stand", "double_down", "surrender")
+    MAX_SEATS = 7
+    # The move names of determine_best_move and their action letters
+    MOVE_LETTERS = {"Hit": "H", "Stand": "S", "Double Down": "D", "Surrender": "R"}
+    record_hands = False
+
+    def __init__(self, seed=None, num_decks=Shoe.DEFAULT_DECKS,
+                 penetration=Shoe.DEFAULT_PENETRATION, seats=1):
+        if not 1 <= seats <= self.MAX_SEATS:
+            raise ValueError(f"A table has 1 to {self.MAX_SEATS} seats, not {seats}")
+        self.deck = Shoe(num_decks, penetration, seed)
+        self.seats = [Player(f"Player {index + 1}") for index in range(seats)]
         self.dealer = Dealer()
-        self.strategy = self.load_strategy("../data/blackjack_strategy.csv")
-        self.used_cards = []
+        self.turn = 0
+        self.results = [None] * seats
+        self.strategy = get_strategy()
+        self.version = None
+        self.counters = {}
+        self.actions = [""] * seats
+        self.history = []
+
+    @property
+    def player(self):
+        """Player: The player in seat 0, the only seat of a single-seat game."""
+        return self.seats[0]
+
+    @property
+    def in_round(self):
+        """bool: Whether a round has been dealt and a seat is still to play it."""
+        return bool(self.dealer.hand) and self.turn < len(self.seats)
+
+    def get_seat(self, seat):
+        """Return the player in a seat.
+
+        Args:
+            seat (int): The seat id.
+
+        Returns:
+            Player: The player in the seat.
+
+        Raises:
+            ValueError: If the table has no such seat.
+        """
+        if not isinstance(seat, int) or not 0 <= seat < len(self.seats):
+            raise ValueError(f"No seat {seat} at this table")
+        return self.seats[seat]
+
+    def counter(self, system=None):
+        """Return the card counter of the game's shoe for a counting system.
+
+        Counters are created on first use and kept with the game; see
+        counting.CardCounter.
+
+        Args:
+            system (str): The counting system, 'hi-lo' if omitted.
+
+        Returns:
+            CardCounter: The counter, up to date with the shoe.
+
+        Raises:
+            ValueError: If there is no such counting system.
+        """
+        from .counting import DEFAULT_SYSTEM, CardCounter  # pylint: disable=C0415
+        system = system or DEFAULT_SYSTEM
+        counter = self.counters.get(system)
+        if counter is None or counter.shoe is not self.deck:
+            counter = self.counters[system] = CardCounter(self.deck, system)
+        return counter.sync()
+
+    def count(self, system=None):
+        """Return the count of the cards the players have seen, as JSON-ready data.
+
+        The dealer's hole card is left out of the count until the seats
+        have played.
+
+        Args:
+            system (str): The counting system, 'hi-lo' if omitted.
+
+        Returns:
+            dict: The counts, see CardCounter.to_dict.
+        """
+        hidden = ()
+        if self.in_round and self.dealer.card_count > 1:
+            hidden = [self.dealer.hand[1].code]
+        return self.counter(system).to_dict(hidden)
+
+    @property
+    def used_cards(self):
+        """list: The cards in the shoe's discard tray."""
+        return [CARDS[code] for code in self.deck.discards[:self.deck.discarded]]
+
+    def log_fields(self, event):
+        """Return the structured fields of a log record about this game.
+
+        Args:
+            event (str): The name of what happened, e.g. 'reshuffle'.
+
+        Returns:
+            dict: The fields, for the extra argument of a log call.
+        """
+        return {"event": event, "version": self.version}
 
     def load_strategy(self, filename):
         """
         Load blackjack strategy from a CSV file into a dictionary.
 
+        Games use the compiled, process-wide table from get_strategy; this
+        returns the raw chart for display or inspection.
+
         Args:
             filename (str): Path to the CSV file containing the strategy.
 
@@ -188,31 +684,24 @@ class Game:
             dict: Dictionary with player hands as keys and sub-dictionaries as values,
                 where each sub-dictionary maps dealer's card to an action.
         """
-        strategy = {}
-        with open(filename, mode="r", encoding="utf-8", newline="") as file:
-            reader = csv.reader(file)
-            headers = next(reader)[1:]  # Skip the first header for 'my_hand'
-
-            for row in reader:
-                hand = row[0]  # Player's hand (e.g., '8', '9', 'a2', 'd2')
-                actions = row[1:]
-                strategy[hand] = dict(zip(headers, actions))
-
-        return strategy
+        return load_strategy(filename)
 
     def start_new_round(self):
         """Start a new round of the game."""
         try:
-            self.player.current_bet = 0
-            self.deck = Deck()  # Reinitialize deck each round
-            self.player.hand = []
-            self.dealer.hand = []
+            for player in self.seats:
+                player.current_bet = 0
+            self.clear_table()
+            if self.deck.shuffle_if_needed():  # Only shuffle once the cut card is out
+                metrics.reshuffles.inc(("cut_card",))
             self.deal_initial_cards()
-        except ValueError as e:  # Assuming ValueError is raised from Deck on issues
-            logger.error("Failed to start a new round: %s", e)
+            metrics.rounds_started.inc()
+        except ValueError as e:  # Raised by the shoe when it runs out of cards
+            logger.error("Failed to start a new round: %s", e, extra=self.log_fields("deal_failed"))
             self.retry_start_new_round()
         except Exception as e:
-            logger.critical("Unexpected error starting a new round: %s", e)
+            logger.critical("Unexpected error starting a new round: %s", e,
+                            extra=self.log_fields("deal_error"))
             raise  # Re-raise to handle or log at a higher level
 
     def retry_start_new_round(self, attempts=3):
@@ -223,43 +712,65 @@ class Game:
         """
         for attempt in range(1, attempts + 1):
             try:
-                self.deck = Deck()  # Reinitialize deck each round
-                self.player.hand = []
-                self.dealer.hand = []
+                self.clear_table()
+                self.deck.shuffle()  # Start over from a freshly shuffled shoe
+                metrics.reshuffles.inc(("retry",))
                 self.deal_initial_cards()
+                metrics.rounds_started.inc()
                 break  # Break out of loop if successful
             except ValueError as e:
                 if attempt == attempts:
-                    logger.error("All retries failed. Unable to start a new round: %s", e)
+                    logger.error("All retries failed. Unable to start a new round: %s", e,
+                                 extra=self.log_fields("deal_retries_failed"))
                     raise ValueError("Failed to start new round after retries") from e
-                logger.warning("Retrying start of new round (%s/%s): %s", attempt, attempts, e)
+                logger.warning("Retrying start of new round (%s/%s): %s", attempt, attempts, e,
+                               extra=self.log_fields("deal_retry"))
+
+    def clear_table(self):
+        """Move every hand into the discard tray and empty them."""
+        for player in self.seats:
+            self.deck.discard(player.clear_hand())
+        self.deck.discard(self.dealer.clear_hand())
+        self.turn = 0
+        self.results = [None] * len(self.seats)
+        self.actions = [""] * len(self.seats)
 
     def deal_initial_cards(self):
-        """Deal initial cards to both player and dealer."""
+        """Deal initial cards in casino order: one to each seat, then the dealer, twice."""
         for _ in range(2):  # Dealing two cards each to start
-            self.player.add_card(self.deck.deal())
+            for player in self.seats:
+                player.add_card(self.deck.deal())
             self.dealer.add_card(self.deck.deal())
 
-    def player_turn(self):
-        """Manage the player's turn based on the strategy."""
+    def player_turn(self, seat=0):
+        """Manage a seat's turn based on the strategy.
+
+        Args:
+            seat (int): The seat to play.
+        """
+        player = self.get_seat(seat)
         dealer_card = self.dealer.hand[0] if self.dealer.hand else None
         if dealer_card:
-            action = self.determine_best_move(self.player.hand, dealer_card)
-            while action != "stand":
+            # Splitting is left to the player, so play pairs by their total
+            action = self.determine_best_move(player.hand, dealer_card, allow_split=False)
+            while True:
+                self.actions[seat] += self.MOVE_LETTERS[action]
+                if action == "Stand":
+                    break
                 try:
-                    if action == "hit":
-                        self.player.add_card(self.deck.deal())
+                    if action == "Hit":
+                        player.add_card(self.deck.deal())
                     elif action == "Double Down":
-                        if self.double_down(self.player.hand):
-                            self.player.add_card(self.deck.deal())
-                            break  # End turn after double down
+                        player.add_card(self.deck.deal())
+                        break  # End turn after double down
                     elif action == "Surrender":
-                        self.handle_surrender()
+                        self.handle_surrender(seat)
                         return
                 except ValueError as e:
-                    logger.error("Game Error: %s", e)
+                    logger.error("Game Error: %s", e, extra=self.log_fields("player_turn_error"))
                     break  # Stop the game or handle the empty deck situation
-                action = self.determine_best_move(self.player.hand, dealer_card)
+                action = self.determine_best_move(
+                    player.hand, dealer_card, allow_split=False)
 
     def dealer_play(self):
         """Manage the dealer's turn."""
@@ -267,69 +778,97 @@ class Game:
             while self.dealer.hand_value() < 17:
                 self.dealer.add_card(self.deck.deal())
         except ValueError as e:
-            logger.error("Game Error: %s", e)  # Log the error
+            logger.error("Game Error: %s", e, extra=self.log_fields("dealer_error"))
             self.handle_empty_deck()  # Call a method to manage the situation
 
     def handle_empty_deck(self):
         """Handle the situation when the deck is empty."""
-        # Option 1: Re-shuffle the deck
-        if len(self.used_cards) > 0:
-            self.deck.cards = self.used_cards
-            self.deck.shuffle()
-            logger.info("Deck was empty. Reshuffled the used cards into the deck.")
+        # Option 1: Re-shuffle the discard tray back into the shoe
+        if self.deck.reshuffle_discards():
+            metrics.reshuffles.inc(("empty_deck",))
+            logger.info("Deck was empty. Reshuffled the used cards into the deck.",
+                        extra=self.log_fields("reshuffle"))
         else:
             # Option 2: End the round and possibly the game if no cards are left
-            logger.info("No cards left to continue the game.")
+            logger.info("No cards left to continue the game.", extra=self.log_fields("shoe_empty"))
             self.end_round()
             # Consider signaling game over or resetting the game state
 
-    def determine_best_move(self, player_hand, dealer_card):
+    def determine_best_move(self, player_hand, dealer_card, allow_split=True):
         """Determine the best move based on the loaded blackjack strategy.
 
+        The move is a single lookup in the compiled strategy table; the
+        double down and surrender conditions are only checked when the chart
+        asks for them.
+
         Args:
             player_hand (list): The player's current hand.
             dealer_card (Card): The dealer's visible card.
+            allow_split (bool): Whether a pair may be split; otherwise pairs
+                are played by their total.
 
         Returns:
-            str: The best move ('hit', 'stand', 'Double Down', 'Surrender').
+            str: The best move ('Hit', 'Stand', 'Double Down', 'Surrender',
+                'Split').
         """
-        player_value = calculate_hand_value(player_hand)
-        soft_hand = any(card.rank == "A" for card in player_hand)
-        hand_key = (
-            f"a{player_value - 11}"
-            if soft_hand and player_value > 21
-            else str(player_value)
-        )
+        hand = self.hand_of(player_hand)
+        hard = hand.hard_total
+        soft = hand.aces > 0 and hard <= 11
+        total = hard + 10 if soft else hard
+        column = dealer_index(dealer_card.value)
+        cells = self.strategy.cells
+        width = len(DEALER_COLUMNS)
 
-        dealer_rank = dealer_card.rank
-        dealer_rank = "T" if dealer_rank in ["J", "Q", "K"] else dealer_card.rank
-        move = self.strategy.get(hand_key, {}).get(dealer_rank, "H")
+        move = NO_ACTION
+        if allow_split and hand.is_pair:
+            move = cells[hand_class(total, pair_value=hand.pair_value) * width + column]
+        if move == NO_ACTION:
+            move = cells[hand_class(total, soft) * width + column]
 
         # Interpretation of moves when multiple options are given, e.g., 'DH' or 'RH'
-        if "D" in move and self.double_down(player_hand):
-            move = "Double Down"
-        elif "R" in move and self.surrender(player_hand, dealer_card):
-            move = "Surrender"
-        elif "D" in move or "R" in move:  # Handle cases where double down or surrender is not possible
-            move = "Hit"  # Default to 'Hit' if double down or surrender not possible
-        elif move == "S":
-            move = "Stand"
-        elif move == "H":
-            move = "Hit"
-
-        return move
+        if move in (Action.DOUBLE_HIT, Action.DOUBLE_STAND):
+            if self.double_down(hand):
+                return "Double Down"
+            return "Hit" if move == Action.DOUBLE_HIT else "Stand"
+        if move == Action.SURRENDER_HIT:
+            return "Surrender" if self.surrender(hand, dealer_card) else "Hit"
+        if move in (Action.SPLIT, Action.SPLIT_DAS):
+            return "Split"
+        return "Stand" if move == Action.STAND else "Hit"
+
+    def hand_of(self, hand):
+        """Return a Player holding hand, reusing the game's players when possible.
+
+        Hands that belong to a seat or the dealer carry running totals; any
+        other list of cards is evaluated once.
+
+        Args:
+            hand (list or Player): A list of cards, or a Player.
+
+        Returns:
+            Player: A player whose totals describe the hand.
+        """
+        if isinstance(hand, Player):
+            return hand
+        for player in self.seats:
+            if hand is player.hand:
+                return player
+        if hand is self.dealer.hand:
+            return self.dealer
+        return Player.holding(hand)
 
     def double_down(self, hand):
         """Determine if the player can double down based on their hand.
 
         Args:
-            hand (list): The player's current hand.
+            hand (list or Player): The player's current hand.
 
         Returns:
             bool: True if the player can double down, False otherwise.
         """
-        total = calculate_hand_value(hand)
-        has_ace = any(card.rank == "A" for card in hand)
+        hand = self.hand_of(hand)
+        total = hand.total
+        has_ace = hand.aces > 0
 
         # Total 9, 10, or 11 without an ace
         if total in [9, 10, 11] and not has_ace:
@@ -342,52 +881,249 @@ class Game:
     def surrender(self, plyr_hand, dealer_card):
         """Determine if the player can surrender based on their hand and the dealer's card.
 
+        The rule is surrender_allowed, which the round simulator follows too.
+
         Args:
-            plyr_hand (list): The player's current hand.
+            plyr_hand (list or Player): The player's current hand.
             dealer_card (Card): The dealer's visible card.
 
         Returns:
             bool: True if the player should surrender, False otherwise.
         """
-        player_value = calculate_hand_value(plyr_hand)
-        dealer_rank = (
-            dealer_card.rank if dealer_card.rank not in ["J", "Q", "K"] else "10"
-        )
+        plyr_hand = self.hand_of(plyr_hand)
+        return surrender_allowed(plyr_hand.total, plyr_hand.is_soft, dealer_card.value,
+                                 plyr_hand.pair_value)
 
-        # Convert ace to '10' if needed for simplicity
-        if dealer_rank == "A":
-            dealer_rank = "10"
+    def end_round(self):
+        """End the current round and settle every seat that is not settled yet."""
+        dealer_score = self.dealer.hand_value()
+        for seat, player in enumerate(self.seats):
+            if self.results[seat] is not None:
+                continue
+            player_score = player.hand_value()
+            result = "draw"
+            if player_score > 21 or (dealer_score <= 21 and dealer_score > player_score):
+                result = "lose"
+            elif dealer_score > 21 or player_score > dealer_score:
+                result = "win"
+            self.resolve_bets(result, seat)
+        self.turn = len(self.seats)
 
-        # Check if the player's hand meets the criteria for surrendering
-        if player_value == 16 and dealer_rank in ["9", "10", "A"]:
-            # Ensure not to surrender if the hand consists of two 8s (split is preferable)
-            if len(plyr_hand) == 2 and all(card.rank == "8" for card in plyr_hand):
-                return False
-            return True
-        elif player_value == 15 and dealer_rank == "10":
-            return True
+    def handle_surrender(self, seat=0):
+        """Adjust a seat's bankroll when they surrender.
 
-        return False
+        Args:
+            seat (int): The seat that surrenders.
+        """
+        self.resolve_bets("surrender", seat)
 
-    def end_round(self):
-        """End the current round and determine the outcome."""
-        player_score = self.player.hand_value()
-        dealer_score = self.dealer.hand_value()
-        result = "draw"
-        if player_score > 21 or (dealer_score <= 21 and dealer_score > player_score):
-            result = "lose"
-        elif dealer_score > 21 or player_score > dealer_score:
-            result = "win"
-        self.resolve_bets(result)
-
-    def handle_surrender(self):
-        """Adjust the player's bankroll when they surrender."""
-        self.player.adjust_bankroll("surrender")
-
-    def resolve_bets(self, result):
-        """Adjust the player's bankroll based on the result of the round.
+    def resolve_bets(self, result, seat=0):
+        """Adjust a seat's bankroll based on the result of the round.
 
         Args:
             result (str): The result of the round ('win', 'lose', 'surrender').
+            seat (int): The seat to settle.
+
+        Raises:
+            ValueError: If the seat's round is already settled.
+        """
+        if self.results[seat] is not None:
+            raise ValueError(f"Seat {seat} is already settled this round")
+        player = self.seats[seat]
+        bankroll = player.bankroll
+        player.adjust_bankroll(result)
+        self.results[seat] = result
+        if self.record_hands:
+            self.history.append(self.hand_record(seat, player.bankroll - bankroll))
+        metrics.outcomes.inc((result,))
+        if None not in self.results:  # The round is finished once its last seat is settled
+            metrics.rounds_finished.inc()
+
+    def chart_move(self, cards, dealer_card, first=True):
+        """Return the move the chart makes with a hand, as this game allows it.
+
+        Pairs are played by their total, as splitting is left to the player,
+        and doubling down and surrender are only offered as the first move.
+
+        Args:
+            cards (list): The cards of the hand.
+            dealer_card (Card): The dealer's visible card.
+            first (bool): Whether the hand is still on its first two cards.
+
+        Returns:
+            str: 'Hit', 'Stand', 'Double Down' or 'Surrender'.
+        """
+        hand = Player.holding(cards)
+        move = self.determine_best_move(hand, dealer_card, allow_split=False)
+        if first or move in ("Hit", "Stand"):
+            return move
+        cell = self.strategy.lookup(hand_class(hand.total, hand.is_soft),
+                                    dealer_index(dealer_card.value))
+        return "Stand" if cell == Action.DOUBLE_STAND else "Hit"
+
+    def hand_record(self, seat, net):
+        """Describe a seat's settled round for the hand history.
+
+        The strategy cell is the chart row of the seat's first two cards
+        against the dealer's up-card. Each of the seat's actions is a
+        decision, and a deviation when it is not the move of chart_move.
+
+        Args:
+            seat (int): The settled seat.
+            net (float): The change in the seat's bankroll.
+
+        Returns:
+            dict: The seat, player name, card codes of the hand and the
+                dealer's hand, up-card value, strategy cell ('hand_key') and
+                its chart code, actions, decisions, deviations, initial bet,
+                net, result in initial bets ('units'), result and time.
+        """
+        player = self.seats[seat]
+        actions = self.actions[seat]
+        result = self.results[seat]
+        doubled = "D" in actions
+        up = self.dealer.hand[0] if self.dealer.hand else None
+        key = chart_action = None
+        deviations = 0
+        if up is not None and player.card_count >= 2:
+            first = Player.holding(player.hand[:2])
+            row = hand_class(first.total, first.is_soft)
+            key = hand_key(row)
+            chart_action = Action(self.strategy.lookup(row, dealer_index(up.value))).code
+            cards = 2
+            for index, letter in enumerate(actions):
+                move = self.chart_move(player.hand[:cards], up, first=index == 0)
+                deviations += self.MOVE_LETTERS[move] != letter
+                cards += letter in "HD"
+        return {
+            "seat": seat,
+            "player": player.name,
+            "cards": [card.code for card in player.hand],
+            "dealer_cards": [card.code for card in self.dealer.hand],
+            "up_card": None if up is None else up.value,
+            "hand_key": key,
+            "chart_action": chart_action,
+            "actions": actions,
+            "decisions": len(actions),
+            "deviations": deviations,
+            "bet": player.current_bet / 2 if doubled else player.current_bet,
+            "net": net,
+            "units": RESULT_UNITS[result] * (2 if doubled else 1),
+            "result": result,
+            "played_at": time.time(),
+        }
+
+    def next_turn(self):
+        """Pass the turn to the next seat, or play the dealer once every seat has acted.
+
+        The dealer only draws if some seat still has a live hand; the round
+        is then settled for every seat at once.
+        """
+        self.turn += 1
+        if self.turn < len(self.seats):
+            return
+        if any(result is None and player.total <= 21
+               for player, result in zip(self.seats, self.results)):
+            self.dealer_play()
+        self.end_round()
+
+    def apply_action(self, action, amount=None, seat=0):
+        """Apply one player action, as sent by the client.
+
+        Betting is open to any seat between rounds and 'deal' starts a round
+        for the whole table once every seat of the last one is settled; the
+        playing actions are only accepted from the seat whose turn it is.
+
+        Args:
+            action (str): One of ACTIONS: 'bet', 'deal', 'hit', 'stand',
+                'double_down' or 'surrender'.
+            amount (int): The amount to bet, for 'bet' only.
+            seat (int): The seat the action is for.
+
+        Raises:
+            ValueError: If the action is unknown, the seat does not exist, or
+                the action is not allowed now.
+        """
+        if action not in self.ACTIONS:
+            raise ValueError(f"Invalid action: {action}")
+        player = self.get_seat(seat)
+        if action in ("bet", "deal") and self.in_round:
+            raise ValueError(f"Wait for the round to be settled to {action}")
+        if action == "bet":
+            player.place_bet(amount)
+            return
+        if action == "deal":
+            bets = [player.current_bet for player in self.seats]
+            self.start_new_round()
+            for player, bet in zip(self.seats, bets):
+                player.current_bet = bet  # The bets placed before the deal ride
+            return
+        if not self.in_round:
+            raise ValueError("No round in progress; deal one first")
+        if self.turn != seat:
+            raise ValueError(f"It is seat {self.turn}'s turn")
+        if action == "hit":
+            if player.total >= 21:
+                raise ValueError("The hand cannot take another card")
+            self.actions[seat] += "H"
+            player.add_card(self.deck.deal())
+            if player.total >= 21:
+                self.next_turn()
+        elif action == "stand":
+            self.actions[seat] += "S"
+            self.next_turn()
+        elif action == "double_down":
+            if not self.double_down(player) or player.card_count != 2:
+                raise ValueError("Double down not allowed at this stage")
+            if player.current_bet * 2 > player.bankroll:
+                raise ValueError("Not enough bankroll to double down")
+            self.actions[seat] += "D"
+            player.current_bet *= 2
+            player.add_card(self.deck.deal())
+            self.next_turn()
+        else:
+            if player.card_count != 2:
+                raise ValueError("Surrender is only allowed on the first two cards")
+            self.actions[seat] += "R"
+            self.handle_surrender(seat)
+            self.next_turn()
+
+    def serialize(self):
+        """Return the state shown to the client, as JSON-ready data.
+
+        While the seats are playing, the dealer's hole card is sent as None
+        and the dealer's total is left out, as in count.
+
+        Returns:
+            dict: The version, each seat keyed by its id as a string with its
+                hand, total, bankroll, bet and result, the seat whose turn it
+                is, the dealer's hand and total and the cards left in the shoe.
         """
-        self.player.adjust_bankroll(result)
+        dealer = [repr(card) for card in self.dealer.hand]
+        dealer_total = self.dealer.total
+        if self.in_round:
+            dealer[1:] = [None] * (len(dealer) - 1)
+            dealer_total = None
+        return {
+            "version": self.version,
+            "turn": self.turn,
+            "seats": {
+                str(seat): {
+                    "name": player.name,
+                    "hand": [repr(card) for card in player.hand],
+                    "total": player.total,
+                    "bankroll": player.bankroll,
+                    "bet": player.current_bet,
+                    "result": result,
+                }
+                for seat, (player, result) in enumerate(zip(self.seats, self.results))
+            },
+            "dealer": {
+                "hand": dealer,
+                "total": dealer_total,
+            },
+            "shoe": {
+                "remaining": self.deck.remaining,
+                "shuffles": self.deck.shuffles,
+            },
+        }
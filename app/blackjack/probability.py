@@ -0,0 +1,228 @@
+"""blackjack/probability.py
+
+This module computes the exact distribution of the dealer's final total
+under the game's rule that the dealer draws to 17 and stands on all 17s
+(see Dealer.play).
+
+The distribution depends on the dealer's up-card and the cards left in the
+shoe. The shoe is described by a composition: the counts of the ten card
+values, ace first and ten-valued cards last. Compositions are packed into a
+single integer key, one byte per value, so drawing a card is a subtraction
+and memoizing on the composition hashes one int. Results are held in bounded
+LRU caches, so repeated queries against the same shoe are nearly free.
+
+An infinite-deck fast path covers the case where card removal is ignored.
+
+Functions:
+    full_shoe_counts: The composition of a complete shoe.
+    shoe_counts: The composition of the cards left in a Shoe.
+    composition_key: Packs a composition into an integer key.
+    composition_counts: Unpacks a key into a composition.
+    dealer_probabilities: The dealer's final-total distribution.
+    dealer_distribution: The same distribution as a dictionary.
+    cache_info: Hit and miss statistics of the caches.
+    clear_cache: Empties the caches.
+"""
+
+from functools import lru_cache
+
+from .models import CARDS
+
+# Outcome order of every distribution returned by this module
+OUTCOMES = ("17", "18", "19", "20", "21", "bust", "blackjack")
+BUST = 5
+BLACKJACK = 6
+
+# Composition order: ace, 2-9, ten-valued cards
+VALUES = (1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+INFINITE_DECK = (4, 4, 4, 4, 4, 4, 4, 4, 4, 16)
+
+CACHE_SIZE = 1 << 17
+BITS = 8
+MASK = (1 << BITS) - 1
+SHIFTS = tuple(index * BITS for index in range(len(VALUES)))
+UNITS = tuple(1 << shift for shift in SHIFTS)
+_STANDING = tuple(
+    tuple(1.0 if index == total - 17 else 0.0 for index in range(BUST + 1))
+    for total in range(17, 22)
+)
+_BUSTED = tuple(1.0 if index == BUST else 0.0 for index in range(BUST + 1))
+
+
+def full_shoe_counts(num_decks=1):
+    """Return the composition of a complete shoe of num_decks decks."""
+    return tuple(count * num_decks for count in INFINITE_DECK)
+
+
+def shoe_counts(shoe):
+    """
+    Return the composition of the cards left to deal in a shoe.
+
+    Args:
+        shoe (Shoe): The shoe to inspect.
+
+    Returns:
+        tuple: Counts of aces, 2-9 and ten-valued cards.
+    """
+    counts = [0] * len(VALUES)
+    for code in shoe.codes[shoe.position:]:
+        value = CARDS[code].value
+        counts[0 if value == 11 else value - 1] += 1
+    return tuple(counts)
+
+
+def composition_key(counts):
+    """Pack a composition into an integer key, one byte per card value."""
+    key = 0
+    for count, shift in zip(counts, SHIFTS):
+        if not 0 <= count <= MASK:
+            raise ValueError(f"Card counts must be between 0 and {MASK}")
+        key |= count << shift
+    return key
+
+
+def composition_counts(key):
+    """Unpack an integer key into a composition."""
+    return tuple((key >> shift) & MASK for shift in SHIFTS)
+
+
+def value_index(value):
+    """Return the composition index of a card value (ace as 1 or 11)."""
+    return 0 if value in (1, 11) else value - 1
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _finish(hard, has_ace, key, remaining):
+    """
+    Distribution of the dealer's final total from a hand of two or more cards.
+
+    Args:
+        hard (int): The hand total with aces counted as 1.
+        has_ace (bool): Whether the hand holds an ace.
+        key (int): The composition key of the cards left.
+        remaining (int): The number of cards left.
+
+    Returns:
+        tuple: Probabilities of 17-21 and bust.
+    """
+    total = hard + 10 if has_ace and hard <= 11 else hard
+    if total > 21:
+        return _BUSTED
+    if total >= 17:
+        return _STANDING[total - 17]
+    if remaining == 0:
+        raise ValueError("The shoe ran out while the dealer was drawing")
+    result = [0.0] * (BUST + 1)
+    for index in range(len(VALUES)):
+        count = (key >> SHIFTS[index]) & MASK
+        if not count:
+            continue
+        weight = count / remaining
+        branch = _finish(hard + index + 1, has_ace or index == 0,
+                         key - UNITS[index], remaining - 1)
+        for outcome in range(BUST + 1):
+            result[outcome] += weight * branch[outcome]
+    return tuple(result)
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _from_up_card(up_index, key, peek):
+    """Distribution of the dealer's result from the up-card, drawing the hole card."""
+    counts = composition_counts(key)
+    remaining = sum(counts)
+    result = [0.0] * len(OUTCOMES)
+    natural = 9 if up_index == 0 else 0 if up_index == 9 else None
+    total_weight = 0.0
+    for index, count in enumerate(counts):
+        if not count:
+            continue
+        weight = count / remaining
+        if index == natural:
+            if not peek:
+                result[BLACKJACK] += weight
+                total_weight += weight
+            continue
+        total_weight += weight
+        branch = _finish(up_index + 1 + index + 1, up_index == 0 or index == 0,
+                         key - UNITS[index], remaining - 1)
+        for outcome in range(BUST + 1):
+            result[outcome] += weight * branch[outcome]
+    if peek and total_weight:
+        result = [probability / total_weight for probability in result]
+    return tuple(result)
+
+
+@lru_cache(maxsize=None)
+def _infinite_finish(hard, has_ace):
+    """Distribution of the dealer's final total with an infinite deck."""
+    total = hard + 10 if has_ace and hard <= 11 else hard
+    if total > 21:
+        return _BUSTED
+    if total >= 17:
+        return _STANDING[total - 17]
+    result = [0.0] * (BUST + 1)
+    for index, count in enumerate(INFINITE_DECK):
+        branch = _infinite_finish(hard + index + 1, has_ace or index == 0)
+        for outcome in range(BUST + 1):
+            result[outcome] += count / 52 * branch[outcome]
+    return tuple(result)
+
+
+@lru_cache(maxsize=None)
+def _infinite_from_up_card(up_index, peek):
+    """Distribution of the dealer's result from the up-card with an infinite deck."""
+    result = [0.0] * len(OUTCOMES)
+    natural = 9 if up_index == 0 else 0 if up_index == 9 else None
+    total_weight = 0.0
+    for index, count in enumerate(INFINITE_DECK):
+        weight = count / 52
+        if index == natural:
+            if not peek:
+                result[BLACKJACK] += weight
+                total_weight += weight
+            continue
+        total_weight += weight
+        branch = _infinite_finish(up_index + 1 + index + 1, up_index == 0 or index == 0)
+        for outcome in range(BUST + 1):
+            result[outcome] += weight * branch[outcome]
+    if peek:
+        result = [probability / total_weight for probability in result]
+    return tuple(result)
+
+
+def dealer_probabilities(up_value, counts=None, peek=False):
+    """
+    Compute the distribution of the dealer's final result.
+
+    Args:
+        up_value (int): The value of the dealer's up-card (2-11, ace as 11,
+            or 1 for an ace).
+        counts (tuple): The composition of the cards left to deal, not
+            including the up-card, or None for an infinite deck.
+        peek (bool): Whether the dealer has already checked for blackjack,
+            in which case the result is conditioned on no dealer blackjack.
+
+    Returns:
+        tuple: Probabilities in OUTCOMES order: 17, 18, 19, 20, 21, bust and
+            blackjack.
+    """
+    up_index = value_index(up_value)
+    if counts is None:
+        return _infinite_from_up_card(up_index, peek)
+    return _from_up_card(up_index, composition_key(counts), peek)
+
+
+def dealer_distribution(up_value, counts=None, peek=False):
+    """Return dealer_probabilities as a dictionary keyed by outcome name."""
+    return dict(zip(OUTCOMES, dealer_probabilities(up_value, counts, peek)))
+
+
+def cache_info():
+    """Return the lru_cache statistics of the composition caches."""
+    return {"hands": _finish.cache_info(), "up_cards": _from_up_card.cache_info()}
+
+
+def clear_cache():
+    """Empty the composition caches."""
+    _finish.cache_clear()
+    _from_up_card.cache_clear()
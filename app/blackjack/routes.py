@@ -6,21 +6,54 @@ Returns:
     Various types based on the routes, primarily dealing with game state and player actions.
 """
 
+import hmac
+import logging
+
 from flask import (
     Blueprint,
+    Response,
+    current_app,
     render_template,
     redirect,
     url_for,
     request,
     flash,
     jsonify,
+    session,
+    stream_with_context,
+)
+from .advice import advise
+from .export import (
+    FORMATS,
+    HISTORY_COLUMNS,
+    SIMULATION_COLUMNS,
+    encode_rows,
+    history_rows,
+    simulation_rows,
 )
+from .history import cell_stats, hand_history, player_stats
 from .models import Game
-from ..utils import save_game_state, load_game_state, setup_logging
+from .simulation import CHUNK_ROUNDS, Rules
+from .store import StaleGameError, game_store
+from ..utils import (
+    diff_state,
+    save_game_state,
+    load_game_state,
+    seat_token,
+    update_game_state,
+)
 
-logger = setup_logging()
+logger = logging.getLogger('BlackjackGame')
+MAX_BATCH_ACTIONS = 32
+DEFAULT_EXPORT_MAX_ROUNDS = 1_000_000
 blackjack_bp = Blueprint("blackjack", __name__, template_folder="templates")
 
+@blackjack_bp.errorhandler(StaleGameError)
+def stale_game(error):
+    """Reject a request that lost a race with another request on the same game."""
+    logger.info("Rejected concurrent update: %s", error, extra={"event": "stale_save"})
+    return jsonify({"error": "The game changed during this request, please reload"}), 409
+
 @blackjack_bp.route("/")
 def index():
     """Render the index page."""
@@ -28,28 +61,33 @@ def index():
 
 @blackjack_bp.route("/start", methods=["POST"])
 def start_game():
-    """Start a new game and save it to the session."""
-    game = Game()  # Create a new game instance
-    game.start_new_round()  # Start a new round
+    """Start a new game, at a table with the posted number of seats, and save it to the session.
+
+    No cards are dealt: the seats bet first, then deal the first round.
+    """
+    try:
+        game = Game(seats=request.form.get("seats", 1, type=int))
+    except ValueError as e:
+        flash(str(e))
+        return redirect(url_for("blackjack.index"))
     save_game_state(game)  # Save game instance to session
     return redirect(url_for("blackjack.game_status"))
 
 @blackjack_bp.route("/bet", methods=["POST"])
 def place_bet():
-    """Place a bet for the current game."""
-    game = load_game_state()
-    if not game:
-        flash("Start a new game before betting.")
-        return redirect(url_for("blackjack.index"))
-
+    """Place a bet for a seat, seat 0 unless the form names one."""
     bet = request.form.get("bet", type=int)
+    seat = request.form.get("seat", 0, type=int)
     try:
-        game.player.place_bet(bet)
-        save_game_state(game)
-        return redirect(url_for("blackjack.game_status"))
+        # Setting the bet is safe to repeat, so a conflicting save is retried
+        game = update_game_state(lambda game: game.apply_action("bet", bet, seat))
     except ValueError as e:
         flash(str(e))
         return redirect(url_for("blackjack.index"))
+    if not game:
+        flash("Start a new game before betting.")
+        return redirect(url_for("blackjack.index"))
+    return redirect(url_for("blackjack.game_status"))
 
 @blackjack_bp.route("/game_status")
 def game_status():
@@ -60,58 +98,283 @@ def game_status():
         return redirect(url_for("blackjack.index"))
     return render_template("status.html", game=game)
 
-@blackjack_bp.route("/action/<action>", methods=["POST"])
-def handle_action(action):
-    """Handle player actions like hit, stand, double down, split, and surrender."""
+@blackjack_bp.route("/action/<action>", methods=["POST"], defaults={"seat": 0})
+@blackjack_bp.route("/seats/<int:seat>/action/<action>", methods=["POST"])
+def handle_action(action, seat):
+    """Apply one action for a seat, seat 0 for /action, as a batch of one.
+
+    The action goes through Game.apply_action like those of /actions, so it
+    is refused outside a dealt round or out of turn; a bet takes its amount
+    from the "amount" form field.
+    """
+    if action not in Game.ACTIONS:
+        return jsonify({"error": f"Invalid action: {action}", "index": 0}), 400
     game = load_game_state()
     if not game:
         return jsonify({"error": "No game in progress"}), 400
 
+    item = {"action": action, "amount": request.form.get("amount", type=int)}
+    failure = apply_batch(game, [item], seat)
+    if failure:
+        return jsonify(failure), 400
+    save_game_state(game)
+    return jsonify({"message": f"Performed {action}", "game": game.serialize()})
+
+def apply_batch(game, actions, seat, own_seat_only=False):
+    """
+    Apply a list of actions to a game, stopping at the first that fails.
+
+    Args:
+        game (Game): The game.
+        actions (list): Action names or objects such as
+            {"action": "bet", "amount": 10, "seat": 1}.
+        seat (int): The seat of actions that do not name one.
+        own_seat_only (bool): Refuse actions that name any other seat, as
+            a live connection acts for its own seat alone.
+
+    Returns:
+        dict: The error and index of the failed action, or None if every
+            action was applied.
+    """
+    for index, item in enumerate(actions):
+        if isinstance(item, str):
+            item = {"action": item}
+        try:
+            if not isinstance(item, dict):
+                raise ValueError("Each action must be a name or an object")
+            if own_seat_only and item.get("seat", seat) != seat:
+                raise ValueError(f"This connection only acts for seat {seat}")
+            game.apply_action(item.get("action"), item.get("amount"), item.get("seat", seat))
+        except (TypeError, ValueError) as e:
+            return {"error": str(e), "index": index}
+    return None
+
+@blackjack_bp.route("/actions", methods=["POST"], defaults={"seat": 0})
+@blackjack_bp.route("/seats/<int:seat>/actions", methods=["POST"])
+def batch_actions(seat):
+    """Apply an ordered list of actions with one load and one save.
+
+    The JSON body holds "actions", a list of action names or objects such as
+    {"action": "bet", "amount": 10}, and optionally "since", the state
+    version the client last saw. The batch is all or nothing: if an action
+    fails, nothing is saved. When "since" matches the version the batch was
+    applied to, the response carries only the changed parts of the state as
+    "delta"; otherwise it carries the full "state". An empty list just
+    fetches the state.
+
+    Actions are for the seat in the URL, seat 0 for /actions, unless an
+    action object names another with "seat".
+    """
+    payload = request.get_json(silent=True) or {}
+    actions = payload.get("actions", [])
+    if not isinstance(actions, list) or len(actions) > MAX_BATCH_ACTIONS:
+        return jsonify({"error": f"actions must be a list of at most {MAX_BATCH_ACTIONS}"}), 400
+    game = load_game_state()
+    if not game:
+        return jsonify({"error": "No game in progress"}), 400
+
+    before = game.serialize()
+    failure = apply_batch(game, actions, seat)
+    if failure:
+        return jsonify(failure), 400
+    if actions:
+        save_game_state(game)
+
+    after = game.serialize()
+    if payload.get("since") is not None and payload.get("since") == before["version"]:
+        return jsonify({"version": game.version, "delta": diff_state(before, after)})
+    return jsonify({"version": game.version, "state": after})
+
+@blackjack_bp.route("/seats/<int:seat>/live")
+def live_url(seat):
+    """Return the WebSocket URL on which a seat of the session's game is pushed live.
+
+    The URL carries the game id and a token for this seat alone (see
+    seat_token), so it is only handed to the session that owns the game.
+    """
+    port = current_app.config.get("LIVE_TABLES_PORT")
+    game = load_game_state()
+    if not port:
+        return jsonify({"error": "Live tables are not enabled"}), 404
+    if not game:
+        return jsonify({"error": "No game in progress"}), 400
     try:
-        if action == "hit":
-            game.player.add_card(game.deck.deal())
-        elif action == "stand":
-            # Stand logic can be handled in the game class, e.g., game.player.stand()
-            pass
-        elif action == "double_down":
-            if game.double_down(game.player.hand):
-                game.player.add_card(game.deck.deal())
-        elif action == "split":
-            if game.player.can_split():
-                game.player.split()
-        elif action == "surrender":
-            game.handle_surrender()
-        else:
-            return jsonify({"error": "Invalid action"}), 400
-
-        save_game_state(game)  # Save changes to session
-        return jsonify(
-            {"message": f"Performed {action}", "game": game.serialize()}
-        )
+        game.get_seat(seat)
     except ValueError as e:
         return jsonify({"error": str(e)}), 400
+    host = current_app.config.get("LIVE_TABLES_PUBLIC_HOST") or request.host.split(":")[0]
+    game_id = session["game_id"]
+    token = seat_token(current_app.secret_key, game_id, seat)
+    return jsonify({"url": f"ws://{host}:{port}/tables/{game_id}/seats/{seat}?token={token}"})
 
-@blackjack_bp.route("/double_down", methods=["POST"])
-def double_down():
-    """Handle double down action."""
+@blackjack_bp.route("/count")
+def count():
+    """Return the card count of the session's game in the system named by ?system=.
+
+    The counter is kept by the game store, so the next request only counts
+    the cards dealt since this one.
+    """
     game = load_game_state()
-    if not game or not game.double_down(game.player.hand):
-        flash("Double down not allowed at this stage.")
-        return redirect(url_for("blackjack.game_status"))
+    if not game:
+        return jsonify({"error": "No game in progress"}), 400
 
-    game.player.place_bet(game.player.current_bet)  # Double the bet
-    game.player.add_card(game.deck.deal())
-    save_game_state(game)
-    return redirect(url_for("blackjack.game_status"))
+    try:
+        counts = game.count(request.args.get("system"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    game_store.keep_counters(session["game_id"], game)
+    return jsonify(counts)
 
-@blackjack_bp.route("/split", methods=["POST"])
-def split():
-    """Handle split action."""
+@blackjack_bp.route("/advice", defaults={"seat": 0})
+@blackjack_bp.route("/seats/<int:seat>/advice")
+def advice(seat):
+    """Return the expected value of each action for a seat's current hand."""
     game = load_game_state()
-    if not game or not game.player.can_split():
-        flash("Cannot split at this time.")
-        return redirect(url_for("blackjack.game_status"))
+    if not game:
+        return jsonify({"error": "No game in progress"}), 400
+
+    try:
+        return jsonify(advise(game, seat=seat))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+def history_enabled():
+    """Return an error response if the hand history is off, and wake its writer."""
+    if hand_history.app is None:
+        return jsonify({"error": "Hand history is not enabled"}), 404
+    hand_history.wake()  # Write the rounds just played soon, off this thread
+    return None
+
+@blackjack_bp.route("/history/players")
+def history_players():
+    """Return the win rate and net result of each seat of the session's game.
+
+    ?since= limits them to the hands settled since a Unix time.
+    """
+    error = history_enabled()
+    if error:
+        return error
+    if session.get("game_id") is None:
+        return jsonify({"error": "No game in progress"}), 400
+    stats = player_stats(session["game_id"], request.args.get("since", type=float))
+    return jsonify({"seats": [
+        {key: seat[key] for key in ("seat", "player", "rounds", "wins", "losses", "pushes",
+                                    "surrenders", "win_rate", "net", "units_per_round")}
+        for seat in stats
+    ]})
+
+@blackjack_bp.route("/history/deviations")
+def history_deviations():
+    """Return how often the session's seats, and every player, left the strategy chart.
+
+    ?since= limits the seats to the hands settled since a Unix time.
+    """
+    error = history_enabled()
+    if error:
+        return error
+    if session.get("game_id") is None:
+        return jsonify({"error": "No game in progress"}), 400
+    stats = player_stats(session["game_id"], request.args.get("since", type=float))
+    cells = cell_stats()
+    decisions = sum(cell["decisions"] for cell in cells)
+    deviations = sum(cell["deviations"] for cell in cells)
+    return jsonify({
+        "seats": [{key: seat[key] for key in ("seat", "player", "decisions", "deviations",
+                                               "deviation_rate")} for seat in stats],
+        "overall": {"decisions": decisions, "deviations": deviations,
+                    "deviation_rate": deviations / decisions if decisions else 0.0},
+    })
+
+@blackjack_bp.route("/history/ev")
+def history_ev():
+    """Return the results and EV of every strategy cell, over every game.
+
+    ?hand= (a chart row such as 16 or a7) and ?up= (a dealer up-card value,
+    2-11) select one row or column.
+    """
+    error = history_enabled()
+    if error:
+        return error
+    return jsonify({"cells": cell_stats(request.args.get("hand"),
+                                        request.args.get("up", type=int))})
+
+def export_denied():
+    """Return an error response unless the request carries the export token."""
+    token = current_app.config.get("EXPORT_TOKEN")
+    if not token:
+        return jsonify({"error": "Export is not enabled"}), 404
+    if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return jsonify({"error": "Export needs a valid token"}), 401
+    return None
+
+def export_response(name, columns, rows):
+    """Stream rows in the ?format= requested, gzipped if the client accepts it."""
+    fmt = request.args.get("format", "ndjson")
+    if fmt not in FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(FORMATS)}"}), 400
+    compress = bool(request.accept_encodings["gzip"])
+    response = Response(stream_with_context(encode_rows(columns, rows, fmt, compress)),
+                        mimetype=FORMATS[fmt])
+    response.headers["Content-Disposition"] = f"attachment; filename={name}.{fmt}"
+    response.headers["Vary"] = "Accept-Encoding"
+    if compress:
+        response.headers["Content-Encoding"] = "gzip"
+    return response
+
+@blackjack_bp.route("/export/history")
+def export_history():
+    """Stream the hand history of every game as NDJSON or CSV.
 
-    game.player.split()
+    ?since= and ?until= (Unix times), ?game=, ?seat=, ?player= (a player
+    name) and ?hand= (a chart row such as 16) filter the rows. Needs the
+    EXPORT_TOKEN as a bearer token.
+    """
+    error = export_denied() or history_enabled()
+    if error:
+        return error
+    args = request.args
+    rows = history_rows(since=args.get("since", type=float), until=args.get("until", type=float),
+                        game=args.get("game"), seat=args.get("seat", type=int),
+                        player=args.get("player"), hand=args.get("hand"))
+    return export_response("hand_history", HISTORY_COLUMNS, rows)
+
+@blackjack_bp.route("/export/simulation")
+def export_simulation():
+    """Play a simulation and stream each chunk's tallies as NDJSON or CSV.
+
+    ?rounds= (at most EXPORT_MAX_ROUNDS), ?seed=, ?decks=, ?seats= and
+    ?chunk_rounds= set up the run. Needs the EXPORT_TOKEN as a bearer token.
+    """
+    error = export_denied()
+    if error:
+        return error
+    args = request.args
+    rounds = args.get("rounds", 100_000, type=int)
+    limit = current_app.config.get("EXPORT_MAX_ROUNDS", DEFAULT_EXPORT_MAX_ROUNDS)
+    chunk_rounds = args.get("chunk_rounds", CHUNK_ROUNDS, type=int)
+    if not 0 < rounds <= limit or chunk_rounds <= 0:
+        return jsonify({"error": f"rounds must be 1 to {limit} and chunk_rounds positive"}), 400
+    try:
+        rules = Rules(decks=args.get("decks", Rules.decks, type=int),
+                      seats=args.get("seats", 1, type=int))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    rows = simulation_rows(rounds, seed=args.get("seed", type=int), rules=rules,
+                           chunk_rounds=chunk_rounds)
+    return export_response("simulation", SIMULATION_COLUMNS, rows)
+
+@blackjack_bp.route("/double_down", methods=["POST"])
+def double_down():
+    """Double down on a seat's hand, seat 0 unless the form names one."""
+    seat = request.form.get("seat", 0, type=int)
+    game = load_game_state()
+    if not game:
+        flash("Start a new game before doubling down.")
+        return redirect(url_for("blackjack.index"))
+    try:
+        game.apply_action("double_down", seat=seat)
+    except ValueError as e:
+        flash(str(e))
+        return redirect(url_for("blackjack.game_status"))
     save_game_state(game)
     return redirect(url_for("blackjack.game_status"))
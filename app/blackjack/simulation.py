@@ -0,0 +1,738 @@
+"""blackjack/simulation.py
+
+This module provides a headless round simulator for the blackjack game. By
+default it plays the rules of the Game class: the dealer stands on 17 and
+does not peek for a natural, every hand is played out and settled on its
+total, so a two-card 21 is paid even money like any other win, pairs are
+played by their total, and doubling down and surrender follow
+Game.double_down and surrender_allowed. Rules can turn on the usual casino
+naturals (dealer peek and a 3:2 payout) and splitting instead. It follows
+the process-wide strategy table from get_strategy, but works on plain card
+values instead of Card/Deck/Player objects so that millions of rounds can be
+played without Flask, a session or a request context. Like Game, a round can
+seat several players at one table: they are dealt in casino order from the
+same shoe and the dealer plays once for all of them.
+
+Classes:
+    Rules: Table rules that are not encoded in the strategy table.
+    SimulationResult: Outcome tallies and timing for a simulation run.
+    Simulator: Plays rounds from a persistent shoe or a fresh deck per round.
+
+Functions:
+    chunk_seed: Derive the seed of one chunk of a run from the run seed.
+    simulate: Play a number of rounds, optionally across a process pool, and
+      return the merged result.
+    simulate_chunks: Play the chunks of a run one after another, yielding
+      each chunk's result.
+
+A run is split into fixed-size chunks, each played by its own Simulator with
+a seed derived from the run seed and the chunk index. Chunks are independent
+of the number of worker processes, so the same seed gives the same totals
+whether the run uses one core or all of them.
+"""
+
+import hashlib
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, asdict, fields
+
+from .counting import BetRamp, CardCounter, get_system
+from .models import CARDS, Game, Shoe, surrender_allowed
+from .strategy import (
+    DEALER_COLUMNS,
+    HARD_BASE,
+    NO_ACTION,
+    NUM_CLASSES,
+    PAIR_BASE,
+    SOFT_BASE,
+    Action,
+    get_strategy,
+    hand_key,
+)
+
+# Card values as dealt by a single deck: four of each of 2-9, sixteen
+# ten-valued cards and four aces (counted as 11 here, like Card.value).
+DECK_VALUES = [value for value in range(2, 12) for _ in range(4)] + [10] * 12
+CODE_VALUES = tuple(card.value for card in CARDS)
+
+# Action codes of the compiled strategy table, as plain ints for the hot loop
+HIT, STAND, DOUBLE_HIT, DOUBLE_STAND, SURRENDER_HIT, SPLIT, SPLIT_DAS = map(int, Action)
+
+# Decisions recorded per strategy cell, indexed like the strategy table.
+DECISIONS = ("hit", "stand", "double", "surrender", "split")
+HIT_MOVE, STAND_MOVE, DOUBLE_MOVE, SURRENDER_MOVE, SPLIT_MOVE = range(len(DECISIONS))
+
+CHUNK_ROUNDS = 50_000
+
+
+def chunk_seed(seed, index):
+    """
+    Derive the seed of one chunk of a run from the run seed.
+
+    Args:
+        seed (int): The seed of the whole run.
+        index (int): The index of the chunk within the run.
+
+    Returns:
+        int: A 64-bit seed independent of every other chunk's.
+    """
+    digest = hashlib.sha256(f"{seed}:{index}".encode()).digest()
+    return int.from_bytes(digest[:8], "big")
+
+
+@dataclass(frozen=True)
+class Rules:
+    """
+    Table rules that are not encoded in the strategy table.
+
+    The defaults are the rules of Game, so results describe the game that
+    is served.
+
+    Attributes:
+        naturals (bool): Whether a two-card 21 is a natural: the dealer peeks
+          and a dealer natural settles the round before the seats play, and
+          a player's natural is paid blackjack_payout at once. Game has no
+          naturals: every hand is played out and settled on its total.
+        blackjack_payout (float): Payout multiple for a natural blackjack,
+          with naturals only.
+        splits (bool): Whether pairs may be split; Game plays pairs by their
+          total.
+        double_after_split (bool): Whether split hands may double down.
+        surrender (bool): Whether late surrender is offered.
+        decks (int): Number of decks in the shoe, or 0 to deal every round
+          from a freshly shuffled single deck.
+        penetration (float): Fraction of the shoe dealt before the cut card.
+        seats (int): Number of seats at the table, all playing every round.
+        counting (str): The counting system followed by bet_ramp, such as
+          'hi-lo'.
+        bet_ramp (BetRamp): Bets by count, in initial-bet units, or None to
+          bet one unit every round.
+
+    Raises:
+        ValueError: If the number of seats is out of range, several seats
+            would share a fresh single deck, or a bet ramp has no counting
+            system or shoe to count.
+    """
+    naturals: bool = False
+    blackjack_payout: float = 1.5
+    splits: bool = False
+    double_after_split: bool = True
+    surrender: bool = True
+    decks: int = Shoe.DEFAULT_DECKS
+    penetration: float = Shoe.DEFAULT_PENETRATION
+    seats: int = 1
+    counting: str = None
+    bet_ramp: BetRamp = None
+
+    def __post_init__(self):
+        if not 1 <= self.seats <= Game.MAX_SEATS:
+            raise ValueError(f"A table has 1 to {Game.MAX_SEATS} seats, not {self.seats}")
+        if self.seats > 1 and not self.decks:
+            # A full table can need more than the 52 cards of one deck
+            raise ValueError("A table with several seats needs a shoe (decks > 0)")
+        if self.counting is not None:
+            get_system(self.counting)
+        if self.bet_ramp is not None and (self.counting is None or not self.decks):
+            raise ValueError("A bet ramp needs a counting system and a shoe (decks > 0)")
+
+
+@dataclass
+class SimulationResult:
+    """
+    Outcome tallies and timing for a simulation run.
+
+    Hand outcomes are counted per hand, so a split round contributes two
+    outcomes. Money is measured in units of the initial bet, one unit unless
+    a bet ramp raises it. At a table with several seats a round is one dealer
+    turn, and the house edge is per seat round.
+
+    Attributes:
+        rounds (int): Number of rounds played.
+        seats (int): Number of seats at the table; not summed by merge.
+        hands (int): Number of player hands settled, including split hands.
+        wins (int): Hands won, including blackjacks.
+        losses (int): Hands lost, excluding surrenders.
+        pushes (int): Hands that tied the dealer.
+        surrenders (int): Hands surrendered.
+        blackjacks (int): Natural blackjacks paid to the player.
+        doubles (int): Hands doubled down.
+        splits (int): Pairs split.
+        net_units (float): Player result in initial-bet units.
+        net_squares (float): Sum of the squared per-round results of the
+          whole table, used for the standard error of the house edge.
+        wagered_units (float): Total amount wagered in initial-bet units.
+        actions (dict): Decision counts per strategy cell, keyed by
+          'hand/dealer' (e.g. '16/T') and then by decision name.
+        elapsed (float): Wall-clock seconds spent playing.
+        seed (int): The seed the run was played with.
+    """
+    rounds: int = 0
+    seats: int = 1
+    hands: int = 0
+    wins: int = 0
+    losses: int = 0
+    pushes: int = 0
+    surrenders: int = 0
+    blackjacks: int = 0
+    doubles: int = 0
+    splits: int = 0
+    net_units: float = 0.0
+    net_squares: float = 0.0
+    wagered_units: float = 0.0
+    actions: dict = field(default_factory=dict)
+    elapsed: float = field(default=0.0, compare=False)
+    seed: int = field(default=None, compare=False)
+
+    @property
+    def seat_rounds(self):
+        """int: Rounds played by all seats together."""
+        return self.rounds * self.seats
+
+    @property
+    def house_edge(self):
+        """float: The house edge as a fraction of the initial bet."""
+        return -self.net_units / self.seat_rounds if self.seat_rounds else 0.0
+
+    @property
+    def return_per_wager(self):
+        """float: The player's net result per unit wagered, which a bet ramp should raise."""
+        return self.net_units / self.wagered_units if self.wagered_units else 0.0
+
+    @property
+    def std_error(self):
+        """float: The standard error of the house edge.
+
+        Seats at one table share the dealer's hand, so their results are
+        correlated; the variance is taken over whole-table rounds and scaled
+        down by the number of seats.
+        """
+        if self.rounds < 2:
+            return 0.0
+        mean = self.net_units / self.rounds
+        variance = (self.net_squares / self.rounds - mean * mean) * self.rounds / (self.rounds - 1)
+        return math.sqrt(max(variance, 0.0) / self.rounds) / self.seats
+
+    @property
+    def rounds_per_second(self):
+        """float: Simulation throughput in dealer rounds."""
+        return self.rounds / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def seat_rounds_per_second(self):
+        """float: Simulation throughput in seat rounds."""
+        return self.seat_rounds / self.elapsed if self.elapsed else 0.0
+
+    def merge(self, other):
+        """
+        Add the tallies of another result into this one.
+
+        Elapsed time is summed; callers running chunks in parallel should
+        replace it with the wall-clock time of the whole run.
+
+        Args:
+            other (SimulationResult): The result to merge in.
+
+        Returns:
+            SimulationResult: This result, for chaining.
+        """
+        for item in fields(self):
+            if item.name in ("actions", "seed", "seats"):
+                continue
+            setattr(self, item.name, getattr(self, item.name) + getattr(other, item.name))
+        for cell, decisions in other.actions.items():
+            merged = self.actions.setdefault(cell, {})
+            for decision, count in decisions.items():
+                merged[decision] = merged.get(decision, 0) + count
+        return self
+
+    def to_dict(self):
+        """Return the tallies plus the derived statistics as a dictionary."""
+        report = asdict(self)
+        report["seat_rounds"] = self.seat_rounds
+        report["house_edge"] = self.house_edge
+        report["return_per_wager"] = self.return_per_wager
+        report["std_error"] = self.std_error
+        report["rounds_per_second"] = self.rounds_per_second
+        report["seat_rounds_per_second"] = self.seat_rounds_per_second
+        return report
+
+
+class Simulator:
+    """
+    Plays rounds of blackjack with the basic strategy table.
+
+    By default rounds are dealt from a Shoe that persists across rounds and
+    is only shuffled once the cut card comes out, as in Game. With
+    Rules(decks=0) every round is dealt from a freshly shuffled single deck
+    instead; rather than rebuilding and shuffling all 52 cards, cards are then
+    drawn by a partial Fisher-Yates shuffle, which gives the same
+    distribution while only touching the cards that are dealt.
+
+    Every round, with one seat or Rules(seats=n) for n > 1, is played by
+    play_table_round, which deals all seats from the shoe and plays the
+    dealer once.
+
+    With a bet ramp, the shoe is counted before every round and each seat
+    bets the ramp's units for the count; the round's results and wagers are
+    scaled by that bet.
+
+    Attributes:
+        rules (Rules): The table rules in effect.
+        rng (random.Random): The random number generator for fresh decks.
+        shoe (Shoe): The shoe dealt from, or None with a fresh deck per round.
+        counter (CardCounter): The count of the shoe under rules.counting, or
+            None.
+    """
+    def __init__(self, strategy=None, rules=None, seed=None):
+        if strategy is None:
+            strategy = get_strategy()
+        self.rules = rules or Rules()
+        self.rng = random.Random(seed)
+        self._deck = list(DECK_VALUES)
+        self._left = len(self._deck)
+        self.shoe = None
+        if self.rules.decks:
+            self.shoe = Shoe(self.rules.decks, self.rules.penetration, seed)
+            self.draw = self.draw_from_shoe
+        self.counter = None
+        if self.rules.counting and self.shoe is not None:
+            self.counter = CardCounter(self.shoe, self.rules.counting)
+        self._hard, self._soft, self._pairs = self.compile_strategy(strategy)
+        self._decisions = [0] * (NUM_CLASSES * len(DEALER_COLUMNS) * len(DECISIONS))
+
+    @staticmethod
+    def compile_strategy(strategy):
+        """
+        Unpack a strategy table into lists indexed by hand total and dealer card.
+
+        Nested lists indexed by the dealer card value are quicker to read in
+        the round loop than the flat table.
+
+        Args:
+            strategy (StrategyTable): The compiled strategy chart.
+
+        Returns:
+            tuple: (hard, soft, pairs) lists where table[total][dealer_value]
+                is an action code, or None for pairs without a row.
+        """
+        def row(base, total):
+            return [
+                strategy.lookup(base + total, value - 2) if value >= 2 else HIT
+                for value in range(12)
+            ]
+
+        hard = [row(HARD_BASE, total) for total in range(22)]
+        soft = [row(SOFT_BASE, total) if total >= 12 else None for total in range(22)]
+        pairs = [None] * 12
+        for value in range(2, 12):
+            if strategy.lookup(PAIR_BASE + value, 0) != NO_ACTION:
+                pairs[value] = row(PAIR_BASE, value)
+        return hard, soft, pairs
+
+    def start_round(self):
+        """Prepare the cards for a new round."""
+        if self.shoe is None:
+            self._left = len(self._deck)  # Fresh deck each round
+        else:
+            self.shoe.shuffle_if_needed()
+
+    def draw_from_shoe(self):
+        """Draw a card value from the shoe.
+
+        If a round outlasts the shoe (possible only at full penetration), the
+        shoe is reshuffled and dealing carries on.
+        """
+        shoe = self.shoe
+        position = shoe.position
+        if position >= len(shoe.codes):
+            shoe.shuffle()
+            position = 0
+        shoe.position = position + 1
+        return CODE_VALUES[shoe.codes[position]]
+
+    def draw(self):
+        """Draw a card value from the remainder of the current deck."""
+        left = self._left - 1
+        deck = self._deck
+        index = int(self.rng.random() * (left + 1))
+        value = deck[index]
+        deck[index] = deck[left]
+        deck[left] = value
+        self._left = left
+        return value
+
+    def run(self, rounds, result=None):
+        """
+        Play a number of rounds.
+
+        Args:
+            rounds (int): The number of rounds, dealer turns, to play.
+            result (SimulationResult): Optional result to accumulate into.
+
+        Returns:
+            SimulationResult: The accumulated tallies.
+        """
+        seats = self.rules.seats
+        result = result or SimulationResult(seats=seats)
+        play_round = self.play_table_round
+        net = squares = 0.0
+        start = time.perf_counter()
+        if self.rules.bet_ramp is None:
+            for _ in range(rounds):
+                outcome = play_round(result)
+                net += outcome
+                squares += outcome * outcome
+        else:
+            units, counter = self.rules.bet_ramp.units, self.counter
+            for _ in range(rounds):
+                self.start_round()  # Shuffle first, so the bet sees a fresh count
+                bet = units(counter.betting_count)
+                wagered = result.wagered_units
+                outcome = play_round(result) * bet
+                result.wagered_units = wagered + (result.wagered_units - wagered) * bet
+                net += outcome
+                squares += outcome * outcome
+        result.elapsed += time.perf_counter() - start
+        result.rounds += rounds
+        result.net_units += net
+        result.net_squares += squares
+        self.collect_decisions(result)
+        return result
+
+    def record(self, base, total, up, decision):
+        """Count a strategy decision for the table row base + total and dealer card."""
+        index = (base + total) * len(DEALER_COLUMNS) + up - 2
+        self._decisions[index * len(DECISIONS) + decision] += 1
+
+    def collect_decisions(self, result):
+        """Move the recorded decision counts into result.actions."""
+        counts = self._decisions
+        width = len(DECISIONS)
+        for index in range(0, len(counts), width):
+            if not any(counts[index:index + width]):
+                continue
+            row, column = divmod(index // width, len(DEALER_COLUMNS))
+            key = f"{hand_key(row)}/{DEALER_COLUMNS[column]}"
+            merged = result.actions.setdefault(key, {})
+            for decision in range(width):
+                if counts[index + decision]:
+                    name = DECISIONS[decision]
+                    merged[name] = merged.get(name, 0) + counts[index + decision]
+                    counts[index + decision] = 0
+
+    def play_table_round(self, result, sink=None):
+        """
+        Play one round for every seat with a single dealer turn.
+
+        This is the one place a round is played: run, the bankroll and
+        columnar modules all go through it, with one seat or several. The
+        cards are dealt in casino order, one to each seat and then the
+        dealer's up card, then a second to each seat and the hole card. The
+        seats play in order and the dealer draws once, only if some seat
+        still has a live hand. With Rules.naturals a natural settles a seat
+        before it plays.
+
+        Args:
+            result (SimulationResult): The tallies to update.
+            sink (callable): Optional function called for each seat, in seat
+                order, with (first, second, up, hands, net): the values of
+                the seat's first two cards and the dealer's up card, the
+                (total, bet) tuples of the hands it played, or None when a
+                natural settled it, and its net result in initial-bet units.
+
+        Returns:
+            float: The net result of all seats together in initial-bet units.
+        """
+        self.start_round()
+        draw = self.draw
+        seats = self.rules.seats
+
+        if seats == 1:
+            firsts = (draw(),)
+            up = draw()
+            seconds = (draw(),)
+        else:
+            firsts = [draw() for _ in range(seats)]
+            up = draw()
+            seconds = [draw() for _ in range(seats)]
+        hole = draw()
+        result.wagered_units += seats
+        naturals = self.rules.naturals
+        dealer_natural = naturals and up + hole == 21
+
+        net = 0.0
+        played = []
+        live = False
+        for first, second in zip(firsts, seconds):
+            player_natural = naturals and first + second == 21
+            if player_natural or dealer_natural:
+                seat_net = self.settle_natural(player_natural, dealer_natural, result)
+                net += seat_net
+                played.append((first, second, None, seat_net))
+                continue
+            hands = self.play_seat(first, second, up, result)
+            played.append((first, second, hands, 0.0))
+            if not live:
+                for total, bet in hands:
+                    if bet and total <= 21:
+                        live = True
+                        break
+        dealer_total = self.dealer_total(up, hole) if live else None
+        for first, second, hands, seat_net in played:
+            if hands is not None:
+                seat_net = self.settle(hands, dealer_total, result)
+                net += seat_net
+            if sink is not None:
+                sink(first, second, up, hands, seat_net)
+        return net
+
+    def settle_natural(self, player_natural, dealer_natural, result):
+        """Settle a seat's round decided by a natural; return its net result."""
+        result.hands += 1
+        if player_natural and dealer_natural:
+            result.pushes += 1
+            return 0.0
+        if player_natural:
+            result.wins += 1
+            result.blackjacks += 1
+            return self.rules.blackjack_payout
+        result.losses += 1
+        return -1.0
+
+    def play_seat(self, first, second, up, result):
+        """
+        Play a seat's two cards, splitting a pair if the rules and strategy say so.
+
+        Args:
+            first (int): The value of the first card.
+            second (int): The value of the second card.
+            up (int): The value of the dealer's up card.
+            result (SimulationResult): The tallies to update.
+
+        Returns:
+            list: A (total, bet) tuple per hand, as returned by play_hand.
+        """
+        rules = self.rules
+        draw = self.draw
+        hands = []
+        if rules.splits and first == second and self._pairs[first] is not None:
+            action = self._pairs[first][up]
+            if action == SPLIT or (action == SPLIT_DAS and rules.double_after_split):
+                self.record(PAIR_BASE, first, up, SPLIT_MOVE)
+                result.splits += 1
+                result.wagered_units += 1
+                for card in (first, first):
+                    if card == 11:  # Split aces receive one card each
+                        hands.append((self.hand_total(card, draw()), 1))
+                    else:
+                        hands.append(self.play_hand(
+                            card, draw(), up, rules.double_after_split, False, result))
+        if not hands:
+            hands.append(self.play_hand(first, second, up, True, rules.surrender, result))
+        return hands
+
+    @staticmethod
+    def settle(hands, dealer_total, result):
+        """
+        Settle a seat's hands against the dealer.
+
+        Args:
+            hands (list): The (total, bet) tuples from play_seat.
+            dealer_total (int): The dealer's final total; only read when a
+                hand is still live.
+            result (SimulationResult): The tallies to update.
+
+        Returns:
+            float: The seat's net result in initial-bet units.
+        """
+        net = 0.0
+        for total, bet in hands:
+            if bet == 0:  # Surrendered
+                net -= 0.5
+                continue
+            result.hands += 1
+            if total > 21:
+                result.losses += 1
+                net -= bet
+            elif dealer_total > 21 or total > dealer_total:
+                result.wins += 1
+                net += bet
+            elif total < dealer_total:
+                result.losses += 1
+                net -= bet
+            else:
+                result.pushes += 1
+        return net
+
+    @staticmethod
+    def hand_total(first, second):
+        """Return the best total of a two-card hand."""
+        total = first + second
+        return total - 10 if total > 21 else total
+
+    def play_hand(self, first, second, up, can_double, can_surrender, result):
+        """
+        Play a single player hand to completion following the strategy table.
+
+        Args:
+            first (int): The value of the first card.
+            second (int): The value of the second card.
+            up (int): The value of the dealer's up card.
+            can_double (bool): Whether doubling down is permitted.
+            can_surrender (bool): Whether surrender is permitted.
+            result (SimulationResult): The tallies to update.
+
+        Returns:
+            tuple: (total, bet) where bet is 0 for a surrendered hand.
+        """
+        hard_table, soft_table = self._hard, self._soft
+        draw = self.draw
+        aces = (first == 11) + (second == 11)
+        hard = first + second - 10 * aces  # Aces counted as 1
+        ncards = 2
+        record = self.record
+        while True:
+            soft = aces and hard <= 11
+            total = hard + 10 if soft else hard
+            if total >= 21:
+                return total, 1
+            base = SOFT_BASE if soft else HARD_BASE
+            action = (soft_table if soft else hard_table)[total][up]
+            if action == STAND:
+                record(base, total, up, STAND_MOVE)
+                return total, 1
+            if action in (DOUBLE_HIT, DOUBLE_STAND):
+                if ncards == 2 and can_double and self.can_double(total, soft):
+                    record(base, total, up, DOUBLE_MOVE)
+                    result.doubles += 1
+                    result.wagered_units += 1
+                    card = draw()
+                    hard += 1 if card == 11 else card
+                    aces += card == 11
+                    total = hard + 10 if aces and hard <= 11 else hard
+                    return total, 2
+                if action == DOUBLE_STAND:
+                    record(base, total, up, STAND_MOVE)
+                    return total, 1
+            elif action == SURRENDER_HIT:
+                if (ncards == 2 and can_surrender
+                        and surrender_allowed(total, soft, up, first if first == second else None)):
+                    record(base, total, up, SURRENDER_MOVE)
+                    result.surrenders += 1
+                    result.hands += 1
+                    return total, 0
+            record(base, total, up, HIT_MOVE)
+            card = draw()
+            hard += 1 if card == 11 else card
+            aces += card == 11
+            ncards += 1
+
+    @staticmethod
+    def can_double(total, soft):
+        """Mirror Game.double_down: hard 9-11 or soft 16-18."""
+        if soft:
+            return 16 <= total <= 18
+        return 9 <= total <= 11
+
+    def dealer_total(self, up, hole):
+        """Play out the dealer's hand, standing on all 17s like Dealer.play."""
+        draw = self.draw
+        aces = (up == 11) + (hole == 11)
+        hard = up + hole - 10 * aces
+        while True:
+            total = hard + 10 if aces and hard <= 11 else hard
+            if total >= 17:
+                return total
+            card = draw()
+            hard += 1 if card == 11 else card
+            aces += card == 11
+
+
+def _play_chunk(task):
+    """Play one chunk of a run in a worker process."""
+    rounds, seed, rules, strategy = task
+    return Simulator(strategy=strategy, rules=rules, seed=seed).run(rounds)
+
+
+def simulate_chunks(rounds, seed=None, rules=None, strategy=None, chunk_rounds=CHUNK_ROUNDS):
+    """
+    Play the chunks of a run in this process, yielding each as it finishes.
+
+    The chunks are those of simulate with the same seed and chunk size, so
+    merging them gives simulate's totals; only one chunk is held at a time.
+
+    Args:
+        rounds (int): The number of rounds to play.
+        seed (int): Optional seed of the run, drawn at random when omitted.
+        rules (Rules): Optional table rules, defaults to Rules().
+        strategy (StrategyTable): Optional strategy table.
+        chunk_rounds (int): Number of rounds played per chunk.
+
+    Yields:
+        tuple: (chunk index, SimulationResult) with the result's seed set to
+            the seed of the chunk.
+    """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    strategy = strategy or get_strategy()
+    rules = rules or Rules()
+    for index, start in enumerate(range(0, rounds, chunk_rounds)):
+        size = min(chunk_rounds, rounds - start)
+        result = _play_chunk((size, chunk_seed(seed, index), rules, strategy))
+        result.seed = chunk_seed(seed, index)
+        yield index, result
+
+
+def simulate(rounds, seed=None, rules=None, strategy=None, workers=1,
+             chunk_rounds=CHUNK_ROUNDS):
+    """
+    Play a number of rounds with the basic strategy table.
+
+    The run is split into chunks of chunk_rounds rounds, each seeded with
+    chunk_seed(seed, index), and the per-chunk tallies are merged in chunk
+    order. The totals depend only on the seed and chunk size, not on the
+    number of workers.
+
+    Args:
+        rounds (int): The number of rounds to play.
+        seed (int): Optional seed for a reproducible run. A random seed is
+            drawn (and reported in the result) when omitted.
+        rules (Rules): Optional table rules, defaults to Rules().
+        strategy (StrategyTable): Optional strategy table, defaults to the
+            process-wide table from get_strategy().
+        workers (int): Number of worker processes; 0 or None uses every core
+            and 1 plays in the calling process.
+        chunk_rounds (int): Number of rounds played per chunk.
+
+    Returns:
+        SimulationResult: The merged tallies for the run.
+    """
+    if seed is None:
+        seed = random.SystemRandom().getrandbits(64)
+    if strategy is None:
+        strategy = get_strategy()
+    rules = rules or Rules()
+    workers = workers or os.cpu_count() or 1
+
+    full, partial = divmod(rounds, chunk_rounds)
+    sizes = [chunk_rounds] * full + ([partial] if partial else [])
+    tasks = [(size, chunk_seed(seed, index), rules, strategy)
+             for index, size in enumerate(sizes)]
+
+    start = time.perf_counter()
+    if workers == 1 or len(tasks) <= 1:
+        chunks = map(_play_chunk, tasks)
+        result = SimulationResult(seats=rules.seats)
+        for chunk in chunks:
+            result.merge(chunk)
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            result = SimulationResult(seats=rules.seats)
+            for chunk in pool.map(_play_chunk, tasks):
+                result.merge(chunk)
+    result.elapsed = time.perf_counter() - start
+    result.seed = seed
+    return result
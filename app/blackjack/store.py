@@ -0,0 +1,497 @@
+"""blackjack/store.py
+
+This module keeps games on the server, keyed by a game id held in the
+session, so a request only carries the id.
+
+Games are held encoded (see codec.encode_game) in a bounded in-process LRU.
+Saving a game updates the LRU and marks it dirty; a background flusher
+writes every dirty game to the games table in a single transaction every
+GAME_STORE_FLUSH_INTERVAL seconds. The database is therefore off the
+per-request path. A game missing from the LRU, because it was evicted or
+because the worker restarted, is reloaded from the database. Games saved
+after the last flush are lost if the process dies before the next one.
+
+Every stored game carries a version that grows by one per save. A game
+loaded at version n can only be saved while the store still holds version n
+(compare-and-swap); otherwise another request saved it first and the save
+raises StaleGameError. The LRU is split into shards, each with its own lock,
+so requests for different games do not contend on a single lock.
+
+With a database, the store of one worker process cannot see the saves of
+another, so the flusher checks versions too: it remembers the version the
+database held when a game was loaded or last flushed, and writes each dirty
+game with an UPDATE conditional on the row still holding that version (an
+INSERT for a game the database has never held). A game another process
+saved first, or inserted first under the same id, is dropped from memory
+instead of written, and the next read of it raises StaleGameError so the
+client reloads the newer state from the database. A stale copy can
+therefore never roll a game back, but a save it made is lost once the flush
+finds it stale.
+
+Without init_app the store works purely in memory, which is what the
+blueprint-only test apps use; games evicted from the LRU are then gone.
+
+The card counters of a game are not encoded with it (see Game.counters),
+so each shard also keeps the counters of its games for the version they
+were read at. A game loaded at that version gets copies of them, and a
+counter then only counts the cards dealt since rather than the whole shoe.
+
+Listeners registered with subscribe are called after every successful save,
+in the saving thread; the live tables use this to push changes made through
+any route to the connected seats.
+
+Classes:
+    StaleGameError: Raised when a game is saved from an out-of-date version.
+    GameRecord: The database row of a stored game.
+    GameStore: The sharded LRU with write-behind to the database.
+
+Attributes:
+    game_store (GameStore): The store used by the session helpers.
+"""
+
+import atexit
+import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+
+import sqlalchemy
+from sqlalchemy.exc import IntegrityError
+
+from ..extensions import db
+from ..metrics import metrics
+from .codec import decode_game, encode_game
+
+logger = logging.getLogger('BlackjackGame')
+
+DEFAULT_CAPACITY = 1024
+DEFAULT_FLUSH_INTERVAL = 0.25
+DEFAULT_SHARDS = 16
+
+
+class StaleGameError(Exception):
+    """
+    Raised when a game is saved from a version that is no longer current.
+
+    Attributes:
+        game_id (str): The game id.
+        expected (int): The version the game was loaded at.
+        current (int): The version the store holds.
+    """
+
+    def __init__(self, game_id, expected, current):
+        super().__init__(
+            f"Game {game_id} was loaded at version {expected} but is now at {current}"
+        )
+        self.game_id = game_id
+        self.expected = expected
+        self.current = current
+
+
+class GameRecord(db.Model):
+    """
+    The database row of a stored game.
+
+    Attributes:
+        id (str): The game id.
+        state (bytes): The game as encoded by codec.encode_game.
+        version (int): The version of the stored state.
+        updated_at (float): The time of the last flush of the game.
+    """
+    __tablename__ = "games"
+
+    id = db.Column(db.String(32), primary_key=True)
+    state = db.Column(db.LargeBinary, nullable=False)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.Float, nullable=False)
+
+
+class _Shard:
+    """One lock's worth of the store: an LRU, its dirty entries and kept counters.
+
+    Entries are (version, encoded game) tuples; kept counters are (version,
+    counters by system) tuples. flushed holds the version the database is
+    known to hold for each game in memory, and stale the errors to raise on
+    the next read of games whose flush was dropped.
+    """
+    __slots__ = ("games", "dirty", "flushing", "counters", "flushed", "stale", "lock",
+                 "capacity")
+
+    def __init__(self, capacity):
+        self.games = OrderedDict()
+        self.dirty = {}
+        self.flushing = {}
+        self.counters = {}
+        self.flushed = {}
+        self.stale = {}
+        self.lock = threading.Lock()
+        self.capacity = capacity
+
+    def lookup(self, game_id):
+        """Return the newest entry held in memory; call with the lock held."""
+        entry = self.games.get(game_id)
+        if entry is not None:
+            self.games.move_to_end(game_id)
+            return entry
+        return self.dirty.get(game_id) or self.flushing.get(game_id)
+
+    def remember(self, game_id, entry):
+        """Put an entry at the hot end of the LRU; call with the lock held."""
+        self.games[game_id] = entry
+        self.games.move_to_end(game_id)
+        while len(self.games) > self.capacity:
+            # Evicted dirty games stay in dirty until they are flushed
+            evicted, _ = self.games.popitem(last=False)
+            self.counters.pop(evicted, None)
+            if evicted not in self.dirty and evicted not in self.flushing:
+                self.flushed.pop(evicted, None)
+
+    def drop(self, game_id, error):
+        """Forget every copy of a game whose flush was stale; call with the lock held."""
+        for held in (self.games, self.dirty, self.counters, self.flushed):
+            held.pop(game_id, None)
+        self.stale[game_id] = error
+
+
+class GameStore:
+    """
+    A sharded, bounded LRU of encoded games with write-behind to the database.
+
+    Attributes:
+        capacity (int): The number of games kept in memory.
+        flush_interval (float): Seconds between flushes of dirty games.
+        app (Flask): The application whose database the store writes to, or
+            None for a memory-only store.
+        flushes (int): The number of flushes that wrote at least one game.
+        listeners (list): Callables told about every save.
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, flush_interval=DEFAULT_FLUSH_INTERVAL,
+                 shards=DEFAULT_SHARDS):
+        self.flush_interval = flush_interval
+        self.app = None
+        self.flushes = 0
+        self.listeners = []
+        self._shards = [_Shard(0) for _ in range(shards)]
+        self.capacity = capacity
+        self._stop = threading.Event()
+        self._flusher = None
+
+    @property
+    def capacity(self):
+        """int: The number of games kept in memory, across every shard."""
+        return sum(shard.capacity for shard in self._shards)
+
+    @capacity.setter
+    def capacity(self, capacity):
+        for shard in self._shards:
+            shard.capacity = math.ceil(capacity / len(self._shards))
+
+    def init_app(self, app):
+        """
+        Bind the store to an application and start the flusher.
+
+        Reads GAME_STORE_CAPACITY and GAME_STORE_FLUSH_INTERVAL from the
+        application config and creates the games table if it is missing.
+
+        Args:
+            app (Flask): The application.
+        """
+        self.capacity = app.config.get("GAME_STORE_CAPACITY", self.capacity)
+        self.flush_interval = app.config.get("GAME_STORE_FLUSH_INTERVAL", self.flush_interval)
+        self.app = app
+        with app.app_context():
+            GameRecord.__table__.create(db.engine, checkfirst=True)
+            columns = sqlalchemy.inspect(db.engine).get_columns("games")
+            if "version" not in {column["name"] for column in columns}:
+                # Tables created before games were versioned
+                with db.engine.begin() as connection:
+                    connection.execute(sqlalchemy.text(
+                        "ALTER TABLE games ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+                    ))
+        if self._flusher is None:
+            atexit.register(self.close)
+        if self._flusher is None or not self._flusher.is_alive():
+            self._stop.clear()
+            self._flusher = threading.Thread(
+                target=self._run, name="game-store-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def _shard(self, game_id):
+        """Return the shard that holds a game."""
+        return self._shards[hash(game_id) % len(self._shards)]
+
+    def get(self, game_id):
+        """
+        Return a stored game.
+
+        Args:
+            game_id (str): The game id.
+
+        Returns:
+            Game: A fresh copy of the game with its version set and copies of
+                the counters kept for that version, or None if it is not
+                stored.
+        """
+        entry = self.get_entry(game_id)
+        if entry is None:
+            return None
+        game = decode_game(entry[1])
+        game.version = entry[0]
+        shard = self._shard(game_id)
+        with shard.lock:
+            kept = shard.counters.get(game_id)
+        if kept is not None and kept[0] == game.version:
+            # Kept counters are never changed, only replaced, so copy them unlocked
+            game.counters = {system: counter.copy(game.deck)
+                             for system, counter in kept[1].items()}
+        return game
+
+    def get_entry(self, game_id):
+        """
+        Return (version, encoded game), loading it from the database on a miss.
+
+        Raises:
+            StaleGameError: Once, if the last flush of the game found that
+                another process had saved it first. The next call loads the
+                game from the database.
+        """
+        shard = self._shard(game_id)
+        with shard.lock:
+            error = shard.stale.pop(game_id, None)
+            if error is not None:
+                raise error
+            entry = shard.lookup(game_id)
+        if entry is not None:
+            return entry
+        entry = self._load(game_id)
+        if entry is None:
+            return None
+        with shard.lock:
+            # A save may have raced with the load; it is newer
+            current = shard.lookup(game_id)
+            if current is not None:
+                return current
+            shard.remember(game_id, entry)
+            shard.flushed[game_id] = entry[0]
+        return entry
+
+    def put(self, game_id, game):
+        """
+        Store a game and mark it for the next flush.
+
+        A game with a version is only stored if that is still the current
+        version; a game whose version is None (a new game) replaces whatever
+        is stored. Only memory is touched unless the game is not held there,
+        in which case it is loaded first to learn its version.
+
+        Args:
+            game_id (str): The game id.
+            game (Game): The game. Its version is advanced on success.
+
+        Returns:
+            int: The new version.
+
+        Raises:
+            StaleGameError: If the game was saved by someone else since it
+                was loaded.
+        """
+        data = encode_game(game)
+        metrics.state_bytes.observe(len(data))
+        if self.app is not None:
+            self.get_entry(game_id)  # Learn the current version on a cold save
+        shard = self._shard(game_id)
+        with shard.lock:
+            current = shard.lookup(game_id)
+            current_version = 0 if current is None else current[0]
+            if game.version is not None and current is not None and game.version != current_version:
+                raise StaleGameError(game_id, game.version, current_version)
+            entry = (current_version + 1, data)
+            shard.remember(game_id, entry)
+            if self.app is not None:
+                shard.dirty[game_id] = entry
+        game.version = entry[0]
+        self.keep_counters(game_id, game)
+        for listener in self.listeners:
+            listener(game_id, game)
+        return entry[0]
+
+    def keep_counters(self, game_id, game):
+        """
+        Keep copies of a game's card counters for the next load of its version.
+
+        put keeps them on every save; call this after reading a count
+        without saving. Nothing is kept for a game that is not in the LRU.
+
+        Args:
+            game_id (str): The game id.
+            game (Game): The game, as loaded or saved.
+        """
+        if not game.counters or game.version is None:
+            return
+        counters = {system: counter.copy() for system, counter in game.counters.items()}
+        shard = self._shard(game_id)
+        with shard.lock:
+            kept = shard.counters.get(game_id)
+            if game_id in shard.games and (kept is None or kept[0] <= game.version):
+                shard.counters[game_id] = (game.version, counters)
+
+    def subscribe(self, listener):
+        """
+        Call listener(game_id, game) after every successful save.
+
+        The listener runs in the saving thread, after the store's lock is
+        released, with the saved game at its new version. It must be quick
+        and must not modify the game.
+
+        Args:
+            listener (callable): The function to call.
+        """
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        """Stop calling a listener registered with subscribe."""
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def _load(self, game_id):
+        """Read (version, encoded game) from the database."""
+        if self.app is None:
+            return None
+        with self.app.app_context():
+            record = db.session.get(GameRecord, game_id)
+            return None if record is None else (record.version, record.state)
+
+    def flush(self):
+        """
+        Write every dirty game to the database in one transaction.
+
+        A game whose row no longer holds the version it was loaded or last
+        flushed at, because another process saved it first, is not written:
+        every copy of it is dropped and the next read raises StaleGameError.
+
+        Returns:
+            int: The number of games written.
+        """
+        batches = []
+        for shard in self._shards:
+            with shard.lock:
+                # Games being written stay readable until the commit is done
+                dirty, shard.dirty = shard.dirty, {}
+                shard.flushing = dirty
+                expected = {game_id: shard.flushed.get(game_id, 0) for game_id in dirty}
+            batches.append((shard, dirty, expected))
+        now = time.time()
+        rows = [{"id": game_id, "state": data, "version": version,
+                 "expected": expected[game_id], "updated_at": now}
+                for _, dirty, expected in batches
+                for game_id, (version, data) in dirty.items()]
+        if not rows:
+            return 0
+        try:
+            with self.app.app_context():
+                stale = self._write(rows)
+                db.session.commit()
+        except Exception:  # pylint: disable=W0718
+            logger.exception("Flushing %s games failed; retrying next time", len(rows))
+            with self.app.app_context():
+                db.session.rollback()
+            for shard, dirty, _ in batches:
+                with shard.lock:
+                    # Keep saves made during the flush, they are newer
+                    shard.dirty = {**dirty, **shard.dirty}
+                    shard.flushing = {}
+            return 0
+        for shard, dirty, _ in batches:
+            with shard.lock:
+                shard.flushing = {}
+                for game_id, (version, _) in dirty.items():
+                    if game_id in stale:
+                        # Saves made during the flush build on the dropped one
+                        shard.drop(game_id, stale[game_id])
+                    elif game_id in shard.games or game_id in shard.dirty:
+                        shard.flushed[game_id] = version
+                    else:
+                        shard.flushed.pop(game_id, None)  # Evicted before the flush
+        if stale:
+            logger.warning("Dropped %s stale games already saved by another process", len(stale))
+        self.flushes += 1
+        return len(rows) - len(stale)
+
+    @staticmethod
+    def _write(rows):
+        """
+        Write each row still at its expected version; return errors for the rest.
+
+        A row expected at version 0 is inserted, in a savepoint so that
+        another process inserting the same id first fails only that row.
+
+        Returns:
+            dict: StaleGameError by game id for the rows not written.
+        """
+        table = GameRecord.__table__
+        stale = {}
+        for row in rows:
+            values = {key: row[key] for key in ("id", "state", "version", "updated_at")}
+            if row["expected"] == 0:
+                try:
+                    with db.session.begin_nested():
+                        db.session.execute(table.insert().values(**values))
+                    continue
+                except IntegrityError:
+                    pass
+            elif db.session.execute(
+                table.update()
+                .where(table.c.id == row["id"], table.c.version == row["expected"])
+                .values(**values)
+            ).rowcount == 1:
+                continue
+            stale[row["id"]] = row["expected"]
+        if stale:
+            current = dict(db.session.execute(
+                sqlalchemy.select(table.c.id, table.c.version).where(table.c.id.in_(stale))
+            ).all())
+            stale = {game_id: StaleGameError(game_id, expected, current.get(game_id, 0))
+                     for game_id, expected in stale.items()}
+        return stale
+
+    def _run(self):
+        """Flush dirty games every flush_interval seconds until closed."""
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def close(self):
+        """Stop the flusher and write any remaining dirty games."""
+        self._stop.set()
+        if self._flusher is not None and self._flusher is not threading.current_thread():
+            self._flusher.join()
+        if self.app is not None:
+            self.flush()
+
+    def clear(self):
+        """Drop every game held in memory, flushed or not."""
+        for shard in self._shards:
+            with shard.lock:
+                shard.games.clear()
+                shard.dirty.clear()
+                shard.counters.clear()
+                shard.flushed.clear()
+                shard.stale.clear()
+                shard.flushing = {}
+
+    def sizes(self):
+        """Return the encoded size in bytes of every game held in memory."""
+        sizes = []
+        for shard in self._shards:
+            with shard.lock:
+                sizes.extend(len(data) for _, data in shard.games.values())
+        return sizes
+
+    def __len__(self):
+        return sum(len(shard.games) for shard in self._shards)
+
+
+game_store = GameStore()
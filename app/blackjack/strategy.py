@@ -0,0 +1,243 @@
+"""blackjack/strategy.py
+
+This module compiles the basic strategy chart into a dense lookup table that
+is shared by every game in the process.
+
+The chart in app/data/blackjack_strategy.csv is parsed once and turned into a
+byte array indexed by (hand class, dealer up-card index), with every cell
+pre-decoded to an Action code. The compiled table is cached per file and
+rebuilt only when the file's modification time changes, so creating a Game
+costs an os.stat rather than a CSV parse.
+
+Classes:
+    Action: The action codes used in the strategy chart.
+    StrategyTable: A compiled strategy chart.
+
+Functions:
+    load_strategy: Loads a blackjack strategy from a CSV file.
+    hand_class: Computes the table row for a hand.
+    dealer_index: Computes the table column for a dealer up-card value.
+    get_strategy: Returns the cached table for a chart, reloading it when the
+      file changes.
+"""
+
+import csv
+import os
+import threading
+from array import array
+from enum import IntEnum
+
+from ..metrics import metrics
+
+STRATEGY_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "blackjack_strategy.csv",
+)
+
+# Dealer columns of the chart, in up-card value order 2-11 (ace last)
+DEALER_COLUMNS = ("2", "3", "4", "5", "6", "7", "8", "9", "T", "A")
+
+# Row layout: hard totals 0-21, then soft totals 0-21, then pairs by card value
+HARD_BASE = 0
+SOFT_BASE = 22
+PAIR_BASE = 44
+NUM_CLASSES = PAIR_BASE + 12
+NO_ACTION = 255
+
+
+def load_strategy(filename):
+    """
+    Load blackjack strategy from a CSV file into a dictionary.
+
+    Args:
+        filename (str): Path to the CSV file containing the strategy.
+
+    Returns:
+        dict: Dictionary with player hands as keys and sub-dictionaries as values,
+            where each sub-dictionary maps dealer's card to an action.
+    """
+    strategy = {}
+    with open(filename, mode="r", encoding="utf-8", newline="") as file:
+        reader = csv.reader(file)
+        # Skip the first header for 'my_hand'; dealer cards are quoted ('2')
+        headers = [header.strip("'") for header in next(reader)[1:]]
+
+        for row in reader:
+            hand = row[0]  # Player's hand (e.g., '8', '9', 'a2', 'd2')
+            actions = row[1:]
+            strategy[hand] = dict(zip(headers, actions))
+
+    return strategy
+
+
+class Action(IntEnum):
+    """
+    The action codes used in the strategy chart.
+
+    Attributes:
+        HIT: 'H', hit.
+        STAND: 'S', stand.
+        DOUBLE_HIT: 'DH', double down if allowed, otherwise hit.
+        DOUBLE_STAND: 'DS', double down if allowed, otherwise stand.
+        SURRENDER_HIT: 'RH', surrender if allowed, otherwise hit.
+        SPLIT: 'Sp', split.
+        SPLIT_DAS: 'PH', split if doubling after a split is allowed,
+          otherwise hit.
+    """
+    HIT = 0
+    STAND = 1
+    DOUBLE_HIT = 2
+    DOUBLE_STAND = 3
+    SURRENDER_HIT = 4
+    SPLIT = 5
+    SPLIT_DAS = 6
+
+    @classmethod
+    def from_code(cls, code):
+        """Return the action for a chart code such as 'DH'."""
+        return _CHART_CODES[code]
+
+    @property
+    def code(self):
+        """str: The chart code of the action."""
+        return _ACTION_NAMES[self]
+
+
+_CHART_CODES = {
+    "H": Action.HIT,
+    "S": Action.STAND,
+    "DH": Action.DOUBLE_HIT,
+    "DS": Action.DOUBLE_STAND,
+    "RH": Action.SURRENDER_HIT,
+    "Sp": Action.SPLIT,
+    "PH": Action.SPLIT_DAS,
+}
+_ACTION_NAMES = {action: code for code, action in _CHART_CODES.items()}
+
+
+def hand_class(total, soft=False, pair_value=None):
+    """
+    Compute the table row for a hand.
+
+    Args:
+        total (int): The best total of the hand.
+        soft (bool): Whether an ace is counted as 11.
+        pair_value (int): The card value if the hand is a two-card pair.
+
+    Returns:
+        int: The hand class, an index into the table rows.
+    """
+    if pair_value is not None:
+        return PAIR_BASE + pair_value
+    return (SOFT_BASE if soft else HARD_BASE) + min(total, 21)
+
+
+def dealer_index(value):
+    """Compute the table column for a dealer up-card value (2-11)."""
+    return value - 2
+
+
+def hand_key(row):
+    """Return the chart key for a hand class, e.g. '16', 'a7' or 'd8'."""
+    if row >= PAIR_BASE:
+        value = row - PAIR_BASE
+        return "aa" if value == 11 else f"d{DEALER_COLUMNS[value - 2]}"
+    if row >= SOFT_BASE:
+        return f"a{row - SOFT_BASE - 11}"
+    return str(row - HARD_BASE)
+
+
+class StrategyTable:
+    """
+    A compiled strategy chart.
+
+    Rows missing from the chart follow the usual conventions: hard totals
+    below 8 hit, hard totals above 17 and soft 19 or more stand. Pairs without
+    a row hold NO_ACTION and are played by their total. Missing dealer columns
+    default to hit.
+
+    Attributes:
+        path (str): The chart file the table was compiled from.
+        mtime (float): The modification time of the file when compiled.
+        rows (dict): The chart as returned by load_strategy.
+        cells (array): Action codes indexed by row * len(DEALER_COLUMNS) +
+            dealer column.
+    """
+    __slots__ = ("path", "mtime", "rows", "cells")
+
+    def __init__(self, rows, path=None, mtime=None):
+        self.path = path
+        self.mtime = mtime
+        self.rows = rows
+        self.cells = array("B", [NO_ACTION]) * (NUM_CLASSES * len(DEALER_COLUMNS))
+        for total in range(22):
+            self._fill(HARD_BASE + total, Action.HIT if total < 18 else Action.STAND)
+        for total in range(12, 22):
+            self._fill(SOFT_BASE + total, Action.HIT if total < 19 else Action.STAND)
+        for value in range(2, 12):
+            if hand_key(PAIR_BASE + value) in rows:
+                self._fill(PAIR_BASE + value, Action.HIT)
+
+    def _fill(self, row, default):
+        """Compile one chart row, using default if the chart lacks it."""
+        cells = self.rows.get(hand_key(row))
+        for column, dealer in enumerate(DEALER_COLUMNS):
+            if cells is None:
+                action = default
+            else:
+                action = _CHART_CODES.get(cells.get(dealer), Action.HIT)
+            self.cells[row * len(DEALER_COLUMNS) + column] = action
+
+    @classmethod
+    def from_file(cls, path):
+        """Parse and compile a chart file."""
+        mtime = os.stat(path).st_mtime
+        return cls(load_strategy(path), path, mtime)
+
+    def lookup(self, row, column):
+        """
+        Look up an action.
+
+        Args:
+            row (int): The hand class, see hand_class.
+            column (int): The dealer column, see dealer_index.
+
+        Returns:
+            int: The Action code, or NO_ACTION for a pair without a row.
+        """
+        return self.cells[row * len(DEALER_COLUMNS) + column]
+
+
+_cache = {}
+_cache_lock = threading.Lock()
+reloads = 0
+
+
+def get_strategy(path=STRATEGY_FILE):
+    """
+    Return the compiled table for a chart, shared by the whole process.
+
+    The file is compiled on first use and again whenever its modification
+    time changes.
+
+    Args:
+        path (str): The chart file, defaults to the packaged chart.
+
+    Returns:
+        StrategyTable: The compiled table.
+    """
+    global reloads  # pylint: disable=W0603
+    path = os.path.abspath(path)
+    table = _cache.get(path)
+    mtime = os.stat(path).st_mtime
+    if table is not None and table.mtime == mtime:
+        return table
+    with _cache_lock:
+        table = _cache.get(path)
+        if table is None or table.mtime != mtime:
+            table = StrategyTable.from_file(path)
+            _cache[path] = table
+            reloads += 1
+            metrics.strategy_reloads.inc()
+    return table
@@ -0,0 +1,177 @@
+"""app/logs.py
+Configure the application's logging once, optionally through a queue.
+
+create_app calls app_logging.init_app, which sets up the 'BlackjackGame'
+logger used by the models, routes and store. With LOG_QUEUE_SIZE above zero,
+the default, a log call on a request thread only copies the record and puts
+it on a bounded queue; a background listener thread formats it and writes it
+to stderr. When the queue is full the record is dropped and counted, in
+QueuedLogging.dropped and the blackjack_log_records_dropped_total metric,
+rather than making the request wait for the writer. With LOG_QUEUE_SIZE = 0
+records are formatted and written on the calling thread, as before.
+
+Records are structured: inside a request, the game id of the session and the
+milliseconds since the request started are attached to every record, and the
+models add an event name and the game's store version. LOG_FORMAT = 'json'
+writes one JSON object per line with these fields; the default text format
+appends them to the message.
+
+Classes:
+    StructuredFormatter: Formats records as text or JSON lines with their
+      structured fields.
+    DroppingQueueHandler: Enqueues records without blocking, counting drops.
+    QueuedLogging: Installs the handlers and runs the listener.
+
+Attributes:
+    app_logging (QueuedLogging): The logging set up by create_app.
+"""
+
+import atexit
+import json
+import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+from flask import g, has_request_context, request, session
+
+from .metrics import metrics
+
+LOGGER_NAME = 'BlackjackGame'
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+DEFAULT_QUEUE_SIZE = 10000
+# Record attributes that are written as structured fields, in this order
+FIELDS = ("event", "game_id", "version", "elapsed_ms")
+_PLAIN = (str, int, float, bool, type(None))
+
+
+class StructuredFormatter(logging.Formatter):
+    """
+    Formats records with their structured fields.
+
+    Attributes:
+        json_lines (bool): Write one JSON object per record instead of text.
+    """
+
+    def __init__(self, json_lines=False):
+        super().__init__(TEXT_FORMAT)
+        self.json_lines = json_lines
+
+    def format(self, record):
+        fields = {name: getattr(record, name) for name in FIELDS
+                  if getattr(record, name, None) is not None}
+        if not self.json_lines:
+            text = super().format(record)
+            if fields:
+                text += " [" + " ".join(f"{name}={value}" for name, value in fields.items()) + "]"
+            return text
+        entry = {"time": record.created, "level": record.levelname, "logger": record.name,
+                 "message": record.getMessage(), **fields}
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class DroppingQueueHandler(QueueHandler):
+    """
+    Puts records on a bounded queue without blocking or formatting them.
+
+    Attributes:
+        dropped (int): The records dropped because the queue was full.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        """Copy the record, with arguments that could change turned into text."""
+        record = logging.makeLogRecord(record.__dict__)
+        if record.args and not isinstance(record.args, dict):
+            record.args = tuple(arg if isinstance(arg, _PLAIN) else str(arg)
+                                for arg in record.args)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            metrics.log_records_dropped.inc()
+
+
+class _RequestContext(logging.Filter):
+    """Attaches the session's game id and the request's elapsed time."""
+
+    def filter(self, record):
+        if has_request_context():
+            if getattr(record, "game_id", None) is None:
+                record.game_id = session.get("game_id")
+            start = g.get("log_start")
+            if start is not None:
+                record.elapsed_ms = round((time.perf_counter() - start) * 1e3, 3)
+        return True
+
+
+class QueuedLogging:
+    """
+    Sets up the application's logger, queued or synchronous.
+
+    Attributes:
+        handler (logging.Handler): The handler installed on the logger.
+        listener (QueueListener): The thread writing queued records, or None.
+    """
+
+    def __init__(self):
+        self.handler = None
+        self.listener = None
+
+    @property
+    def dropped(self):
+        """int: The records dropped because the queue was full."""
+        return getattr(self.handler, "dropped", 0)
+
+    def init_app(self, app):
+        """
+        Configure the 'BlackjackGame' logger for an application.
+
+        Reads LOG_LEVEL, LOG_FORMAT ('text' or 'json') and LOG_QUEUE_SIZE
+        from the application config. Calling it again replaces the previous
+        setup.
+
+        Args:
+            app (Flask): The application.
+        """
+        self.close()
+        logger = logging.getLogger(LOGGER_NAME)
+        logger.setLevel(app.config.get("LOG_LEVEL", "INFO"))
+        logger.propagate = False
+        writer = logging.StreamHandler()
+        writer.setFormatter(StructuredFormatter(app.config.get("LOG_FORMAT") == "json"))
+        size = app.config.get("LOG_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)
+        if size:
+            self.handler = DroppingQueueHandler(queue.Queue(size))
+            self.listener = QueueListener(self.handler.queue, writer)
+            self.listener.start()
+        else:
+            self.handler = writer
+        self.handler.addFilter(_RequestContext())
+        logger.addHandler(self.handler)
+        app.before_request(_start_timer)
+
+    def close(self):
+        """Remove the handler and write out every queued record."""
+        if self.handler is not None:
+            logging.getLogger(LOGGER_NAME).removeHandler(self.handler)
+            self.handler = None
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+def _start_timer():
+    g.log_start = time.perf_counter()
+
+
+app_logging = QueuedLogging()
+atexit.register(app_logging.close)
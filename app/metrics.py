@@ -0,0 +1,325 @@
+"""app/metrics.py
+Collect application metrics and expose them in the Prometheus text format.
+
+create_app calls metrics.init_app, which times every request to the blackjack
+blueprint, records the size of the session cookie it carried and serves
+everything at /metrics. The models record rounds, outcomes and reshuffles,
+the strategy module records reloads of the chart and the game store records
+the encoded size of every saved game.
+
+Recording must not become a point of contention under a threaded server, so
+no lock is taken on the hot path. Every thread keeps its own counts in a
+dictionary that only it writes to; a scrape adds up the dictionaries of every
+thread. When a new thread first records a metric, the counts of threads that
+have exited are folded into one dictionary, so a server that starts a thread
+per request does not collect them without bound. Each process has its own
+counts; scrape every worker of a multi-process server separately.
+
+Classes:
+    Counter: A monotonically increasing count, per label values.
+    Histogram: A distribution of observed values over fixed buckets.
+    Gauge: A value read by a callback at scrape time.
+    Metrics: The application's metrics.
+
+Attributes:
+    metrics (Metrics): The metrics recorded by the application.
+"""
+
+import threading
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_left
+
+from flask import Response, current_app, g, request
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+SIZE_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+
+def _escape(value):
+    """Escape a label value for the text format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=""):
+    """Format a label set, e.g. {endpoint="blackjack.bet"}."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    """Format a sample value, integral floats without a fraction."""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+class _Metric(ABC):
+    """
+    A metric whose values are kept per thread and added up when read.
+
+    Subclasses record values in the dictionary of _values and define
+    _merge, which adds one thread's values into a total.
+
+    Attributes:
+        name (str): The metric name.
+        documentation (str): The help text.
+        labelnames (tuple): The names of the labels, in the order their
+            values are passed.
+    """
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._threads = []  # (thread, values) for every thread that recorded
+        self._retired = {}  # The values of threads that have exited
+
+    def _values(self):
+        """Return the calling thread's values, registering them on first use."""
+        try:
+            return self._local.values
+        except AttributeError:
+            values = self._local.values = {}
+            with self._lock:
+                live = []
+                for thread, old in self._threads:
+                    if thread.is_alive():
+                        live.append((thread, old))
+                    else:
+                        self._merge(self._retired, old)
+                live.append((threading.current_thread(), values))
+                self._threads = live
+            return values
+
+    @abstractmethod
+    def _merge(self, into, values):
+        """Add one thread's values into a total."""
+
+    def collect(self):
+        """Return the values of every thread added up, by label values."""
+        with self._lock:
+            total = {}
+            self._merge(total, self._retired)
+            for _, values in self._threads:
+                self._merge(total, values.copy())  # A copy is taken atomically
+        return total
+
+    def render(self):
+        """Return the metric in the text format, one line per sample."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for labels, value in sorted(self.collect().items()):
+            lines.extend(self._samples(labels, value))
+        return lines
+
+    def _samples(self, labels, value):
+        """Return the sample lines for one set of label values."""
+        return [f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}"]
+
+
+class Counter(_Metric):
+    """A count that only goes up, such as rounds played."""
+    kind = "counter"
+
+    def inc(self, labels=(), amount=1):
+        """
+        Add to the count.
+
+        Args:
+            labels (tuple): The label values, in the order of labelnames.
+            amount (int): The amount to add.
+        """
+        values = self._values()
+        values[labels] = values.get(labels, 0) + amount
+
+    def value(self, labels=()):
+        """Return the count for a set of label values."""
+        return self.collect().get(labels, 0)
+
+    def _merge(self, into, values):
+        for labels, count in values.items():
+            into[labels] = into.get(labels, 0) + count
+
+
+class Histogram(_Metric):
+    """
+    Observed values, such as request latencies, counted into buckets.
+
+    Attributes:
+        buckets (tuple): The inclusive upper bounds of the buckets, ascending;
+            a +Inf bucket is added.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        """
+        Record a value.
+
+        Args:
+            value (float): The observed value.
+            labels (tuple): The label values, in the order of labelnames.
+        """
+        values = self._values()
+        counts = values.get(labels)
+        if counts is None:
+            # The count of each bucket, the +Inf bucket, then the sum
+            counts = values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def count(self, labels=()):
+        """Return the number of values observed for a set of label values."""
+        counts = self.collect().get(labels)
+        return sum(counts[:-1]) if counts else 0
+
+    def _merge(self, into, values):
+        for labels, counts in values.items():
+            total = into.get(labels)
+            if total is None:
+                into[labels] = list(counts)
+            else:
+                for index, count in enumerate(counts):
+                    total[index] += count
+
+    def _samples(self, labels, value):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), value):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else _number(float(bound))
+            bucket = _labels(self.labelnames, labels, 'le="' + le + '"')
+            lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+        lines.append(f"{self.name}_sum{_labels(self.labelnames, labels)} {_number(value[-1])}")
+        lines.append(f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}")
+        return lines
+
+
+class Gauge(_Metric):
+    """
+    A value that goes up and down, read by a callback at scrape time.
+
+    Attributes:
+        function (callable): Returns the current value.
+    """
+    kind = "gauge"
+
+    def __init__(self, name, documentation, function):
+        super().__init__(name, documentation)
+        self.function = function
+
+    def collect(self):
+        return {(): self.function()}
+
+    def _merge(self, into, values):
+        into.update(values)  # A gauge is read, not recorded per thread
+
+
+class Metrics:
+    """
+    The application's metrics.
+
+    Attributes:
+        request_seconds (Histogram): Latency of blackjack requests, by endpoint.
+        requests (Counter): Blackjack requests, by endpoint and status code.
+        session_bytes (Histogram): Size of the session cookie sent with
+            blackjack requests.
+        state_bytes (Histogram): Encoded size of every game saved to the store.
+        rounds_started (Counter): Rounds dealt.
+        rounds_finished (Counter): Rounds settled, one per table.
+        outcomes (Counter): Settled seats, by result.
+        reshuffles (Counter): Shoe shuffles, by reason.
+        strategy_reloads (Counter): Compilations of a strategy chart.
+        log_records_dropped (Counter): Log records dropped by a full queue.
+        gauges (list): Gauges added by init_app.
+    """
+
+    def __init__(self):
+        self.request_seconds = Histogram(
+            "blackjack_request_duration_seconds",
+            "Time spent handling blackjack requests.", ("endpoint",))
+        self.requests = Counter(
+            "blackjack_requests_total", "Blackjack requests handled.", ("endpoint", "status"))
+        self.session_bytes = Histogram(
+            "blackjack_session_cookie_bytes",
+            "Size of the session cookie sent with blackjack requests.", buckets=SIZE_BUCKETS)
+        self.state_bytes = Histogram(
+            "blackjack_game_state_bytes", "Encoded size of saved games.", buckets=SIZE_BUCKETS)
+        self.rounds_started = Counter("blackjack_rounds_started_total", "Rounds dealt.")
+        self.rounds_finished = Counter("blackjack_rounds_finished_total", "Rounds settled.")
+        self.outcomes = Counter(
+            "blackjack_outcomes_total",
+            "Settled seats by result: win, lose, draw (a push) or surrender.", ("result",))
+        self.reshuffles = Counter(
+            "blackjack_reshuffles_total",
+            "Shoe shuffles: cut_card before a round, empty_deck during one, or retry "
+            "after a failed deal.", ("reason",))
+        self.strategy_reloads = Counter(
+            "blackjack_strategy_reloads_total", "Compilations of a strategy chart file.")
+        self.log_records_dropped = Counter(
+            "blackjack_log_records_dropped_total", "Log records dropped by a full log queue.")
+        self.gauges = []
+
+    def all(self):
+        """Return every metric, in the order they are rendered."""
+        return [self.request_seconds, self.requests, self.session_bytes, self.state_bytes,
+                self.rounds_started, self.rounds_finished, self.outcomes, self.reshuffles,
+                self.strategy_reloads, self.log_records_dropped, *self.gauges]
+
+    def render(self):
+        """Return every metric in the Prometheus text format."""
+        lines = []
+        for metric in self.all():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def init_app(self, app):
+        """
+        Time the blackjack requests of an application and serve /metrics.
+
+        Does nothing if METRICS_ENABLED is false.
+
+        Args:
+            app (Flask): The application.
+        """
+        if not app.config.get("METRICS_ENABLED", True):
+            return
+        from .blackjack.store import game_store  # pylint: disable=C0415
+        if not self.gauges:
+            self.gauges.append(Gauge(
+                "blackjack_games_in_memory", "Games held in the game store's memory.",
+                lambda: len(game_store)))
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.add_url_rule("/metrics", "metrics", self._view)
+
+    def _before_request(self):
+        if request.blueprint != "blackjack":
+            return
+        g.metrics_start = time.perf_counter()
+        cookie = request.cookies.get(current_app.config.get("SESSION_COOKIE_NAME", "session"))
+        if cookie:
+            self.session_bytes.observe(len(cookie))
+
+    def _after_request(self, response):
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            endpoint = (request.endpoint,)
+            self.request_seconds.observe(time.perf_counter() - start, endpoint)
+            self.requests.inc((request.endpoint, response.status_code))
+        return response
+
+    def _view(self):
+        return Response(self.render(), content_type=CONTENT_TYPE)
+
+
+metrics = Metrics()
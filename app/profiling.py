@@ -0,0 +1,170 @@
+"""app/profiling.py
+Profile a sample of blackjack requests and aggregate the profiles.
+
+create_app calls profiler.init_app. When PROFILE_SAMPLE_RATE is above zero,
+that fraction of requests to the blackjack blueprint runs under cProfile and
+each profile is written to PROFILE_DIR (instance/profiles by default) as a
+pstats file named after the time, endpoint and duration of the request. Only
+the newest PROFILE_KEEP files are kept. With a rate of zero, the default, no
+hook is registered at all, so requests pay nothing for the feature.
+
+Only one request is profiled at a time; requests sampled while another is
+being profiled run unprofiled. profile_report.py, next to run.py, adds up
+the saved profiles into a report of the functions with the most cumulative
+or self time.
+
+Classes:
+    RequestProfiler: Samples, profiles and saves requests.
+
+Functions:
+    aggregate: Adds up saved profiles into rows per function.
+
+Attributes:
+    profiler (RequestProfiler): The profiler started by create_app.
+"""
+
+import cProfile
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+
+from flask import g, request
+
+logger = logging.getLogger('BlackjackGame')
+
+DEFAULT_KEEP = 200
+SORT_KEYS = {"cumulative": 3, "self": 2, "calls": 1}  # Positions in a row
+
+
+class RequestProfiler:
+    """
+    Samples, profiles and saves requests to the blackjack blueprint.
+
+    Attributes:
+        sample_rate (float): The fraction of requests profiled, 0 to 1.
+        directory (str): Where profiles are written.
+        keep (int): The number of profiles kept.
+        saved (int): The number of profiles written.
+    """
+
+    def __init__(self, sample_rate=0.0, directory=None, keep=DEFAULT_KEEP):
+        self.sample_rate = sample_rate
+        self.directory = directory
+        self.keep = keep
+        self.saved = 0
+        self._busy = threading.Lock()
+
+    def init_app(self, app):
+        """
+        Profile a sample of an application's requests.
+
+        Reads PROFILE_SAMPLE_RATE, PROFILE_DIR and PROFILE_KEEP from the
+        application config. Does nothing unless the rate is above zero.
+
+        Args:
+            app (Flask): The application.
+        """
+        self.sample_rate = app.config.get("PROFILE_SAMPLE_RATE", self.sample_rate) or 0.0
+        if not 0 <= self.sample_rate <= 1:
+            raise ValueError(f"PROFILE_SAMPLE_RATE must be 0 to 1, not {self.sample_rate}")
+        if not self.sample_rate:
+            return
+        self.directory = (app.config.get("PROFILE_DIR") or self.directory
+                          or os.path.join(app.instance_path, "profiles"))
+        self.keep = app.config.get("PROFILE_KEEP", self.keep)
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+        logger.info("Profiling %.1f%% of requests into %s", self.sample_rate * 100, self.directory)
+
+    def _before_request(self):
+        if request.blueprint != "blackjack" or random.random() >= self.sample_rate:
+            return
+        if not self._busy.acquire(blocking=False):
+            return  # Another request is being profiled
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # Another profiling tool is active
+            self._busy.release()
+            return
+        g.profile = (profile, time.perf_counter())
+
+    def _teardown_request(self, _error):
+        started = g.pop("profile", None)
+        if started is None:
+            return
+        profile, start = started
+        profile.disable()
+        self._busy.release()
+        elapsed = time.perf_counter() - start
+        try:
+            self.save(profile, request.endpoint or "unknown", elapsed)
+        except OSError as e:
+            logger.warning("Could not save a request profile: %s", e)
+
+    def save(self, profile, endpoint, elapsed):
+        """
+        Write a profile and delete the oldest beyond the retention limit.
+
+        Args:
+            profile (cProfile.Profile): The finished profile.
+            endpoint (str): The endpoint of the request.
+            elapsed (float): The duration of the request in seconds.
+
+        Returns:
+            str: The path of the profile.
+        """
+        name = re.sub(r"[^\w.-]", "_", endpoint)
+        path = os.path.join(self.directory,
+                            f"{time.time_ns()}-{name}-{elapsed * 1e3:.0f}ms.prof")
+        profile.dump_stats(path)
+        self.saved += 1
+        profiles = sorted(entry for entry in os.listdir(self.directory) if entry.endswith(".prof"))
+        for old in profiles[:max(0, len(profiles) - self.keep)]:
+            try:
+                os.remove(os.path.join(self.directory, old))
+            except FileNotFoundError:
+                pass  # Removed by another worker
+        return path
+
+
+def aggregate(paths, sort="cumulative", top=20, match=None):
+    """
+    Add up saved profiles into the functions with the most time.
+
+    Args:
+        paths (list): Profile files.
+        sort (str): 'cumulative', 'self' or 'calls'.
+        top (int): The number of functions returned.
+        match (str): Only include functions whose location or name contains
+            this text.
+
+    Returns:
+        list: Dictionaries with the function, its calls, self and cumulative
+            seconds, and the cumulative milliseconds per profiled request,
+            most expensive first.
+    """
+    if sort not in SORT_KEYS:
+        raise ValueError(f"sort must be one of {', '.join(SORT_KEYS)}")
+    if not paths:
+        return []
+    stats = pstats.Stats(*paths)
+    rows = []
+    for (filename, line, function), (_, calls, self_time, cumulative, _) in stats.stats.items():
+        where = f"{filename}:{line}({function})"
+        if match and match not in where:
+            continue
+        rows.append((where, calls, self_time, cumulative))
+    rows.sort(key=lambda row: row[SORT_KEYS[sort]], reverse=True)
+    return [{"function": where, "calls": calls, "self_seconds": self_time,
+             "cumulative_seconds": cumulative,
+             "cumulative_ms_per_request": cumulative / len(paths) * 1e3}
+            for where, calls, self_time, cumulative in rows[:top]]
+
+
+profiler = RequestProfiler()
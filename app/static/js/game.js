@@ -1,60 +1,138 @@
 // game.js
+// Actions go to the batch endpoint, which answers with only what changed
+// since the state version this page last saw. The page plays one seat of
+// the table; other seats may be played from other pages. When the server
+// offers live tables, actions and updates go over a WebSocket instead and
+// every change to the table is pushed as it happens.
+const seatId = '0';
+let gameState = null;
+let stateVersion = null;
+let liveSocket = null;
+
 document.getElementById('hitButton').addEventListener('click', () => {
-  performAction('hit');
+  performActions(['hit']);
 });
 
 document.getElementById('standButton').addEventListener('click', () => {
-  performAction('stand');
+  performActions(['stand']);
 });
 
 document.getElementById('doubleDownButton').addEventListener('click', () => {
-  performAction('doubleDown');
+  performActions(['double_down']);
 });
 
 document.getElementById('splitButton').addEventListener('click', () => {
-  performAction('split');
+  showMessage('Splitting is not available yet.');
 });
 
 document.getElementById('surrenderButton').addEventListener('click', () => {
-  performAction('surrender');
+  performActions(['surrender']);
 });
 
 document.getElementById('betButton').addEventListener('click', () => {
-  const bet = document.getElementById('betSlider').value;
-  placeBet(bet);
+  const bet = parseInt(document.getElementById('betSlider').value, 10);
+  // Bet and deal in one request
+  performActions([{ action: 'bet', amount: bet }, 'deal']);
 });
 
 document.getElementById('newGameButton').addEventListener('click', startNewGame);
 
-function performAction(action) {
-  fetch(`/action/${action}`, { method: 'POST' })
-      .then(response => response.json())
-      .then(updateGameState)
-      .catch(showError);
-}
-
-function placeBet(bet) {
-  fetch(`/bet`, {
+function performActions(actions) {
+  if (liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+      liveSocket.send(JSON.stringify({ actions }));
+      return;
+  }
+  fetch(`/blackjack/seats/${seatId}/actions`, {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
-      body: JSON.stringify({ bet })
+      body: JSON.stringify({ actions, since: stateVersion })
   })
-      .then(response => response.json())
-      .then(updateGameState)
+      .then(response => response.json().then(data => ({ status: response.status, data })))
+      .then(({ status, data }) => {
+          if (status === 409) {
+              // Another request changed the game first; fetch the full state
+              stateVersion = null;
+              performActions([]);
+              showMessage(data.error);
+          } else if (data.error) {
+              showMessage(data.error);
+          } else {
+              updateGameState(data);
+          }
+      })
       .catch(showError);
 }
 
 function startNewGame() {
-  fetch(`/start`, { method: 'POST' })
-      .then(response => response.json())
-      .then(updateGameState)
+  fetch('/blackjack/start', { method: 'POST' })
+      .then(() => {
+          stateVersion = null;
+          performActions([]);
+          connectLive();
+      })
+      .catch(showError);
+}
+
+function connectLive() {
+  if (liveSocket) {
+      liveSocket.close();
+      liveSocket = null;
+  }
+  fetch(`/blackjack/seats/${seatId}/live`)
+      .then(response => (response.ok ? response.json() : null))
+      .then(data => {
+          if (!data) {
+              return;  // Live tables are off; keep using the batch endpoint
+          }
+          liveSocket = new WebSocket(data.url);
+          liveSocket.onmessage = event => {
+              const message = JSON.parse(event.data);
+              if (message.error) {
+                  showMessage(message.error);
+              } else if (message.state || stateVersion === message.version - 1) {
+                  updateGameState(message);
+              } else {
+                  liveSocket.send(JSON.stringify({ actions: [] }));  // Missed a version
+              }
+          };
+          liveSocket.onclose = () => {
+              liveSocket = null;
+          };
+      })
       .catch(showError);
 }
 
+function mergeDelta(state, delta) {
+  Object.keys(delta).forEach(key => {
+      const value = delta[key];
+      if (value && typeof value === 'object' && !Array.isArray(value) && state[key]) {
+          mergeDelta(state[key], value);
+      } else {
+          state[key] = value;
+      }
+  });
+  return state;
+}
+
 function updateGameState(data) {
-  document.getElementById('playerHand').innerHTML = data.playerHand;
-  document.getElementById('dealerHand').innerHTML = data.dealerHand;
-  document.getElementById('statusMessages').innerHTML = data.message;
+  gameState = data.state || mergeDelta(gameState, data.delta);
+  stateVersion = data.version;
+  const player = gameState.seats[seatId];
+  const dealer = gameState.dealer;
+  document.getElementById('playerHand').innerHTML =
+      `${player.hand.join(', ')} (${player.total})`;
+  // The hole card and the dealer's total are hidden until the seats have played
+  const dealerCards = dealer.hand.map(card => card || '??').join(', ');
+  document.getElementById('dealerHand').innerHTML =
+      dealer.total === null ? dealerCards : `${dealerCards} (${dealer.total})`;
+  document.getElementById('playerHand').style.display = '';
+  document.getElementById('dealerHand').style.display = '';
+  const result = player.result ? ` - ${player.result}` : '';
+  showMessage(`Bankroll: ${player.bankroll} - Bet: ${player.bet}${result}`);
+}
+
+function showMessage(message) {
+  document.getElementById('statusMessages').textContent = message;
 }
 
 function showError(error) {
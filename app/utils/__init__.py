@@ -3,7 +3,10 @@
 from .helpers import (
     assign_value,
     calculate_hand_value,
+    diff_state,
     save_game_state,
     load_game_state,
+    seat_token,
     setup_logging,
+    update_game_state,
 )
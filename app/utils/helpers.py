@@ -1,26 +1,116 @@
 # app/utils/helpers
 
+import hashlib
+import hmac
 import logging
+import uuid
 from flask import session
 
 
 def setup_logging():
-    """Set up the application's logging configuration."""
+    """Set up synchronous logging for scripts that run without create_app (see app/logs.py)."""
     logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
     return logging.getLogger('BlackjackGame')
 
 def save_game_state(game_state):
-    """Save current game state to session."""
-    session["game_state"] = game_state
+    """Save current game state to the server-side store, keyed by the session's game id.
+
+    Raises StaleGameError if the game was loaded at a version another request
+    has since saved over.
+    """
+    from ..blackjack.store import game_store  # pylint: disable=C0415
+    game_id = session.get("game_id")
+    if game_id is None:
+        game_id = session["game_id"] = uuid.uuid4().hex
+    game_store.put(game_id, game_state)
 
 def load_game_state():
-    """Load game state from session."""
-    return session.get("game_state", None)
+    """Load game state for the session's game id, or None if there is no usable state.
+
+    Raises StaleGameError, once, if a save of the game was dropped because
+    another worker process had saved it first.
+    """
+    from ..blackjack.store import game_store  # pylint: disable=C0415
+    game_id = session.get("game_id")
+    if game_id is None:
+        return None
+    try:
+        return game_store.get(game_id)
+    except ValueError as e:
+        logging.getLogger('BlackjackGame').warning("Discarding game %s: %s", game_id, e)
+        return None
+
+def update_game_state(update, attempts=3):
+    """Load the game, apply update to it and save it, retrying on a conflict.
+
+    Only use this for updates that are safe to apply to the newer state,
+    such as setting the bet; a repeated card action must be rejected instead.
+
+    Args:
+        update (callable): Called with the Game; may raise to abort.
+        attempts (int): The number of load-update-save attempts.
+
+    Returns:
+        Game: The saved game, or None if there is no game.
+    """
+    from ..blackjack.store import StaleGameError  # pylint: disable=C0415
+    for attempt in range(1, attempts + 1):
+        try:
+            game = load_game_state()
+            if game is None:
+                return None
+            update(game)
+            save_game_state(game)
+            return game
+        except StaleGameError:
+            if attempt == attempts:
+                raise
+    return None
+
+def diff_state(before, after):
+    """Return the parts of a serialized state that changed.
+
+    Nested dictionaries are compared key by key; any other value that
+    differs is returned whole.
+
+    Args:
+        before (dict): The state the client already has.
+        after (dict): The current state.
+
+    Returns:
+        dict: The changed keys of after, with nested dictionaries reduced to
+            their changed keys.
+    """
+    delta = {}
+    for key, value in after.items():
+        old = before.get(key)
+        if isinstance(value, dict) and isinstance(old, dict):
+            nested = diff_state(old, value)
+            if nested:
+                delta[key] = nested
+        elif key not in before or old != value:
+            delta[key] = value
+    return delta
+
+def seat_token(secret, game_id, seat):
+    """Return the token that grants a live connection to one seat of a game.
+
+    Args:
+        secret (str): The application's secret key.
+        game_id (str): The game id.
+        seat (int): The seat.
+
+    Returns:
+        str: A hex HMAC of the game id and seat, so a token for one seat
+            cannot be used for another.
+    """
+    message = f"{game_id}/{seat}".encode("utf-8")
+    return hmac.new(str(secret).encode("utf-8"), message, hashlib.sha256).hexdigest()
 
 def calculate_hand_value(hand):
     """Calculate the total value of a hand, adjust for aces as needed."""
-    total = sum(assign_value(card) for card in hand)
-    aces = sum(1 for card in hand if card.rank == 'A')
+    total = sum(card.value for card in hand)
+    aces = sum(1 for card in hand if card.value == 11)
     while total > 21 and aces:
         total -= 10
         aces -= 1
@@ -0,0 +1,45 @@
+"""benchmarks/bench_advice.py
+Measure the latency of advice queries as a game deals through its shoe.
+
+Plays rounds of a six-deck game and asks for advice on every initial hand,
+recording the time of each query. Every round changes the composition, so
+each query is cold for the advice cache; a repeat query is timed separately.
+The target is a p99 under 20 ms.
+
+Example:
+    python -m benchmarks.bench_advice
+"""
+
+import time
+
+from app.blackjack.advice import advise
+from app.blackjack.models import Game
+
+
+def percentile(samples, fraction):
+    """Return the sample at the given fraction of a sorted list."""
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def main(rounds=500):
+    """Print the advice latency percentiles."""
+    game = Game(seed=11)
+    cold, warm = [], []
+    for _ in range(rounds):
+        game.start_new_round()
+        start = time.perf_counter()
+        advise(game)
+        cold.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        advise(game)
+        warm.append(time.perf_counter() - start)
+    cold.sort()
+    warm.sort()
+    print(f"{'':8}{'p50 (ms)':>10}{'p99 (ms)':>10}{'max (ms)':>10}")
+    for name, samples in (("cold", cold), ("warm", warm)):
+        print(f"{name:8}{percentile(samples, 0.5) * 1e3:10.3f}"
+              f"{percentile(samples, 0.99) * 1e3:10.3f}{samples[-1] * 1e3:10.3f}")
+
+
+if __name__ == "__main__":
+    main()
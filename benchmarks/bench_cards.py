@@ -0,0 +1,90 @@
+"""benchmarks/bench_cards.py
+Compare the compact Card/Deck representation with the original classes.
+
+The original classes stored each card as a Python object holding two strings
+and an instance dict, and rebuilt 52 of them for every deck. This script
+measures the memory held by one deck and the time to build, shuffle and deal
+a deck for both representations.
+
+Example:
+    python -m benchmarks.bench_cards
+"""
+
+import random
+import timeit
+import tracemalloc
+
+from app.blackjack.models import Deck
+from app.utils import assign_value
+
+
+class LegacyCard:
+    """The original Card: rank, suit and value stored per instance."""
+    def __init__(self, rank, suit):
+        self.rank = rank
+        self.suit = suit
+        self.value = assign_value(rank)
+
+
+class LegacyDeck:
+    """The original Deck: a list of 52 freshly built LegacyCard objects."""
+    suits = ["Hearts", "Diamonds", "Clubs", "Spades"]
+    ranks = ["2", "3", "4", "5", "6", "7", "8", "9", "10", "J", "Q", "K", "A"]
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.cards = [LegacyCard(rank, suit) for suit in self.suits for rank in self.ranks]
+        self.rng.shuffle(self.cards)
+
+    def deal(self):
+        """Deal a card from the deck."""
+        if self.cards:
+            return self.cards.pop()
+        return None
+
+
+def deck_memory(factory, count=1000):
+    """Return the average number of bytes allocated per deck."""
+    rng = random.Random(0)
+    tracemalloc.start()
+    decks = [factory(rng) for _ in range(count)]
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del decks
+    return size / count
+
+
+def time_per_call(statement, number=20000):
+    """Return the best average time per call in microseconds."""
+    return min(timeit.repeat(statement, number=number, repeat=5)) / number * 1e6
+
+
+def play_through(factory, rng):
+    """Build a deck, then deal and read the value of every card."""
+    deck = factory(rng)
+    total = 0
+    card = deck.deal()
+    while card is not None:
+        total += card.value
+        card = deck.deal()
+    return total
+
+
+def main():
+    """Print the memory and speed comparison."""
+    rng = random.Random(0)
+    rows = [
+        ("bytes per deck", deck_memory(LegacyDeck), deck_memory(Deck)),
+        ("build + shuffle (us)",
+         time_per_call(lambda: LegacyDeck(rng)), time_per_call(lambda: Deck(rng))),
+        ("build + deal 52 (us)",
+         time_per_call(lambda: play_through(LegacyDeck, rng), 5000),
+         time_per_call(lambda: play_through(Deck, rng), 5000)),
+    ]
+    print(f"{'':24}{'legacy':>12}{'compact':>12}{'ratio':>8}")
+    for name, legacy, compact in rows:
+        print(f"{name:24}{legacy:12.1f}{compact:12.1f}{legacy / compact:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""benchmarks/bench_dealer.py
+Time dealer final-total queries against a six-deck shoe.
+
+Deals through a six-deck shoe and, after every card, asks for the dealer
+distribution of each up-card. The first pass over a composition is cold; the
+second pass repeats the same queries against the warm cache.
+
+Example:
+    python -m benchmarks.bench_dealer
+"""
+
+import time
+
+from app.blackjack.models import Shoe
+from app.blackjack.probability import cache_info, dealer_probabilities, shoe_counts
+
+
+def query_all(compositions):
+    """Query every up-card for every composition; return the time per query."""
+    start = time.perf_counter()
+    queries = 0
+    for counts in compositions:
+        for up in range(2, 12):
+            index = 0 if up == 11 else up - 1
+            if counts[index]:
+                reduced = counts[:index] + (counts[index] - 1,) + counts[index + 1:]
+                dealer_probabilities(up, reduced)
+                queries += 1
+    return (time.perf_counter() - start) / queries
+
+
+def main(cards=20):
+    """Print cold and warm query times."""
+    shoe = Shoe(num_decks=6, seed=7)
+    compositions = []
+    for _ in range(cards):
+        compositions.append(shoe_counts(shoe))
+        shoe.deal()
+    cold = query_all(compositions)
+    warm = query_all(compositions)
+    print(f"cold query: {cold * 1e3:8.3f} ms")
+    print(f"warm query: {warm * 1e3:8.3f} ms")
+    print(cache_info())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""benchmarks/bench_hand.py
+Measure the decision loop with running hand totals against recomputation.
+
+Player keeps its hard total, ace count and pair flag up to date in add_card.
+This script compares reading those totals with the code they replaced,
+both for a single hand value (calculate_hand_value over the player's
+cards) and for the decisions Game makes during a turn. The recomputed
+decision is legacy_best_move, a copy of determine_best_move as it was
+before running totals: it sums the hand itself and calls
+calculate_hand_value again in the double down and surrender checks.
+
+Example:
+    python -m benchmarks.bench_hand
+"""
+
+import timeit
+
+from app.blackjack.models import Card, Game, Player
+from app.blackjack.strategy import NO_ACTION, Action, dealer_index, hand_class
+from app.utils import calculate_hand_value
+
+HANDS = (
+    [Card("10", "Clubs"), Card("6", "Hearts")],
+    [Card("A", "Clubs"), Card("7", "Hearts")],
+    [Card("5", "Clubs"), Card("6", "Hearts")],
+    [Card("8", "Clubs"), Card("8", "Hearts")],
+    [Card("2", "Clubs"), Card("3", "Hearts"), Card("A", "Spades"), Card("4", "Diamonds")],
+)
+UP_CARDS = [Card(rank, "Spades") for rank in ("2", "6", "9", "10", "A")]
+
+
+def legacy_double_down(hand):
+    """Game.double_down before running totals."""
+    total = calculate_hand_value(hand)
+    has_ace = any(card.rank == "A" for card in hand)
+    if total in [9, 10, 11] and not has_ace:
+        return True
+    return total in [16, 17, 18] and has_ace
+
+
+def legacy_surrender(hand, dealer_card):
+    """Game.surrender before running totals."""
+    player_value = calculate_hand_value(hand)
+    dealer_rank = dealer_card.rank if dealer_card.rank not in ["J", "Q", "K"] else "10"
+    if dealer_rank == "A":
+        dealer_rank = "10"
+    if player_value == 16 and dealer_rank in ["9", "10", "A"]:
+        return not (len(hand) == 2 and all(card.rank == "8" for card in hand))
+    return player_value == 15 and dealer_rank == "10"
+
+
+def legacy_best_move(game, hand, dealer_card):
+    """Game.determine_best_move before running totals, on a list of cards."""
+    aces = 0
+    hard = 0
+    for card in hand:
+        value = card.value
+        if value == 11:
+            aces += 1
+            value = 1
+        hard += value
+    soft = aces > 0 and hard <= 11
+    total = hard + 10 if soft else hard
+    column = dealer_index(dealer_card.value)
+
+    move = NO_ACTION
+    if len(hand) == 2 and hand[0].value == hand[1].value:
+        move = game.strategy.lookup(hand_class(total, pair_value=hand[0].value), column)
+    if move == NO_ACTION:
+        move = game.strategy.lookup(hand_class(total, soft), column)
+    if move in (Action.DOUBLE_HIT, Action.DOUBLE_STAND):
+        if legacy_double_down(hand):
+            return "Double Down"
+        return "Hit" if move == Action.DOUBLE_HIT else "Stand"
+    if move == Action.SURRENDER_HIT:
+        return "Surrender" if legacy_surrender(hand, dealer_card) else "Hit"
+    if move in (Action.SPLIT, Action.SPLIT_DAS):
+        return "Split"
+    return "Stand" if move == Action.STAND else "Hit"
+
+
+def time_per_call(function, number=20000):
+    """Return the best average time per call in microseconds."""
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    """Print the timings for recomputed and running totals."""
+    game = Game(seed=1)
+    players = [Player.holding(hand) for hand in HANDS]
+
+    def recomputed_values():
+        for player in players:
+            calculate_hand_value(player.hand)
+
+    def running_values():
+        for player in players:
+            player.hand_value()
+
+    def recomputed_decisions():
+        for player in players:
+            for up in UP_CARDS:
+                legacy_best_move(game, player.hand, up)
+
+    def running_decisions():
+        for player in players:
+            for up in UP_CARDS:
+                game.determine_best_move(player, up)
+
+    hand_count = len(HANDS)
+    rows = [
+        ("hand value (us/call)",
+         time_per_call(recomputed_values) / hand_count,
+         time_per_call(running_values) / hand_count),
+        ("decision (us/call)",
+         time_per_call(recomputed_decisions, 5000) / (hand_count * len(UP_CARDS)),
+         time_per_call(running_decisions, 5000) / (hand_count * len(UP_CARDS))),
+    ]
+    print(f"{'':24}{'recomputed':>12}{'running':>12}{'speedup':>9}")
+    for name, recomputed, running in rows:
+        print(f"{name:24}{recomputed:12.3f}{running:12.3f}{recomputed / running:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""benchmarks/bench_session.py
+Compare the session codec with pickling the whole Game.
+
+Before the codec, the session held the Game object itself, which a pickling
+session backend stores with its shoe, both hands and the strategy table.
+This script plays a game part way through a shoe and reports the stored size
+and the time to save and load it both ways.
+
+Example:
+    python -m benchmarks.bench_session
+"""
+
+import pickle
+import timeit
+
+from app.blackjack.codec import decode_game, encode_game
+from app.blackjack.models import Game
+
+
+def time_per_call(function, number=20000):
+    """Return the best average time per call in microseconds."""
+    return min(timeit.repeat(function, number=number, repeat=5)) / number * 1e6
+
+
+def main(rounds=30):
+    """Print the size and speed comparison."""
+    game = Game(seed=1)
+    for _ in range(rounds):
+        game.start_new_round()
+    pickled = pickle.dumps(game)
+    encoded = encode_game(game)
+    rows = [
+        ("bytes stored", len(pickled), len(encoded)),
+        ("save (us)",
+         time_per_call(lambda: pickle.dumps(game), 2000),
+         time_per_call(lambda: encode_game(game), 2000)),
+        ("load (us)",
+         time_per_call(lambda: pickle.loads(pickled), 2000),
+         time_per_call(lambda: decode_game(encoded), 2000)),
+    ]
+    print(f"{'':16}{'pickle':>12}{'codec':>12}{'ratio':>8}")
+    for name, old, new in rows:
+        print(f"{name:16}{old:12.1f}{new:12.1f}{old / new:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
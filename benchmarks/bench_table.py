@@ -0,0 +1,63 @@
+"""benchmarks/bench_table.py
+Compare one N-seat table with N independent single-seat games.
+
+A table deals every seat from one shoe and plays the dealer once per round,
+so the shuffles, the dealer's draws and, in the web app, the load and save
+of the game are shared by the seats. This script reports seat rounds per
+second both ways, for the simulator and for Game played through
+apply_action with an encode/decode round trip per round, as the batch
+endpoint does.
+
+Example:
+    python -m benchmarks.bench_table
+    python -m benchmarks.bench_table 3
+"""
+
+import sys
+import time
+
+from app.blackjack.codec import decode_game, encode_game
+from app.blackjack.models import Game
+from app.blackjack.simulation import Rules, simulate
+
+
+def simulator_rate(seats, seat_rounds):
+    """Return seat rounds per second of the simulator at a table of seats."""
+    result = simulate(seat_rounds // seats, seed=1, rules=Rules(seats=seats))
+    return result.seat_rounds_per_second
+
+
+def play(data, seats):
+    """Play one round of a stored game, standing every seat; return the new data."""
+    game = decode_game(data)
+    for seat in range(seats):
+        game.apply_action("bet", 1, seat)
+    game.apply_action("deal")
+    for seat in range(seats):
+        game.apply_action("stand", seat=seat)
+    return encode_game(game)
+
+
+def game_rate(seats, tables, rounds):
+    """Return seat rounds per second of tables games of seats each."""
+    stored = [encode_game(Game(seed=index, seats=seats)) for index in range(tables)]
+    start = time.perf_counter()
+    for _ in range(rounds):
+        stored = [play(data, seats) for data in stored]
+    return seats * tables * rounds / (time.perf_counter() - start)
+
+
+def main(seats=7, seat_rounds=700_000, game_rounds=2000):
+    """Print seat rounds per second for a table and for separate games."""
+    rows = [
+        ("simulator", simulator_rate(1, seat_rounds), simulator_rate(seats, seat_rounds)),
+        ("game", game_rate(1, seats, game_rounds), game_rate(seats, 1, game_rounds)),
+    ]
+    print(f"seat rounds/sec, {seats} seats")
+    print(f"{'':12}{'separate':>12}{'table':>12}{'ratio':>8}")
+    for name, separate, table in rows:
+        print(f"{name:12}{separate:12,.0f}{table:12,.0f}{table / separate:7.2f}x")
+
+
+if __name__ == "__main__":
+    main(*(int(arg) for arg in sys.argv[1:2]))
@@ -0,0 +1,296 @@
+"""benchmarks/loadtest.py
+Load-test the blackjack blueprint with many concurrent simulated users.
+
+Each user keeps its own cookies, starts a game with POST /blackjack/start
+and plays rounds through the page flow: POST /blackjack/actions to bet and
+deal in one batch, POST /blackjack/action/hit (zero to two times, while the
+hand is live) and POST /blackjack/action/stand. Redirects are not followed;
+any status of 400 or above, or a failed connection, counts as an error. A
+round counts as settled once a response shows the seat's result; the
+command fails if any round is left unsettled, since the throughput would
+then not measure whole rounds.
+
+Without --url the users drive create_app() in-process through the Flask test
+client, configured by FLASK_CONFIG as under gunicorn. With --url they drive a
+running server, for example one gunicorn worker:
+
+    gunicorn --workers 1 --threads 8 --bind 127.0.0.1:8000 "app:create_app()"
+
+The report gives the throughput in requests and settled rounds per second,
+the p50/p95/p99 latency and error rate of each route, the rounds in which
+every request succeeded, and the size of the session cookie, plus that of
+the stored game in-process. It is printed and, with
+--output, saved as JSON; --baseline compares the run with a saved one.
+
+Example:
+    python -m benchmarks.loadtest --users 20 --rounds 50 --output load.json
+    python -m benchmarks.loadtest --url http://127.0.0.1:8000 --baseline load.json
+"""
+
+import argparse
+import http.client
+import json
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+ROUTES = ("start", "deal", "action/hit", "action/stand")
+
+
+def percentile(samples, fraction):
+    """Return the sample at the given fraction of a sorted list."""
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class InProcessUser:
+    """A user driving an application through its test client."""
+
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def request(self, method, path, body=None):
+        """Send a request with an optional JSON body; return (status, cookie bytes, body)."""
+        response = self.client.open(path, method=method, json=body)
+        cookie = self.client.get_cookie("session")
+        return response.status_code, len(cookie.value) if cookie else 0, response.get_data()
+
+
+class HttpUser:
+    """A user driving a server over one keep-alive HTTP connection."""
+
+    def __init__(self, url, timeout=30):
+        parts = urlsplit(url)
+        self.prefix = parts.path.rstrip("/")
+        self.connection = http.client.HTTPConnection(parts.hostname, parts.port or 80,
+                                                     timeout=timeout)
+        self.cookies = {}
+
+    def request(self, method, path, body=None):
+        """Send a request with an optional JSON body; return (status, cookie bytes, body)."""
+        headers = {}
+        if self.cookies:
+            headers["Cookie"] = "; ".join(f"{name}={value}" for name, value in self.cookies.items())
+        if body is not None:
+            body = json.dumps(body)
+            headers["Content-Type"] = "application/json"
+        try:
+            self.connection.request(method, self.prefix + path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+        except (OSError, http.client.HTTPException):
+            self.connection.close()  # Reconnect on the next request
+            raise
+        for header in response.headers.get_all("Set-Cookie") or ():
+            name, _, value = header.split(";", 1)[0].partition("=")
+            self.cookies[name.strip()] = value
+        return response.status, len(self.cookies.get("session", "")), data
+
+
+class Recorder:
+    """Latencies and errors per route, shared by the user threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {route: [] for route in ROUTES}
+        self.errors = {route: 0 for route in ROUTES}
+        self.statuses = {}
+        self.cookie_sizes = []
+        self.rounds = 0
+        self.clean_rounds = 0
+        self.settled_rounds = 0
+
+    def add(self, route, latency, status, cookie_size):
+        """Record one request; status is None for a failed connection."""
+        with self.lock:
+            self.latencies[route].append(latency)
+            if status is None or status >= 400:
+                self.errors[route] += 1
+            key = str(status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+            if cookie_size:
+                self.cookie_sizes.append(cookie_size)
+
+
+def seat_state(data, key):
+    """Return seat 0 of the game state under key in a JSON response body, or None."""
+    try:
+        return json.loads(data)[key]["seats"]["0"]
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+def play(user, recorder, rounds, bet, rng):
+    """Start a game and play rounds in it as one user."""
+    def send(route, method, path, body=None, key="game"):
+        start = time.perf_counter()
+        try:
+            status, cookie_size, data = user.request(method, path, body)
+        except (OSError, http.client.HTTPException):
+            status, cookie_size, data = None, 0, b""
+        recorder.add(route, time.perf_counter() - start, status, cookie_size)
+        if status is None or status >= 400:
+            return False, None
+        return True, seat_state(data, key) if key else None
+
+    started, _ = send("start", "POST", "/blackjack/start", key=None)
+    for _ in range(rounds):
+        ok, seat = send("deal", "POST", "/blackjack/actions",
+                        {"actions": [{"action": "bet", "amount": bet}, "deal"]}, key="state")
+        for _ in range(rng.randrange(3)):
+            if seat is None or seat["result"] is not None or seat["total"] >= 21:
+                break  # Not dealt, or the hand can take no more cards
+            sent, seat = send("action/hit", "POST", "/blackjack/action/hit")
+            ok &= sent
+        if seat is not None and seat["result"] is None:
+            sent, seat = send("action/stand", "POST", "/blackjack/action/stand")
+            ok &= sent
+        with recorder.lock:
+            recorder.rounds += 1
+            recorder.clean_rounds += started and ok
+            recorder.settled_rounds += seat is not None and seat["result"] is not None
+
+
+def run(users=10, rounds=20, url=None, bet=10, seed=0, app=None):
+    """
+    Run a load test and return the report.
+
+    Args:
+        users (int): The number of concurrent users.
+        rounds (int): The rounds each user plays.
+        url (str): The base URL of a running server, or None to run
+            in-process.
+        bet (int): The bet placed every round.
+        seed (int): Seed for the number of hits each round.
+        app (Flask): The application to drive in-process, create_app() by
+            default.
+
+    Returns:
+        dict: The report, ready to be saved as JSON.
+    """
+    if url is None and app is None:
+        from app import create_app  # pylint: disable=C0415
+        app = create_app()
+    recorder = Recorder()
+    players = [HttpUser(url) if url else InProcessUser(app) for _ in range(users)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=users) as pool:
+        futures = [pool.submit(play, player, recorder, rounds, bet, random.Random(seed + index))
+                   for index, player in enumerate(players)]
+        for future in futures:
+            future.result()
+    elapsed = time.perf_counter() - start
+
+    routes = {}
+    for route in ROUTES:
+        samples = sorted(recorder.latencies[route])
+        if not samples:
+            continue
+        routes[route] = {
+            "requests": len(samples),
+            "errors": recorder.errors[route],
+            "error_rate": recorder.errors[route] / len(samples),
+            "mean_ms": sum(samples) / len(samples) * 1e3,
+            "p50_ms": percentile(samples, 0.50) * 1e3,
+            "p95_ms": percentile(samples, 0.95) * 1e3,
+            "p99_ms": percentile(samples, 0.99) * 1e3,
+        }
+    requests = sum(route["requests"] for route in routes.values())
+    errors = sum(route["errors"] for route in routes.values())
+    cookies = recorder.cookie_sizes
+    session = {
+        "cookie_bytes_mean": sum(cookies) / len(cookies) if cookies else 0,
+        "cookie_bytes_max": max(cookies, default=0),
+    }
+    if url is None:
+        from app.blackjack.store import game_store  # pylint: disable=C0415
+        sizes = game_store.sizes()
+        session["state_bytes_mean"] = sum(sizes) / len(sizes) if sizes else 0
+        session["state_bytes_max"] = max(sizes, default=0)
+    return {
+        "target": url or "in-process",
+        "users": users,
+        "rounds_per_user": rounds,
+        "elapsed": elapsed,
+        "requests": requests,
+        "errors": errors,
+        "error_rate": errors / requests if requests else 0.0,
+        "requests_per_second": requests / elapsed,
+        "rounds": recorder.rounds,
+        "rounds_without_errors": recorder.clean_rounds,
+        "rounds_settled": recorder.settled_rounds,
+        "rounds_per_second": recorder.settled_rounds / elapsed,
+        "statuses": recorder.statuses,
+        "routes": routes,
+        "session": session,
+    }
+
+
+def print_report(report, baseline=None):
+    """Print a report, with the ratio to a baseline report when given."""
+    print(f"{report['target']}: {report['users']} users x {report['rounds_per_user']} rounds "
+          f"in {report['elapsed']:.2f} s")
+    print(f"requests/sec {report['requests_per_second']:10,.1f}   "
+          f"rounds/sec {report['rounds_per_second']:8,.1f}   "
+          f"errors {report['error_rate']:.2%}   "
+          f"rounds without errors {report['rounds_without_errors']}/{report['rounds']}   "
+          f"settled {report['rounds_settled']}/{report['rounds']}")
+    print(f"{'route':14}{'requests':>10}{'errors':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+          + (f"{'p99 vs base':>13}" if baseline else ""))
+    for route, stats in report["routes"].items():
+        line = (f"{route:14}{stats['requests']:10}{stats['error_rate']:8.1%}"
+                f"{stats['p50_ms']:9.2f}{stats['p95_ms']:9.2f}{stats['p99_ms']:9.2f}")
+        base = (baseline or {}).get("routes", {}).get(route)
+        if base and base["p99_ms"]:
+            line += f"{stats['p99_ms'] / base['p99_ms']:12.2f}x"
+        print(line)
+    session = report["session"]
+    print(f"session cookie {session['cookie_bytes_mean']:.0f} bytes (max "
+          f"{session['cookie_bytes_max']})", end="")
+    if "state_bytes_mean" in session:
+        print(f", stored game {session['state_bytes_mean']:.0f} bytes", end="")
+    print()
+    if baseline:
+        print(f"rounds/sec vs base "
+              f"{report['rounds_per_second'] / baseline['rounds_per_second']:.2f}x")
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--url', default=None,
+                        help='base URL of a running server (default: in-process)')
+    parser.add_argument('--users', type=int, default=10,
+                        help='concurrent users (default: 10)')
+    parser.add_argument('--rounds', type=int, default=20,
+                        help='rounds played by each user (default: 20)')
+    parser.add_argument('--bet', type=int, default=10, help='bet per round (default: 10)')
+    parser.add_argument('--seed', type=int, default=0,
+                        help='seed for the number of hits per round (default: 0)')
+    parser.add_argument('--output', default=None, help='save the report as JSON')
+    parser.add_argument('--baseline', default=None,
+                        help='a saved report to compare the run with')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the load test and report the results."""
+    args = parse_args(argv)
+    report = run(args.users, args.rounds, args.url, args.bet, args.seed)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    print_report(report, baseline)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    if report["rounds_settled"] < report["rounds"]:
+        sys.exit(f"error: {report['rounds'] - report['rounds_settled']} of {report['rounds']} "
+                 "rounds were not settled")
+
+
+if __name__ == "__main__":
+    main()
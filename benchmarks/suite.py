@@ -0,0 +1,219 @@
+"""benchmarks/suite.py
+Time the hot paths of the models and utils against a stored baseline.
+
+Each case is timed with timeit, keeping the best of several repeats, and
+reported in microseconds per call. Absolute timings depend on the machine
+and its load, so a fixed pure-Python calibration loop is timed in turn with
+every repeat of a case, and cases are compared as multiples of it. A case
+regresses when its multiple grows by more than --threshold percent over
+benchmarks/baseline.json; the script then exits with status 1, so it can
+gate changes to app/blackjack/models.py and app/utils/helpers.py.
+
+After an intended change in speed, rewrite the baseline with --update and
+commit it together with the change.
+
+Example:
+    python -m benchmarks.suite
+    python -m benchmarks.suite --threshold 15 --only deal
+    python -m benchmarks.suite --update
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+from array import array
+
+from app.blackjack.models import FULL_DECK, Card, Deck, Game
+from app.blackjack.strategy import STRATEGY_FILE
+from app.utils import assign_value, calculate_hand_value
+
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_THRESHOLD = 25.0
+
+HANDS = (
+    [Card("10", "Clubs"), Card("6", "Hearts")],
+    [Card("A", "Clubs"), Card("7", "Hearts")],
+    [Card("5", "Clubs"), Card("6", "Hearts")],
+    [Card("8", "Clubs"), Card("8", "Hearts")],
+    [Card("2", "Clubs"), Card("3", "Hearts"), Card("A", "Spades"), Card("4", "Diamonds")],
+)
+UP_CARDS = [Card(rank, "Spades") for rank in ("2", "6", "9", "10", "A")]
+
+
+def calibration():
+    """A fixed pure-Python loop that the cases are measured against."""
+    total = 0
+    for index in range(1000):
+        total += index * index % 7
+    return total
+
+
+def make_cases():
+    """
+    Build the benchmark cases.
+
+    Returns:
+        dict: Zero-argument callables by case name; each call is timed as one
+            unit of work.
+    """
+    rng = random.Random(1)
+    deck = Deck(rng)
+    game = Game(seed=1)
+    round_game = Game(seed=2)
+
+    def deal_deck():
+        deck.codes = array("B", FULL_DECK)
+        for _ in range(52):
+            deck.deal()
+
+    def hand_values():
+        for hand in HANDS:
+            calculate_hand_value(hand)
+
+    def card_values():
+        for rank in Deck.ranks:
+            assign_value(rank)
+
+    def best_moves():
+        for hand in HANDS:
+            for up_card in UP_CARDS:
+                game.determine_best_move(hand, up_card)
+
+    def full_rounds():
+        # Replay the same 30 rounds from the top of the shoe, before the cut
+        # card, so every call does the same work
+        shoe = round_game.deck
+        round_game.clear_table()
+        shoe.position = shoe.discarded = 0
+        round_game.player.bankroll = 1000
+        for _ in range(30):
+            round_game.start_new_round()
+            round_game.player_turn()
+            round_game.dealer_play()
+            round_game.end_round()
+
+    return {
+        "deck_init": lambda: Deck(rng),
+        "deck_shuffle": deck.shuffle,
+        "deck_deal_52": deal_deck,
+        "calculate_hand_value_x5": hand_values,
+        "assign_value_x13": card_values,
+        "load_strategy": lambda: game.load_strategy(STRATEGY_FILE),
+        "determine_best_move_x25": best_moves,
+        "round_cycle_x30": full_rounds,
+    }
+
+
+def time_case(function, repeat=5):
+    """
+    Time a case in turn with the calibration loop.
+
+    Returns:
+        dict: {"us": best microseconds per call, "relative": that time as a
+            multiple of the best calibration time}.
+    """
+    timer, reference = timeit.Timer(function), timeit.Timer(calibration)
+    number, _ = timer.autorange()
+    reference_number, _ = reference.autorange()
+    best = best_reference = float("inf")
+    for _ in range(repeat):
+        best_reference = min(best_reference, reference.timeit(reference_number) / reference_number)
+        best = min(best, timer.timeit(number) / number)
+    return {"us": best * 1e6, "relative": best / best_reference}
+
+
+def measure(only=None, repeat=5):
+    """
+    Time every case.
+
+    Args:
+        only (str): Only time the cases whose name contains this text.
+        repeat (int): The number of repeats to take the best of.
+
+    Returns:
+        dict: {"cases": {name: {"us": float, "relative": float}}}.
+    """
+    cases = {name: case for name, case in make_cases().items() if not only or only in name}
+    return {"cases": {name: time_case(case, repeat) for name, case in cases.items()}}
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare measured cases with a baseline, as multiples of the calibration.
+
+    Args:
+        results (dict): The output of measure.
+        baseline (dict): A stored output of measure.
+        threshold (float): The allowed slowdown in percent.
+
+    Returns:
+        list: (name, change in percent, regressed) for every case that is in
+            both, in the order of results.
+    """
+    rows = []
+    for name, timing in results["cases"].items():
+        base = baseline["cases"].get(name)
+        if not base:
+            continue
+        change = (timing["relative"] / base["relative"] - 1) * 100
+        rows.append((name, change, change > threshold))
+    return rows
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--baseline', default=BASELINE_FILE,
+                        help='baseline JSON file (default: benchmarks/baseline.json)')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'allowed slowdown in percent (default: {DEFAULT_THRESHOLD:g})')
+    parser.add_argument('--only', default=None,
+                        help='only run cases whose name contains this text')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='repeats to take the best of (default: 5)')
+    parser.add_argument('--update', action='store_true',
+                        help='write the measurements as the new baseline')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the suite; return 1 if a case regressed past the threshold."""
+    args = parse_args(argv)
+    results = measure(args.only, args.repeat)
+    if args.update:
+        if args.only:
+            with open(args.baseline, encoding="utf-8") as file:
+                stored = json.load(file)
+            stored["cases"].update(results["cases"])
+            results["cases"] = stored["cases"]
+        with open(args.baseline, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"Wrote {len(results['cases'])} cases to {args.baseline}")
+        return 0
+
+    try:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+    except FileNotFoundError:
+        baseline = {"cases": {}}
+    changes = {name: (change, regressed)
+               for name, change, regressed in compare(results, baseline, args.threshold)}
+    print(f"{'case':26}{'us/call':>12}{'vs base':>10}")
+    for name, timing in results["cases"].items():
+        change, regressed = changes.get(name, (None, False))
+        shown = "new" if change is None else f"{change:+.1f}%"
+        print(f"{name:26}{timing['us']:12.3f}{shown:>10}{'  REGRESSED' if regressed else ''}")
+    regressions = [name for name, (_, regressed) in changes.items() if regressed]
+    if regressions:
+        print(f"{len(regressions)} case(s) slower than the baseline by more than "
+              f"{args.threshold:g}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
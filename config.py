@@ -20,6 +20,40 @@ class Config:
     SESSION_PERMANENT = False
     SQLALCHEMY_DATABASE_URI = 'sqlite:///blackjack.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Server-side game store: games kept in memory and seconds between
+    # write-behind flushes to the database
+    GAME_STORE_CAPACITY = 1024
+    GAME_STORE_FLUSH_INTERVAL = 0.25
+    # Hand history: settled hands buffered and inserted in batches of
+    # HAND_HISTORY_BATCH_SIZE, at least every HAND_HISTORY_FLUSH_INTERVAL
+    # seconds; at most HAND_HISTORY_MAX_PENDING are kept while writes fail
+    HAND_HISTORY_ENABLED = os.getenv('HAND_HISTORY_ENABLED', '1') != '0'
+    HAND_HISTORY_BATCH_SIZE = int(os.getenv('HAND_HISTORY_BATCH_SIZE', '500'))
+    HAND_HISTORY_FLUSH_INTERVAL = float(os.getenv('HAND_HISTORY_FLUSH_INTERVAL', '1.0'))
+    HAND_HISTORY_MAX_PENDING = int(os.getenv('HAND_HISTORY_MAX_PENDING', '100000'))
+    # Export: the bearer token the streaming export routes require (they are
+    # off without one) and the most rounds a simulation export may play
+    EXPORT_TOKEN = os.getenv('EXPORT_TOKEN')
+    EXPORT_MAX_ROUNDS = int(os.getenv('EXPORT_MAX_ROUNDS', '1000000'))
+    # Live tables: the WebSocket push server is started in the app's process
+    # when a port is set; the public host defaults to the host of the request
+    LIVE_TABLES_HOST = os.getenv('LIVE_TABLES_HOST', '127.0.0.1')
+    LIVE_TABLES_PORT = int(os.getenv('LIVE_TABLES_PORT', '0')) or None
+    LIVE_TABLES_PUBLIC_HOST = os.getenv('LIVE_TABLES_PUBLIC_HOST')
+    # Metrics: request timings and game counters in the Prometheus text
+    # format at /metrics
+    METRICS_ENABLED = os.getenv('METRICS_ENABLED', '1') != '0'
+    # Profiling: the fraction of blackjack requests profiled (0 turns it
+    # off), where profiles go (instance/profiles by default) and how many
+    # are kept; see profile_report.py
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))
+    PROFILE_DIR = os.getenv('PROFILE_DIR')
+    PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '200'))
+    # Logging: records are queued and written by a background thread; a
+    # queue size of 0 writes them on the calling thread instead
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
 
     # Constants for card values, assuming these are static across the game logic
     T, J, Q, K = 10, 10, 10, 10
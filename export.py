@@ -0,0 +1,105 @@
+"""export.py
+Export the hand history or a simulation as NDJSON or CSV.
+
+This script streams rows with app.blackjack.export, so memory stays flat
+however large the export. The history subcommand reads the hand history of
+the database configured by FLASK_CONFIG, filtered by time, game, seat,
+player or hand. The simulation subcommand plays a simulation and writes the
+tallies of each chunk of --chunk-rounds rounds as it finishes. Output goes
+to standard output unless --output is given; --gzip compresses it.
+
+Example:
+    python export.py history --since 1760000000 --format csv --output hands.csv
+    python export.py simulation --rounds 10000000 --seed 7 --gzip --output sim.ndjson.gz
+"""
+
+import argparse
+import os
+import sys
+
+from app.blackjack.export import (
+    FORMATS,
+    HISTORY_COLUMNS,
+    SIMULATION_COLUMNS,
+    encode_rows,
+    history_rows,
+    simulation_rows,
+)
+from app.blackjack.models import Shoe
+from app.blackjack.simulation import CHUNK_ROUNDS, Rules
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--format', choices=sorted(FORMATS), default='ndjson',
+                        help='output format (default: ndjson)')
+    common.add_argument('--gzip', action='store_true',
+                        help='gzip the output')
+    common.add_argument('--output', default=None,
+                        help='file to write (default: standard output)')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    history = commands.add_parser('history', parents=[common],
+                                  help='export the hand history')
+    history.add_argument('--since', type=float, default=None,
+                         help='only hands settled at or after this Unix time')
+    history.add_argument('--until', type=float, default=None,
+                         help='only hands settled before this Unix time')
+    history.add_argument('--game', default=None,
+                         help='only hands of this game id')
+    history.add_argument('--seat', type=int, default=None,
+                         help='only hands of this seat')
+    history.add_argument('--player', default=None,
+                         help='only hands of players with this name')
+    history.add_argument('--hand', default=None,
+                         help='only hands from this chart row, such as 16 or a7')
+
+    simulation = commands.add_parser('simulation', parents=[common],
+                                     help='export the tallies of a simulation')
+    simulation.add_argument('--rounds', type=int, default=1_000_000,
+                            help='rounds to play (default: 1000000)')
+    simulation.add_argument('--chunk-rounds', type=int, default=CHUNK_ROUNDS,
+                            help=f'rounds per exported row (default: {CHUNK_ROUNDS})')
+    simulation.add_argument('--decks', type=int, default=Shoe.DEFAULT_DECKS,
+                            help=f'decks in the shoe (default: {Shoe.DEFAULT_DECKS})')
+    simulation.add_argument('--seats', type=int, default=1,
+                            help='seats at the table (default: 1)')
+    simulation.add_argument('--seed', type=int, default=None,
+                            help='seed for a reproducible run')
+    return parser.parse_args(argv)
+
+
+def write(chunks, path):
+    """Write encoded chunks to a file, or to standard output if path is None."""
+    if path is None:
+        for chunk in chunks:
+            sys.stdout.buffer.write(chunk)
+        sys.stdout.buffer.flush()
+        return
+    with open(path, 'wb') as output:
+        for chunk in chunks:
+            output.write(chunk)
+
+
+def main(argv=None):
+    """Stream the requested export to the output."""
+    args = parse_args(argv)
+    if args.command == 'simulation':
+        rows = simulation_rows(args.rounds, seed=args.seed,
+                               rules=Rules(decks=args.decks, seats=args.seats),
+                               chunk_rounds=args.chunk_rounds)
+        write(encode_rows(SIMULATION_COLUMNS, rows, args.format, args.gzip), args.output)
+        return
+
+    from app import create_app  # pylint: disable=C0415
+    app = create_app(os.getenv('FLASK_CONFIG', 'DevelopmentConfig'))
+    with app.app_context():
+        rows = history_rows(since=args.since, until=args.until, game=args.game,
+                            seat=args.seat, player=args.player, hand=args.hand)
+        write(encode_rows(HISTORY_COLUMNS, rows, args.format, args.gzip), args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""generate_strategy.py
+Regenerate the basic strategy chart from expected values.
+
+This script computes every cell of the basic strategy chart for a rule set
+with app.blackjack.chart and writes both app/data/blackjack_strategy.csv and
+app/data/strategy.json. Cell expected values are cached on disk, so only a
+change in the number of decks computes cells again.
+
+Example:
+    python generate_strategy.py
+    python generate_strategy.py --decks 2 --no-surrender --workers 0
+"""
+
+import argparse
+
+from app.blackjack.chart import (
+    CACHE_FILE,
+    JSON_FILE,
+    generate_chart,
+    write_csv,
+    write_json,
+)
+from app.blackjack.models import Shoe
+from app.blackjack.simulation import Rules
+from app.blackjack.strategy import STRATEGY_FILE
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--decks', type=int, default=Shoe.DEFAULT_DECKS,
+                        help=f'decks in the shoe (default: {Shoe.DEFAULT_DECKS})')
+    parser.add_argument('--no-das', action='store_true',
+                        help='disallow doubling down after a split')
+    parser.add_argument('--no-surrender', action='store_true',
+                        help='disallow late surrender')
+    parser.add_argument('--workers', type=int, default=0,
+                        help='worker processes, 0 for every core (default: 0)')
+    parser.add_argument('--csv', default=STRATEGY_FILE,
+                        help='chart CSV to write (default: the packaged chart)')
+    parser.add_argument('--json', default=JSON_FILE,
+                        help='strategy JSON to write (default: the packaged file)')
+    parser.add_argument('--cache', default=CACHE_FILE,
+                        help='cell cache file (default: %(default)s)')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='compute every cell without reading or writing the cache')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Generate the chart and write both files."""
+    args = parse_args(argv)
+    rules = Rules(
+        double_after_split=not args.no_das,
+        surrender=not args.no_surrender,
+        decks=args.decks,
+    )
+    cache = None if args.no_cache else args.cache
+    chart, computed = generate_chart(rules, workers=args.workers, cache_path=cache)
+    write_csv(chart, args.csv)
+    write_json(chart, args.json)
+    cells = len(chart) * len(next(iter(chart.values())))
+    print(f"Computed {computed} of {cells} cells ({cells - computed} cached)")
+    print(f"Wrote {args.csv}")
+    print(f"Wrote {args.json}")
+
+
+if __name__ == "__main__":
+    main()
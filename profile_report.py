@@ -0,0 +1,65 @@
+"""profile_report.py
+Aggregate saved request profiles into a report of the hottest functions.
+
+The app saves profiles of a sample of its requests when PROFILE_SAMPLE_RATE
+is set (see app/profiling.py). This script adds up the saved profiles and
+prints the functions with the most cumulative or self time, with their time
+per profiled request, either as a table or as JSON.
+
+Example:
+    PROFILE_SAMPLE_RATE=0.05 python run.py
+    python profile_report.py --top 30
+    python profile_report.py --sort self --endpoint place_bet --match models.py
+"""
+
+import argparse
+import glob
+import json
+import os
+
+from app.profiling import SORT_KEYS, aggregate
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instance", "profiles")
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--dir', default=os.getenv('PROFILE_DIR') or DEFAULT_DIR,
+                        help='directory of saved profiles (default: PROFILE_DIR or '
+                             'instance/profiles)')
+    parser.add_argument('--sort', choices=tuple(SORT_KEYS), default='cumulative',
+                        help='order functions by cumulative time, self time or calls '
+                             '(default: cumulative)')
+    parser.add_argument('--top', type=int, default=20,
+                        help='number of functions to report (default: 20)')
+    parser.add_argument('--endpoint', default=None,
+                        help='only use profiles of endpoints containing this text')
+    parser.add_argument('--match', default=None,
+                        help='only report functions whose location contains this text')
+    parser.add_argument('--json', action='store_true', help='print the report as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Aggregate the profiles and print the report."""
+    args = parse_args(argv)
+    paths = sorted(glob.glob(os.path.join(args.dir, "*.prof")))
+    if args.endpoint:
+        paths = [path for path in paths if args.endpoint in os.path.basename(path)]
+    rows = aggregate(paths, args.sort, args.top, args.match)
+    if args.json:
+        print(json.dumps({"profiles": len(paths), "sort": args.sort, "functions": rows}, indent=2))
+        return
+    if not paths:
+        print(f"No profiles in {args.dir}")
+        return
+    print(f"{len(paths)} profiles from {args.dir}, by {args.sort} time")
+    print(f"{'calls':>10}{'self s':>10}{'cum s':>10}{'cum ms/req':>12}  function")
+    for row in rows:
+        print(f"{row['calls']:10}{row['self_seconds']:10.4f}{row['cumulative_seconds']:10.4f}"
+              f"{row['cumulative_ms_per_request']:12.3f}  {row['function']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""risk_of_ruin.py
+Estimate the risk of ruin of bankrolls and table limits.
+
+This script measures the outcome distribution of one round with the round
+simulator from app.blackjack.simulation, then evolves many bankroll paths at
+once with app.blackjack.bankroll. It prints the probability of ruin for every
+combination of starting bankroll and table minimum, flat betting the minimum
+unless --unit or --fraction is given, and the time to ruin, drawdown and
+final bankroll quantiles of each. Use --json for machine-readable output.
+
+Example:
+    python risk_of_ruin.py --bankroll 500,1000,2000 --table-min 5,10,25
+    python risk_of_ruin.py --bankroll 1000 --fraction 0.02 --rounds 20000
+"""
+
+import argparse
+import json
+
+from app.blackjack.bankroll import BettingPolicy, OutcomeDistribution, simulate_bankrolls
+from app.blackjack.models import Shoe
+from app.blackjack.simulation import Rules
+
+
+def _numbers(text):
+    """Parse a comma-separated list of numbers."""
+    try:
+        return [float(value) for value in text.split(",") if value.strip()]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected numbers such as 500,1000, not {text!r}") from None
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--bankroll', type=_numbers, default=[1000.0],
+                        help='starting bankrolls, comma-separated (default: 1000)')
+    parser.add_argument('--table-min', type=_numbers, default=[10.0],
+                        help='table minimums, comma-separated (default: 10)')
+    parser.add_argument('--table-max', type=float, default=500.0,
+                        help='table maximum (default: 500)')
+    parser.add_argument('--unit', type=float, default=None,
+                        help='flat bet, at least the table minimum (default: the minimum)')
+    parser.add_argument('--fraction', type=float, default=None,
+                        help='bet this fraction of the bankroll instead of a flat bet')
+    parser.add_argument('--rounds', type=int, default=5000,
+                        help='rounds each path plays (default: 5000)')
+    parser.add_argument('--paths', type=int, default=100_000,
+                        help='bankroll paths per combination (default: 100000)')
+    parser.add_argument('--measure-rounds', type=int, default=1_000_000,
+                        help='rounds simulated to measure the outcome distribution '
+                             '(default: 1000000)')
+    parser.add_argument('--decks', type=int, default=Shoe.DEFAULT_DECKS,
+                        help=f'decks in the shoe (default: {Shoe.DEFAULT_DECKS})')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for a reproducible run')
+    parser.add_argument('--json', action='store_true',
+                        help='print the report as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Measure the distribution, run every combination and print the report."""
+    args = parse_args(argv)
+    distribution = OutcomeDistribution.from_simulation(
+        args.measure_rounds, seed=args.seed, rules=Rules(decks=args.decks))
+    results = []
+    for table_min in args.table_min:
+        policy = BettingPolicy(unit=args.unit or table_min, table_min=table_min,
+                               table_max=args.table_max, fraction=args.fraction)
+        for bankroll in args.bankroll:
+            result = simulate_bankrolls(distribution, policy, bankroll, args.rounds,
+                                        paths=args.paths, seed=args.seed)
+            results.append((table_min, result))
+
+    if args.json:
+        print(json.dumps({
+            "distribution": {"mean": distribution.mean, "std": distribution.std},
+            "results": [{"table_min": table_min, **result.to_dict()}
+                        for table_min, result in results],
+        }, indent=2))
+        return
+
+    print(f"Outcome per unit: mean {distribution.mean:+.4f}, std {distribution.std:.4f}")
+    print(f"Rounds per path:  {args.rounds:,} ({args.paths:,} paths)")
+    print()
+    print("Risk of ruin     " + "".join(f"{bankroll:>12,.0f}" for bankroll in args.bankroll))
+    for index, table_min in enumerate(args.table_min):
+        row = results[index * len(args.bankroll):(index + 1) * len(args.bankroll)]
+        print(f"Table min {table_min:<7,.0f}" +
+              "".join(f"{result.ruin_probability:>12.2%}" for _, result in row))
+    print()
+    for table_min, result in results:
+        ruin = result.time_to_ruin
+        drawdown = result.max_drawdown
+        print(f"Min {table_min:,.0f}, bankroll {result.bankroll:,.0f}: "
+              f"ruin {result.ruin_probability:.2%}"
+              + (f", median ruin round {ruin['0.5']:,.0f}" if ruin else "")
+              + f", drawdown p50/p99 {drawdown['0.5']:,.0f}/{drawdown['0.99']:,.0f}"
+              f", mean final {result.final_bankroll['mean']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""simulate.py
+Play blackjack rounds headlessly and report the results.
+
+This script runs the round simulator from app.blackjack.simulation outside of
+Flask. It plays the requested number of rounds with the basic strategy table
+and prints the house edge, outcome counts and throughput, either as a short
+text report or as JSON. With --columns it also stores every seat round in
+memory-mapped column files (see app.blackjack.columnar), resuming a run
+that was interrupted in the same directory, and adds the EV by betting
+count: the true count, or the running count for KO.
+
+Example:
+    python simulate.py --rounds 1000000 --seed 42
+    python simulate.py --rounds 50000000 --seed 42 --workers 0
+    python simulate.py --rounds 1000000 --seats 7
+    python simulate.py --rounds 1000000 --naturals --splits
+    python simulate.py --rounds 1000000 --count hi-lo --ramp 2:2,3:4,4:8
+    python simulate.py --rounds 1000000000 --seed 42 --workers 0 --columns runs/1b
+"""
+
+import argparse
+import json
+import sys
+
+from app.blackjack.counting import SYSTEMS, BetRamp
+from app.blackjack.models import Shoe
+from app.blackjack.simulation import Rules, simulate
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--rounds', type=int, default=1_000_000,
+                        help='number of rounds to play (default: 1000000)')
+    parser.add_argument('--seed', type=int, default=None,
+                        help='seed for a reproducible run')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='worker processes, 0 for every core (default: 1)')
+    parser.add_argument('--decks', type=int, default=Shoe.DEFAULT_DECKS,
+                        help='decks in the shoe, 0 for a fresh deck every round '
+                             f'(default: {Shoe.DEFAULT_DECKS})')
+    parser.add_argument('--penetration', type=float, default=Shoe.DEFAULT_PENETRATION,
+                        help='fraction of the shoe dealt before the cut card '
+                             f'(default: {Shoe.DEFAULT_PENETRATION})')
+    parser.add_argument('--seats', type=int, default=1,
+                        help='seats at the table, each playing every round (default: 1)')
+    parser.add_argument('--naturals', action='store_true',
+                        help='have the dealer peek and pay player naturals at once, '
+                             'instead of playing them out as the web game does')
+    parser.add_argument('--blackjack-payout', type=float, default=1.5,
+                        help='payout multiple for a natural, with --naturals (default: 1.5)')
+    parser.add_argument('--splits', action='store_true',
+                        help='allow splitting pairs, which the web game plays by their total')
+    parser.add_argument('--no-das', action='store_true',
+                        help='disallow doubling down after a split, with --splits')
+    parser.add_argument('--no-surrender', action='store_true',
+                        help='disallow late surrender')
+    parser.add_argument('--count', choices=tuple(SYSTEMS), default=None,
+                        help='count the shoe with this system and bet by the count')
+    parser.add_argument('--ramp', type=BetRamp.parse, default=BetRamp(),
+                        help='bet units by count as count:units pairs, used with --count '
+                             '(default: 2:2,3:4,4:6,5:8)')
+    parser.add_argument('--columns', metavar='DIR', default=None,
+                        help='store every seat round as memory-mapped columns in DIR, '
+                             'resuming a run interrupted there')
+    parser.add_argument('--json', action='store_true',
+                        help='print the report as JSON')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the simulation and print the report."""
+    args = parse_args(argv)
+    rules = Rules(
+        naturals=args.naturals,
+        blackjack_payout=args.blackjack_payout,
+        splits=args.splits,
+        double_after_split=not args.no_das,
+        surrender=not args.no_surrender,
+        decks=args.decks,
+        penetration=args.penetration,
+        seats=args.seats,
+        counting=args.count,
+        bet_ramp=args.ramp if args.count else None,
+    )
+    summary = None
+    if args.columns:
+        from app.blackjack.columnar import ColumnStore, write_columns  # pylint: disable=C0415
+        try:
+            result = write_columns(args.columns, args.rounds, seed=args.seed, rules=rules,
+                                   workers=args.workers)
+        except ValueError as e:
+            sys.exit(f"error: {e}")
+        summary = ColumnStore(args.columns).aggregate()
+    else:
+        result = simulate(args.rounds, seed=args.seed, rules=rules, workers=args.workers)
+
+    if args.json:
+        report = result.to_dict()
+        if summary is not None:
+            report["columns"] = summary.to_dict()
+        print(json.dumps(report, indent=2))
+        return
+
+    print(f"Rounds played:   {result.rounds:,}")
+    if result.seats > 1:
+        print(f"Seat rounds:     {result.seat_rounds:,} ({result.seats} seats)")
+    print(f"Hands settled:   {result.hands:,}")
+    print(f"Wins:            {result.wins:,} ({result.blackjacks:,} blackjacks)")
+    print(f"Losses:          {result.losses:,}")
+    print(f"Pushes:          {result.pushes:,}")
+    print(f"Surrenders:      {result.surrenders:,}")
+    print(f"Doubles/splits:  {result.doubles:,}/{result.splits:,}")
+    print(f"Net units:       {result.net_units:+,.1f}")
+    print(f"House edge:      {result.house_edge:.4%} (+/- {1.96 * result.std_error:.4%})")
+    if args.count:
+        print(f"Return/wager:    {result.return_per_wager:+.4%} ({args.count} bet ramp, "
+              f"{result.wagered_units / result.seat_rounds:.2f} units wagered per seat round)")
+    print(f"Rounds/sec:      {result.rounds_per_second:,.0f}")
+    if result.seats > 1:
+        print(f"Seat rounds/sec: {result.seat_rounds_per_second:,.0f}")
+    print(f"Seed:            {result.seed}")
+    if summary is not None:
+        print(f"Columns:         {summary.rows:,} seat rounds in {args.columns}")
+        for count, cell in summary.by_count.items():
+            print(f"  Count {count:+3d}: EV {cell['ev']:+.4f} over {cell['rows']:,} seat rounds")
+
+
+if __name__ == "__main__":
+    main()
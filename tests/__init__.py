@@ -1,5 +1,25 @@
 # tests/__init__.py
 
 from .test_config import TestConfigurations
-from .test_game_logic import TestCard, TestDealer, TestDeck, TestGame, TestPlayer
+from .test_game_logic import TestCard, TestDealer, TestDeck, TestGame, TestPlayer, TestShoe
 from .test_routes import TestBlackjackRoutes
+from .test_simulation import TestSimulator
+from .test_strategy import TestDetermineBestMove, TestStrategyTable
+from .test_probability import TestDealerProbabilities
+from .test_advice import TestAdvise, TestAdviceRoute, TestHandEvs
+from .test_chart import TestChart
+from .test_codec import TestCodec
+from .test_store import TestGameStore, TestOptimisticConcurrency
+from .test_actions import TestApplyAction, TestBatchRoute, TestDiffState
+from .test_table import TestTable, TestTableRoutes, TestTableSimulation
+from .test_live import TestLiveRoute, TestLiveTables
+from .test_loadtest import TestLoadTest
+from .test_suite import TestSuite
+from .test_metrics import TestGameMetrics, TestMetricTypes, TestMetricsRoute
+from .test_profiling import TestRequestProfiler
+from .test_logs import TestQueuedLogging
+from .test_counting import TestBetRamp, TestCardCounter, TestCountRoute
+from .test_bankroll import TestBankroll
+from .test_history import TestHandHistory, TestHandRecord, TestHistoryRoutes
+from .test_export import TestEncoding, TestExportRoutes, TestHistoryExport
+from .test_columnar import TestColumnarResults
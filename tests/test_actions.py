@@ -0,0 +1,167 @@
+"""test_actions.py
+Tests for Game.serialize, Game.apply_action and the batch action route.
+"""
+
+import unittest
+from flask import Flask
+from app.blackjack.models import Card, Game
+from app.blackjack.routes import blackjack_bp
+from app.blackjack.store import game_store
+from app.utils import diff_state, save_game_state
+
+class TestApplyAction(unittest.TestCase):
+    def setUp(self):
+        self.game = Game(seed=2)
+
+    def test_bet_deal_stand(self):
+        """Test a full round played through apply_action."""
+        self.game.apply_action("bet", 10)
+        self.game.apply_action("deal")
+        self.assertEqual(self.game.player.current_bet, 10)
+        self.assertEqual(self.game.player.card_count, 2)
+        self.game.apply_action("stand")
+        self.assertGreaterEqual(self.game.dealer.total, 17)
+        self.assertIn(self.game.player.bankroll, (990, 1000, 1010))
+
+    def test_invalid_actions(self):
+        """Test that unknown or illegal actions raise ValueError."""
+        with self.assertRaises(ValueError):
+            self.game.apply_action("split")
+        with self.assertRaises(ValueError):
+            self.game.apply_action("bet", 5000)
+        self.game.player.hand = [Card("10", "Hearts"), Card("A", "Spades")]
+        with self.assertRaises(ValueError):
+            self.game.apply_action("hit")
+        with self.assertRaises(ValueError):
+            self.game.apply_action("double_down")
+
+    def test_settled_round_does_not_pay_again(self):
+        """Test that playing actions are refused once the round is settled."""
+        game = Game(seed=3)
+        with self.assertRaises(ValueError):
+            game.apply_action("stand")  # Nothing dealt yet
+        game.apply_action("bet", 100)
+        game.apply_action("deal")
+        game.apply_action("stand")
+        bankroll = game.player.bankroll
+        for action in ("stand", "surrender", "hit", "double_down"):
+            with self.assertRaises(ValueError):
+                game.apply_action(action)
+        game.apply_action("bet", 100)
+        with self.assertRaises(ValueError):
+            game.apply_action("stand")
+        with self.assertRaises(ValueError):
+            game.resolve_bets("win")
+        self.assertEqual(game.player.bankroll, bankroll)
+
+    def test_double_down_doubles_the_bet(self):
+        """Test that doubling takes one card, doubles the bet and settles."""
+        self.game.apply_action("bet", 10)
+        self.game.apply_action("deal")
+        self.game.player.hand = [Card("5", "Hearts"), Card("6", "Spades")]
+        self.game.apply_action("double_down")
+        self.assertEqual(self.game.player.card_count, 3)
+        self.assertEqual(self.game.player.current_bet, 20)
+
+    def test_serialize(self):
+        """Test the serialized state."""
+        self.game.start_new_round()
+        state = self.game.serialize()
+        self.assertEqual(state["seats"]["0"]["hand"], [repr(card) for card in self.game.player.hand])
+        self.assertEqual(state["seats"]["0"]["total"], self.game.player.total)
+        self.assertEqual(state["turn"], 0)
+        self.assertEqual(state["shoe"]["remaining"], self.game.deck.remaining)
+        self.assertIsNone(state["version"])
+
+    def test_hole_card_is_hidden_until_the_dealer_plays(self):
+        """Test that the dealer's hole card and total are only sent once the round is settled."""
+        self.game.apply_action("bet", 10)
+        self.game.apply_action("deal")
+        dealer = self.game.serialize()["dealer"]
+        self.assertEqual(dealer["hand"], [repr(self.game.dealer.hand[0]), None])
+        self.assertIsNone(dealer["total"])
+        with self.assertRaises(ValueError):
+            self.game.apply_action("bet", 20)
+        with self.assertRaises(ValueError):
+            self.game.apply_action("deal")
+        self.game.apply_action("stand")
+        dealer = self.game.serialize()["dealer"]
+        self.assertEqual(dealer["hand"], [repr(card) for card in self.game.dealer.hand])
+        self.assertEqual(dealer["total"], self.game.dealer.total)
+
+class TestDiffState(unittest.TestCase):
+    def test_only_changes_are_returned(self):
+        """Test that unchanged keys are left out at every level."""
+        before = {"version": 1, "player": {"hand": ["a"], "bet": 10}, "shoe": {"remaining": 5}}
+        after = {"version": 2, "player": {"hand": ["a", "b"], "bet": 10}, "shoe": {"remaining": 5}}
+        self.assertEqual(diff_state(before, after), {"version": 2, "player": {"hand": ["a", "b"]}})
+        self.assertEqual(diff_state(after, after), {})
+
+class TestBatchRoute(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SECRET_KEY'] = 'test_key'
+        self.app.register_blueprint(blackjack_bp)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        game_store.clear()
+
+    def start(self):
+        with self.client.session_transaction() as session:
+            session['game_id'] = 'batch-test'
+        game = Game(seed=9)
+        with self.app.test_request_context():
+            from flask import session
+            session['game_id'] = 'batch-test'
+            save_game_state(game)
+        return game
+
+    def post(self, actions, since=None):
+        return self.client.post('/actions', json={"actions": actions, "since": since})
+
+    def test_no_game(self):
+        """Test that a batch without a game is rejected."""
+        self.assertEqual(self.post(["hit"]).status_code, 400)
+
+    def test_fetch_then_delta(self):
+        """Test that a batch answers with a delta against the client's version."""
+        self.start()
+        full = self.post([]).get_json()
+        self.assertEqual(full["version"], 1)
+        self.assertIn("state", full)
+
+        response = self.post([{"action": "bet", "amount": 10}, "deal", "stand"], since=1)
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data["version"], 2)
+        self.assertNotIn("state", data)
+        self.assertEqual(data["delta"]["version"], 2)
+        self.assertNotIn("name", data["delta"]["seats"]["0"])
+
+    def test_stale_client_gets_full_state(self):
+        """Test that a client behind by a version receives the whole state."""
+        self.start()
+        self.post(["deal"])
+        data = self.post(["hit"], since=1).get_json()
+        self.assertIn("state", data)
+        self.assertEqual(data["version"], 3)
+
+    def test_failed_batch_saves_nothing(self):
+        """Test that a failing action aborts the whole batch."""
+        self.start()
+        response = self.post([{"action": "bet", "amount": 10}, "fly"])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["index"], 1)
+        state = self.post([]).get_json()["state"]
+        self.assertEqual(state["seats"]["0"]["bet"], 0)
+        self.assertEqual(state["version"], 1)
+
+    def test_batch_size_is_bounded(self):
+        """Test that oversized or malformed batches are rejected."""
+        self.start()
+        self.assertEqual(self.post(["hit"] * 100).status_code, 400)
+        self.assertEqual(self.client.post('/actions', json={"actions": "hit"}).status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
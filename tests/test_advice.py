@@ -0,0 +1,126 @@
+"""test_advice.py
+Tests for the composition-dependent expected value advice.
+"""
+
+import unittest
+from dataclasses import replace
+from flask import Flask
+from app.blackjack.advice import advise, cache_info, hand_evs
+from app.blackjack.models import Card, Game
+from app.blackjack.probability import full_shoe_counts, shoe_counts
+from app.blackjack.routes import blackjack_bp
+from app.blackjack.simulation import Rules
+from app.blackjack.store import game_store
+from app.utils import load_game_state
+
+SIX_DECKS = full_shoe_counts(6)
+CASINO = Rules(naturals=True, splits=True)
+
+class TestHandEvs(unittest.TestCase):
+    def best(self, hand, up, counts=SIX_DECKS, rules=None):
+        evs = hand_evs(hand, up, counts, rules)
+        return max(evs, key=evs.get)
+
+    def test_textbook_decisions(self):
+        """Test that a full shoe reproduces well-known basic strategy plays."""
+        no_surrender = replace(CASINO, surrender=False)
+        self.assertEqual(self.best([10, 6], 10, rules=CASINO), "surrender")
+        self.assertEqual(self.best([10, 6], 10, rules=no_surrender), "hit")
+        self.assertEqual(self.best([8, 8], 10, rules=no_surrender), "split")
+        self.assertEqual(self.best([11, 11], 6, rules=CASINO), "split")
+        self.assertEqual(self.best([6, 5], 6, rules=CASINO), "double")
+        self.assertEqual(self.best([10, 2], 4, rules=CASINO), "stand")
+        self.assertEqual(self.best([10, 2], 2, rules=CASINO), "hit")
+        self.assertEqual(self.best([10, 10], 6), "stand")
+
+    def test_legal_actions(self):
+        """Test that double, surrender and split are only offered on two cards."""
+        self.assertEqual(set(hand_evs([10, 6], 10, SIX_DECKS)),
+                         {"stand", "hit", "double", "surrender"})
+        self.assertIn("split", hand_evs([8, 8], 10, SIX_DECKS, CASINO))
+        self.assertNotIn("split", hand_evs([8, 8], 10, SIX_DECKS))
+        self.assertEqual(set(hand_evs([2, 3, 4], 10, SIX_DECKS)), {"stand", "hit"})
+        self.assertNotIn("surrender", hand_evs([10, 6], 10, SIX_DECKS, Rules(surrender=False)))
+
+    def test_natural_pays_blackjack(self):
+        """Test that a natural stands for the blackjack payout with naturals."""
+        self.assertEqual(hand_evs([11, 10], 10, SIX_DECKS, CASINO), {"stand": 1.5})
+
+    def test_game_rules_have_no_naturals(self):
+        """Test that by default a two-card 21 is played out and no peek protects a double."""
+        natural = hand_evs([11, 10], 10, SIX_DECKS)
+        self.assertEqual(set(natural), {"stand"})
+        self.assertTrue(0 < natural["stand"] < 1)
+        self.assertLess(hand_evs([6, 5], 11, SIX_DECKS)["double"],
+                        hand_evs([6, 5], 11, SIX_DECKS, CASINO)["double"])
+
+    def test_composition_matters(self):
+        """Test that a ten-rich shoe makes standing on 16 against a ten worse to hit."""
+        rich = list(SIX_DECKS)
+        rich[9] += 40
+        lean = list(SIX_DECKS)
+        lean[9] -= 40
+        self.assertLess(hand_evs([10, 6], 10, rich)["hit"], hand_evs([10, 6], 10, lean)["hit"])
+        self.assertEqual(self.best([10, 2], 4, lean), "hit")
+
+    def test_repeat_query_is_cached(self):
+        """Test that asking twice without a new card hits the cache."""
+        hand_evs([9, 7], 9, SIX_DECKS)
+        hits = cache_info().hits
+        hand_evs([7, 9], 9, SIX_DECKS)
+        self.assertEqual(cache_info().hits, hits + 1)
+
+class TestAdvise(unittest.TestCase):
+    def setUp(self):
+        self.game = Game(seed=5)
+
+    def test_no_hand_in_progress(self):
+        """Test that advice requires a dealt hand."""
+        with self.assertRaises(ValueError):
+            advise(self.game)
+
+    def test_advice_for_current_hand(self):
+        """Test the advice payload and that the hole card counts as unseen."""
+        self.game.start_new_round()
+        self.game.player.hand = [Card("10", "Hearts"), Card("6", "Clubs")]
+        self.game.dealer.hand = [Card("10", "Spades"), Card("7", "Clubs")]
+        result = advise(self.game)
+        self.assertEqual(result["total"], 16)
+        self.assertEqual(result["chart"], "Surrender")
+        self.assertEqual(result["best"], max(result["ev"], key=result["ev"].get))
+        counts = list(shoe_counts(self.game.deck))
+        counts[6] += 1
+        self.assertEqual(result["ev"], hand_evs([10, 6], 10, counts))
+
+class TestAdviceRoute(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SECRET_KEY'] = 'test_key'
+        self.app.register_blueprint(blackjack_bp)
+
+    def tearDown(self):
+        game_store.clear()
+
+    def test_no_game(self):
+        """Test that the advice route rejects requests without a game."""
+        response = self.app.test_client().get('/advice')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("error", response.get_json())
+
+    def test_dealt_hand(self):
+        """Test that the route returns the advice of the session's dealt hand."""
+        with self.app.test_client() as client:
+            client.post('/start')
+            client.post('/actions', json={"actions": [{"action": "bet", "amount": 10}, "deal"]})
+            response = client.get('/advice')
+            self.assertEqual(response.status_code, 200)
+            expected = advise(load_game_state())
+        result = response.get_json()
+        self.assertEqual(result["ev"], expected["ev"])
+        self.assertEqual(result["best"], expected["best"])
+        self.assertEqual(result["best"], max(result["ev"], key=result["ev"].get))
+        self.assertEqual(result["chart"], expected["chart"])
+        self.assertEqual(len(result["hand"]), 2)
+
+if __name__ == '__main__':
+    unittest.main()
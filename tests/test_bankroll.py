@@ -0,0 +1,90 @@
+"""test_bankroll.py
+Tests for the outcome distributions, betting policies and bankroll paths.
+"""
+
+import unittest
+import numpy as np
+from app.blackjack.bankroll import BettingPolicy, OutcomeDistribution, simulate_bankrolls
+from app.blackjack.simulation import Rules
+
+class TestBankroll(unittest.TestCase):
+    def test_distribution(self):
+        """Test that a distribution is validated, sorted and summarized."""
+        with self.assertRaises(ValueError):
+            OutcomeDistribution([1, -1], [0.5])
+        with self.assertRaises(ValueError):
+            OutcomeDistribution([1, -1], [0.6, 0.6])
+        distribution = OutcomeDistribution.from_counts({1: 3, -1: 1})
+        self.assertEqual(list(distribution.values), [-1, 1])
+        self.assertEqual(list(distribution.probabilities), [0.25, 0.75])
+        self.assertAlmostEqual(distribution.mean, 0.5)
+        self.assertAlmostEqual(distribution.std, np.sqrt(0.75))
+
+    def test_sample_frequencies(self):
+        """Test that samples follow the probabilities."""
+        distribution = OutcomeDistribution([-1, 0, 1.5], [0.5, 0.1, 0.4])
+        draws = distribution.sample(np.random.default_rng(3), 200_000)
+        for value, probability in zip(distribution.values, distribution.probabilities):
+            self.assertAlmostEqual((draws == value).mean(), probability, delta=0.005)
+
+    def test_from_simulation(self):
+        """Test that a measured distribution is reproducible and near the house edge."""
+        first = OutcomeDistribution.from_simulation(20_000, seed=5, rules=Rules(decks=6))
+        second = OutcomeDistribution.from_simulation(20_000, seed=5, rules=Rules(decks=6))
+        np.testing.assert_array_equal(first.values, second.values)
+        np.testing.assert_array_equal(first.probabilities, second.probabilities)
+        self.assertIn(-1.0, first.values)
+        self.assertIn(2.0, first.values)
+        self.assertNotIn(1.5, first.values)  # Game pays a natural even money
+        self.assertLess(abs(first.mean), 0.06)
+
+    def test_bets(self):
+        """Test flat and fractional bets within the table limits and the bankroll."""
+        bankrolls = np.array([0.0, 7.0, 100.0, 1000.0, 100_000.0])
+        flat = BettingPolicy(unit=25, table_min=10, table_max=500)
+        self.assertEqual(list(flat.bets(bankrolls)), [0, 7, 25, 25, 25])
+        fraction = BettingPolicy(table_min=10, table_max=500, fraction=0.05)
+        self.assertEqual(list(fraction.bets(bankrolls)), [0, 7, 10, 50, 500])
+        self.assertEqual(list(fraction.bets(np.array([390.0]))), [10])
+        with self.assertRaises(ValueError):
+            BettingPolicy(table_min=10, table_max=5)
+        with self.assertRaises(ValueError):
+            BettingPolicy(fraction=1.5)
+
+    def test_reproducible(self):
+        """Test that a seed reproduces a run."""
+        distribution = OutcomeDistribution([-1, 1], [0.51, 0.49])
+        policy = BettingPolicy(unit=10, table_min=10)
+        first = simulate_bankrolls(distribution, policy, 200, 500, paths=2000, seed=8)
+        second = simulate_bankrolls(distribution, policy, 200, 500, paths=2000, seed=8)
+        self.assertEqual(first.to_dict(), second.to_dict())
+        self.assertTrue(0 < first.ruin_probability < 1)
+
+    def test_sure_loss(self):
+        """Test that losing every round ruins every path on schedule."""
+        distribution = OutcomeDistribution([-1], [1])
+        result = simulate_bankrolls(distribution, BettingPolicy(unit=10, table_min=10),
+                                    100, 50, paths=100, seed=1)
+        self.assertEqual(result.ruin_probability, 1.0)
+        self.assertEqual(result.time_to_ruin["0.5"], 10)
+        self.assertEqual(result.time_to_ruin["mean"], 10)
+        self.assertEqual(result.max_drawdown["0.99"], 100)
+        self.assertEqual(result.final_bankroll["mean"], 0)
+
+    def test_sure_win(self):
+        """Test that winning every round ruins nothing and draws nothing down."""
+        distribution = OutcomeDistribution([1], [1])
+        result = simulate_bankrolls(distribution, BettingPolicy(unit=10, table_min=10),
+                                    100, 20, paths=100, seed=1)
+        self.assertEqual(result.ruined, 0)
+        self.assertEqual(result.time_to_ruin, {})
+        self.assertEqual(result.max_drawdown["0.99"], 0)
+        self.assertEqual(result.final_bankroll["0.5"], 300)
+
+    def test_below_table_minimum(self):
+        """Test that a bankroll below the table minimum is ruined at once."""
+        distribution = OutcomeDistribution([1], [1])
+        result = simulate_bankrolls(distribution, BettingPolicy(unit=25, table_min=25),
+                                    20, 10, paths=10)
+        self.assertEqual(result.ruin_probability, 1.0)
+        self.assertEqual(result.time_to_ruin["0.99"], 0)
@@ -0,0 +1,95 @@
+"""test_chart.py
+Tests for the basic strategy chart generator.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from app.blackjack.chart import (
+    cell_code,
+    chart_hands,
+    generate_chart,
+    write_csv,
+    write_json,
+)
+from app.blackjack.simulation import Rules
+from app.blackjack.strategy import STRATEGY_FILE, load_strategy
+
+class TestChart(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.cache = os.path.join(cls.directory.name, "cache.json")
+        cls.chart, cls.computed = generate_chart(Rules(), cache_path=cls.cache)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_representative_hands(self):
+        """Test that every row's hand has the row's total and kind."""
+        for row, cards in chart_hands():
+            if row[0] == "d":
+                self.assertEqual(cards[0], cards[1])
+            elif row == "aa":
+                self.assertEqual(cards, (11, 11))
+            elif row[0] == "a":
+                self.assertEqual(cards[0], 11)
+            else:
+                self.assertEqual(sum(cards), int(row))
+                self.assertEqual(len(set(cards)), len(cards))
+
+    def test_textbook_cells(self):
+        """Test cells of the six-deck, stand on 17, DAS, late surrender chart."""
+        self.assertEqual(self.chart["16"]["T"], "RH")
+        self.assertEqual(self.chart["12"]["4"], "S")
+        self.assertEqual(self.chart["12"]["2"], "H")
+        self.assertEqual(self.chart["11"]["6"], "DH")
+        self.assertEqual(self.chart["a7"]["3"], "DS")
+        self.assertEqual(self.chart["d4"]["5"], "PH")
+        self.assertEqual(self.chart["d8"]["A"], "Sp")
+        self.assertEqual(self.chart["dT"]["6"], "S")
+        self.assertEqual(self.chart["aa"]["T"], "Sp")
+
+    def test_rule_change_uses_cache(self):
+        """Test that changing surrender and DAS rules recomputes no cells."""
+        self.assertEqual(self.computed, 350)
+        chart, computed = generate_chart(
+            Rules(surrender=False, double_after_split=False), cache_path=self.cache
+        )
+        self.assertEqual(computed, 0)
+        self.assertEqual(chart["16"]["T"], "H")
+        self.assertNotIn("PH", [code for cells in chart.values() for code in cells.values()])
+
+    def test_cell_code(self):
+        """Test the choice of chart code from expected values."""
+        rules = Rules()
+        self.assertEqual(cell_code({"stand": -0.2, "hit": 0.1, "double": 0.2}, rules), "DH")
+        self.assertEqual(cell_code({"stand": 0.1, "hit": 0.0, "double": 0.2}, rules), "DS")
+        self.assertEqual(cell_code({"stand": -0.6, "hit": -0.55, "double": -1.1}, rules), "RH")
+        self.assertEqual(cell_code({"stand": -0.6, "hit": -0.55}, Rules(surrender=False)), "H")
+        pair = {"stand": -0.2, "hit": -0.1, "double": -0.4, "split": 0.0, "split_no_das": -0.15}
+        self.assertEqual(cell_code(pair, rules), "PH")
+        self.assertEqual(cell_code(pair, Rules(double_after_split=False)), "H")
+
+    def test_written_files_round_trip(self):
+        """Test that the CSV loads like the packaged chart and the JSON covers every cell."""
+        csv_path = os.path.join(self.directory.name, "chart.csv")
+        json_path = os.path.join(self.directory.name, "strategy.json")
+        write_csv(self.chart, csv_path)
+        write_json(self.chart, json_path)
+
+        rows = load_strategy(csv_path)
+        self.assertEqual(rows, self.chart)
+        self.assertEqual(set(load_strategy(STRATEGY_FILE)["16"]), set(rows["16"]))
+
+        with open(json_path, encoding="utf-8") as file:
+            groups = json.load(file)
+        cells = sum(len(hands) for columns in groups.values() for hands in columns.values())
+        self.assertEqual(cells, 350)
+        self.assertIn("D10", groups["stand"]["6"])
+        self.assertIn(16, groups["surrender_or_hit"]["T"])
+
+if __name__ == '__main__':
+    unittest.main()
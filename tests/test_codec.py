@@ -0,0 +1,115 @@
+"""test_codec.py
+Tests for the compact session codec of a Game.
+"""
+
+import unittest
+from flask import Flask
+from app.blackjack.codec import _HEADER, _SEAT, FORMAT_VERSION, decode_game, encode_game
+from app.blackjack.models import Card, Game
+from app.blackjack.strategy import get_strategy
+from app.utils import load_game_state, save_game_state
+
+class TestCodec(unittest.TestCase):
+    def setUp(self):
+        self.game = Game(seed=21)
+        for _ in range(12):
+            self.game.start_new_round()
+        self.game.player.bankroll = 975
+        self.game.player.current_bet = 25
+
+    def assertSameGame(self, first, second):
+        self.assertEqual(first.deck.codes, second.deck.codes)
+        self.assertEqual(first.deck.position, second.deck.position)
+        self.assertEqual(first.deck.cut, second.deck.cut)
+        self.assertEqual(first.deck.shuffles, second.deck.shuffles)
+        self.assertEqual(sorted(first.deck.discards[:first.deck.discarded]),
+                         sorted(second.deck.discards[:second.deck.discarded]))
+        self.assertEqual(first.player.hand, second.player.hand)
+        self.assertEqual(first.dealer.hand, second.dealer.hand)
+        self.assertEqual(first.player.name, second.player.name)
+        self.assertEqual(first.player.bankroll, second.player.bankroll)
+        self.assertEqual(first.player.current_bet, second.player.current_bet)
+
+    def test_round_trip_is_tens_of_bytes(self):
+        """Test that a shoe dealt from its seed encodes compactly and decodes exactly."""
+        data = encode_game(self.game)
+        self.assertLess(len(data), 80)
+        self.assertEqual(data[0], FORMAT_VERSION)
+        decoded = decode_game(data)
+        self.assertSameGame(self.game, decoded)
+        self.assertIs(decoded.strategy, get_strategy())
+
+    def test_decoded_game_plays_on_identically(self):
+        """Test that the decoded game deals the same cards as the original."""
+        decoded = decode_game(encode_game(self.game))
+        for _ in range(60):
+            self.game.start_new_round()
+            decoded.start_new_round()
+            self.assertEqual(self.game.player.hand, decoded.player.hand)
+            self.assertEqual(self.game.dealer.hand, decoded.dealer.hand)
+
+    def test_reshuffled_discards_are_packed(self):
+        """Test that a shoe rebuilt from the tray is stored card by card."""
+        self.game.deck.reshuffle_discards()
+        self.game.player.add_card(self.game.deck.deal())
+        data = encode_game(self.game)
+        decoded = decode_game(data)
+        self.assertSameGame(self.game, decoded)
+        self.assertGreater(len(data), 80)
+
+    def test_hands_placed_by_hand(self):
+        """Test that hands not dealt from the shoe still round-trip."""
+        self.game.player.hand = [Card("A", "Spades"), Card("A", "Spades"), Card("9", "Hearts")]
+        self.assertSameGame(self.game, decode_game(encode_game(self.game)))
+
+    def test_fractional_bankroll(self):
+        """Test that a bankroll left fractional by a surrender is kept."""
+        self.game.player.bankroll = 962.5
+        self.assertEqual(decode_game(encode_game(self.game)).player.bankroll, 962.5)
+
+    def test_actions_round_trip(self):
+        """Test that the actions of each seat this round are kept."""
+        self.game.actions = ["HHS"]
+        self.assertEqual(decode_game(encode_game(self.game)).actions, ["HHS"])
+
+    def test_reads_version_2(self):
+        """Test that games saved before seats kept their actions still load."""
+        data = encode_game(self.game)
+        name = len(self.game.player.name)
+        cards = self.game.player.card_count
+        end = _HEADER.size + _SEAT.size + 1 + name + 1 + cards  # Up to the seat's actions
+        decoded = decode_game(bytes([2]) + data[1:end] + data[end + 1:])
+        self.assertSameGame(self.game, decoded)
+        self.assertEqual(decoded.actions, [""])
+
+    def test_rejects_bad_data(self):
+        """Test that other versions and truncated data raise ValueError."""
+        data = encode_game(self.game)
+        with self.assertRaises(ValueError):
+            decode_game(bytes([FORMAT_VERSION + 1]) + data[1:])
+        with self.assertRaises(ValueError):
+            decode_game(data[:-1])
+        with self.assertRaises(ValueError):
+            decode_game(data + b"\x00")
+        with self.assertRaises(ValueError):
+            decode_game(b"")
+
+    def test_session_helpers(self):
+        """Test that the session helpers round-trip a game through the codec."""
+        app = Flask(__name__)
+        app.config['SECRET_KEY'] = 'test_key'
+        with app.test_request_context():
+            save_game_state(self.game)
+            self.assertSameGame(self.game, load_game_state())
+
+    def test_session_holds_only_the_game_id(self):
+        """Test that the session cookie holds the game id and nothing of the shoe."""
+        app = Flask(__name__)
+        app.config['SECRET_KEY'] = 'test_key'
+        with app.test_request_context():
+            from flask import session
+            save_game_state(self.game)
+            self.assertEqual(list(session.keys()), ["game_id"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+"""test_columnar.py
+Tests for the memory-mapped columnar results of the round simulator.
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+from app.blackjack.columnar import (
+    BLACKJACK, COLUMNS, OUTCOMES, SURRENDER, ColumnStore, write_columns)
+from app.blackjack.counting import SYSTEMS, BetRamp
+from app.blackjack.simulation import Rules, simulate
+
+class Interrupted(Exception):
+    """Raised by a progress callback to stop a run part way."""
+
+class TestColumnarResults(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "run")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_rows_add_up_to_simulate(self):
+        """Test that the rows hold simulate's result for the same seed and chunks."""
+        result = write_columns(self.path, 6000, seed=8, chunk_rounds=2000)
+        expected = simulate(6000, seed=8, chunk_rounds=2000)
+        self.assertEqual(result, expected)
+        store = ColumnStore(self.path)
+        self.assertTrue(store.complete)
+        self.assertEqual(len(store), 6000)
+        for name, dtype in COLUMNS.items():
+            values = np.load(os.path.join(self.path, f"{name}.npy"))
+            self.assertEqual((values.dtype, values.shape), (np.dtype(dtype), (6000,)))
+        outcome = store.columns["outcome"]
+        self.assertEqual((outcome == SURRENDER).sum(), expected.surrenders)
+        self.assertEqual((outcome == BLACKJACK).sum(), expected.blackjacks)
+        self.assertAlmostEqual(float(store.columns["net"].sum(dtype=np.float64)),
+                               expected.net_units)
+        self.assertTrue(((store.columns["up"] >= 2) & (store.columns["up"] <= 11)).all())
+
+    def test_seats(self):
+        """Test that a table writes a row per seat, adding up to the table's result."""
+        rules = Rules(seats=3)
+        result = write_columns(self.path, 1000, seed=2, rules=rules, chunk_rounds=400)
+        store = ColumnStore(self.path)
+        self.assertEqual((len(store), store.seats), (3000, 3))
+        self.assertEqual(result, simulate(1000, seed=2, rules=rules, chunk_rounds=400))
+        self.assertAlmostEqual(store.aggregate().net_units, result.net_units)
+
+    def test_resume(self):
+        """Test that an interrupted run resumes to exactly the uninterrupted columns."""
+        def stop(done, total):
+            self.assertEqual(total, 5)
+            if done == 2:
+                raise Interrupted
+
+        with self.assertRaises(Interrupted):
+            write_columns(self.path, 5000, seed=4, chunk_rounds=1000, progress=stop)
+        store = ColumnStore(self.path)
+        self.assertEqual((len(store), store.complete), (2000, False))
+        self.assertEqual(store.aggregate().rows, 2000)
+
+        result = write_columns(self.path, 5000, chunk_rounds=1000)
+        other = os.path.join(self.directory.name, "other")
+        self.assertEqual(result, write_columns(other, 5000, seed=4, chunk_rounds=1000))
+        for name in COLUMNS:
+            np.testing.assert_array_equal(ColumnStore(self.path).columns[name],
+                                          ColumnStore(other).columns[name])
+
+    def test_other_run_is_refused(self):
+        """Test that a directory holding a different run is not overwritten."""
+        write_columns(self.path, 1000, seed=1, chunk_rounds=500)
+        with self.assertRaises(ValueError):
+            write_columns(self.path, 1000, seed=2, chunk_rounds=500)
+        with self.assertRaises(ValueError):
+            write_columns(self.path, 1000, seed=1, rules=Rules(decks=2), chunk_rounds=500)
+        with self.assertRaises(ValueError):
+            ColumnStore(os.path.join(self.directory.name, "missing"))
+
+    def test_aggregate_by_block(self):
+        """Test that streamed aggregates match the columns read whole."""
+        write_columns(self.path, 4000, seed=6, chunk_rounds=1000)
+        store = ColumnStore(self.path)
+        summary = store.aggregate(block_rows=333)
+        net = np.asarray(store.columns["net"], dtype=np.float64)
+        self.assertEqual(summary.rows, 4000)
+        self.assertEqual(sum(summary.outcomes.values()), 4000)
+        self.assertEqual(summary.outcomes["loss"], (store.columns["outcome"] == OUTCOMES.index("loss")).sum())
+        self.assertAlmostEqual(summary.net_units, net.sum())
+        self.assertAlmostEqual(summary.net_squares, (net * net).sum())
+        self.assertEqual(sum(cell["rows"] for cell in summary.by_count.values()), 4000)
+        self.assertAlmostEqual(sum(cell["net_units"] for cell in summary.by_cell.values()), net.sum())
+        self.assertAlmostEqual(summary.to_dict()["ev"], net.mean())
+        self.assertGreater(summary.std_error, 0)
+
+    def test_bet_ramp(self):
+        """Test that a ramped run stores counts and scales nets by the bet."""
+        rules = Rules(counting="hi-lo", bet_ramp=BetRamp(((1, 4),)))
+        result = write_columns(self.path, 3000, seed=9, rules=rules, chunk_rounds=1000)
+        self.assertEqual(result, simulate(3000, seed=9, rules=rules, chunk_rounds=1000))
+        store = ColumnStore(self.path)
+        counts = np.floor(store.columns["count"])
+        nets = np.abs(store.columns["net"])
+        self.assertTrue((nets[counts < 1] <= 8).all())
+        self.assertTrue((nets[(counts >= 1) & (nets > 0)] >= 2).all())
+
+    def test_fresh_deck_count(self):
+        """Test that a fresh deck every round records a zero count."""
+        write_columns(self.path, 500, seed=3, rules=Rules(decks=0), chunk_rounds=500)
+        self.assertFalse(ColumnStore(self.path).columns["count"].any())
+
+    def test_ko_records_the_running_count(self):
+        """Test that an unbalanced count is recorded as the running count it is bet on."""
+        rules = Rules(counting="ko", bet_ramp=BetRamp(((1, 4),)))
+        write_columns(self.path, 500, seed=5, rules=rules, chunk_rounds=500)
+        counts = ColumnStore(self.path).columns["count"]
+        self.assertEqual(counts[0], SYSTEMS["ko"].initial_count(rules.decks))
+        self.assertTrue((counts == np.round(counts)).all())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+"""test_counting.py
+Tests for the incremental card counters, the count route and bet ramps.
+"""
+
+import unittest
+from collections import Counter
+from unittest import mock
+from flask import Flask
+from app.blackjack.counting import SYSTEMS, BetRamp, CardCounter
+from app.blackjack.models import RANKS, Game, Player, Shoe
+from app.blackjack.routes import blackjack_bp
+from app.blackjack.simulation import Rules, Simulator, simulate
+from app.blackjack.store import game_store
+
+def recount(shoe, system):
+    """Count a shoe from scratch, the slow way."""
+    dealt = [code for code in range(52) for _ in range(shoe.num_decks)]
+    for code in shoe.codes[shoe.position:]:
+        dealt.remove(code)
+    return system.initial_count(shoe.num_decks) + sum(system.tags[code >> 2] for code in dealt)
+
+class TestCardCounter(unittest.TestCase):
+    def test_systems(self):
+        """Test which systems are balanced and the KO starting count."""
+        self.assertEqual([name for name, system in SYSTEMS.items() if not system.balanced], ["ko"])
+        self.assertEqual(SYSTEMS["ko"].initial_count(6), -20)
+        self.assertEqual(SYSTEMS["zen"].initial_count(6), 0)
+        with self.assertRaises(ValueError):
+            CardCounter(Shoe(seed=1), "wong-halves")
+
+    def test_counts_follow_the_shoe(self):
+        """Test that every system matches a full recount through deals and shuffles."""
+        shoe = Shoe(num_decks=2, penetration=0.5, seed=9)
+        counters = [CardCounter(shoe, name) for name in SYSTEMS]
+        for step in range(60):
+            for _ in range(step % 7):
+                shoe.deal()
+            if step % 11 == 10:
+                shoe.shuffle_if_needed()
+            for counter in counters:
+                self.assertEqual(counter.running_count, recount(shoe, counter.system))
+                left = Counter(RANKS[code >> 2] for code in shoe.codes[shoe.position:])
+                self.assertEqual(counter.to_dict()["remaining"], {rank: left[rank] for rank in RANKS})
+                self.assertEqual(counter.cards_left, shoe.remaining)
+        self.assertGreater(shoe.shuffles, 1)
+
+    def test_balanced_count_ends_at_zero(self):
+        """Test that a balanced count of a whole shoe returns to zero."""
+        shoe = Shoe(num_decks=1, penetration=1.0, seed=2)
+        counter = CardCounter(shoe, "omega-ii")
+        while shoe.remaining:
+            shoe.deal()
+            counter.sync()
+        self.assertEqual(counter.running_count, 0)
+        self.assertEqual(counter.decks_left, 0.25)
+
+    def test_reshuffled_discards(self):
+        """Test that a mid-round reshuffle of the discards rebuilds the count."""
+        game = Game(seed=4, num_decks=1)
+        game.start_new_round()
+        counter = game.counter("hi-lo")
+        game.deck.discard([game.deck.deal() for _ in range(20)])
+        game.deck.position = len(game.deck.codes)
+        counter.sync()
+        game.handle_empty_deck()
+        self.assertEqual(counter.cards_left, 20)
+        self.assertEqual(counter.running_count, recount(game.deck, counter.system))
+
+    def test_hole_card_is_hidden(self):
+        """Test that the game's count leaves out the hole card until the seats have played."""
+        game = Game(seed=5)
+        game.start_new_round()
+        hole = game.dealer.hand[1]
+        shown = game.count()
+        raw = game.counter().running_count
+        self.assertEqual(shown["running"], raw - SYSTEMS["hi-lo"].tags[hole.code >> 2])
+        self.assertEqual(shown["cards_left"], game.deck.remaining + 1)
+        game.apply_action("stand")
+        self.assertEqual(game.count()["running"], game.counter().running_count)
+
+class TestCountRoute(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SECRET_KEY'] = 'test_key'
+        self.app.register_blueprint(blackjack_bp)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        game_store.clear()
+
+    def test_count(self):
+        """Test the count of the session's game and the choice of system."""
+        self.assertEqual(self.client.get('/count').status_code, 400)
+        with self.client.session_transaction() as session:
+            session['game_id'] = 'count-test'
+        game = Game(seed=6)
+        game.start_new_round()
+        game_store.put('count-test', game)
+        data = self.client.get('/count?system=zen').get_json()
+        self.assertEqual(data["system"], "zen")
+        self.assertEqual(data["cards_left"], 6 * 52 - 3)
+        self.assertEqual(sum(data["remaining"].values()), data["cards_left"])
+        self.assertEqual(self.client.get('/count?system=nope').status_code, 400)
+
+    def test_counter_is_kept_between_requests(self):
+        """Test that a counter read by one request is not rebuilt by the next."""
+        with self.client.session_transaction() as session:
+            session['game_id'] = 'count-test'
+        game = Game(seed=7)
+        game.start_new_round()
+        game_store.put('count-test', game)
+        self.client.get('/count?system=ko')
+        loaded = game_store.get('count-test')
+        self.assertIn("ko", loaded.counters)
+        with mock.patch.object(CardCounter, "_rebuild") as rebuild:
+            loaded.apply_action("stand")
+            game_store.put('count-test', loaded)
+            data = self.client.get('/count?system=ko').get_json()
+        rebuild.assert_not_called()
+        self.assertEqual(data["running"], recount(loaded.deck, SYSTEMS["ko"]))
+
+class TestBetRamp(unittest.TestCase):
+    def test_units(self):
+        """Test the units bet below, on and above the steps."""
+        ramp = BetRamp.parse("2:2, 3:4,5:10")
+        self.assertEqual([ramp.units(count) for count in (-3, 1.9, 2, 3.5, 4.9, 9)],
+                         [1, 1, 2, 4, 4, 10])
+        with self.assertRaises(ValueError):
+            BetRamp.parse("3:2,2:4")
+        with self.assertRaises(ValueError):
+            BetRamp.parse("two")
+
+    def test_place_bet(self):
+        """Test that the ramp bets through Player.place_bet."""
+        shoe = Shoe(seed=3)
+        counter = CardCounter(shoe)
+        player = Player("Counter", 100)
+        self.assertEqual(BetRamp().place_bet(player, counter, 10), 10)
+        self.assertEqual(player.current_bet, 10)
+        with self.assertRaises(ValueError):
+            BetRamp(((-100, 20),)).place_bet(player, counter, 10)  # More than the bankroll
+
+    def test_simulated_ramp(self):
+        """Test that a ramp scales wagers, is reproducible and leaves flat play alone."""
+        with self.assertRaises(ValueError):
+            Rules(bet_ramp=BetRamp())
+        with self.assertRaises(ValueError):
+            Rules(counting="hi-lo", bet_ramp=BetRamp(), decks=0)
+        flat = Simulator(seed=8).run(3000)
+        self.assertEqual(Simulator(seed=8, rules=Rules(counting="hi-lo")).run(3000), flat)
+        rules = Rules(counting="hi-lo", bet_ramp=BetRamp(((1, 4),)))
+        ramped = simulate(6000, seed=8, rules=rules, chunk_rounds=2000)
+        self.assertEqual(ramped.hands, simulate(6000, seed=8, chunk_rounds=2000).hands)
+        self.assertGreater(ramped.wagered_units, flat.wagered_units * 2)
+        self.assertEqual(ramped, simulate(6000, seed=8, rules=rules, chunk_rounds=2000, workers=2))
+
+if __name__ == '__main__':
+    unittest.main()
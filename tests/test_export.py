@@ -0,0 +1,200 @@
+"""test_export.py
+Tests for the streaming NDJSON and CSV exports and their routes.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import tempfile
+import unittest
+from flask import Flask
+from app.blackjack import export
+from app.blackjack.export import (
+    HISTORY_COLUMNS, SIMULATION_COLUMNS, encode_rows, history_rows, simulation_rows)
+from app.blackjack.history import HandHistory, hand_history
+from app.blackjack.models import Game
+from app.blackjack.routes import blackjack_bp
+from app.blackjack.simulation import simulate
+from app.blackjack.store import game_store
+from app.extensions import db
+
+def make_app(path):
+    """Create an app with the blackjack blueprint and a SQLite database at path."""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test_key'
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    app.register_blueprint(blackjack_bp, url_prefix='/blackjack')
+    return app
+
+class TestEncoding(unittest.TestCase):
+    def setUp(self):
+        self.columns = ("n", "name")
+        self.rows = [(n, f"seat, {n}") for n in range(1234)]
+
+    def test_ndjson(self):
+        """Test that each row becomes one JSON object per line."""
+        text = b"".join(encode_rows(self.columns, iter(self.rows))).decode()
+        lines = text.splitlines()
+        self.assertEqual(len(lines), len(self.rows))
+        self.assertEqual(json.loads(lines[7]), {"n": 7, "name": "seat, 7"})
+
+    def test_csv(self):
+        """Test that CSV output has a header and quotes values as needed."""
+        chunks = list(encode_rows(self.columns, iter(self.rows), "csv"))
+        self.assertGreater(len(chunks), 1)
+        rows = list(csv.reader(io.StringIO(b"".join(chunks).decode())))
+        self.assertEqual(rows[0], ["n", "name"])
+        self.assertEqual(rows[1:], [[str(n), name] for n, name in self.rows])
+
+    def test_empty_csv_has_a_header(self):
+        """Test that an export with no rows is still a valid CSV file."""
+        self.assertEqual(b"".join(encode_rows(self.columns, [], "csv")), b"n,name\n")
+
+    def test_gzip_round_trip(self):
+        """Test that the compressed stream decompresses to the plain one."""
+        plain = b"".join(encode_rows(self.columns, iter(self.rows)))
+        packed = b"".join(encode_rows(self.columns, iter(self.rows), compress=True))
+        self.assertLess(len(packed), len(plain))
+        self.assertEqual(gzip.decompress(packed), plain)
+
+    def test_unknown_format(self):
+        """Test that an unknown format raises ValueError."""
+        with self.assertRaises(ValueError):
+            encode_rows(self.columns, self.rows, "xml")
+
+    def test_simulation_rows_add_up(self):
+        """Test that the chunk rows sum to the simulation with the same seed."""
+        rows = list(simulation_rows(5000, seed=3, chunk_rounds=1000))
+        self.assertEqual([row[0] for row in rows], list(range(5)))
+        totals = dict(zip(SIMULATION_COLUMNS[2:], (sum(column) for column in
+                                                   list(zip(*rows))[2:])))
+        result = simulate(5000, seed=3, chunk_rounds=1000)
+        self.assertEqual(totals["rounds"], 5000)
+        self.assertEqual(totals["wins"], result.wins)
+        self.assertAlmostEqual(totals["net_units"], result.net_units)
+
+class TestHistoryExport(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = make_app(os.path.join(self.directory.name, "hands.db"))
+        self.app.config['HAND_HISTORY_FLUSH_INTERVAL'] = 60
+        self.history = HandHistory()
+        self.history.init_app(self.app)
+        for game_id, rounds in (("g1", 30), ("g2", 12)):
+            game = Game(seed=11)
+            for _ in range(rounds):
+                game.apply_action("bet", 10)
+                game.apply_action("deal")
+                game.apply_action("stand")
+                game_store.put(game_id, game)
+        self.history.flush()
+
+    def tearDown(self):
+        self.history.close()
+        game_store.clear()
+        with self.app.app_context():
+            db.engine.dispose()
+        self.directory.cleanup()
+
+    def rows(self, **filters):
+        """Return the exported rows as dicts."""
+        with self.app.app_context():
+            return [dict(zip(HISTORY_COLUMNS, row))
+                    for row in history_rows(fetch_size=7, **filters)]
+
+    def test_all_rows_in_order(self):
+        """Test that every row is read, oldest first, across several fetches."""
+        rows = self.rows()
+        self.assertEqual(len(rows), 42)
+        self.assertEqual([row["id"] for row in rows], sorted(row["id"] for row in rows))
+
+    def test_filters(self):
+        """Test the game, seat, hand (in either case) and time filters."""
+        self.assertEqual(len(self.rows(game="g2")), 12)
+        self.assertEqual(len(self.rows(game="g2", seat=1)), 0)
+        rows = self.rows()
+        hand = rows[0]["hand_key"]
+        self.assertEqual(len(self.rows(hand=hand)),
+                         sum(row["hand_key"] == hand for row in rows))
+        self.assertEqual(len(self.rows(hand="A4")), sum(row["hand_key"] == "a4" for row in rows))
+        middle = rows[20]["played_at"]
+        self.assertEqual(len(self.rows(since=middle)) + len(self.rows(until=middle)), 42)
+
+class TestExportRoutes(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = make_app(os.path.join(self.directory.name, "hands.db"))
+        self.app.config['EXPORT_TOKEN'] = 'secret'
+        self.client = self.app.test_client()
+        self.auth = {"Authorization": "Bearer secret"}
+
+    def tearDown(self):
+        hand_history.close()
+        game_store.clear()
+        with self.app.app_context():
+            db.engine.dispose()
+        self.directory.cleanup()
+
+    def test_token(self):
+        """Test that the routes are off without a token and refuse a wrong one."""
+        url = '/blackjack/export/simulation?rounds=10'
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.assertEqual(self.client.get(url, headers={"Authorization": "Bearer nope"}).status_code, 401)
+        self.app.config['EXPORT_TOKEN'] = None
+        self.assertEqual(self.client.get(url, headers=self.auth).status_code, 404)
+
+    def test_simulation(self):
+        """Test a streamed CSV simulation export and the round limit."""
+        response = self.client.get(
+            '/blackjack/export/simulation?rounds=3000&chunk_rounds=1000&seed=5&format=csv',
+            headers=self.auth)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertIn("attachment", response.headers["Content-Disposition"])
+        rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+        self.assertEqual([int(row["rounds"]) for row in rows], [1000] * 3)
+        self.app.config['EXPORT_MAX_ROUNDS'] = 100
+        self.assertEqual(self.client.get('/blackjack/export/simulation?rounds=101',
+                                         headers=self.auth).status_code, 400)
+        self.assertEqual(self.client.get('/blackjack/export/simulation?format=xml',
+                                         headers=self.auth).status_code, 400)
+
+    def test_bad_rules(self):
+        """Test that an impossible table is refused."""
+        response = self.client.get('/blackjack/export/simulation?rounds=10&seats=9',
+                                   headers=self.auth)
+        self.assertEqual(response.status_code, 400)
+
+    def test_history_gzip(self):
+        """Test a gzipped NDJSON history export of a played round."""
+        self.assertEqual(self.client.get('/blackjack/export/history',
+                                         headers=self.auth).status_code, 404)
+        hand_history.init_app(self.app)
+        self.client.post('/blackjack/start')
+        self.client.post('/blackjack/actions', json={
+            "actions": [{"action": "bet", "amount": 10}, "deal", "stand"]})
+        hand_history.flush()
+        response = self.client.get('/blackjack/export/history?seat=0',
+                                   headers={**self.auth, "Accept-Encoding": "gzip"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        (line,) = gzip.decompress(response.get_data()).decode().splitlines()
+        record = json.loads(line)
+        self.assertEqual((record["seat"], record["actions"], record["bet"]), (0, "S", 10))
+
+    def test_small_blocks(self):
+        """Test that a long export arrives in several chunks."""
+        export.BLOCK_ROWS, block_rows = 2, export.BLOCK_ROWS
+        try:
+            response = self.client.get('/blackjack/export/simulation?rounds=1000&chunk_rounds=100',
+                                       headers=self.auth)
+            self.assertGreater(len(list(response.response)), 1)
+        finally:
+            export.BLOCK_ROWS = block_rows
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,6 +1,6 @@
 import unittest
 from unittest.mock import MagicMock
-from app.blackjack.models import Card, Deck, Player, Dealer, Game
+from app.blackjack.models import Card, Deck, Shoe, Player, Dealer, Game
 
 class TestCard(unittest.TestCase):
     def test_card_value(self):
@@ -12,6 +12,16 @@ class TestCard(unittest.TestCase):
         self.assertEqual(king.value, 10)
         self.assertEqual(three.value, 3)
 
+    def test_card_code_views(self):
+        """Test rank, suit and value are views of the compact code."""
+        card = Card('Q', 'Spades')
+        self.assertIs(Card.from_code(card.code), Card.from_code(card.code))
+        self.assertEqual(Card.from_code(card.code), card)
+        self.assertEqual((card.rank, card.suit, card.value), ('Q', 'Spades', 10))
+        self.assertEqual(repr(card), 'Q of Spades')
+        with self.assertRaises(AttributeError):
+            card.extra = 1
+
 class TestDeck(unittest.TestCase):
     def test_deck_length(self):
         """Test that a new deck has 52 cards."""
@@ -31,6 +41,56 @@ class TestDeck(unittest.TestCase):
         deck.deal()
         self.assertEqual(len(deck.cards), 51)
 
+    def test_deck_holds_every_card_once(self):
+        """Test the packed deck deals each of the 52 cards exactly once."""
+        deck = Deck()
+        dealt = {deck.deal() for _ in range(52)}
+        self.assertEqual(len(dealt), 52)
+        self.assertIsNone(deck.deal())
+
+class TestShoe(unittest.TestCase):
+    def test_shoe_size(self):
+        """Test a shoe holds the requested number of decks."""
+        shoe = Shoe(num_decks=6, penetration=0.75, seed=1)
+        self.assertEqual(len(shoe), 312)
+        self.assertEqual(shoe.cut, 234)
+
+    def test_invalid_shoe(self):
+        """Test shoes outside 1-8 decks are rejected."""
+        with self.assertRaises(ValueError):
+            Shoe(num_decks=9)
+        with self.assertRaises(ValueError):
+            Shoe(num_decks=0)
+
+    def test_shuffle_only_at_cut_card(self):
+        """Test the shoe keeps dealing until the cut card comes out."""
+        shoe = Shoe(num_decks=1, penetration=0.5, seed=2)
+        for _ in range(25):
+            shoe.deal()
+        self.assertFalse(shoe.shuffle_if_needed())
+        shoe.deal()
+        self.assertTrue(shoe.shuffle_if_needed())
+        self.assertEqual(len(shoe), 52)
+
+    def test_order_follows_seed(self):
+        """Test the shoe order is rebuilt from its seed and shuffle count."""
+        first, second = Shoe(seed=3), Shoe(seed=3)
+        self.assertEqual(first.cards, second.cards)
+        first.shuffle()
+        second.shuffle()
+        self.assertEqual([first.deal() for _ in range(10)], [second.deal() for _ in range(10)])
+
+    def test_reshuffle_discards(self):
+        """Test the discard tray is reshuffled into an empty shoe."""
+        shoe = Shoe(num_decks=1, penetration=1, seed=4)
+        dealt = [shoe.deal() for _ in range(52)]
+        with self.assertRaises(ValueError):
+            shoe.deal()
+        shoe.discard(dealt[:10])
+        self.assertTrue(shoe.reshuffle_discards())
+        self.assertEqual(sorted(card.code for card in shoe.cards),
+                         sorted(card.code for card in dealt[:10]))
+
 class TestPlayer(unittest.TestCase):
     def test_add_card(self):
         """Test adding a card to the player's hand."""
@@ -47,6 +107,32 @@ class TestPlayer(unittest.TestCase):
             player.add_card(card)
         self.assertEqual(player.hand_value(), 21)
 
+    def test_running_totals(self):
+        """Test totals, soft, pair and blackjack flags follow add_card."""
+        player = Player("Test Player")
+        player.add_card(Card('A', 'Diamonds'))
+        player.add_card(Card('A', 'Hearts'))
+        self.assertTrue(player.is_pair)
+        self.assertTrue(player.is_soft)
+        self.assertEqual(player.hand_value(), 12)
+        player.add_card(Card('9', 'Clubs'))
+        self.assertFalse(player.is_pair)
+        self.assertEqual(player.hand_value(), 21)
+        self.assertFalse(player.is_blackjack)
+        player.add_card(Card('5', 'Clubs'))
+        self.assertFalse(player.is_soft)
+        self.assertEqual(player.hard_total, 16)
+        self.assertEqual(player.card_count, 4)
+
+    def test_clear_and_assign_hand(self):
+        """Test clearing or assigning the hand resets the totals."""
+        player = Player("Test Player")
+        player.add_card(Card('K', 'Diamonds'))
+        self.assertEqual(len(player.clear_hand()), 1)
+        self.assertEqual(player.hand_value(), 0)
+        player.hand = [Card('A', 'Spades'), Card('Q', 'Hearts')]
+        self.assertTrue(player.is_blackjack)
+
 class TestDealer(unittest.TestCase):
     def test_dealer_play(self):
         """Test dealer plays correctly (stops at 17 or higher)."""
@@ -61,11 +147,22 @@ class TestGame(unittest.TestCase):
         self.game = Game()
 
     def test_start_new_round(self):
-        """Test starting a new round resets hands and deck."""
+        """Test a new round deals from the same shoe, reshuffled only at the cut card."""
+        shoe = self.game.deck
+        self.game.start_new_round()
+        self.assertEqual(len(self.game.player.hand), 2)
+        self.assertEqual(len(self.game.dealer.hand), 2)
+        self.assertEqual(shoe.remaining, 6 * 52 - 4)
+        self.game.start_new_round()
+        self.assertIs(self.game.deck, shoe)
+        self.assertEqual(shoe.remaining, 6 * 52 - 8)
+        self.assertEqual(shoe.discarded, 4)  # The last round's cards are in the tray
+        self.assertEqual(shoe.shuffles, 1)
+        shoe.position = shoe.cut  # The cut card comes out
         self.game.start_new_round()
-        self.assertEqual(len(self.game.player.hand), 0)
-        self.assertEqual(len(self.game.dealer.hand), 0)
-        self.assertEqual(len(self.game.deck.cards), 52)
+        self.assertEqual(shoe.shuffles, 2)
+        self.assertEqual(shoe.remaining, 6 * 52 - 4)
+        self.assertEqual(shoe.discarded, 0)
 
     def test_player_turn(self):
         """Test player actions during their turn."""
@@ -80,7 +177,7 @@ class TestGame(unittest.TestCase):
         self.game.dealer.hand = [Card('10', 'Spades')]
         self.game.player.hand = [Card('6', 'Clubs'), Card('5', 'Diamonds')]
         move = self.game.determine_best_move(self.game.player.hand, self.game.dealer.hand[0])
-        self.assertEqual(move, 'Hit')  # Example expected strategy
+        self.assertEqual(move, 'Double Down')  # 11 doubles against a 10
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,229 @@
+"""test_history.py
+Tests for hand records, the batched hand history and its analytics routes.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from flask import Flask
+from app.blackjack.history import (
+    HandCell, HandHistory, HandRecord, cell_stats, hand_history, player_stats)
+from app.blackjack.models import Card, Game
+from app.blackjack.routes import blackjack_bp
+from app.blackjack.store import game_store
+from app.extensions import db
+
+def make_app(path):
+    """Create an app with the blackjack blueprint and a SQLite database at path."""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test_key'
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db.init_app(app)
+    app.register_blueprint(blackjack_bp, url_prefix='/blackjack')
+    return app
+
+def seat_game(player, dealer, bet=10):
+    """Return a game whose seat and dealer hold the given ranks, at the seat's turn."""
+    game = Game(seed=4)
+    game.player.hand = [Card(rank, "Spades") for rank in player]
+    game.dealer.hand = [Card(rank, "Hearts") for rank in dealer]
+    game.player.current_bet = bet
+    return game
+
+class TestHandRecord(unittest.TestCase):
+    def setUp(self):
+        Game.record_hands = True
+
+    def tearDown(self):
+        Game.record_hands = False
+
+    def test_deviation_from_the_chart(self):
+        """Test that standing on 16 against a ten, where the chart surrenders, is a deviation."""
+        game = seat_game(["10", "6"], ["K", "7"])
+        game.apply_action("stand")
+        (record,) = game.history
+        self.assertEqual(record["hand_key"], "16")
+        self.assertEqual(record["up_card"], 10)
+        self.assertEqual(record["chart_action"], "RH")
+        self.assertEqual((record["actions"], record["decisions"], record["deviations"]), ("S", 1, 1))
+        self.assertEqual((record["result"], record["net"], record["units"]), ("lose", -10, -1))
+
+    def test_following_the_chart(self):
+        """Test that a surrender the chart asks for is no deviation."""
+        game = seat_game(["10", "6"], ["K", "7"])
+        game.apply_action("surrender")
+        (record,) = game.history
+        self.assertEqual((record["deviations"], record["units"], record["net"]), (0, -0.5, -5))
+
+    def test_double_down(self):
+        """Test that a double is recorded with its initial bet and a doubled result."""
+        game = seat_game(["5", "6"], ["6", "10"])
+        game.apply_action("double_down")
+        (record,) = game.history
+        self.assertEqual((record["actions"], record["deviations"], record["bet"]), ("D", 0, 10))
+        self.assertEqual(record["units"], record["net"] / 10)
+        self.assertIn(record["units"], (-2, 0, 2))
+
+    def test_later_decisions(self):
+        """Test that every action after a hit is checked against the chart."""
+        game = seat_game(["2", "3"], ["7", "10"])
+        game.player.add_card(Card("4", "Clubs"))
+        game.actions[0] = "H"
+        game.apply_action("stand")  # Hard 9 against a 7 hits
+        (record,) = game.history
+        self.assertEqual(record["hand_key"], "5")
+        self.assertEqual((record["actions"], record["decisions"], record["deviations"]), ("HS", 2, 1))
+
+    def test_off_by_default(self):
+        """Test that nothing is recorded unless the hand history is on."""
+        Game.record_hands = False
+        game = seat_game(["10", "6"], ["K", "7"])
+        game.apply_action("stand")
+        self.assertEqual(game.history, [])
+        self.assertEqual(game.actions, ["S"])
+
+class TestHandHistory(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = make_app(os.path.join(self.directory.name, "hands.db"))
+        self.app.config['HAND_HISTORY_FLUSH_INTERVAL'] = 60
+        self.history = HandHistory()
+        self.history.init_app(self.app)
+
+    def tearDown(self):
+        self.history.close()
+        game_store.clear()
+        with self.app.app_context():
+            db.engine.dispose()
+        self.directory.cleanup()
+
+    def play(self, game_id, rounds):
+        """Play and save rounds of a game, standing on every hand."""
+        game = Game(seed=11)
+        for _ in range(rounds):
+            game.apply_action("bet", 10)
+            game.apply_action("deal")
+            game.apply_action("stand")
+            game_store.put(game_id, game)
+        return game
+
+    def test_records_reach_the_database_on_flush(self):
+        """Test that saved games are buffered and written, with their cell totals."""
+        self.play("g1", 30)
+        with self.app.app_context():
+            self.assertEqual(db.session.query(HandRecord).count(), 0)
+        self.assertEqual(self.history.flush(), 30)
+        with self.app.app_context():
+            rows = db.session.query(HandRecord).filter_by(game_id="g1").all()
+            self.assertEqual(len(rows), 30)
+            self.assertTrue(all(row.actions == "S" for row in rows))
+            self.assertEqual(sum(cell.rounds for cell in db.session.query(HandCell)), 30)
+            indexes = {index.name for index in HandRecord.__table__.indexes}
+            self.assertEqual(indexes, {"ix_hand_history_game_time", "ix_hand_history_cell"})
+
+    def test_saving_again_does_not_repeat(self):
+        """Test that a record is taken from the game by the first save only."""
+        game = self.play("g1", 1)
+        game_store.put("g1", game)
+        self.assertEqual(self.history.flush(), 1)
+
+    def test_full_batch_wakes_the_writer(self):
+        """Test that a full batch is written without waiting for the interval."""
+        self.history.batch_size = 5
+        self.play("g1", 5)
+        deadline = time.time() + 5
+        while self.history.written < 5 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.history.written, 5)
+
+    def test_stats(self):
+        """Test that the player and cell statistics add up to the rows."""
+        self.play("g1", 40)
+        self.play("g2", 10)
+        self.history.flush()
+        with self.app.app_context():
+            (seat,) = player_stats("g1")
+            self.assertEqual(seat["rounds"], 40)
+            self.assertEqual(seat["wins"] + seat["losses"] + seat["pushes"] + seat["surrenders"], 40)
+            self.assertAlmostEqual(seat["win_rate"], seat["wins"] / 40)
+            self.assertEqual(player_stats("g1", since=time.time() + 60), [])
+            cells = cell_stats()
+            self.assertEqual(sum(cell["rounds"] for cell in cells), 50)
+            self.assertEqual(sum(cell["deviations"] for cell in cells),
+                             sum(row["deviations"] for row in player_stats("g1") + player_stats("g2")))
+            for cell in cell_stats(hand="16", up=10):
+                self.assertEqual((cell["hand_key"], cell["dealer"]), ("16", "T"))
+                self.assertEqual(cell["chart_action"], "RH")
+
+    def test_failed_write_is_retried(self):
+        """Test that records are kept when the write fails."""
+        self.play("g1", 3)
+        with self.app.app_context():
+            HandRecord.__table__.drop(db.engine)
+        self.assertEqual(self.history.flush(), 0)
+        with self.app.app_context():
+            HandRecord.__table__.create(db.engine)
+        self.assertEqual(self.history.flush(), 3)
+
+class TestHistoryRoutes(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = make_app(os.path.join(self.directory.name, "hands.db"))
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        hand_history.close()
+        game_store.clear()
+        with self.app.app_context():
+            db.engine.dispose()
+        self.directory.cleanup()
+
+    def test_disabled(self):
+        """Test that the routes report a missing hand history."""
+        self.assertEqual(self.client.get('/blackjack/history/ev').status_code, 404)
+
+    def test_routes(self):
+        """Test the per-player, deviation and EV routes after a played round."""
+        hand_history.init_app(self.app)
+        self.client.post('/blackjack/start')
+        response = self.client.post('/blackjack/actions', json={
+            "actions": [{"action": "bet", "amount": 10}, "deal", "stand"]})
+        self.assertEqual(response.status_code, 200)
+        hand_history.flush()  # The routes leave writing to the writer thread
+        seats = self.client.get('/blackjack/history/players').get_json()["seats"]
+        self.assertEqual([(seat["seat"], seat["rounds"]) for seat in seats], [(0, 1)])
+        deviations = self.client.get('/blackjack/history/deviations').get_json()
+        self.assertEqual(deviations["overall"]["decisions"], 1)
+        self.assertEqual(deviations["seats"][0]["decisions"], 1)
+        cells = self.client.get('/blackjack/history/ev').get_json()["cells"]
+        self.assertEqual(sum(cell["rounds"] for cell in cells), 1)
+        self.assertIn(cells[0]["ev"], (-1, 0, 1))
+
+    def test_routes_do_not_write(self):
+        """Test that the routes wake the writer rather than write on the request thread."""
+        self.app.config['HAND_HISTORY_FLUSH_INTERVAL'] = 60
+        hand_history.init_app(self.app)
+        self.client.post('/blackjack/start')
+        self.client.post('/blackjack/actions', json={
+            "actions": [{"action": "bet", "amount": 10}, "deal", "stand"]})
+        threads = []
+        flush = hand_history.flush
+        written = hand_history.written
+
+        def record_thread():
+            threads.append(threading.current_thread())
+            return flush()
+
+        with patch.object(hand_history, "flush", record_thread):
+            self.assertEqual(self.client.get('/blackjack/history/ev').status_code, 200)
+            deadline = time.time() + 5
+            while hand_history.written == written and time.time() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(hand_history.written, written + 1)
+        self.assertNotIn(threading.current_thread(), threads)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,159 @@
+"""test_live.py
+Tests for the WebSocket push channel of live tables.
+"""
+
+import asyncio
+import unittest
+from flask import Flask
+from app.blackjack.live import LiveClient, LiveTables, accept_key
+from app.blackjack.models import Game
+from app.blackjack.routes import blackjack_bp
+from app.blackjack.store import GameStore, game_store
+from app.utils import seat_token
+
+class TestLiveTables(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.store = GameStore()
+        self.store.put("table", Game(seed=12, seats=3))
+        self.live = LiveTables(self.store, secret="test_key")
+        await self.live.start()
+        self.clients = []
+
+    async def asyncTearDown(self):
+        for client in self.clients:
+            await client.close()
+        await self.live.stop()
+
+    async def join(self, seat, game_id="table", token=None):
+        token = token or seat_token("test_key", game_id, seat)
+        client = await LiveClient.connect(
+            f"ws://127.0.0.1:{self.live.port}/tables/{game_id}/seats/{seat}?token={token}")
+        self.clients.append(client)
+        return client, await client.receive()
+
+    async def receive(self, client):
+        return await asyncio.wait_for(client.receive(), 5)
+
+    def test_accept_key(self):
+        """Test the handshake answer against the example in RFC 6455."""
+        self.assertEqual(accept_key("dGhlIHNhbXBsZSBub25jZQ=="), "s3pPLMBiTxaQ9kYGzzhZRbK+xOo=")
+
+    async def test_join_receives_state(self):
+        """Test that a new connection receives the full state of its table."""
+        _, message = await self.join(1)
+        self.assertEqual(message["version"], 1)
+        self.assertEqual(set(message["state"]["seats"]), {"0", "1", "2"})
+
+    async def test_action_is_pushed_to_every_seat(self):
+        """Test that one seat's action reaches every connection as a delta."""
+        first, _ = await self.join(0)
+        second, _ = await self.join(2)
+        await second.send({"actions": [{"action": "bet", "amount": 15}, "deal"]})
+        for client in (first, second):
+            message = await self.receive(client)
+            self.assertEqual(message["version"], 2)
+            self.assertEqual(message["delta"]["seats"]["2"]["bet"], 15)
+            self.assertNotIn("state", message)
+
+    async def test_errors_go_to_the_sender(self):
+        """Test that a failed action is answered to its sender only."""
+        first, _ = await self.join(0)
+        second, _ = await self.join(1)
+        await first.send({"actions": ["deal"]})
+        for client in (first, second):
+            await self.receive(client)
+        await second.send({"actions": ["stand"]})  # Seat 0 acts first
+        message = await self.receive(second)
+        self.assertEqual(message["index"], 0)
+        await first.send({"actions": ["stand"]})
+        self.assertEqual((await self.receive(first))["version"], 3)
+        self.assertEqual((await self.receive(second))["delta"]["turn"], 1)
+
+    async def test_actions_are_for_the_connection_seat(self):
+        """Test that a connection cannot act for another seat of its table."""
+        client, _ = await self.join(1)
+        await client.send({"actions": [{"action": "bet", "amount": 25, "seat": 0}]})
+        message = await self.receive(client)
+        self.assertEqual(message["index"], 0)
+        self.assertEqual(self.store.get("table").seats[0].current_bet, 0)
+
+    async def test_token_is_for_one_seat(self):
+        """Test that a seat's token opens that seat only."""
+        with self.assertRaises(ConnectionError):
+            await self.join(0, token=seat_token("test_key", "table", 1))
+        with self.assertRaises(ConnectionError):
+            await self.join(0, token=seat_token("other_key", "table", 0))
+        await self.join(1, token=seat_token("test_key", "table", 1))
+
+    async def test_saves_from_other_threads_are_pushed(self):
+        """Test that a save made outside the loop, as by an HTTP route, is pushed."""
+        client, _ = await self.join(0)
+
+        def save():
+            game = self.store.get("table")
+            game.apply_action("bet", 30, 1)
+            self.store.put("table", game)
+
+        await asyncio.to_thread(save)
+        message = await self.receive(client)
+        self.assertEqual(message["delta"]["seats"], {"1": {"bet": 30}})
+
+    async def test_missed_versions_get_the_full_state(self):
+        """Test that a connection behind the table receives the full state."""
+        client, _ = await self.join(0)
+        game = self.store.get("table")
+        game.apply_action("bet", 10, 0)
+        self.live.broadcast("table", 3, game.serialize())
+        message = await self.receive(client)
+        self.assertEqual(message["version"], 3)
+        self.assertIn("state", message)
+
+    async def test_refuses_unknown_tables(self):
+        """Test that the handshake is refused for missing games and seats."""
+        with self.assertRaises(ConnectionError):
+            await self.join(0, game_id="missing")
+        with self.assertRaises(ConnectionError):
+            await self.join(3)
+
+    async def test_many_idle_connections_on_one_loop(self):
+        """Test that hundreds of idle seats are served without a thread each."""
+        await asyncio.gather(*(self.join(index % 3) for index in range(300)))
+        self.assertEqual(self.live.connections, 300)
+        await self.clients[0].send({"actions": ["deal"]})
+        messages = await asyncio.gather(*(self.receive(client) for client in self.clients))
+        self.assertTrue(all(message["version"] == 2 for message in messages))
+        for client in self.clients:
+            await client.close()
+        self.clients = []
+        for _ in range(100):
+            if not self.live.tables:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual(self.live.tables, {})
+
+class TestLiveRoute(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SECRET_KEY'] = 'test_key'
+        self.app.register_blueprint(blackjack_bp)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        game_store.clear()
+
+    def test_live_url(self):
+        """Test that the live URL is only given out when live tables are enabled."""
+        self.client.post('/actions', json={"actions": []})
+        self.assertEqual(self.client.get('/seats/0/live').status_code, 404)
+        self.app.config['LIVE_TABLES_PORT'] = 5002
+        self.assertEqual(self.client.get('/seats/0/live').status_code, 400)
+        with self.client.session_transaction() as session:
+            session['game_id'] = 'live-test'
+        game_store.put('live-test', Game(seed=1, seats=2))
+        url = self.client.get('/seats/1/live').get_json()["url"]
+        token = seat_token('test_key', 'live-test', 1)
+        self.assertEqual(url, f"ws://localhost:5002/tables/live-test/seats/1?token={token}")
+        self.assertEqual(self.client.get('/seats/2/live').status_code, 400)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+"""test_loadtest.py
+Tests for the HTTP load-test harness.
+"""
+
+import json
+import unittest
+from flask import Flask
+from app.blackjack.routes import blackjack_bp
+from app.blackjack.store import game_store
+from benchmarks.loadtest import ROUTES, percentile, run
+
+class TestLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SECRET_KEY'] = 'test_key'
+        self.app.register_blueprint(blackjack_bp, url_prefix='/blackjack')
+
+    def tearDown(self):
+        game_store.clear()
+
+    def test_percentile(self):
+        """Test the nearest-rank percentile of a sorted sample."""
+        samples = list(range(100))
+        self.assertEqual(percentile(samples, 0.5), 50)
+        self.assertEqual(percentile(samples, 0.99), 99)
+        self.assertEqual(percentile([7], 0.99), 7)
+
+    def test_in_process_report(self):
+        """Test that an in-process run settles every round, reports every route and is JSON-ready."""
+        report = run(users=3, rounds=2, app=self.app)
+        self.assertEqual(report["rounds"], 6)
+        self.assertEqual(report["rounds_settled"], 6)
+        self.assertEqual(report["rounds_without_errors"], 6)
+        self.assertEqual(report["errors"], 0)
+        self.assertEqual(set(report["routes"]) - set(ROUTES), set())
+        self.assertEqual(report["routes"]["start"]["requests"], 3)
+        self.assertEqual(report["routes"]["deal"]["requests"], 6)
+        self.assertEqual(report["requests"], sum(report["statuses"].values()))
+        self.assertGreater(report["session"]["cookie_bytes_max"], 0)
+        self.assertGreater(report["session"]["state_bytes_mean"], 0)
+        json.dumps(report)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""test_logs.py
+Tests for queued, structured logging.
+"""
+
+import io
+import json
+import logging
+import queue
+import unittest
+from flask import Flask
+from app.blackjack.models import Game
+from app.logs import DroppingQueueHandler, QueuedLogging
+from app.metrics import metrics
+
+class TestQueuedLogging(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SECRET_KEY'] = 'test_key'
+        self.logging = QueuedLogging()
+        self.logger = logging.getLogger('BlackjackGame')
+
+    def tearDown(self):
+        self.logging.close()
+        self.logger.propagate = True
+
+    def start(self, **config):
+        self.app.config.update(config)
+        self.logging.init_app(self.app)
+        stream = io.StringIO()
+        writer = self.logging.listener.handlers[0] if self.logging.listener else self.logging.handler
+        writer.setStream(stream)
+        return stream
+
+    def test_records_are_written_by_the_listener(self):
+        """Test that queued records reach the stream once the queue is drained."""
+        stream = self.start(LOG_FORMAT='json')
+        self.assertIsInstance(self.logging.handler, DroppingQueueHandler)
+
+        @self.app.route('/')
+        def index():
+            from flask import session
+            session['game_id'] = 'g1'
+            game = Game(seed=1)
+            game.version = 4
+            self.logger.warning("Reshuffled %s", game.deck, extra=game.log_fields("reshuffle"))
+            return ""
+
+        self.app.test_client().get('/')
+        self.logging.close()  # Stops the listener after the queue is drained
+        entry = json.loads(stream.getvalue())
+        self.assertEqual(entry["event"], "reshuffle")
+        self.assertEqual(entry["game_id"], "g1")
+        self.assertEqual(entry["version"], 4)
+        self.assertGreaterEqual(entry["elapsed_ms"], 0)
+        self.assertEqual(entry["level"], "WARNING")
+        self.assertTrue(entry["message"].startswith("Reshuffled <"))
+
+    def test_synchronous_text_mode(self):
+        """Test that a queue size of 0 writes text on the calling thread."""
+        stream = self.start(LOG_QUEUE_SIZE=0)
+        self.assertIsNone(self.logging.listener)
+        self.logger.info("Dealt", extra={"event": "deal"})
+        self.assertTrue(stream.getvalue().rstrip().endswith("INFO - Dealt [event=deal]"))
+
+    def test_full_queue_drops_and_counts(self):
+        """Test that records are dropped and counted instead of blocking."""
+        before = metrics.log_records_dropped.value()
+        handler = DroppingQueueHandler(queue.Queue(2))
+        for index in range(5):
+            handler.handle(logging.makeLogRecord({"msg": "record %s", "args": (index,)}))
+        self.assertEqual(handler.dropped, 3)
+        self.assertEqual(metrics.log_records_dropped.value(), before + 3)
+        self.assertEqual(handler.queue.get_nowait().getMessage(), "record 0")
+
+    def test_init_app_replaces_the_handler(self):
+        """Test that configuring twice leaves a single handler on the logger."""
+        self.start()
+        self.start()
+        self.assertEqual(self.logger.handlers, [self.logging.handler])
+
+if __name__ == '__main__':
+    unittest.main()
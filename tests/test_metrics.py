@@ -0,0 +1,123 @@
+"""test_metrics.py
+Tests for the metrics and the /metrics endpoint.
+"""
+
+import threading
+import unittest
+from flask import Flask
+from app.blackjack.models import Card, Game
+from app.blackjack.routes import blackjack_bp
+from app.blackjack.store import game_store
+from app.metrics import Counter, Gauge, Histogram, Metrics, _Metric, metrics
+
+class TestMetricTypes(unittest.TestCase):
+    def test_counter_adds_up_threads(self):
+        """Test that counts made by many threads, live or exited, are all kept."""
+        counter = Counter("test_total", "Test.", ("kind",))
+
+        def count():
+            for _ in range(1000):
+                counter.inc(("a",))
+            counter.inc(("b",), 5)
+
+        threads = [threading.Thread(target=count) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc(("a",))  # Registers this thread and folds in the exited ones
+        self.assertEqual(counter.value(("a",)), 8001)
+        self.assertEqual(counter.value(("b",)), 40)
+        self.assertEqual(len(counter._threads), 1)
+
+    def test_histogram_render(self):
+        """Test the cumulative buckets, sum and count of a histogram."""
+        histogram = Histogram("test_seconds", "Test.", ("route",), buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, ("x",))
+        lines = histogram.render()
+        self.assertIn('test_seconds_bucket{route="x",le="0.1"} 2', lines)
+        self.assertIn('test_seconds_bucket{route="x",le="1"} 3', lines)
+        self.assertIn('test_seconds_bucket{route="x",le="+Inf"} 4', lines)
+        self.assertIn('test_seconds_sum{route="x"} 3.65', lines)
+        self.assertIn('test_seconds_count{route="x"} 4', lines)
+        self.assertEqual(lines[1], "# TYPE test_seconds histogram")
+
+    def test_label_values_are_escaped(self):
+        """Test that quotes and backslashes in label values are escaped."""
+        counter = Counter("test_total", "Test.", ("path",))
+        counter.inc(('a"b\\',))
+        self.assertIn('test_total{path="a\\"b\\\\"} 1', counter.render())
+
+    def test_metric_types_define_merge(self):
+        """Test that the base metric is abstract and a gauge renders its callback's value."""
+        with self.assertRaises(TypeError):
+            _Metric("test", "Test.")  # pylint: disable=abstract-class-instantiated
+        self.assertIn("test_gauge 3", Gauge("test_gauge", "Test.", lambda: 3).render())
+
+class TestGameMetrics(unittest.TestCase):
+    def test_rounds_and_outcomes(self):
+        """Test that a round counts once when dealt and once when its last seat settles."""
+        started = metrics.rounds_started.value()
+        finished = metrics.rounds_finished.value()
+        surrenders = metrics.outcomes.value(("surrender",))
+        game = Game(seed=4, seats=2)
+        game.start_new_round()
+        game.apply_action("surrender", seat=0)
+        self.assertEqual(metrics.rounds_finished.value(), finished)
+        game.apply_action("surrender", seat=1)
+        game.end_round()
+        self.assertEqual(metrics.rounds_started.value(), started + 1)
+        self.assertEqual(metrics.rounds_finished.value(), finished + 1)
+        self.assertEqual(metrics.outcomes.value(("surrender",)), surrenders + 2)
+
+    def test_empty_deck_reshuffle(self):
+        """Test that reshuffling the discards mid-round is counted."""
+        before = metrics.reshuffles.value(("empty_deck",))
+        game = Game(seed=4)
+        game.start_new_round()
+        game.start_new_round()
+        game.deck.position = len(game.deck.codes)
+        game.dealer.hand = [Card("2", "Spades"), Card("3", "Spades")]
+        game.dealer_play()
+        self.assertEqual(metrics.reshuffles.value(("empty_deck",)), before + 1)
+
+class TestMetricsRoute(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SECRET_KEY'] = 'test_key'
+        self.app.register_blueprint(blackjack_bp, url_prefix='/blackjack')
+        self.metrics = Metrics()
+        self.metrics.init_app(self.app)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        game_store.clear()
+
+    def test_requests_are_timed(self):
+        """Test that blackjack requests are timed by endpoint and /metrics is served."""
+        self.client.post('/blackjack/actions', json={"actions": []})
+        self.client.post('/blackjack/start')
+        self.client.post('/blackjack/bet', data={"bet": 10})
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.content_type.startswith("text/plain; version=0.0.4"))
+        text = response.get_data(as_text=True)
+        self.assertIn('blackjack_requests_total{endpoint="blackjack.batch_actions",status="400"} 1',
+                      text)
+        self.assertIn('blackjack_request_duration_seconds_count{endpoint="blackjack.place_bet"} 1',
+                      text)
+        self.assertIn("blackjack_session_cookie_bytes_count 1", text)
+        self.assertIn("# TYPE blackjack_games_in_memory gauge", text)
+        self.assertIn("blackjack_strategy_reloads_total", text)
+        self.assertNotIn('endpoint="metrics"', text)
+
+    def test_disabled(self):
+        """Test that METRICS_ENABLED = False leaves the app uninstrumented."""
+        app = Flask(__name__)
+        app.config['METRICS_ENABLED'] = False
+        Metrics().init_app(app)
+        self.assertEqual(app.test_client().get('/metrics').status_code, 404)
+
+if __name__ == '__main__':
+    unittest.main()
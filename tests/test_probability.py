@@ -0,0 +1,89 @@
+"""test_probability.py
+Tests for the dealer final-total probability engine.
+"""
+
+import itertools
+import unittest
+from app.blackjack.models import Shoe
+from app.blackjack.probability import (
+    BLACKJACK,
+    BUST,
+    composition_counts,
+    composition_key,
+    dealer_distribution,
+    dealer_probabilities,
+    full_shoe_counts,
+    shoe_counts,
+)
+
+def brute_force(up_value, cards):
+    """Play the dealer out over every ordering of a small set of cards."""
+    results = [0] * 7
+    orderings = list(itertools.permutations(cards))
+    for order in orderings:
+        hand = [up_value] + list(order)
+        hard, aces, drawn = 0, 0, 0
+        for value in hand:
+            drawn += 1
+            hard += 1 if value == 11 else value
+            aces += value == 11
+            total = hard + 10 if aces and hard <= 11 else hard
+            if drawn == 2 and total == 21:
+                results[BLACKJACK] += 1
+                break
+            if total > 21:
+                results[BUST] += 1
+                break
+            if total >= 17:
+                results[total - 17] += 1
+                break
+    return [count / len(orderings) for count in results]
+
+class TestDealerProbabilities(unittest.TestCase):
+    def test_distribution_sums_to_one(self):
+        """Test every up-card gives a complete distribution."""
+        counts = full_shoe_counts(6)
+        for up in range(2, 12):
+            self.assertAlmostEqual(sum(dealer_probabilities(up, counts)), 1.0)
+            self.assertAlmostEqual(sum(dealer_probabilities(up)), 1.0)
+
+    def test_matches_brute_force(self):
+        """Test the recursion against exhaustive enumeration of a tiny shoe."""
+        cards = [11, 5, 5, 10, 10, 10, 6]
+        counts = [0] * 10
+        for value in cards:
+            counts[0 if value == 11 else value - 1] += 1
+        for up in (6, 10, 11):
+            expected = brute_force(up, cards)
+            for got, want in zip(dealer_probabilities(up, tuple(counts)), expected):
+                self.assertAlmostEqual(got, want)
+
+    def test_infinite_deck(self):
+        """Test the infinite-deck path matches published figures."""
+        self.assertAlmostEqual(dealer_distribution(6)["bust"], 0.4232, places=4)
+        self.assertAlmostEqual(dealer_distribution(11)["blackjack"], 4 / 13, places=6)
+
+    def test_peek_excludes_blackjack(self):
+        """Test peeking conditions on no dealer blackjack."""
+        probabilities = dealer_probabilities(10, full_shoe_counts(2), peek=True)
+        self.assertEqual(probabilities[BLACKJACK], 0.0)
+        self.assertAlmostEqual(sum(probabilities), 1.0)
+
+    def test_composition_key_round_trip(self):
+        """Test compositions pack into a key and back."""
+        counts = (24, 23, 24, 24, 22, 24, 24, 24, 24, 90)
+        self.assertEqual(composition_counts(composition_key(counts)), counts)
+        with self.assertRaises(ValueError):
+            composition_key((256,) + (0,) * 9)
+
+    def test_shoe_counts(self):
+        """Test the composition of a shoe follows the cards dealt."""
+        shoe = Shoe(num_decks=2, seed=1)
+        self.assertEqual(shoe_counts(shoe), full_shoe_counts(2))
+        card = shoe.deal()
+        counts = list(full_shoe_counts(2))
+        counts[0 if card.value == 11 else card.value - 1] -= 1
+        self.assertEqual(shoe_counts(shoe), tuple(counts))
+
+if __name__ == '__main__':
+    unittest.main()
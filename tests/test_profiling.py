@@ -0,0 +1,63 @@
+"""test_profiling.py
+Tests for sampled request profiling and the aggregated report.
+"""
+
+import os
+import tempfile
+import unittest
+from flask import Flask
+from app.blackjack.routes import blackjack_bp
+from app.blackjack.store import game_store
+from app.profiling import RequestProfiler, aggregate
+
+class TestRequestProfiler(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = Flask(__name__)
+        self.app.config['SECRET_KEY'] = 'test_key'
+        self.app.config['PROFILE_DIR'] = self.directory.name
+        self.app.register_blueprint(blackjack_bp, url_prefix='/blackjack')
+
+    def tearDown(self):
+        game_store.clear()
+        self.directory.cleanup()
+
+    def profiles(self):
+        return sorted(os.path.join(self.directory.name, name)
+                      for name in os.listdir(self.directory.name))
+
+    def test_disabled_registers_nothing(self):
+        """Test that a sample rate of zero adds no request hooks."""
+        RequestProfiler().init_app(self.app)
+        self.assertEqual(dict(self.app.before_request_funcs), {})
+        self.assertEqual(dict(self.app.teardown_request_funcs), {})
+        with self.assertRaises(ValueError):
+            self.app.config['PROFILE_SAMPLE_RATE'] = 2
+            RequestProfiler().init_app(self.app)
+
+    def test_profiles_are_saved_and_pruned(self):
+        """Test that sampled requests are saved and only the newest are kept."""
+        self.app.config.update(PROFILE_SAMPLE_RATE=1.0, PROFILE_KEEP=3)
+        profiler = RequestProfiler()
+        profiler.init_app(self.app)
+        client = self.app.test_client()
+        client.post('/blackjack/actions', json={"actions": []})
+        for _ in range(4):
+            client.post('/blackjack/start')
+        self.assertEqual(profiler.saved, 5)
+        profiles = self.profiles()
+        self.assertEqual(len(profiles), 3)
+        self.assertTrue(all("blackjack.start_game" in path for path in profiles))
+
+        rows = aggregate(profiles, top=5)
+        self.assertEqual(len(rows), 5)
+        cumulative = [row["cumulative_seconds"] for row in rows]
+        self.assertEqual(cumulative, sorted(cumulative, reverse=True))
+        rows = aggregate(profiles, sort="self", top=50, match="models.py")
+        self.assertTrue(any("__init__" in row["function"] for row in rows))
+        self.assertTrue(all("models.py" in row["function"] for row in rows))
+        with self.assertRaises(ValueError):
+            aggregate(profiles, sort="name")
+
+if __name__ == '__main__':
+    unittest.main()
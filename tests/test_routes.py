@@ -54,9 +54,33 @@ class TestBlackjackRoutes(unittest.TestCase):
         """Test handling an action during a game."""
         with self.client as client:
             client.post('/start')
-            response = client.post('/action/hit', follow_redirects=True)
+            client.post('/actions', json={"actions": [{"action": "bet", "amount": 10}, "deal"]})
+            response = client.post('/action/stand', follow_redirects=True)
             self.assertEqual(response.status_code, 200)
-            self.assertIn('Performed hit', response.get_data(as_text=True))
+            self.assertIn('Performed stand', response.get_data(as_text=True))
+            self.assertIsNotNone(response.get_json()["game"]["seats"]["0"]["result"])
+
+    def test_action_outside_round(self):
+        """Test that a hit is refused before a round is dealt and after it is settled."""
+        with self.client as client:
+            client.post('/start')
+            response = client.post('/action/hit')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('No round in progress', response.get_json()["error"])
+            client.post('/actions', json={"actions": [{"action": "bet", "amount": 10}, "deal"]})
+            client.post('/action/stand')
+            response = client.post('/action/hit')
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(len(client.post('/actions', json={}).get_json()
+                                 ["state"]["seats"]["0"]["hand"]), 2)
+
+    def test_split_is_not_offered(self):
+        """Test that split, which the game does not support, is an invalid action."""
+        with self.client as client:
+            client.post('/start')
+            response = client.post('/action/split')
+            self.assertEqual(response.status_code, 400)
+            self.assertIn('Invalid action', response.get_json()["error"])
 
     def test_invalid_action(self):
         """Test sending an invalid action."""
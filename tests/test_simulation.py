@@ -0,0 +1,122 @@
+"""test_simulation.py
+Tests for the headless round simulator.
+"""
+
+import unittest
+from app.blackjack.models import Card, Game
+from app.blackjack.simulation import (
+    HIT,
+    STAND,
+    DOUBLE_HIT,
+    SPLIT,
+    Rules,
+    SimulationResult,
+    Simulator,
+    chunk_seed,
+    simulate,
+)
+
+class TestSimulator(unittest.TestCase):
+    def test_compile_strategy(self):
+        """Test the strategy table compiles to the expected action codes."""
+        simulator = Simulator(seed=1)
+        self.assertEqual(simulator._hard[11][10], DOUBLE_HIT)
+        self.assertEqual(simulator._hard[12][4], STAND)
+        self.assertEqual(simulator._hard[5][6], HIT)
+        self.assertEqual(simulator._soft[20][10], STAND)
+        self.assertEqual(simulator._pairs[8][10], SPLIT)
+
+    def test_dealer_stands_on_17(self):
+        """Test the dealer draws to at least 17."""
+        for rules in (Rules(), Rules(decks=0)):
+            simulator = Simulator(rules=rules, seed=2)
+            for _ in range(200):
+                simulator.start_round()
+                self.assertGreaterEqual(simulator.dealer_total(2, 3), 17)
+
+    def test_run_tallies(self):
+        """Test every hand ends in exactly one outcome."""
+        result = simulate(20000, seed=3)
+        self.assertEqual(result.rounds, 20000)
+        self.assertEqual(
+            result.hands,
+            result.wins + result.losses + result.pushes + result.surrenders,
+        )
+        self.assertEqual(result.hands, result.rounds + result.splits)
+        self.assertLess(abs(result.house_edge), 0.05)
+
+    def test_seed_is_reproducible(self):
+        """Test the same seed plays the same rounds."""
+        self.assertEqual(simulate(5000, seed=4), simulate(5000, seed=4))
+
+    def test_worker_count_does_not_change_totals(self):
+        """Test a seeded run gives the same totals in-process and in a pool."""
+        serial = simulate(6000, seed=6, workers=1, chunk_rounds=1000)
+        parallel = simulate(6000, seed=6, workers=3, chunk_rounds=1000)
+        self.assertEqual(serial, parallel)
+        self.assertEqual(serial.actions, parallel.actions)
+
+    def test_chunk_seeds_are_independent(self):
+        """Test chunk seeds differ per chunk and repeat per run seed."""
+        self.assertNotEqual(chunk_seed(7, 0), chunk_seed(7, 1))
+        self.assertEqual(chunk_seed(7, 3), chunk_seed(7, 3))
+
+    def test_merge(self):
+        """Test merging sums tallies and decision counts."""
+        first = SimulationResult(rounds=2, wins=1, actions={"16/T": {"hit": 1}})
+        second = SimulationResult(rounds=3, wins=2, actions={"16/T": {"hit": 2, "surrender": 1}})
+        first.merge(second)
+        self.assertEqual(first.rounds, 5)
+        self.assertEqual(first.wins, 3)
+        self.assertEqual(first.actions, {"16/T": {"hit": 3, "surrender": 1}})
+
+    def test_fresh_deck_per_round(self):
+        """Test the single fresh deck mode keeps the same invariants."""
+        result = simulate(5000, seed=8, rules=Rules(decks=0))
+        self.assertEqual(result.hands, result.rounds + result.splits)
+
+    def test_blackjack_payout_rule(self):
+        """Test the blackjack payout changes the result."""
+        full = simulate(5000, seed=5, rules=Rules(naturals=True))
+        even = simulate(5000, seed=5, rules=Rules(naturals=True, blackjack_payout=1.0))
+        self.assertAlmostEqual(
+            full.net_units - even.net_units, 0.5 * full.blackjacks)
+
+    def test_default_rules_are_the_game_rules(self):
+        """Test that by default naturals are played out and pairs are not split, as in Game."""
+        game = simulate(5000, seed=5)
+        self.assertEqual((game.blackjacks, game.splits), (0, 0))
+        self.assertEqual(game.hands, game.rounds)
+        casino = simulate(5000, seed=5, rules=Rules(naturals=True, splits=True))
+        self.assertGreater(casino.blackjacks, 0)
+        self.assertGreater(casino.splits, 0)
+
+    def test_surrender_rule_is_the_game_rule(self):
+        """Test that the game surrenders exactly the hands the simulator does."""
+        game = Game(seed=1)
+        cases = [(("10", "6"), "A", True), (("10", "5"), "A", False), (("10", "5"), "K", True),
+                 (("8", "8"), "10", False), (("A", "5"), "10", False), (("9", "7"), "8", False)]
+        for ranks, up, allowed in cases:
+            cards = [Card(rank, "Spades") for rank in ranks]
+            self.assertEqual(game.surrender(cards, Card(up, "Hearts")), allowed, (ranks, up))
+
+    def test_round_sink_hears_every_seat(self):
+        """Test that play_table_round reports each seat's result, adding up to the round."""
+        for seats in (1, 3):
+            simulator = Simulator(rules=Rules(seats=seats), seed=11)
+            result = SimulationResult(seats=seats)
+            for _ in range(500):
+                heard = []
+                net = simulator.play_table_round(result, lambda *seat: heard.append(seat))
+                self.assertEqual(len(heard), seats)
+                self.assertAlmostEqual(sum(seat[4] for seat in heard), net)
+                self.assertTrue(all(seat[3] is None or seat[3] for seat in heard))
+
+    def test_result_to_dict(self):
+        """Test the report includes the derived statistics."""
+        report = SimulationResult(rounds=10, net_units=-1.0, elapsed=2.0).to_dict()
+        self.assertAlmostEqual(report["house_edge"], 0.1)
+        self.assertAlmostEqual(report["rounds_per_second"], 5.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,259 @@
+"""test_store.py
+Tests for the server-side game store and its write-behind flusher.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from flask import Flask
+from app.blackjack.models import Game
+from app.blackjack.routes import blackjack_bp, stale_game
+from app.blackjack.store import GameRecord, GameStore, StaleGameError, game_store
+from app.extensions import db
+from app.utils import load_game_state, save_game_state, update_game_state
+
+def make_app(path, flush_interval=60):
+    """Create a bare app with a SQLite database at path."""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    app.config['GAME_STORE_FLUSH_INTERVAL'] = flush_interval
+    db.init_app(app)
+    return app
+
+class TestGameStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.app = make_app(os.path.join(self.directory.name, "games.db"))
+        self.stores = []
+        self.game = Game(seed=8)
+        self.game.start_new_round()
+
+    def tearDown(self):
+        for store in self.stores:
+            store.close()
+        with self.app.app_context():
+            db.engine.dispose()
+        self.directory.cleanup()
+
+    def bound_store(self, **kwargs):
+        store = GameStore(**kwargs)
+        store.init_app(self.app)
+        self.stores.append(store)
+        return store
+
+    def rows(self):
+        with self.app.app_context():
+            return db.session.query(GameRecord).count()
+
+    def test_memory_only_lru(self):
+        """Test that an unbound store keeps the most recent games."""
+        store = GameStore(capacity=2, shards=1)
+        for game_id in ("a", "b", "c"):
+            store.put(game_id, self.game)
+        self.assertIsNone(store.get("a"))
+        self.assertEqual(store.get("c").player.hand, self.game.player.hand)
+        self.assertEqual(len(store), 2)
+
+    def test_get_returns_a_copy(self):
+        """Test that mutating a loaded game does not change the stored one."""
+        store = GameStore()
+        store.put("a", self.game)
+        loaded = store.get("a")
+        loaded.player.add_card(loaded.deck.deal())
+        self.assertEqual(len(store.get("a").player.hand), 2)
+
+    def test_flush_writes_one_batch(self):
+        """Test that dirty games reach the database only when flushed."""
+        store = self.bound_store()
+        for index in range(5):
+            store.put(f"game{index}", self.game)
+        self.assertEqual(self.rows(), 0)
+        self.assertEqual(store.flush(), 5)
+        self.assertEqual(store.flushes, 1)
+        self.assertEqual(self.rows(), 5)
+        store.put("game0", store.get("game0"))
+        self.assertEqual(store.flush(), 1)
+        with self.app.app_context():
+            self.assertEqual(db.session.get(GameRecord, "game0").version, 2)
+        self.assertEqual(store.flush(), 0)
+
+    def test_evicted_dirty_game_is_still_readable(self):
+        """Test that eviction before a flush neither loses nor hides a game."""
+        store = self.bound_store(capacity=1, shards=1)
+        store.put("a", self.game)
+        store.put("b", Game(seed=9))
+        game = store.get("a")
+        game.player.add_card(game.deck.deal())
+        store.put("a", game)
+        store.put("b", store.get("b"))  # Evicts a before it is flushed
+        self.assertEqual(store.get("a").player.hand, game.player.hand)
+        self.assertEqual(store.flush(), 2)
+
+    def test_restart_reloads_from_database(self):
+        """Test that a new store, as after a worker restart, reads flushed games."""
+        store = self.bound_store()
+        store.put("a", self.game)
+        store.close()
+        restarted = self.bound_store()
+        loaded = restarted.get("a")
+        self.assertEqual(loaded.player.hand, self.game.player.hand)
+        self.assertEqual(loaded.deck.position, self.game.deck.position)
+        self.assertIsNone(restarted.get("missing"))
+
+    def test_background_flusher(self):
+        """Test that the flusher writes dirty games on its own."""
+        self.app.config['GAME_STORE_FLUSH_INTERVAL'] = 0.02
+        store = self.bound_store()
+        store.put("a", self.game)
+        deadline = time.monotonic() + 5
+        while not store.flushes and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(self.rows(), 1)
+
+    def test_flush_never_rolls_back_another_process(self):
+        """Test that a stale copy in one process does not overwrite a newer row."""
+        first = self.bound_store()
+        first.put("a", self.game)
+        first.flush()
+        second = self.bound_store()
+        newer = second.get("a")
+        newer.player.add_card(newer.deck.deal())
+        second.put("a", newer)
+        second.flush()
+
+        stale = first.get("a")
+        stale.player.bankroll = 1
+        first.put("a", stale)  # Both processes are now at version 2
+        self.assertEqual(first.flush(), 0)
+        with self.assertRaises(StaleGameError) as context:
+            first.get("a")
+        self.assertEqual((context.exception.expected, context.exception.current), (1, 2))
+        reloaded = first.get("a")
+        self.assertEqual(reloaded.player.hand, newer.player.hand)
+        self.assertEqual(reloaded.version, 2)
+        self.assertEqual(first.put("a", reloaded), 3)
+        self.assertEqual(first.flush(), 1)
+
+    def test_saves_during_a_stale_flush_are_dropped(self):
+        """Test that saves building on a stale copy are dropped with it."""
+        first = self.bound_store()
+        second = self.bound_store()
+        first.put("a", self.game)
+        first.flush()
+        copy = second.get("a")
+        game = first.get("a")
+        game.player.add_card(game.deck.deal())
+        first.put("a", game)
+        copy.player.bankroll = 1
+        second.put("a", copy)
+        first.flush()
+        second.put("a", copy)  # Still only in the memory of the second process
+        self.assertEqual(second.flush(), 0)
+        with self.assertRaises(StaleGameError):
+            second.put("a", copy)
+        reloaded = second.get("a")
+        self.assertEqual((reloaded.version, reloaded.player.hand), (2, game.player.hand))
+
+    def test_concurrent_first_insert_is_stale(self):
+        """Test that a new game another process inserted first is dropped, not an error."""
+        first = self.bound_store()
+        second = self.bound_store()
+        first.put("a", self.game)
+        second.put("a", Game(seed=9))
+        second.put("b", Game(seed=9))
+        self.assertEqual(first.flush(), 1)
+        self.assertEqual(second.flush(), 1)  # Only the conflicting insert fails
+        with self.assertRaises(StaleGameError) as context:
+            second.get("a")
+        self.assertEqual((context.exception.expected, context.exception.current), (0, 1))
+        self.assertEqual(second.get("a").player.hand, self.game.player.hand)
+        self.assertEqual(self.rows(), 2)
+
+class TestOptimisticConcurrency(unittest.TestCase):
+    def setUp(self):
+        self.store = GameStore()
+        self.game = Game(seed=4)
+        self.game.start_new_round()
+        self.store.put("a", self.game)
+
+    def test_versions_advance(self):
+        """Test that each save bumps the version the game is loaded at."""
+        game = self.store.get("a")
+        self.assertEqual(game.version, 1)
+        self.assertEqual(self.store.put("a", game), 2)
+        self.assertEqual(game.version, 2)
+        self.assertEqual(self.store.get("a").version, 2)
+
+    def test_stale_save_is_rejected(self):
+        """Test that the second of two saves from the same version conflicts."""
+        first, second = self.store.get("a"), self.store.get("a")
+        first.player.add_card(first.deck.deal())
+        self.store.put("a", first)
+        second.player.add_card(second.deck.deal())
+        with self.assertRaises(StaleGameError) as context:
+            self.store.put("a", second)
+        self.assertEqual((context.exception.expected, context.exception.current), (1, 2))
+        self.assertEqual(self.store.get("a").player.hand, first.player.hand)
+
+    def test_new_game_replaces(self):
+        """Test that a game that was never loaded overwrites the stored one."""
+        self.store.put("a", self.store.get("a"))
+        self.assertEqual(self.store.put("a", Game(seed=5)), 3)
+
+    def test_concurrent_hits_are_never_lost(self):
+        """Test that racing saves either land or conflict, never overwrite."""
+        saved, conflicts = [], []
+        barrier = threading.Barrier(8)
+
+        def hit():
+            game = self.store.get("a")
+            game.player.add_card(game.deck.deal())
+            barrier.wait()
+            try:
+                self.store.put("a", game)
+                saved.append(game)
+            except StaleGameError:
+                conflicts.append(game)
+
+        threads = [threading.Thread(target=hit) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(saved), 1)
+        self.assertEqual(len(conflicts), 7)
+        self.assertEqual(len(self.store.get("a").player.hand), 3)
+
+    def test_update_game_state_retries(self):
+        """Test that the session helper retries an update after a conflict."""
+        app = Flask(__name__)
+        app.config['SECRET_KEY'] = 'test_key'
+        calls = []
+
+        def update(game):
+            calls.append(game.version)
+            if len(calls) == 1:
+                # Another request saves the game in the meantime
+                save_game_state(load_game_state())
+            game.player.place_bet(10)
+
+        with app.test_request_context():
+            save_game_state(self.game)
+            update_game_state(update)
+            self.assertEqual(load_game_state().player.current_bet, 10)
+        self.assertEqual(calls[1], calls[0] + 1)
+        game_store.clear()
+
+    def test_conflict_response(self):
+        """Test that the blueprint answers a conflict with 409."""
+        app = Flask(__name__)
+        app.register_blueprint(blackjack_bp)
+        with app.app_context():
+            response, status = stale_game(StaleGameError("a", 1, 2))
+        self.assertEqual(status, 409)
+        self.assertIn("error", response.get_json())
+
+if __name__ == '__main__':
+    unittest.main()
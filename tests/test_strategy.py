@@ -0,0 +1,83 @@
+"""test_strategy.py
+Tests for the compiled, process-wide strategy table.
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from app.blackjack.models import Card, Game
+from app.blackjack.strategy import (
+    NO_ACTION,
+    STRATEGY_FILE,
+    Action,
+    StrategyTable,
+    dealer_index,
+    get_strategy,
+    hand_class,
+)
+
+class TestStrategyTable(unittest.TestCase):
+    def test_lookup(self):
+        """Test chart cells are decoded to action codes."""
+        table = get_strategy()
+        self.assertEqual(table.lookup(hand_class(11), dealer_index(10)), Action.DOUBLE_HIT)
+        self.assertEqual(table.lookup(hand_class(16), dealer_index(10)), Action.SURRENDER_HIT)
+        self.assertEqual(table.lookup(hand_class(18, soft=True), dealer_index(3)), Action.DOUBLE_STAND)
+        self.assertEqual(table.lookup(hand_class(16, pair_value=8), dealer_index(11)), Action.SPLIT)
+        self.assertEqual(table.lookup(hand_class(20), dealer_index(6)), Action.STAND)
+
+    def test_pair_without_row(self):
+        """Test pairs missing from the chart have no action."""
+        table = StrategyTable({"8": {"T": "H"}})
+        self.assertEqual(table.lookup(hand_class(16, pair_value=8), 0), NO_ACTION)
+        self.assertEqual(table.lookup(hand_class(8), dealer_index(10)), Action.HIT)
+        self.assertEqual(table.lookup(hand_class(19), 0), Action.STAND)
+
+    def test_cached_per_process(self):
+        """Test the table is compiled once and shared."""
+        self.assertIs(get_strategy(), get_strategy())
+        self.assertIs(Game().strategy, Game().strategy)
+
+    def test_reload_on_mtime_change(self):
+        """Test the table is recompiled when the file changes."""
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, "strategy.csv")
+            shutil.copy(STRATEGY_FILE, path)
+            first = get_strategy(path)
+            with open(path, "a", encoding="utf-8") as file:
+                file.write("18,S,S,S,S,S,S,S,S,S,S\n")
+            stat = os.stat(path)
+            os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+            second = get_strategy(path)
+            self.assertIsNot(first, second)
+            self.assertIn("18", second.rows)
+        finally:
+            shutil.rmtree(directory)
+
+class TestDetermineBestMove(unittest.TestCase):
+    def setUp(self):
+        self.game = Game(seed=1)
+
+    def test_pair_split(self):
+        """Test pairs are split when the chart says so."""
+        hand = [Card('8', 'Clubs'), Card('8', 'Hearts')]
+        self.assertEqual(self.game.determine_best_move(hand, Card('A', 'Spades')), 'Split')
+        self.assertEqual(
+            self.game.determine_best_move(hand, Card('A', 'Spades'), allow_split=False), 'Hit')
+
+    def test_soft_hand(self):
+        """Test soft hands use the soft rows."""
+        hand = [Card('A', 'Clubs'), Card('7', 'Hearts')]
+        self.assertEqual(self.game.determine_best_move(hand, Card('2', 'Spades')), 'Stand')
+        self.assertEqual(self.game.determine_best_move(hand, Card('9', 'Spades')), 'Hit')
+
+    def test_face_cards_use_ten_column(self):
+        """Test tens and face cards share the 'T' column."""
+        hand = [Card('10', 'Clubs'), Card('5', 'Hearts')]
+        self.assertEqual(self.game.determine_best_move(hand, Card('K', 'Spades')), 'Surrender')
+        self.assertEqual(self.game.determine_best_move(hand, Card('10', 'Spades')), 'Surrender')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+"""test_suite.py
+Tests for the micro-benchmark suite and its regression check.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from benchmarks.suite import BASELINE_FILE, compare, main, make_cases
+
+def timings(**relative):
+    return {"cases": {name: {"us": 1.0, "relative": value} for name, value in relative.items()}}
+
+class TestSuite(unittest.TestCase):
+    def test_cases_run(self):
+        """Test that every case runs and the stored baseline covers them all."""
+        cases = make_cases()
+        for case in cases.values():
+            case()
+        with open(BASELINE_FILE, encoding="utf-8") as file:
+            self.assertEqual(set(json.load(file)["cases"]), set(cases))
+
+    def test_compare(self):
+        """Test that only cases slower than the threshold regress."""
+        rows = compare(timings(fast=1.0, slow=1.5, new=1.0), timings(fast=1.2, slow=1.0), 25)
+        self.assertEqual([row[0] for row in rows], ["fast", "slow"])
+        self.assertFalse(rows[0][2])
+        self.assertAlmostEqual(rows[1][1], 50)
+        self.assertTrue(rows[1][2])
+
+    def test_update_and_check(self):
+        """Test that a fresh baseline passes and a much faster one fails the run."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "baseline.json")
+            arguments = ["--baseline", path, "--only", "assign_value", "--repeat", "1"]
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump({"cases": {}}, file)
+            self.assertEqual(main(arguments + ["--update"]), 0)
+            with open(path, encoding="utf-8") as file:
+                baseline = json.load(file)
+            self.assertEqual(list(baseline["cases"]), ["assign_value_x13"])
+            baseline["cases"]["assign_value_x13"]["relative"] /= 10
+            with open(path, "w", encoding="utf-8") as file:
+                json.dump(baseline, file)
+            self.assertEqual(main(arguments), 1)
+
+if __name__ == '__main__':
+    unittest.main()
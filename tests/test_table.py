@@ -0,0 +1,184 @@
+"""test_table.py
+Tests for multi-seat tables in the game, codec, routes and simulator.
+"""
+
+import struct
+import unittest
+from flask import Flask
+from app.blackjack.codec import decode_game, encode_game
+from app.blackjack.models import Card, Game
+from app.blackjack.routes import blackjack_bp
+from app.blackjack.simulation import Rules, simulate
+from app.blackjack.store import game_store
+from app.utils import save_game_state
+
+def hand(*ranks):
+    return [Card(rank, "Spades") for rank in ranks]
+
+class TestTable(unittest.TestCase):
+    def setUp(self):
+        self.game = Game(seed=3, seats=3)
+        self.game.start_new_round()
+
+    def test_seat_count_is_bounded(self):
+        """Test that a table has one to seven seats."""
+        with self.assertRaises(ValueError):
+            Game(seats=0)
+        with self.assertRaises(ValueError):
+            Game(seats=Game.MAX_SEATS + 1)
+        with self.assertRaises(ValueError):
+            self.game.get_seat(3)
+
+    def test_casino_order(self):
+        """Test that each seat gets a card, then the dealer, twice around."""
+        dealt = self.game.deck.codes[:8]
+        seats = self.game.seats
+        self.assertEqual([card.code for card in seats[0].hand], [dealt[0], dealt[4]])
+        self.assertEqual([card.code for card in seats[2].hand], [dealt[2], dealt[6]])
+        self.assertEqual([card.code for card in self.game.dealer.hand], [dealt[3], dealt[7]])
+
+    def test_seats_act_in_turn(self):
+        """Test that only the seat whose turn it is may play."""
+        with self.assertRaises(ValueError):
+            self.game.apply_action("stand", seat=1)
+        self.game.apply_action("stand", seat=0)
+        self.assertEqual(self.game.turn, 1)
+        with self.assertRaises(ValueError):
+            self.game.apply_action("bet", 10, seat=2)  # Betting closes with the deal
+        with self.assertRaises(ValueError):
+            self.game.apply_action("deal", seat=2)  # Seats 1 and 2 are still to play
+
+    def test_one_dealer_turn_settles_every_seat(self):
+        """Test that the dealer plays once after the last seat and every seat is settled."""
+        self.game = Game(seed=3, seats=3)
+        for seat in range(3):
+            self.game.apply_action("bet", 10, seat)
+        self.game.apply_action("deal")
+        self.game.dealer.hand = hand("10", "6")
+        self.game.seats[0].hand = hand("10", "9")
+        self.game.seats[1].hand = hand("10", "6")
+        self.game.seats[2].hand = hand("10", "6")
+        self.game.apply_action("stand", seat=0)
+        self.game.apply_action("surrender", seat=1)
+        self.assertEqual(self.game.dealer.card_count, 2)
+        self.game.apply_action("stand", seat=2)
+        self.assertEqual(self.game.turn, 3)
+        self.assertGreaterEqual(self.game.dealer.total, 17)
+        self.assertEqual(self.game.results[1], "surrender")
+        self.assertEqual(self.game.seats[1].bankroll, 995)
+        self.assertIn(self.game.results[0], ("win", "draw"))
+        with self.assertRaises(ValueError):
+            self.game.apply_action("hit", seat=0)
+
+    def test_dealer_skips_when_every_seat_is_out(self):
+        """Test that the dealer does not draw when no seat has a live hand."""
+        game = Game(seed=3, seats=2)
+        game.start_new_round()
+        game.dealer.hand = hand("10", "2")
+        game.seats[0].hand = hand("10", "6")
+        game.seats[1].hand = hand("10", "5")
+        game.apply_action("surrender", seat=0)
+        game.apply_action("hit", seat=1)
+        while game.turn == 1:
+            game.apply_action("hit", seat=1)
+        self.assertEqual(game.results[1], "lose")
+        self.assertEqual(game.dealer.card_count, 2)
+
+    def test_deal_keeps_each_seat_bet(self):
+        """Test that deal starts a round for the table with the bets placed."""
+        self.game = Game(seed=3, seats=3)
+        self.game.apply_action("bet", 5, 0)
+        self.game.apply_action("bet", 20, 2)
+        self.game.apply_action("deal")
+        self.assertEqual([player.current_bet for player in self.game.seats], [5, 0, 20])
+        self.assertEqual(self.game.results, [None] * 3)
+        self.assertTrue(all(player.card_count == 2 for player in self.game.seats))
+
+    def test_codec_round_trip(self):
+        """Test that every seat, the turn and the results survive the codec."""
+        self.game.seats[1].bankroll = 950.5
+        self.game.apply_action("stand", seat=0)
+        self.game.resolve_bets("surrender", 2)
+        decoded = decode_game(encode_game(self.game))
+        self.assertEqual(decoded.turn, 1)
+        self.assertEqual(decoded.results, self.game.results)
+        for first, second in zip(self.game.seats, decoded.seats):
+            self.assertEqual(first.hand, second.hand)
+            self.assertEqual(first.bankroll, second.bankroll)
+            self.assertEqual(first.name, second.name)
+        self.assertEqual(decoded.serialize(), self.game.serialize())
+
+    def test_decodes_single_seat_format(self):
+        """Test that games stored before tables had seats still load."""
+        game = Game(seed=5)
+        game.start_new_round()
+        shoe = game.deck
+        name = game.player.name.encode()
+        data = struct.pack(
+            "<BBBdqIHHHdd", 1, 0, shoe.num_decks, shoe.penetration, shoe.seed,
+            shoe.shuffles, shoe.position, shoe.cut, shoe.discarded, 990, 10,
+        ) + bytes([len(name)]) + name
+        for cards in (game.player.hand, game.dealer.hand):
+            data += bytes([len(cards)]) + bytes(card.code for card in cards)
+        decoded = decode_game(data)
+        self.assertEqual(len(decoded.seats), 1)
+        self.assertEqual(decoded.player.hand, game.player.hand)
+        self.assertEqual((decoded.player.bankroll, decoded.player.current_bet), (990, 10))
+        self.assertEqual(decoded.deck.discarded, shoe.discarded)
+
+class TestTableRoutes(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.config['SECRET_KEY'] = 'test_key'
+        self.app.register_blueprint(blackjack_bp)
+        self.client = self.app.test_client()
+        with self.client.session_transaction() as session:
+            session['game_id'] = 'table-test'
+        with self.app.test_request_context():
+            from flask import session
+            session['game_id'] = 'table-test'
+            save_game_state(Game(seed=6, seats=2))
+
+    def tearDown(self):
+        game_store.clear()
+
+    def test_actions_address_seats(self):
+        """Test that the seat in the URL, or in an action, is the one that acts."""
+        response = self.client.post('/seats/1/actions', json={"actions": [
+            {"action": "bet", "amount": 25}, {"action": "bet", "amount": 5, "seat": 0}, "deal",
+        ]})
+        state = response.get_json()["state"]
+        self.assertEqual(state["seats"]["1"]["bet"], 25)
+        self.assertEqual(state["seats"]["0"]["bet"], 5)
+        response = self.client.post('/seats/1/actions', json={"actions": ["stand"]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.post('/seats/7/actions', json={"actions": ["bet"]}).status_code, 400)
+
+    def test_advice_for_a_seat(self):
+        """Test that advice is given for the seat in the URL."""
+        self.client.post('/actions', json={"actions": ["deal"]})
+        state = self.client.post('/actions', json={"actions": []}).get_json()["state"]
+        data = self.client.get('/seats/1/advice').get_json()
+        self.assertEqual(data["hand"], state["seats"]["1"]["hand"])
+        self.assertEqual(self.client.get('/seats/5/advice').status_code, 400)
+
+class TestTableSimulation(unittest.TestCase):
+    def test_rules_validate_seats(self):
+        """Test that seat counts out of range or without a shoe are rejected."""
+        with self.assertRaises(ValueError):
+            Rules(seats=8)
+        with self.assertRaises(ValueError):
+            Rules(seats=2, decks=0)
+
+    def test_table_run(self):
+        """Test that a table run counts seat rounds and is reproducible."""
+        rules = Rules(seats=4)
+        result = simulate(3000, seed=2, rules=rules, chunk_rounds=1000)
+        self.assertEqual(result.seats, 4)
+        self.assertEqual(result.seat_rounds, 12000)
+        self.assertGreaterEqual(result.hands, 12000)
+        self.assertEqual(result, simulate(3000, seed=2, rules=rules, chunk_rounds=1000, workers=2))
+        self.assertAlmostEqual(result.house_edge, -result.net_units / 12000)
+
+if __name__ == '__main__':
+    unittest.main()